@@ -0,0 +1,114 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Time building penalty models from a specification, and reading them from the cache.
+
+For complete graphs with 8 to 64 nodes, four of them decision variables, a
+penalty model is built with PenaltyModel.from_specification and with the full
+constructor, which checks the specification again. A cache hit, with the
+database already open, is then timed with each of the two. Times are the mean
+over REPEATS calls, in milliseconds.
+
+Run with::
+
+    python benchmarks/cache_hit.py
+
+"""
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import time
+
+import dimod
+import networkx as nx
+
+import penaltymodel.core as pm
+
+from penaltymodel.cache.database_manager import (cache_connect, insert_penalty_model,
+                                                 iter_penalty_model_from_specification)
+
+REPEATS = 200
+
+
+def full_construction(cls, specification, model, classical_gap, ground_energy, optimal=True):
+    """PenaltyModel.from_specification as it was, through the full constructor."""
+    return cls(specification.graph,
+               specification.decision_variables,
+               specification.feasible_configurations,
+               specification.vartype,
+               model,
+               classical_gap,
+               ground_energy,
+               ising_linear_ranges=specification.ising_linear_ranges,
+               ising_quadratic_ranges=specification.ising_quadratic_ranges,
+               optimal=optimal)
+
+
+def problem(num_nodes):
+    graph = nx.complete_graph(num_nodes)
+    spec = pm.Specification(graph, [0, 1, 2, 3], {(-1, -1, -1, -1): 0., (1, 1, 1, 1): 0.},
+                            dimod.SPIN)
+    model = dimod.BinaryQuadraticModel({v: 0. for v in graph},
+                                       {edge: -1. / num_nodes for edge in graph.edges},
+                                       0.0, dimod.SPIN)
+    return spec, model
+
+
+def time_construction(construct, spec, model):
+    t = time.time()
+    for _ in range(REPEATS):
+        construct(pm.PenaltyModel, spec, model, 2., -1.)
+    return 1000 * (time.time() - t) / REPEATS
+
+
+def time_cache_hit(cur, spec, construct):
+    from_specification = pm.PenaltyModel.from_specification
+    pm.PenaltyModel.from_specification = classmethod(construct)
+    try:
+        t = time.time()
+        for _ in range(REPEATS):
+            next(iter_penalty_model_from_specification(cur, spec))
+        return 1000 * (time.time() - t) / REPEATS
+    finally:
+        pm.PenaltyModel.from_specification = from_specification
+
+
+def main():
+    directory = tempfile.mkdtemp()
+    conn = cache_connect(os.path.join(directory, 'cache.db'))
+
+    trusted = pm.PenaltyModel.from_specification.__func__
+
+    print('{:<6}{:>12}{:>12}{:>12}{:>12}'.format(
+        'nodes', 'full', 'trusted', 'hit full', 'hit trusted'))
+    try:
+        for num_nodes in (8, 16, 32, 64):
+            spec, model = problem(num_nodes)
+            with conn as cur:
+                insert_penalty_model(cur, pm.PenaltyModel.from_specification(spec, model, 2., -1.))
+
+                print('{:<6}{:>12.3f}{:>12.3f}{:>12.3f}{:>12.3f}'.format(
+                    num_nodes,
+                    time_construction(full_construction, spec, model),
+                    time_construction(trusted, spec, model),
+                    time_cache_hit(cur, spec, full_construction),
+                    time_cache_hit(cur, spec, trusted)))
+    finally:
+        conn.close()
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    main()
@@ -164,9 +164,9 @@ def insert_feasible_configurations(cur, feasible_configurations, encoded_data=No
     Args:
         cur (:class:`sqlite3.Cursor`): An sqlite3 cursor. This function
             is meant to be run within a :obj:`with` statement.
-        feasible_configurations (dict[tuple[int]): The set of feasible
-            configurations. Each key should be a tuple of variable assignments.
-            The values are the relative energies.
+        feasible_configurations (dict[tuple[int]]/:class:`penaltymodel.FeasibleConfigurations`):
+            The set of feasible configurations. Each key should be a tuple of
+            variable assignments. The values are the relative energies.
         encoded_data (dict, optional): If a dictionary is provided, it
             will be populated with the serialized data. This is useful for
             preventing encoding the same information many times.
@@ -181,15 +181,14 @@ def insert_feasible_configurations(cur, feasible_configurations, encoded_data=No
         encoded_data = {}
 
     if 'num_variables' not in encoded_data:
-        encoded_data['num_variables'] = len(next(iter(feasible_configurations)))
+        if isinstance(feasible_configurations, pm.FeasibleConfigurations):
+            encoded_data['num_variables'] = feasible_configurations.num_variables
+        else:
+            encoded_data['num_variables'] = len(next(iter(feasible_configurations)))
     if 'num_feasible_configurations' not in encoded_data:
         encoded_data['num_feasible_configurations'] = len(feasible_configurations)
     if 'feasible_configurations' not in encoded_data or 'energies' not in encoded_data:
-        encoded = {_serialize_config(config): en for config, en in feasible_configurations.items()}
-
-        configs, energies = zip(*sorted(encoded.items()))
-        encoded_data['feasible_configurations'] = json.dumps(configs, separators=(',', ':'))
-        encoded_data['energies'] = json.dumps(energies, separators=(',', ':'))
+        _encode_feasible_configurations(feasible_configurations, encoded_data)
 
     insert = """
             INSERT OR IGNORE INTO feasible_configurations(
@@ -207,6 +206,24 @@ def insert_feasible_configurations(cur, feasible_configurations, encoded_data=No
     cur.execute(insert, encoded_data)
 
 
+def _encode_feasible_configurations(feasible_configurations, encoded_data):
+    """Serialize the feasible configurations, sorted, into encoded_data.
+
+    A :class:`penaltymodel.FeasibleConfigurations` is already sorted by its
+    bitmasks, which are the serialized configurations. The energies are
+    always written as floats so that both forms encode the same way.
+    """
+    if isinstance(feasible_configurations, pm.FeasibleConfigurations):
+        configs = feasible_configurations.masks.tolist()
+        energies = feasible_configurations.energies.tolist()
+    else:
+        encoded = {_serialize_config(config): float(en) for config, en in feasible_configurations.items()}
+        configs, energies = zip(*sorted(encoded.items()))
+
+    encoded_data['feasible_configurations'] = json.dumps(configs, separators=(',', ':'))
+    encoded_data['energies'] = json.dumps(energies, separators=(',', ':'))
+
+
 def _serialize_config(config):
     """Turns a config into an integer treating each of the variables as spins.
 
@@ -234,7 +251,8 @@ def iter_feasible_configurations(cur):
             is meant to be run within a :obj:`with` statement.
 
     Yields:
-        dict[tuple(int): number]: The feasible_configurations.
+        :class:`penaltymodel.FeasibleConfigurations`: The feasible_configurations,
+        spin-valued.
 
     """
     select = \
@@ -243,21 +261,8 @@ def iter_feasible_configurations(cur):
         FROM feasible_configurations
         """
     for num_variables, feasible_configurations, energies in cur.execute(select):
-        configs = json.loads(feasible_configurations)
-        energies = json.loads(energies)
-
-        yield {_decode_config(config, num_variables): energy
-               for config, energy in zip(configs, energies)}
-
-
-def _decode_config(c, num_variables):
-    """inverse of _serialize_config, always converts to spin."""
-    def bits(c):
-        n = 1 << (num_variables - 1)
-        for __ in range(num_variables):
-            yield 1 if c & n else -1
-            n >>= 1
-    return tuple(bits(c))
+        yield pm.FeasibleConfigurations(json.loads(feasible_configurations), json.loads(energies),
+                                        num_variables, dimod.SPIN)
 
 
 def insert_ising_model(cur, nodelist, edgelist, linear, quadratic, offset, encoded_data=None):
@@ -461,6 +466,11 @@ def _decode_quadratic_biases(quadratic_string, edgelist):
 def insert_penalty_model(cur, penalty_model):
     """Insert a penalty model into the database.
 
+    Penalty models for the same graph, decision variables and feasible
+    configurations that are not optimal and have a classical gap no larger
+    than `penalty_model`'s are removed. This lets a better model replace one
+    that was found by a factory that ran out of time.
+
     Args:
         cur (:class:`sqlite3.Cursor`): An sqlite3 cursor. This function
             is meant to be run within a :obj:`with` statement.
@@ -490,12 +500,37 @@ def insert_penalty_model(cur, penalty_model):
     edgelist = sorted(sorted(edge) for edge in penalty_model.graph.edges)
 
     insert_graph(cur, nodelist, edgelist, encoded_data)
-    insert_feasible_configurations(cur, penalty_model.feasible_configurations, encoded_data)
+    feasible_configurations = pm.as_feasible_configurations(penalty_model.feasible_configurations,
+                                                            len(penalty_model.decision_variables),
+                                                            penalty_model.vartype)
+    insert_feasible_configurations(cur, feasible_configurations, encoded_data)
     insert_ising_model(cur, nodelist, edgelist, linear, quadratic, offset, encoded_data)
 
     encoded_data['decision_variables'] = json.dumps(penalty_model.decision_variables, separators=(',', ':'))
     encoded_data['classical_gap'] = penalty_model.classical_gap
     encoded_data['ground_energy'] = penalty_model.ground_energy
+    encoded_data['optimal'] = int(penalty_model.optimal)
+
+    delete = \
+        """
+        DELETE FROM penalty_model
+        WHERE id IN (
+            SELECT id FROM penalty_model_view
+            WHERE
+                num_nodes = :num_nodes AND
+                num_edges = :num_edges AND
+                edges = :edges AND
+                num_variables = :num_variables AND
+                num_feasible_configurations = :num_feasible_configurations AND
+                feasible_configurations = :feasible_configurations AND
+                energies = :energies AND
+                decision_variables = :decision_variables AND
+                NOT optimal AND
+                (classical_gap < :classical_gap OR
+                 (classical_gap = :classical_gap AND :optimal)));
+        """
+
+    cur.execute(delete, encoded_data)
 
     insert = \
         """
@@ -503,12 +538,14 @@ def insert_penalty_model(cur, penalty_model):
             decision_variables,
             classical_gap,
             ground_energy,
+            optimal,
             feasible_configurations_id,
             ising_model_id)
         SELECT
             :decision_variables,
             :classical_gap,
             :ground_energy,
+            :optimal,
             feasible_configurations.id,
             ising_model.id
         FROM feasible_configurations, ising_model, graph
@@ -528,7 +565,7 @@ def insert_penalty_model(cur, penalty_model):
     cur.execute(insert, encoded_data)
 
 
-def iter_penalty_model_from_specification(cur, specification):
+def iter_penalty_model_from_specification(cur, specification, allow_suboptimal=True, verify=False):
     """Iterate through all penalty models in the cache matching the
     given specification.
 
@@ -537,6 +574,11 @@ def iter_penalty_model_from_specification(cur, specification):
             is meant to be run within a :obj:`with` statement.
         specification (:class:`penaltymodel.Specification`): A specification
             for a penalty model.
+        allow_suboptimal (bool, optional, default=True): If False, penalty
+            models that are not known to be optimal are skipped.
+        verify (bool, optional, default=False): If True, penalty models that
+            fail :meth:`penaltymodel.PenaltyModel.verify` are skipped. This
+            enumerates every configuration of the graph's variables.
 
     Yields:
         :class:`penaltymodel.PenaltyModel`
@@ -549,16 +591,16 @@ def iter_penalty_model_from_specification(cur, specification):
     encoded_data['num_nodes'] = len(nodelist)
     encoded_data['num_edges'] = len(edgelist)
     encoded_data['edges'] = json.dumps(edgelist, separators=(',', ':'))
-    encoded_data['num_variables'] = len(next(iter(specification.feasible_configurations)))
-    encoded_data['num_feasible_configurations'] = len(specification.feasible_configurations)
-
-    encoded = {_serialize_config(config): en for config, en in specification.feasible_configurations.items()}
-    configs, energies = zip(*sorted(encoded.items()))
-    encoded_data['feasible_configurations'] = json.dumps(configs, separators=(',', ':'))
-    encoded_data['energies'] = json.dumps(energies, separators=(',', ':'))
+    feasible_configurations = pm.as_feasible_configurations(specification.feasible_configurations,
+                                                            len(specification.decision_variables),
+                                                            specification.vartype)
+    encoded_data['num_variables'] = feasible_configurations.num_variables
+    encoded_data['num_feasible_configurations'] = len(feasible_configurations)
+    _encode_feasible_configurations(feasible_configurations, encoded_data)
 
     encoded_data['decision_variables'] = json.dumps(specification.decision_variables, separators=(',', ':'))
     encoded_data['classical_gap'] = json.dumps(specification.min_classical_gap, separators=(',', ':'))
+    encoded_data['allow_suboptimal'] = int(allow_suboptimal)
 
     select = \
         """
@@ -568,7 +610,8 @@ def iter_penalty_model_from_specification(cur, specification):
             offset,
             decision_variables,
             classical_gap,
-            ground_energy
+            ground_energy,
+            optimal
         FROM penalty_model_view
         WHERE
             -- graph:
@@ -583,7 +626,8 @@ def iter_penalty_model_from_specification(cur, specification):
             -- decision variables:
             decision_variables = :decision_variables AND
             -- we could apply filters based on the energy ranges but in practice this seems slower
-            classical_gap >= :classical_gap
+            classical_gap >= :classical_gap AND
+            (optimal OR :allow_suboptimal)
         ORDER BY classical_gap DESC;
         """
 
@@ -594,4 +638,10 @@ def iter_penalty_model_from_specification(cur, specification):
 
         model = dimod.BinaryQuadraticModel(linear, quadratic, row['offset'], dimod.SPIN)  # always spin
 
-        yield pm.PenaltyModel.from_specification(specification, model, row['classical_gap'], row['ground_energy'])
+        widget = pm.PenaltyModel.from_specification(specification, model, row['classical_gap'], row['ground_energy'],
+                                                    optimal=bool(row['optimal']))
+
+        if verify and not widget.verify().valid:
+            continue
+
+        yield widget
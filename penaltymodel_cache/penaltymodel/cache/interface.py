@@ -27,7 +27,7 @@ __all__ = ['get_penalty_model',
 
 
 @pm.interface.penaltymodel_factory(100)
-def get_penalty_model(specification, database=None):
+def get_penalty_model(specification, database=None, allow_suboptimal=True, verify=False):
     """Factory function for penaltymodel_cache.
 
     Args:
@@ -35,6 +35,15 @@ def get_penalty_model(specification, database=None):
             for the desired penalty model.
         database (str, optional): The path to the desired sqlite database
             file. If None, will use the default.
+        allow_suboptimal (bool, optional, default=True): If False, penalty
+            models that are not known to be optimal (see
+            :attr:`penaltymodel.PenaltyModel.optimal`) are treated as missing,
+            so that the next factory can try to find a better one.
+        verify (bool, optional, default=False): If True, penalty models are
+            checked with :meth:`penaltymodel.PenaltyModel.verify` as they are
+            read, and those without the claimed ground states and classical
+            gap are treated as missing. Useful for caches from untrusted
+            sources.
 
     Returns:
         :class:`penaltymodel.PenaltyModel`: Penalty model with the given specification.
@@ -65,7 +74,9 @@ def get_penalty_model(specification, database=None):
     # get the penalty_model
     with conn as cur:
         try:
-            widget = next(iter_penalty_model_from_specification(cur, specification))
+            widget = next(iter_penalty_model_from_specification(cur, specification,
+                                                                allow_suboptimal=allow_suboptimal,
+                                                                verify=verify))
         except StopIteration:
             widget = None
 
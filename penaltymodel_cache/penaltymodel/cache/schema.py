@@ -58,6 +58,7 @@ schema = \
         decision_variables TEXT NOT NULL,
         classical_gap REAL NOT NULL,
         ground_energy REAL NOT NULL,
+        optimal INTEGER NOT NULL DEFAULT 1,  -- 0 if the factory did not prove the gap is maximal
         feasible_configurations_id INT,
         ising_model_id INT,
         id INTEGER PRIMARY KEY,
@@ -90,6 +91,7 @@ schema = \
         decision_variables,
         classical_gap,
         ground_energy,
+        optimal,
         penalty_model.id
     FROM
         ising_model,
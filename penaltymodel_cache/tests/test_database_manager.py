@@ -172,6 +172,86 @@ class TestDatabaseManager(unittest.TestCase):
             widget_, = pms
             self.assertEqual(widget_, widget)
 
+    def test_penalty_model_suboptimal_upgrade(self):
+        conn = self.clean_connection
+
+        graph = nx.path_graph(3)
+        decision_variables = (0, 2)
+        feasible_configurations = {(-1, -1): 0., (+1, +1): 0.}
+        spec = pm.Specification(graph, decision_variables, feasible_configurations, dimod.SPIN,
+                                min_classical_gap=1)
+
+        linear = {v: 0 for v in graph}
+        weak = dimod.BinaryQuadraticModel(linear, {edge: -.5 for edge in graph.edges}, 0.0, dimod.SPIN)
+        strong = dimod.BinaryQuadraticModel(linear, {edge: -1 for edge in graph.edges}, 0.0, dimod.SPIN)
+
+        suboptimal = pm.PenaltyModel.from_specification(spec, weak, 1., -1, optimal=False)
+        optimal = pm.PenaltyModel.from_specification(spec, strong, 2., -2)
+
+        with conn as cur:
+            pmc.insert_penalty_model(cur, suboptimal)
+
+        with conn as cur:
+            widget, = pmc.iter_penalty_model_from_specification(cur, spec)
+            self.assertFalse(widget.optimal)
+            self.assertEqual(widget, suboptimal)
+
+            self.assertEqual(list(pmc.iter_penalty_model_from_specification(
+                cur, spec, allow_suboptimal=False)), [])
+
+        # the better model replaces the suboptimal one
+        with conn as cur:
+            pmc.insert_penalty_model(cur, optimal)
+
+        with conn as cur:
+            widget, = pmc.iter_penalty_model_from_specification(cur, spec)
+            self.assertTrue(widget.optimal)
+            self.assertEqual(widget, optimal)
+
+        # but a suboptimal one never replaces an optimal one
+        with conn as cur:
+            pmc.insert_penalty_model(cur, suboptimal)
+
+        with conn as cur:
+            pms = list(pmc.iter_penalty_model_from_specification(cur, spec))
+            self.assertEqual(len(pms), 2)
+            self.assertTrue(pms[0].optimal)
+
+    def test_penalty_model_verify(self):
+        conn = self.clean_connection
+
+        graph = nx.path_graph(3)
+        decision_variables = (0, 2)
+        feasible_configurations = {(-1, -1): 0., (+1, +1): 0.}
+        spec = pm.Specification(graph, decision_variables, feasible_configurations, dimod.SPIN,
+                                min_classical_gap=1)
+
+        # the path has a classical gap of 2, not 3
+        model = dimod.BinaryQuadraticModel({v: 0 for v in graph}, {edge: -1 for edge in graph.edges},
+                                           0.0, dimod.SPIN)
+        overstated = pm.PenaltyModel.from_specification(spec, model, 3., -2)
+
+        with conn as cur:
+            pmc.insert_penalty_model(cur, overstated)
+
+        with conn as cur:
+            widget, = pmc.iter_penalty_model_from_specification(cur, spec)
+            self.assertEqual(widget, overstated)
+
+            self.assertEqual(list(pmc.iter_penalty_model_from_specification(cur, spec, verify=True)), [])
+
+        # a correct model with a smaller gap is kept
+        weak = dimod.BinaryQuadraticModel({v: 0 for v in graph}, {edge: -.5 for edge in graph.edges},
+                                          0.0, dimod.SPIN)
+        widget = pm.PenaltyModel.from_specification(spec, weak, 1., -1)
+        with conn as cur:
+            pmc.insert_penalty_model(cur, widget)
+
+        with conn as cur:
+            self.assertEqual(len(list(pmc.iter_penalty_model_from_specification(cur, spec))), 2)
+            self.assertEqual(list(pmc.iter_penalty_model_from_specification(cur, spec, verify=True)),
+                             [widget])
+
     def test_penalty_model_classical_gap_insert_retrieve(self):
         """Verify that classical gap constraint searches work in the database.
         """
@@ -52,6 +52,25 @@ class TestInterfaceFunctions(unittest.TestCase):
 
         self.assertEqual(widget_, widget)
 
+    def test_verify(self):
+        dbfile = self.database
+
+        graph = nx.path_graph(['a', 'b', 'c'])
+        decision_variables = ('a', 'c')
+        feasible_configurations = {(-1, +1): 0., (+1, -1): 0.}
+        spec = pm.Specification(graph, decision_variables, feasible_configurations, dimod.SPIN)
+
+        # a ferromagnet does not have the given (antiferromagnetic) ground states
+        model = dimod.BinaryQuadraticModel({v: 0 for v in graph}, {edge: -1 for edge in graph.edges},
+                                           0.0, vartype=dimod.SPIN)
+        widget = pm.PenaltyModel.from_specification(spec, model, 2., -2)
+
+        pmc.cache_penalty_model(widget, database=dbfile)
+
+        self.assertEqual(pmc.get_penalty_model(spec, database=dbfile), widget)
+        with self.assertRaises(pm.MissingPenaltyModel):
+            pmc.get_penalty_model(spec, database=dbfile, verify=True)
+
     def test_arbitrary_labels(self):
         dbfile = self.database
 
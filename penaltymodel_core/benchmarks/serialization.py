@@ -0,0 +1,102 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Time a round trip of penalty models through to_bytes/from_bytes and through pickle.
+
+The penalty models are on complete graphs with 8 to 64 nodes, eight of them
+decision variables with 16 feasible configurations, with integer and with
+string labels. Pickle is timed on the attributes of the penalty model, which is
+how it was pickled before PenaltyModel pickled through to_bytes. Sizes are in
+bytes and times are the mean over REPEATS round trips, in milliseconds.
+
+from_bytes builds the graph, the energy ranges and the binary quadratic model
+when they are first read, so the last column also reads them. Pickle restores
+the dicts inside them directly, while they are built through networkx and
+dimod, adding the interactions one at a time with dimod 0.8.
+
+Run with::
+
+    python benchmarks/serialization.py
+
+"""
+from __future__ import print_function
+
+import pickle
+import time
+
+import dimod
+import networkx as nx
+import numpy as np
+
+import penaltymodel.core as pm
+
+REPEATS = 100
+
+
+def penalty_model(num_nodes, labels, random_state):
+    graph = nx.relabel_nodes(nx.complete_graph(num_nodes), labels)
+    decision = [labels(v) for v in range(8)]
+    configurations = {tuple(config): energy for config, energy
+                      in zip(random_state.choice((-1, 1), (16, 8)).tolist(),
+                             random_state.uniform(0, 1, 16).tolist())}
+    spec = pm.Specification(graph, decision, configurations, dimod.SPIN)
+
+    model = dimod.BinaryQuadraticModel({v: random_state.uniform(-2, 2) for v in graph},
+                                       {edge: random_state.uniform(-1, 1) for edge in graph.edges},
+                                       0.0, dimod.SPIN)
+    return pm.PenaltyModel.from_specification(spec, model, 2., -1.)
+
+
+def dumps_state(widget):
+    return pickle.dumps((type(widget), widget.__dict__), protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def loads_state(data):
+    cls, state = pickle.loads(data)
+    widget = cls.__new__(cls)
+    widget.__dict__.update(state)
+    return widget
+
+
+def loads_built(data):
+    widget = pm.PenaltyModel.from_bytes(data)
+    widget.graph, widget.ising_linear_ranges, widget.ising_quadratic_ranges, widget.model
+    return widget
+
+
+def time_round_trip(dumps, loads, widget):
+    t = time.time()
+    for _ in range(REPEATS):
+        data = dumps(widget)
+        loads(data)
+    return len(data), 1000 * (time.time() - t) / REPEATS
+
+
+def main():
+    random_state = np.random.RandomState(0)
+
+    print('{:<8}{:>6}{:>10}{:>10}{:>10}{:>10}{:>10}'.format(
+        'labels', 'nodes', 'pickle', 'ms', 'to_bytes', 'ms', 'built ms'))
+    for name, labels in [('int', int), ('str', 'v{}'.format)]:
+        for num_nodes in (8, 16, 32, 64):
+            widget = penalty_model(num_nodes, labels, random_state)
+
+            print('{:<8}{:>6}{:>10}{:>10.3f}{:>10}{:>10.3f}{:>10.3f}'.format(
+                name, num_nodes,
+                *(time_round_trip(dumps_state, loads_state, widget) +
+                  time_round_trip(pm.PenaltyModel.to_bytes, pm.PenaltyModel.from_bytes, widget) +
+                  time_round_trip(pm.PenaltyModel.to_bytes, loads_built, widget)[1:])))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,8 @@
 from __future__ import absolute_import
 
+from penaltymodel.core.classes.feasible_configurations import *
+import penaltymodel.core.classes.feasible_configurations
+
 from penaltymodel.core.classes.specification import *
 import penaltymodel.core.classes.specification
 
@@ -0,0 +1,293 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+FeasibleConfigurations
+----------------------
+"""
+from __future__ import absolute_import
+
+from numbers import Number
+
+try:
+    from collections.abc import ItemsView, Mapping, ValuesView
+except ImportError:
+    from collections import ItemsView, Mapping, ValuesView
+
+import numpy as np
+
+import dimod
+
+
+__all__ = ['FeasibleConfigurations', 'as_feasible_configurations']
+
+
+class FeasibleConfigurations(Mapping):
+    """A compact, read-only set of feasible configurations and their energies.
+
+    Each configuration is stored as a bitmask, the first decision variable in
+    the most significant bit and a set bit for the larger value of `vartype`,
+    which is also its index in ``itertools.product(sorted(vartype.value),
+    repeat=num_variables)``. The masks are kept sorted, with their energies in
+    a parallel array. It can be used anywhere a dict of feasible
+    configurations is expected, with configurations as tuples of values
+    matching `vartype`.
+
+    Args:
+        masks (array-like): The bitmask of each feasible configuration. Must be
+            unique.
+
+        energies (array-like): The (relative) energy of each feasible
+            configuration.
+
+        num_variables (int): The number of decision variables, at most 64.
+
+        vartype (:class:`dimod.Vartype`/str/set):
+            The variable type of the configurations.
+            Accepted input values:
+            :class:`.Vartype.SPIN`, ``'SPIN'``, ``{-1, 1}``
+            :class:`.Vartype.BINARY`, ``'BINARY'``, ``{0, 1}``
+
+    Examples:
+        >>> configurations = pm.FeasibleConfigurations([0, 3], [0., 0.], 2, dimod.SPIN)
+        >>> configurations == {(-1, -1): 0., (+1, +1): 0.}
+        True
+        >>> configurations.change_vartype(dimod.BINARY)[(1, 1)]
+        0.0
+
+    Attributes:
+        masks (:obj:`numpy.ndarray`): The sorted bitmasks, as uint64.
+        energies (:obj:`numpy.ndarray`): The energy of each configuration, as float64.
+        num_variables (int): The number of decision variables.
+        vartype (:class:`dimod.Vartype`): The variable type.
+
+    """
+    @dimod.decorators.vartype_argument('vartype')
+    def __init__(self, masks, energies, num_variables, vartype):
+        if not 0 <= num_variables <= 64:
+            raise ValueError("num_variables must be between 0 and 64")
+
+        masks = np.array(masks, dtype=np.uint64).reshape(-1)
+        energies = np.array(energies, dtype=np.float64).reshape(-1)
+        if masks.shape != energies.shape:
+            raise ValueError("masks and energies should have the same length")
+        if num_variables < 64 and np.any(masks >> np.uint64(num_variables)):
+            raise ValueError("masks have bits set past num_variables")
+
+        order = np.argsort(masks, kind='stable')
+        masks, energies = masks[order], energies[order]
+        if np.any(masks[1:] == masks[:-1]):
+            raise ValueError("masks should be unique")
+
+        # read-only, so that the masks stay sorted and views can share them
+        masks.flags.writeable = energies.flags.writeable = False
+
+        self.masks = masks
+        self.energies = energies
+        self.num_variables = num_variables
+        self.vartype = vartype
+
+    @classmethod
+    @dimod.decorators.vartype_argument('vartype')
+    def from_dict(cls, feasible_configurations, num_variables, vartype):
+        """Construct from a dict of feasible configurations.
+
+        Args:
+            feasible_configurations (dict[tuple[int], number]/iterable[tuple[int]]):
+                The feasible configurations, with values matching `vartype`.
+                If given as a dict, the value is the energy of each
+                configuration. If given as an iterable, the energies are all 0.
+
+            num_variables (int): The length of each configuration.
+
+            vartype (:class:`dimod.Vartype`/str/set): The variable type.
+
+        Returns:
+            :class:`.FeasibleConfigurations`
+
+        Raises:
+            ValueError: If the configurations do not match `num_variables` or
+                `vartype`, or the energies are not numeric.
+
+        """
+        if not isinstance(feasible_configurations, Mapping):
+            feasible_configurations = dict.fromkeys(feasible_configurations, 0.0)
+
+        energies = list(feasible_configurations.values())
+        if not all(isinstance(en, Number) for en in energies):
+            raise ValueError("the energy of each configuration should be numeric")
+
+        configs = np.array(list(feasible_configurations), dtype=object)
+        if not len(configs):
+            return cls([], [], num_variables, vartype)
+        if configs.ndim != 2 or configs.shape[1] != num_variables:
+            raise ValueError("the feasible configurations should all match the length of decision_variables")
+
+        low, high = sorted(vartype.value)
+        is_high = configs == high
+        if not (is_high | (configs == low)).all():
+            raise ValueError(("feasible_configurations type must match vartype. "
+                              "values permitted by vartype are {}.").format(vartype.value))
+
+        return cls(_bits_to_masks(is_high), energies, num_variables, vartype)
+
+    @dimod.decorators.vartype_argument('vartype')
+    def change_vartype(self, vartype):
+        """Return the same configurations with values of the given variable type.
+
+        The masks and energies are shared, not copied.
+
+        Args:
+            vartype (:class:`dimod.Vartype`/str/set): The variable type.
+
+        Returns:
+            :class:`.FeasibleConfigurations`
+
+        """
+        if vartype is self.vartype:
+            return self
+
+        new = object.__new__(type(self))
+        new.masks = self.masks
+        new.energies = self.energies
+        new.num_variables = self.num_variables
+        new.vartype = vartype
+        return new
+
+    def _mask(self, config):
+        """The bitmask of config, or None if it is not a configuration of these variables."""
+        try:
+            if len(config) != self.num_variables:
+                return None
+        except TypeError:
+            return None
+
+        low, high = sorted(self.vartype.value)
+        mask = 0
+        for value in config:
+            if value == high:
+                mask = (mask << 1) | 1
+            elif value == low:
+                mask <<= 1
+            else:
+                return None
+        return mask
+
+    def _find(self, config):
+        mask = self._mask(config)
+        if mask is None:
+            return None
+        idx = int(np.searchsorted(self.masks, np.uint64(mask)))
+        if idx < len(self.masks) and self.masks[idx] == mask:
+            return idx
+        return None
+
+    def __getitem__(self, config):
+        idx = self._find(config)
+        if idx is None:
+            raise KeyError(config)
+        return float(self.energies[idx])
+
+    def __contains__(self, config):
+        return self._find(config) is not None
+
+    def __iter__(self):
+        low, high = sorted(self.vartype.value)
+        shifts = np.arange(self.num_variables - 1, -1, -1, dtype=np.uint64)
+        bits = (self.masks[:, np.newaxis] >> shifts) & np.uint64(1)
+        values = np.where(bits.astype(bool), high, low)
+        return iter(map(tuple, values.tolist()))
+
+    def __len__(self):
+        return len(self.masks)
+
+    def items(self):
+        return _ItemsView(self)
+
+    def values(self):
+        return _ValuesView(self)
+
+    def __eq__(self, other):
+        if isinstance(other, FeasibleConfigurations):
+            return (self.num_variables == other.num_variables and
+                    self.vartype is other.vartype and
+                    np.array_equal(self.masks, other.masks) and
+                    np.array_equal(self.energies, other.energies))
+        return Mapping.__eq__(self, other)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '{}({}, {}, {}, {!r})'.format(type(self).__name__, self.masks.tolist(),
+                                             self.energies.tolist(), self.num_variables,
+                                             self.vartype.name)
+
+
+class _ItemsView(ItemsView):
+    def __iter__(self):
+        return zip(iter(self._mapping), self._mapping.energies.tolist())
+
+
+class _ValuesView(ValuesView):
+    def __iter__(self):
+        return iter(self._mapping.energies.tolist())
+
+
+def _bits_to_masks(bits):
+    """The bitmask of each row of a boolean array, the first column the most significant."""
+    num_variables = bits.shape[1]
+    weights = np.uint64(1) << np.arange(num_variables - 1, -1, -1, dtype=np.uint64)
+    return (bits.astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)
+
+
+@dimod.decorators.vartype_argument('vartype')
+def as_feasible_configurations(feasible_configurations, num_variables, vartype):
+    """Convert feasible configurations to a :class:`.FeasibleConfigurations`.
+
+    Args:
+        feasible_configurations (dict/iterable/:class:`.FeasibleConfigurations`):
+            The feasible configurations, see :meth:`.FeasibleConfigurations.from_dict`.
+            A :class:`.FeasibleConfigurations` is returned as-is.
+
+        num_variables (int): The length of each configuration.
+
+        vartype (:class:`dimod.Vartype`/str/set): The variable type of the
+            configurations.
+
+    Returns:
+        :class:`.FeasibleConfigurations`
+
+    Raises:
+        ValueError: If the configurations do not match `num_variables` or `vartype`.
+
+    Examples:
+        >>> configurations = pm.as_feasible_configurations({(0, 0), (1, 1)}, 2, dimod.BINARY)
+        >>> configurations.change_vartype(dimod.SPIN) == {(-1, -1): 0., (1, 1): 0.}
+        True
+
+    """
+    if not isinstance(feasible_configurations, FeasibleConfigurations):
+        return FeasibleConfigurations.from_dict(feasible_configurations, num_variables, vartype)
+
+    if feasible_configurations.num_variables != num_variables:
+        raise ValueError("the feasible configurations should all match the length of decision_variables")
+    if feasible_configurations.vartype is not vartype:
+        raise ValueError(("feasible_configurations type must match vartype. "
+                          "feasible_configurations have vartype {}, expected {}."
+                          ).format(feasible_configurations.vartype.name, vartype.name))
+    return feasible_configurations
@@ -18,17 +18,38 @@ PenaltyModel
 """
 from __future__ import absolute_import
 
+from collections import namedtuple
 from numbers import Number
+import struct
 
-from six import iteritems
+from six import iteritems, itervalues
 import networkx as nx
+import numpy as np
 
 from dimod import BinaryQuadraticModel, Vartype
 
-from penaltymodel.core.classes.specification import Specification
+from penaltymodel.core.classes.feasible_configurations import as_feasible_configurations
+from penaltymodel.core.classes.specification import (Specification, _Deserialized, _edge_labels,
+                                                     _index_dtype, _to_array)
 
 
-__all__ = ['PenaltyModel']
+__all__ = ['PenaltyModel', 'Verification']
+
+
+Verification = namedtuple('Verification', ['valid', 'ground_energies', 'ground_energy', 'classical_gap'])
+Verification.__doc__ = """The result of :meth:`.PenaltyModel.verify`.
+
+Attributes:
+    valid (bool): True if the model has the claimed classical gap and its
+        feasible configurations have the relative energies of the specification.
+    ground_energies (dict[tuple, float]): The lowest energy of the model over
+        the auxiliary variables, for each feasible configuration.
+    ground_energy (float): The lowest energy of the model over all configurations.
+    classical_gap (float): The difference between the lowest energy of the
+        infeasible configurations and the highest of the feasible ones, or
+        inf if every configuration is feasible.
+
+"""
 
 
 class PenaltyModel(Specification):
@@ -99,6 +120,12 @@ class PenaltyModel(Specification):
             edge u, v in graph.
             A partial assignment is allowed.
 
+        optimal (bool, optional, default=True):
+            False if the factory stopped before it could show that
+            `classical_gap` is the largest achievable, for instance because
+            it ran out of time. A cache may later replace a model that is not
+            optimal with one that has a larger gap.
+
     Examples:
         The penalty model can be created from its component parts:
 
@@ -140,11 +167,21 @@ class PenaltyModel(Specification):
             Defines the energy ranges available for the quadratic
             biases of the penalty model.
         vartype (:class:`dimod.Vartype`): The variable type.
+        optimal (bool): False if the classical gap might not be the
+            largest achievable.
 
     """
+    _serialization_kind = 1
+
+    model = _Deserialized('model')
+
+    _serialized_attributes = Specification._serialized_attributes.union(
+        ['model', 'classical_gap', 'ground_energy', 'optimal'])
+
     def __init__(self, graph, decision_variables, feasible_configurations, vartype,
                  model, classical_gap, ground_energy,
-                 ising_linear_ranges=None, ising_quadratic_ranges=None):
+                 ising_linear_ranges=None, ising_quadratic_ranges=None,
+                 optimal=True):
 
         Specification.__init__(self, graph, decision_variables, feasible_configurations,
                                vartype=vartype,
@@ -152,6 +189,11 @@ class PenaltyModel(Specification):
                                ising_linear_ranges=ising_linear_ranges,
                                ising_quadratic_ranges=ising_quadratic_ranges)
 
+        self._set_model(model, classical_gap, ground_energy, optimal)
+
+    def _set_model(self, model, classical_gap, ground_energy, optimal):
+        """Check the model, gap and ground energy against the (already checked) specification
+        attributes and set them."""
         if self.vartype != model.vartype:
             model = model.change_vartype(self.vartype)
 
@@ -173,7 +215,7 @@ class PenaltyModel(Specification):
 
         if not isinstance(model, BinaryQuadraticModel):
             raise TypeError("expected 'model' to be a BinaryQuadraticModel")
-        if set(model.variables).symmetric_difference(graph.nodes):
+        if set(model.variables).symmetric_difference(self.graph.nodes):
             raise ValueError("model labels must match graph node labels")
         self.model = model
 
@@ -187,8 +229,10 @@ class PenaltyModel(Specification):
             raise TypeError("expected ground_energy to be numeric")
         self.ground_energy = ground_energy
 
+        self.optimal = bool(optimal)
+
     @classmethod
-    def from_specification(cls, specification, model, classical_gap, ground_energy):
+    def from_specification(cls, specification, model, classical_gap, ground_energy, optimal=True):
         """Construct a PenaltyModel from a Specification.
 
         Args:
@@ -199,23 +243,30 @@ class PenaltyModel(Specification):
             classical_gap (numeric): The difference in classical energy between the ground
                 state and the first excited state. Must be positive.
             ground_energy (numeric): The minimum energy of all possible configurations.
+            optimal (bool, optional, default=True): False if the classical gap
+                might not be the largest achievable.
 
         Returns:
             :class:`.PenaltyModel`
 
+        Notes:
+            The specification is not checked again, only the model, gap and ground energy
+            are. The penalty model shares the graph, feasible configurations and energy
+            ranges of the specification, as normalized when it was constructed.
+
         """
+        penalty_model = cls.__new__(cls)
+
+        penalty_model.graph = specification.graph
+        penalty_model.decision_variables = specification.decision_variables
+        penalty_model.feasible_configurations = specification.feasible_configurations
+        penalty_model.ising_linear_ranges = specification.ising_linear_ranges
+        penalty_model.ising_quadratic_ranges = specification.ising_quadratic_ranges
+        penalty_model.min_classical_gap = classical_gap
+        penalty_model.vartype = specification.vartype
 
-        # Author note: there might be a way that avoids rechecking all of the values without
-        # side-effects or lots of repeated code, but this seems simpler and more explicit
-        return cls(specification.graph,
-                   specification.decision_variables,
-                   specification.feasible_configurations,
-                   specification.vartype,
-                   model,
-                   classical_gap,
-                   ground_energy,
-                   ising_linear_ranges=specification.ising_linear_ranges,
-                   ising_quadratic_ranges=specification.ising_quadratic_ranges)
+        penalty_model._set_model(model, classical_gap, ground_energy, optimal)
+        return penalty_model
 
     def __eq__(self, penalty_model):
         # other values are derived
@@ -226,6 +277,160 @@ class PenaltyModel(Specification):
     def __ne__(self, penalty_model):
         return not self.__eq__(penalty_model)
 
+    # equal penalty models have equal specifications, so they can share its hash
+    __hash__ = Specification.__hash__
+
+    def _fingerprint_data(self, labels, nodes, edges):
+        """The specification's parts of the fingerprint, with the model and ground energy."""
+        data = Specification._fingerprint_data(self, labels, nodes, edges)
+
+        model = self.model
+        data['model'] = {'linear': [float(model.linear[v]) for v in nodes],
+                         'quadratic': sorted(sorted([labels[u], labels[v]]) + [float(bias)]
+                                             for (u, v), bias in iteritems(model.quadratic)),
+                         'offset': float(model.offset)}
+        data['ground_energy'] = float(self.ground_energy)
+        return data
+
+    def _to_bytes_extra(self, nodes, edges):
+        """The model, ground energy and optimal flag, after the specification. The classical
+        gap is stored as min_classical_gap. The quadratic biases are in the order of the
+        edges, unless the interactions of the model are not the edges of the graph."""
+        model = self.model
+
+        try:
+            on_edges = len(model.quadratic) == len(edges)
+            quadratic = list(map(model.quadratic.__getitem__, edges)) if on_edges else None
+        except KeyError:
+            on_edges = False
+        if on_edges:
+            interactions = []
+        else:
+            index = {v: idx for idx, v in enumerate(nodes)}
+            interactions = [index[v] for interaction in model.quadratic for v in interaction]
+            quadratic = list(itervalues(model.quadratic))
+
+        return [_MODEL_HEADER.pack(model.offset, self.ground_energy, self.optimal, on_edges,
+                                   len(quadratic)),
+                _to_array([model.linear[v] for v in nodes], '<f8'),
+                _to_array(interactions, _index_dtype(len(nodes))),
+                _to_array(quadratic, '<f8')]
+
+    def _from_bytes_extra(self, reader, arrays):
+        offset, ground_energy, optimal, on_edges, num_interactions = reader.unpack(_MODEL_HEADER)
+        num_nodes = len(arrays['nodes'])
+        linear = reader.array('<f8', num_nodes)
+        if on_edges:
+            if num_interactions != len(arrays['edges']):
+                raise ValueError("serialized model does not match the number of edges")
+            interactions = arrays['edges']
+        else:
+            interactions = reader.indices(num_nodes, (num_interactions, 2))
+        quadratic = reader.array('<f8', num_interactions)
+
+        arrays.update(linear=linear, interactions=interactions, quadratic=quadratic,
+                      offset=offset)
+
+        # with the biases on the edges, the ranges can be checked on the arrays and the
+        # model built when first read. Otherwise, or if a bias is out of its range, the model
+        # is built now and _set_model checks it.
+        if on_edges and self.vartype is Vartype.SPIN:
+            ranges = arrays['ranges'][arrays['range_indices']]
+            biases = np.concatenate((linear, quadratic))
+            on_edges = np.all((ranges[:, 0] <= biases) & (biases <= ranges[:, 1]))
+        if not on_edges:
+            self._set_model(self._build_attribute('model'), self.min_classical_gap,
+                            ground_energy, optimal)
+            return
+
+        self.classical_gap = self.min_classical_gap
+        self.ground_energy = ground_energy
+        self.optimal = optimal
+
+    def _build_attribute(self, name):
+        if name != 'model':
+            return Specification._build_attribute(self, name)
+
+        arrays = self._arrays
+        nodes = arrays['nodes']
+        return BinaryQuadraticModel(dict(zip(nodes, arrays['linear'].tolist())),
+                                    dict(zip(_edge_labels(nodes, arrays['interactions']),
+                                             arrays['quadratic'].tolist())),
+                                    arrays['offset'], self.vartype)
+
+    def verify(self, atol=1e-6, chunk_size=2**20):
+        """Check the ground states and classical gap of the model by exhaustive enumeration.
+
+        The configurations are enumerated in blocks of at most `chunk_size`, each one a
+        matrix product between the decision and auxiliary spins, so memory stays bounded
+        while the time grows as 2**len(graph). This is practical up to about 30 variables.
+
+        Args:
+            atol (float, optional, default=1e-6): The tolerance of the energy comparisons.
+            chunk_size (int, optional, default=2**20): The number of configurations whose
+                energies are computed at once.
+
+        Returns:
+            :class:`.Verification`
+
+        Examples:
+            >>> spec = pm.Specification(nx.path_graph(3), (0, 2), {(-1, -1), (1, 1)}, dimod.SPIN)
+            >>> model = dimod.BinaryQuadraticModel({0: 0, 1: 0, 2: 0}, {(0, 1): -1, (1, 2): -1}, 0.0, dimod.SPIN)
+            >>> penalty_model = pm.PenaltyModel.from_specification(spec, model, 2., -2.)
+            >>> penalty_model.verify().valid
+            True
+
+        """
+        if len(self.graph) > 62:
+            raise ValueError("cannot enumerate the configurations of more than 62 variables")
+
+        decision = list(self.decision_variables)
+        auxiliary = [v for v in self.model.variables if v not in self.decision_variables]
+        index = {v: idx for idx, v in enumerate(decision + auxiliary)}
+
+        linear = np.zeros(len(index))
+        for v, bias in iteritems(self.model.linear):
+            linear[index[v]] = bias
+        quadratic = np.zeros((len(index), len(index)))
+        for (u, v), bias in iteritems(self.model.quadratic):
+            i, j = sorted((index[u], index[v]))
+            quadratic[i, j] += bias
+
+        # the masks are the indices of the feasible configurations in itertools.product(values, repeat=n)
+        feasible = as_feasible_configurations(self.feasible_configurations, len(decision), self.vartype)
+        feasible_indices = feasible.masks.astype(np.int64)
+
+        feasible_energies = np.empty(len(feasible))
+        lowest_infeasible = np.inf
+        for start, energies in _iter_ground_energies(linear, quadratic, self.model.offset, len(decision),
+                                                     self.vartype, chunk_size):
+            stop = start + len(energies)
+            is_feasible = np.zeros(len(energies), dtype=bool)
+            lo, hi = np.searchsorted(feasible_indices, [start, stop])
+            is_feasible[feasible_indices[lo:hi] - start] = True
+            feasible_energies[lo:hi] = energies[is_feasible]
+            if not is_feasible.all():
+                lowest_infeasible = min(lowest_infeasible, energies[~is_feasible].min())
+
+        ground_energies = dict(zip(feasible, feasible_energies.tolist()))
+
+        # feasible energies are relative, so they only need to agree up to a constant
+        if len(feasible):
+            shifts = feasible_energies - feasible.energies
+            relative = bool(np.all(np.abs(shifts - shifts[0]) <= atol))
+            highest_feasible = feasible_energies.max()
+            ground_energy = min(feasible_energies.min(), lowest_infeasible)
+        else:
+            relative = True
+            highest_feasible, ground_energy = -np.inf, lowest_infeasible
+        if np.isfinite(lowest_infeasible) and np.isfinite(highest_feasible):
+            classical_gap = float(lowest_infeasible - highest_feasible)
+        else:
+            classical_gap = np.inf
+
+        valid = relative and classical_gap >= self.classical_gap - atol
+        return Verification(valid, ground_energies, float(ground_energy), classical_gap)
+
     def relabel_variables(self, mapping, inplace=True):
         """Relabel the variables and nodes according to the given mapping.
 
@@ -266,4 +471,69 @@ class PenaltyModel(Specification):
         else:
             spec = Specification.relabel_variables(self, mapping, inplace=False)
             model = self.model.relabel_variables(mapping, inplace=False)
-            return PenaltyModel.from_specification(spec, model, self.classical_gap, self.ground_energy)
+            return PenaltyModel.from_specification(spec, model, self.classical_gap, self.ground_energy,
+                                                   optimal=self.optimal)
+
+
+# offset, ground energy, optimal, whether the interactions are the edges and their number
+_MODEL_HEADER = struct.Struct('<dd??Q')
+
+
+def _iter_ground_energies(linear, quadratic, offset, num_decision, vartype, chunk_size):
+    """Yield the lowest energy over the auxiliary variables of blocks of decision configurations.
+
+    The decision variables are the first `num_decision` of `linear`. The configurations are
+    split into rows, over the leading variables, and about sqrt(chunk_size) columns, over the
+    trailing ones, which are built once. The energies of each block of rows are then one
+    matrix product, minimized over the auxiliary variables in the columns and then over the
+    rows of each decision configuration.
+
+    Yields:
+        tuple: The index of the first decision configuration of the block, in
+        itertools.product(vartype.value, repeat=num_decision) order, and their energies.
+
+    """
+    low, high = sorted(vartype.value)
+
+    def configurations(start, stop, num_variables):
+        shifts = np.arange(num_variables - 1, -1, -1, dtype=np.int64)
+        bits = (np.arange(start, stop, dtype=np.int64)[:, None] >> shifts) & 1
+        return bits * float(high - low) + low  # floats so that the products go through BLAS
+
+    num_variables = len(linear)
+    num_auxiliary = num_variables - num_decision
+    chunk_bits = max(int(chunk_size), 1).bit_length() - 1
+
+    num_columns = min(num_variables, chunk_bits // 2)
+    column_decision = max(num_columns - num_auxiliary, 0)  # decision variables in the columns
+    num_rows = num_variables - num_columns
+    rows_per_decision = 2**(num_rows - num_decision + column_decision)
+
+    # the row configurations and the energy block both stay within about chunk_size values
+    rows_per_chunk = min(2**num_rows, 2**max(chunk_bits - max(num_columns, num_rows.bit_length()), 0))
+
+    y = configurations(0, 2**num_columns, num_columns)
+    column_energies = (y.dot(linear[num_rows:]) +
+                       (y.dot(quadratic[num_rows:, num_rows:]) * y).sum(axis=1))
+
+    running = np.inf
+    for start in range(0, 2**num_rows, rows_per_chunk):
+        x = configurations(start, start + rows_per_chunk, num_rows)
+        row_energies = x.dot(linear[:num_rows]) + (x.dot(quadratic[:num_rows, :num_rows]) * x).sum(axis=1)
+        block = column_energies[None, :] + x.dot(quadratic[:num_rows, num_rows:]).dot(y.T)
+
+        # the lowest energy over the auxiliary variables in the columns, for each row and
+        # each configuration of the decision variables in the columns
+        energies = (block.reshape(rows_per_chunk, 2**column_decision, -1).min(axis=2) +
+                    row_energies[:, None]).ravel()
+
+        # rows_per_chunk and rows_per_decision are both powers of two, so either each chunk
+        # holds whole decision configurations or each decision configuration spans whole chunks
+        if rows_per_chunk >= rows_per_decision:
+            yield ((start << column_decision) // rows_per_decision,
+                   energies.reshape(-1, rows_per_decision).min(axis=1) + offset)
+        else:
+            running = min(running, energies.min())
+            if (start + rows_per_chunk) % rows_per_decision == 0:
+                yield start // rows_per_decision, np.array([running + offset])
+                running = np.inf
@@ -19,17 +19,40 @@ Specification
 from __future__ import absolute_import
 
 from numbers import Number
+import hashlib
 import itertools
+import json
+import struct
 
 import networkx as nx
+import numpy as np
 
 import dimod
-from six import itervalues, iteritems, iterkeys
+from six import itervalues, iteritems, iterkeys, string_types
+
+from penaltymodel.core.classes.feasible_configurations import (FeasibleConfigurations,
+                                                               as_feasible_configurations)
 
 
 __all__ = ['Specification']
 
 
+class _Deserialized(object):
+    """An attribute that :meth:`.Specification.from_bytes` leaves to be built from the
+    decoded arrays the first time it is read. Once built, or if set, it is an ordinary
+    attribute of the instance."""
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        if instance._arrays is None:
+            raise AttributeError(self.name)
+        value = instance.__dict__[self.name] = instance._build_attribute(self.name)
+        return value
+
+
 class Specification(object):
     """Specification for a PenaltyModel.
 
@@ -50,14 +73,15 @@ class Specification(object):
             in `decision_variables` must correspond to a node in `graph`.
             Should be an ordered iterable of hashable labels.
 
-        feasible_configurations (dict[tuple[int], number]/iterable[tuple[int]]):
+        feasible_configurations (dict[tuple[int], number]/iterable[tuple[int]]/:class:`.FeasibleConfigurations`):
             The set of feasible configurations. Defines the allowed configurations
             of the decision variables allowed by the constraint.
             Each feasible configuration should be a tuple, each element of which
             must be of a value matching `vartype`. If given as a dict, the key
             is the feasible configuration and the value is the desired relative
             energy. If given as an iterable, it will be case to a dict where
-            the relative energies are all 0.
+            the relative energies are all 0. A :class:`.FeasibleConfigurations`
+            is kept as-is, as the compact form of the dict.
 
         vartype (:class:`dimod.Vartype`/str/set):
             The variable type desired for the penalty model.
@@ -106,7 +130,7 @@ class Specification(object):
             The labels of the penalty model's decision variables. Each variable label
             in `decision_variables` must correspond to a node in `graph`.
 
-        feasible_configurations (dict[tuple[int], number]):
+        feasible_configurations (dict[tuple[int], number]/:class:`.FeasibleConfigurations`):
             The set of feasible configurations. Defines the allowed configurations
             of the decision variables allowed by the constraint. The key is the
             allowed configuration, the value is the relative energy of each
@@ -135,7 +159,20 @@ class Specification(object):
             This is a threshold value for the classical gap. It describes the minimum energy gap
             between the highest feasible state and the lowest infeasible state. Default value is 2.
 
+        fingerprint (str):
+            A sha256 hex digest of the specification, see :attr:`.fingerprint`.
+
     """
+    _fingerprints = None  # the fingerprint and hash, computed on first use
+
+    _serialization_kind = 0  # identifies the class in to_bytes, see from_bytes
+
+    # the arrays read by from_bytes, from which these attributes are built when first read
+    _arrays = None
+    graph = _Deserialized('graph')
+    ising_linear_ranges = _Deserialized('ising_linear_ranges')
+    ising_quadratic_ranges = _Deserialized('ising_quadratic_ranges')
+
     @dimod.decorators.vartype_argument('vartype')
     def __init__(self, graph, decision_variables, feasible_configurations, vartype,
                  ising_linear_ranges=None, ising_quadratic_ranges=None, min_classical_gap=2):
@@ -168,16 +205,21 @@ class Specification(object):
         #
         # feasible_configurations
         #
-        try:
-            if not isinstance(feasible_configurations, dict):
-                feasible_configurations = {config: 0.0 for config in feasible_configurations}
-            else:
-                if not all(isinstance(en, Number) for en in itervalues(feasible_configurations)):
-                    raise ValueError("the energy fo each configuration should be numeric")
-        except TypeError:
-            raise TypeError("expected decision_variables to be an iterable")
-        if not all(len(config) == num_dv for config in feasible_configurations):
-            raise ValueError("the feasible configurations should all match the length of decision_variables")
+        if isinstance(feasible_configurations, FeasibleConfigurations):
+            # already checked, only the length and vartype are left
+            if feasible_configurations.num_variables != num_dv:
+                raise ValueError("the feasible configurations should all match the length of decision_variables")
+        else:
+            try:
+                if not isinstance(feasible_configurations, dict):
+                    feasible_configurations = {config: 0.0 for config in feasible_configurations}
+                else:
+                    if not all(isinstance(en, Number) for en in itervalues(feasible_configurations)):
+                        raise ValueError("the energy fo each configuration should be numeric")
+            except TypeError:
+                raise TypeError("expected decision_variables to be an iterable")
+            if not all(len(config) == num_dv for config in feasible_configurations):
+                raise ValueError("the feasible configurations should all match the length of decision_variables")
         self.feasible_configurations = feasible_configurations
 
         #
@@ -197,11 +239,17 @@ class Specification(object):
         # vartype
         #
         # check that our feasible configurations match
-        seen_variable_types = set().union(*feasible_configurations)
-        if not seen_variable_types.issubset(vartype.value):
-            raise ValueError(("feasible_configurations type must match vartype. "
-                              "feasible_configurations have values {}, "
-                              "values permitted by vartype are {}.").format(seen_variable_types, vartype.value))
+        if isinstance(feasible_configurations, FeasibleConfigurations):
+            if feasible_configurations.vartype is not vartype:
+                raise ValueError(("feasible_configurations type must match vartype. "
+                                  "feasible_configurations have vartype {}, "
+                                  "expected {}.").format(feasible_configurations.vartype.name, vartype.name))
+        else:
+            seen_variable_types = set().union(*feasible_configurations)
+            if not seen_variable_types.issubset(vartype.value):
+                raise ValueError(("feasible_configurations type must match vartype. "
+                                  "feasible_configurations have values {}, "
+                                  "values permitted by vartype are {}.").format(seen_variable_types, vartype.value))
         self.vartype = vartype
 
     @staticmethod
@@ -281,6 +329,275 @@ class Specification(object):
     def __ne__(self, specification):
         return not self.__eq__(specification)
 
+    def __hash__(self):
+        return self._get_fingerprints()[1]
+
+    @property
+    def fingerprint(self):
+        """str: A sha256 hex digest of the graph, decision variables, feasible configurations,
+        vartype, energy ranges and min_classical_gap.
+
+        It does not depend on the order of the nodes, edges or feasible configurations, so it is
+        the same across processes and Python versions, provided that the variable labels can be
+        serialized to JSON. Other labels are encoded by their repr.
+
+        The fingerprint and the hash are computed once. :meth:`.relabel_variables` resets them,
+        but other in-place changes to the specification are not detected.
+
+        Examples:
+            >>> spec = pm.Specification(nx.path_graph(3), (0, 2), {(-1, -1), (1, 1)}, dimod.SPIN)
+            >>> spec.fingerprint == pm.Specification([(2, 1), (1, 0)], (0, 2),
+            ...                                      {(1, 1): 0, (-1, -1): 0}, dimod.SPIN).fingerprint
+            True
+
+        """
+        return self._get_fingerprints()[0]
+
+    def _get_fingerprints(self):
+        fingerprints = self._fingerprints
+        if fingerprints is None:
+            self._fingerprints = fingerprints = self._compute_fingerprints()
+        return fingerprints
+
+    def _compute_fingerprints(self):
+        """The fingerprint, and a hash of only what __eq__ compares so that the two agree."""
+        labels = {v: _encode_label(v) for v in self.graph}
+        nodes = sorted(self.graph, key=labels.__getitem__)
+        edges = sorted((tuple(sorted(edge, key=labels.__getitem__)) for edge in self.graph.edges),
+                       key=lambda edge: (labels[edge[0]], labels[edge[1]]))
+
+        feasible_configurations = as_feasible_configurations(self.feasible_configurations,
+                                                             len(self.decision_variables),
+                                                             self.vartype)
+
+        compared = [[labels[v] for v in nodes],
+                    [[labels[u], labels[v]] for u, v in edges],
+                    [labels[v] for v in self.decision_variables],
+                    len(feasible_configurations),
+                    self.vartype.name if len(feasible_configurations) else None]
+
+        digest = hashlib.sha256(_encode_data(compared))
+        digest.update(feasible_configurations.masks.astype('<u8').tobytes())
+        digest.update(feasible_configurations.energies.astype('<f8').tobytes())
+
+        fingerprint = hashlib.sha256(digest.digest())
+        fingerprint.update(_encode_data(self._fingerprint_data(labels, nodes, edges)))
+
+        # __eq__ compares the labels with == and ignores the vartype, so the hash uses the
+        # labels' own hashes and leaves the vartype out. The masks do not depend on it, and
+        # hashing the energies as floats makes -0. and 0. agree.
+        hash_ = hash((frozenset(self.graph.nodes),
+                      frozenset(frozenset(edge) for edge in self.graph.edges),
+                      tuple(self.decision_variables),
+                      tuple(feasible_configurations.masks.tolist()),
+                      tuple(feasible_configurations.energies.tolist())))
+
+        return fingerprint.hexdigest(), hash_
+
+    def _fingerprint_data(self, labels, nodes, edges):
+        """The JSON-serializable parts of the fingerprint that __eq__ does not compare, given
+        the encoded labels and the nodes and edges in canonical order."""
+        ising_linear_ranges = self.ising_linear_ranges
+        ising_quadratic_ranges = self.ising_quadratic_ranges
+        return {'vartype': self.vartype.name,
+                'ising_linear_ranges': [list(map(float, ising_linear_ranges[v])) for v in nodes],
+                'ising_quadratic_ranges': [list(map(float, ising_quadratic_ranges[u][v]))
+                                           for u, v in edges],
+                'min_classical_gap': float(self.min_classical_gap)}
+
+    def to_bytes(self):
+        """Serialize the specification to a compact binary layout.
+
+        The layout is versioned. After a fixed header come the node labels, the edges and
+        decision variables as indices into the nodes, the feasible configurations as bitmasks
+        and float64 energies, and the energy ranges as a float64 array of the distinct ranges
+        with the index of the range of each node and edge. Indices are stored in the smallest
+        unsigned integer type that fits. Integer labels are stored as an int64 array and
+        labels built from strings, numbers and tuples as JSON. Other labels are not supported.
+
+        Node and edge attributes of the graph are not kept, nor are energy ranges for
+        variables or interactions that are not in the graph. The ranges and gap are read back
+        as floats and the feasible configurations as a :class:`.FeasibleConfigurations`.
+
+        Specifications are pickled and copied through this layout, unless it would lose
+        one of the above or another attribute of the specification.
+
+        Returns:
+            bytes
+
+        Raises:
+            ValueError: If a label is not a string, number or tuple of them.
+
+        Examples:
+            >>> spec = pm.Specification(nx.path_graph(3), (0, 2), {(-1, -1), (1, 1)}, dimod.SPIN)
+            >>> pm.Specification.from_bytes(spec.to_bytes()) == spec
+            True
+
+        """
+        nodes = list(self.graph)
+        index = {v: idx for idx, v in enumerate(nodes)}
+        label_format, labels = _dump_labels(nodes)
+
+        node_dtype = _index_dtype(len(nodes))
+
+        edges = list(self.graph.edges)
+        ising_linear_ranges = self.ising_linear_ranges
+        ising_quadratic_ranges = self.ising_quadratic_ranges
+
+        # most variables and interactions share a few ranges, which are found as complex
+        # numbers min + max*j
+        bounds = [bound for v in nodes for bound in ising_linear_ranges[v]]
+        bounds.extend(bound for u, v in edges for bound in ising_quadratic_ranges[u][v])
+        ranges, range_indices = np.unique(np.fromiter(bounds, '<f8', len(bounds)).view('<c16'),
+                                          return_inverse=True)
+
+        feasible_configurations = as_feasible_configurations(self.feasible_configurations,
+                                                             len(self.decision_variables),
+                                                             self.vartype)
+
+        header = _HEADER.pack(_MAGIC, _VERSION, self._serialization_kind,
+                              _VARTYPES.index(self.vartype), label_format,
+                              len(nodes), len(edges), len(self.decision_variables),
+                              len(feasible_configurations), len(ranges), len(labels),
+                              float(self.min_classical_gap))
+
+        parts = [header,
+                 labels,
+                 _to_array(list(map(index.__getitem__, itertools.chain.from_iterable(edges))),
+                           node_dtype),
+                 _to_array([index[v] for v in self.decision_variables], node_dtype),
+                 _to_array(feasible_configurations.masks, '<u8'),
+                 _to_array(feasible_configurations.energies, '<f8'),
+                 _to_array(ranges.view('<f8'), '<f8'),
+                 _to_array(range_indices, _index_dtype(len(ranges)))]
+        parts.extend(self._to_bytes_extra(nodes, edges))
+        return b''.join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Construct a specification from the output of :meth:`.to_bytes`.
+
+        The layout is checked, so that the indices are in range, the labels are distinct and
+        the energy ranges are ordered, but the specification is not checked again, e.g. that
+        the decision variables are distinct. See :meth:`.to_bytes` for what is kept.
+
+        Only the arrays of the layout are read. The graph and the energy ranges are built
+        from them when they are first used, so that specifications that are only passed on
+        or stored are not built at all. Building them takes longer than unpickling them.
+
+        Args:
+            data (bytes): A serialized specification.
+
+        Returns:
+            :class:`.Specification`
+
+        Raises:
+            ValueError: If the data is not a serialized specification of this class, is of
+                an unsupported version, or is malformed.
+
+        """
+        reader = _Reader(data)
+
+        (magic, version, kind, vartype, label_format, num_nodes, num_edges, num_decision,
+         num_feasible, num_ranges, label_size, min_classical_gap) = reader.unpack(_HEADER)
+        if magic != _MAGIC:
+            raise ValueError("data is not a serialized specification")
+        if version != _VERSION:
+            raise ValueError("unsupported serialization version {}".format(version))
+        if kind != cls._serialization_kind:
+            raise ValueError("data is not a serialized {}".format(cls.__name__))
+        if vartype >= len(_VARTYPES):
+            raise ValueError("unknown vartype {}".format(vartype))
+        vartype = _VARTYPES[vartype]
+        if not min_classical_gap > 0:
+            raise ValueError("min_classical_gap must be a positive number")
+
+        nodes = _load_labels(reader.read(label_size), label_format)
+        if len(nodes) != num_nodes or len(set(nodes)) != num_nodes:
+            raise ValueError("serialized labels do not match the number of nodes")
+        edges = reader.indices(num_nodes, (num_edges, 2))
+        decision_variables = tuple(nodes[v] for v in reader.indices(num_nodes, num_decision).tolist())
+        feasible_configurations = FeasibleConfigurations(reader.array('<u8', num_feasible),
+                                                         reader.array('<f8', num_feasible),
+                                                         num_decision, vartype)
+        ranges = reader.array('<f8', (num_ranges, 2))
+        if not np.all(ranges[:, 0] <= ranges[:, 1]):
+            raise ValueError("each serialized range should be (min, max) where min <= max")
+        range_indices = reader.indices(num_ranges, num_nodes + num_edges)
+
+        # the graph and energy ranges are built when first read, see _build_attribute
+        specification = cls.__new__(cls)
+        specification._arrays = arrays = {'nodes': nodes, 'edges': edges,
+                                          'ranges': ranges, 'range_indices': range_indices}
+        specification.decision_variables = decision_variables
+        specification.feasible_configurations = feasible_configurations
+        specification.min_classical_gap = min_classical_gap
+        specification.vartype = vartype
+
+        specification._from_bytes_extra(reader, arrays)
+        reader.close()
+        return specification
+
+    def _to_bytes_extra(self, nodes, edges):
+        """The parts of the serialization after the specification, given the order of the
+        nodes and edges."""
+        return []
+
+    def _from_bytes_extra(self, reader, arrays):
+        """Read what _to_bytes_extra wrote, given the arrays read by from_bytes."""
+        pass
+
+    def _build_attribute(self, name):
+        """Build an attribute that from_bytes left to be built from its arrays."""
+        arrays = self._arrays
+        nodes = arrays['nodes']
+
+        if name == 'graph':
+            graph = nx.Graph()
+            graph.add_nodes_from(nodes)
+            graph.add_edges_from(_edge_labels(nodes, arrays['edges']))
+            return graph
+
+        # each variable and interaction gets its own list, as in __init__
+        ranges = arrays['ranges'].tolist()
+        range_indices = arrays['range_indices'].tolist()
+
+        if name == 'ising_linear_ranges':
+            return {v: list(ranges[idx]) for v, idx in zip(nodes, range_indices)}
+
+        if name == 'ising_quadratic_ranges':
+            ising_quadratic_ranges = {v: {} for v in nodes}
+            for (u, v), idx in zip(_edge_labels(nodes, arrays['edges']),
+                                   range_indices[len(nodes):]):
+                ising_quadratic_ranges[u][v] = ising_quadratic_ranges[v][u] = list(ranges[idx])
+            return ising_quadratic_ranges
+
+        raise AttributeError(name)
+
+    # the attributes that to_bytes keeps, or can recompute
+    _serialized_attributes = frozenset(['graph', 'decision_variables', 'feasible_configurations',
+                                        'ising_linear_ranges', 'ising_quadratic_ranges',
+                                        'min_classical_gap', 'vartype', '_fingerprints',
+                                        '_arrays'])
+
+    def __reduce_ex__(self, protocol):
+        """Pickle and copy through :meth:`.to_bytes`, unless it would lose something: an
+        attribute of the graph, nodes or edges, a label it cannot store, or an attribute it
+        does not know of."""
+        if not self._serialized_attributes.issuperset(self.__dict__):
+            return object.__reduce_ex__(self, protocol)
+
+        # a graph that was not built since from_bytes has no attributes
+        graph = self.__dict__.get('graph')
+        if graph is not None and (graph.graph or any(itervalues(graph.nodes)) or
+                                  any(data for _, _, data in graph.edges(data=True))):
+            return object.__reduce_ex__(self, protocol)
+
+        try:
+            return _from_bytes, (type(self), self.to_bytes())
+        except ValueError:
+            return object.__reduce_ex__(self, protocol)
+
     def relabel_variables(self, mapping, inplace=True):
         """Relabel the variables and nodes according to the given mapping.
 
@@ -301,6 +618,9 @@ class Specification(object):
         ising_linear_ranges = self.ising_linear_ranges
         ising_quadratic_ranges = self.ising_quadratic_ranges
 
+        if inplace:
+            self._fingerprints = None
+
         try:
             old_labels = set(iterkeys(mapping))
             new_labels = set(itervalues(mapping))
@@ -385,3 +705,125 @@ class Specification(object):
                     del ising_quadratic_ranges[v]
 
             return self
+
+
+def _encode_label(label):
+    """A canonical string for a variable label, its JSON if it has one."""
+    try:
+        return json.dumps(label, separators=(',', ':'), sort_keys=True)
+    except (TypeError, ValueError):
+        return '{}:{!r}'.format(type(label).__name__, label)
+
+
+def _encode_data(data):
+    return json.dumps(data, separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+
+_MAGIC = b'PMSP'
+_VERSION = 1
+
+# magic, version, kind, vartype, label format, number of nodes, edges, decision variables,
+# feasible configurations and distinct ranges, length of the labels and min_classical_gap
+_HEADER = struct.Struct('<4sBBBBQQQQQQd')
+
+_VARTYPES = (dimod.SPIN, dimod.BINARY)
+
+_INT_LABELS, _JSON_LABELS = range(2)
+
+
+def _from_bytes(cls, data):
+    return cls.from_bytes(data)
+
+
+def _edge_labels(nodes, edges):
+    """The edges as pairs of labels, given as an array of indices into nodes."""
+    return [(nodes[u], nodes[v]) for u, v in edges.tolist()]
+
+
+def _to_array(data, dtype):
+    """The bytes of an array of data, a numpy array or a flat list of numbers."""
+    if isinstance(data, list):
+        data = np.fromiter(data, dtype=dtype, count=len(data))
+    return np.asarray(data, dtype=dtype).tobytes()
+
+
+def _index_dtype(size):
+    """The smallest unsigned integer type for indices into size items."""
+    if size <= 2**8:
+        return '<u1'
+    if size <= 2**16:
+        return '<u2'
+    if size <= 2**32:
+        return '<u4'
+    return '<u8'
+
+
+class _Reader(object):
+    """Read the parts of a serialization in order."""
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.position = 0
+
+    def read(self, size):
+        if self.position + size > len(self.data):
+            raise ValueError("serialized data is truncated")
+        start, self.position = self.position, self.position + size
+        return self.data[start:self.position]
+
+    def unpack(self, struct_):
+        return struct_.unpack(self.read(struct_.size))
+
+    def array(self, dtype, shape):
+        dtype = np.dtype(dtype)
+        count = int(np.prod(shape))
+        return np.frombuffer(self.read(count * dtype.itemsize), dtype=dtype).reshape(shape)
+
+    def indices(self, size, shape):
+        """An array of indices into size items, see _index_dtype."""
+        indices = self.array(_index_dtype(size), shape)
+        if indices.size and indices.max() >= size:
+            raise ValueError("serialized data has an index out of range")
+        return indices
+
+    def close(self):
+        if self.position != len(self.data):
+            raise ValueError("serialized data has trailing bytes")
+
+
+def _is_json_label(label):
+    if type(label) is tuple:
+        return all(_is_json_label(v) for v in label)
+    return type(label) in (bool, int, float) or isinstance(label, string_types)
+
+
+def _dump_labels(labels):
+    """The format and encoding of a list of labels."""
+    if all(type(v) is int for v in labels):
+        try:
+            return _INT_LABELS, np.array(labels, dtype='<i8').tobytes()
+        except OverflowError:
+            pass
+    if all(_is_json_label(v) for v in labels):
+        return _JSON_LABELS, json.dumps(labels, separators=(',', ':')).encode('utf-8')
+    raise ValueError("only labels that are strings, numbers or tuples of them can be serialized")
+
+
+def _load_labels(data, label_format):
+    if label_format == _INT_LABELS:
+        return np.frombuffer(data, dtype='<i8').tolist()
+    if label_format == _JSON_LABELS:
+        labels = json.loads(bytes(data).decode('utf-8'))
+        if not isinstance(labels, list):
+            raise ValueError("serialized labels should be a JSON array")
+        labels = [_as_label(v) for v in labels]
+        if not all(_is_json_label(v) for v in labels):
+            raise ValueError("serialized labels should be strings, numbers or arrays of them")
+        return labels
+    raise ValueError("unknown label format {}".format(label_format))
+
+
+def _as_label(value):
+    """Labels cannot be lists, so every JSON array was a tuple."""
+    if isinstance(value, list):
+        return tuple(_as_label(v) for v in value)
+    return value
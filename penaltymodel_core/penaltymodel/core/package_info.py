@@ -1,4 +1,4 @@
-__version__ = '0.16.2'
+__version__ = '0.17.0'
 __author__ = 'D-Wave Systems Inc.'
 __authoremail__ = 'acondello@dwavesys.com'
 __description__ = 'Utilities and interfaces for using penalty models.'
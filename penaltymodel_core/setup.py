@@ -11,7 +11,8 @@ else:
 
 install_requires = ['dimod>=0.6.3,<0.9.0',
                     'six>=1.11.0,<2.0.0',
-                    'networkx>=2.0,<3.0'
+                    'networkx>=2.0,<3.0',
+                    'numpy>=1.15.3,<2.0.0'
                     ]
 
 extras_require = {'all': ['penaltymodel_cache>=0.3.0,<0.4.0',
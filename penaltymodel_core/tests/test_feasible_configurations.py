@@ -0,0 +1,183 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+import itertools
+
+import networkx as nx
+import numpy as np
+
+import penaltymodel.core as pm
+
+import dimod
+
+
+class TestFeasibleConfigurations(unittest.TestCase):
+    def test_construction_empty(self):
+        configurations = pm.FeasibleConfigurations([], [], 3, dimod.SPIN)
+        self.assertEqual(len(configurations), 0)
+        self.assertEqual(list(configurations), [])
+        self.assertEqual(configurations, {})
+
+    def test_construction_sorts(self):
+        configurations = pm.FeasibleConfigurations([3, 0, 2], [1., 2., 3.], 2, 'SPIN')
+
+        self.assertEqual(configurations.masks.tolist(), [0, 2, 3])
+        self.assertEqual(configurations.energies.tolist(), [2., 3., 1.])
+        self.assertIs(configurations.vartype, dimod.SPIN)
+        self.assertEqual(list(configurations), [(-1, -1), (1, -1), (1, 1)])
+        self.assertEqual(configurations, {(-1, -1): 2., (1, -1): 3., (1, 1): 1.})
+
+    def test_construction_vartype_forms(self):
+        for vartype in ['BINARY', {0, 1}, frozenset((0, 1)), dimod.BINARY]:
+            configurations = pm.FeasibleConfigurations([1], [0.], 1, vartype)
+            self.assertIs(configurations.vartype, dimod.BINARY)
+            self.assertIs(configurations.change_vartype('SPIN').vartype, dimod.SPIN)
+            self.assertIs(pm.as_feasible_configurations({(1,): 0.}, 1, vartype).vartype,
+                          dimod.BINARY)
+
+        with self.assertRaises(TypeError):
+            pm.FeasibleConfigurations([1], [0.], 1, 'INTEGER')
+
+    def test_construction_read_only(self):
+        configurations = pm.FeasibleConfigurations([0, 1], [0., 0.], 1, dimod.BINARY)
+
+        with self.assertRaises(ValueError):
+            configurations.masks[0] = 1
+        with self.assertRaises(ValueError):
+            configurations.energies[0] = 1.
+
+    def test_construction_bad(self):
+        with self.assertRaises(ValueError):
+            pm.FeasibleConfigurations([0, 0], [0., 1.], 2, dimod.SPIN)  # duplicate
+        with self.assertRaises(ValueError):
+            pm.FeasibleConfigurations([4], [0.], 2, dimod.SPIN)  # too many bits
+        with self.assertRaises(ValueError):
+            pm.FeasibleConfigurations([0, 1], [0.], 2, dimod.SPIN)  # lengths differ
+        with self.assertRaises(ValueError):
+            pm.FeasibleConfigurations([], [], 65, dimod.SPIN)
+
+    def test_from_dict(self):
+        feasible_configurations = {(0, 1, 1): .5, (1, 0, 0): -1, (0, 0, 0): 0}
+        configurations = pm.FeasibleConfigurations.from_dict(feasible_configurations,
+                                                             3, dimod.BINARY)
+
+        self.assertEqual(configurations.masks.tolist(), [0, 3, 4])
+        self.assertEqual(configurations.energies.tolist(), [0., .5, -1.])
+        self.assertEqual(configurations, feasible_configurations)
+        self.assertEqual(feasible_configurations, dict(configurations.items()))
+
+    def test_from_dict_iterable(self):
+        configurations = pm.FeasibleConfigurations.from_dict({(-1, 1), (1, -1)}, 2, dimod.SPIN)
+        self.assertEqual(configurations, {(-1, 1): 0., (1, -1): 0.})
+
+    def test_from_dict_bad(self):
+        with self.assertRaises(ValueError):
+            pm.FeasibleConfigurations.from_dict({(0, 1): 0.}, 2, dimod.SPIN)  # wrong vartype
+        with self.assertRaises(ValueError):
+            pm.FeasibleConfigurations.from_dict({(-1, 1, 1): 0.}, 2, dimod.SPIN)  # wrong length
+        with self.assertRaises(ValueError):
+            pm.FeasibleConfigurations.from_dict({(-1, 1): 'a'}, 2, dimod.SPIN)
+
+    def test_lookup(self):
+        configurations = pm.FeasibleConfigurations([1, 6], [.5, -1.], 3, dimod.SPIN)
+
+        self.assertIn((-1, -1, 1), configurations)
+        self.assertIn((1, 1, -1), configurations)
+        self.assertNotIn((1, 1, 1), configurations)
+        self.assertNotIn((0, 1, 1), configurations)
+        self.assertNotIn((1, 1), configurations)
+        self.assertNotIn(5, configurations)
+
+        self.assertEqual(configurations[(-1, -1, 1)], .5)
+        self.assertEqual(configurations.get((1, 1, 1), 'missing'), 'missing')
+        with self.assertRaises(KeyError):
+            configurations[(1, 1, 1)]
+
+    def test_change_vartype(self):
+        spin = pm.FeasibleConfigurations([1, 2], [0., 1.], 2, dimod.SPIN)
+        binary = spin.change_vartype(dimod.BINARY)
+
+        self.assertIs(spin.change_vartype(dimod.SPIN), spin)
+        self.assertIs(binary.masks, spin.masks)
+        self.assertIs(binary.energies, spin.energies)
+        self.assertEqual(binary, {(0, 1): 0., (1, 0): 1.})
+        self.assertNotEqual(binary, spin)
+
+    def test_equality(self):
+        a = pm.FeasibleConfigurations([1, 2], [0., 1.], 2, dimod.SPIN)
+
+        self.assertEqual(a, pm.FeasibleConfigurations([2, 1], [1., 0.], 2, dimod.SPIN))
+        self.assertNotEqual(a, pm.FeasibleConfigurations([1, 2], [0., 2.], 2, dimod.SPIN))
+        self.assertNotEqual(a, pm.FeasibleConfigurations([1, 2], [0., 1.], 3, dimod.SPIN))
+        self.assertNotEqual(a, {(-1, 1): 0.})
+        self.assertNotEqual(a, [(-1, 1), (1, -1)])
+
+    def test_as_feasible_configurations(self):
+        configurations = pm.FeasibleConfigurations([0], [0.], 2, dimod.SPIN)
+
+        self.assertIs(pm.as_feasible_configurations(configurations, 2, dimod.SPIN),
+                      configurations)
+        with self.assertRaises(ValueError):
+            pm.as_feasible_configurations(configurations, 3, dimod.SPIN)
+        with self.assertRaises(ValueError):
+            pm.as_feasible_configurations(configurations, 2, dimod.BINARY)
+
+        self.assertEqual(pm.as_feasible_configurations([(0, 0)], 2, dimod.BINARY),
+                         {(0, 0): 0.})
+
+    def test_roundtrip_all_configurations(self):
+        num_variables = 6
+        feasible_configurations = {config: float(idx) for idx, config
+                                   in enumerate(itertools.product((-1, 1), repeat=num_variables))}
+        configurations = pm.as_feasible_configurations(feasible_configurations,
+                                                       num_variables, dimod.SPIN)
+
+        # the mask of a configuration is its index in itertools.product
+        np.testing.assert_array_equal(configurations.masks, np.arange(2**num_variables))
+        self.assertEqual(list(configurations), list(feasible_configurations))
+        self.assertEqual(dict(configurations.items()), feasible_configurations)
+
+
+class TestSpecificationFeasibleConfigurations(unittest.TestCase):
+    def test_specification(self):
+        graph = nx.path_graph(3)
+        configurations = pm.FeasibleConfigurations([0, 7], [0., 0.], 3, dimod.SPIN)
+
+        spec = pm.Specification(graph, [0, 1, 2], configurations, dimod.SPIN)
+        self.assertIs(spec.feasible_configurations, configurations)
+        self.assertEqual(spec, pm.Specification(graph, [0, 1, 2],
+                                                {(-1, -1, -1): 0., (1, 1, 1): 0.}, dimod.SPIN))
+
+    def test_specification_bad(self):
+        graph = nx.path_graph(3)
+        configurations = pm.FeasibleConfigurations([0, 3], [0., 0.], 2, dimod.SPIN)
+
+        with self.assertRaises(ValueError):
+            pm.Specification(graph, [0, 1, 2], configurations, dimod.SPIN)
+        with self.assertRaises(ValueError):
+            pm.Specification(graph, [0, 1], configurations, dimod.BINARY)
+
+    def test_verify(self):
+        graph = nx.path_graph(3)
+        configurations = pm.FeasibleConfigurations([0, 7], [0., 0.], 3, dimod.SPIN)
+        spec = pm.Specification(graph, [0, 1, 2], configurations, dimod.SPIN)
+
+        bqm = dimod.BinaryQuadraticModel.from_ising({}, {(0, 1): -1, (1, 2): -1})
+        widget = pm.PenaltyModel.from_specification(spec, bqm, 2, -2)
+
+        result = widget.verify()
+        self.assertTrue(result.valid)
+        self.assertEqual(result.classical_gap, 2)
+        self.assertEqual(result.ground_energies, {(-1, -1, -1): -2., (1, 1, 1): -2.})
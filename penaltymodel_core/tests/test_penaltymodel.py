@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import pickle
 import unittest
 import random
 import itertools
@@ -47,6 +48,125 @@ class TestPenaltyModel(unittest.TestCase):
         # should result in equality
         self.assertEqual(pm0, pm1)
 
+    def test_from_specification(self):
+        graph = nx.path_graph(3)
+        spec = pm.Specification(graph, (0, 2), {(-1, -1), (1, 1)}, dimod.SPIN,
+                                ising_linear_ranges={1: (-1, 1)}, min_classical_gap=1)
+        model = dimod.BinaryQuadraticModel({v: 0 for v in graph}, {(0, 1): -1, (1, 2): -1},
+                                           0.0, dimod.SPIN)
+
+        widget = pm.PenaltyModel.from_specification(spec, model, 2., -2)
+
+        # the normalized specification is reused, not rebuilt
+        self.assertIs(widget.graph, spec.graph)
+        self.assertIs(widget.feasible_configurations, spec.feasible_configurations)
+        self.assertIs(widget.ising_linear_ranges, spec.ising_linear_ranges)
+        self.assertIs(widget.ising_quadratic_ranges, spec.ising_quadratic_ranges)
+        self.assertEqual(widget.min_classical_gap, 2.)
+        self.assertEqual(widget, pm.PenaltyModel(graph, (0, 2), {(-1, -1), (1, 1)}, dimod.SPIN,
+                                                 model, 2., -2))
+
+        # the model is still checked
+        with self.assertRaises(ValueError):
+            pm.PenaltyModel.from_specification(spec, model, 0, -2)
+        with self.assertRaises(TypeError):
+            pm.PenaltyModel.from_specification(spec, model, 2., 'a')
+        with self.assertRaises(ValueError):
+            pm.PenaltyModel.from_specification(
+                spec, dimod.BinaryQuadraticModel({0: 0, 1: 0}, {}, 0.0, dimod.SPIN), 2., -2)
+
+    def test_from_specification_binary(self):
+        graph = nx.path_graph(3)
+        spec = pm.Specification(graph, (0, 2), {(0, 0), (1, 1)}, dimod.BINARY)
+        model = dimod.BinaryQuadraticModel({v: 0 for v in graph}, {(0, 1): -1, (1, 2): -1},
+                                           0.0, dimod.SPIN)
+
+        widget = pm.PenaltyModel.from_specification(spec, model, 2., -2)
+        self.assertIs(widget.vartype, dimod.BINARY)
+        self.assertIs(widget.model.vartype, dimod.BINARY)
+
+    def test_fingerprint(self):
+        graph = nx.path_graph(3)
+        spec = pm.Specification(graph, (0, 2), {(-1, -1), (1, 1)}, dimod.SPIN)
+        model = dimod.BinaryQuadraticModel({v: 0 for v in graph}, {(0, 1): -1, (1, 2): -1},
+                                           0.0, dimod.SPIN)
+        widget = pm.PenaltyModel.from_specification(spec, model, 2., -2)
+
+        other = dimod.BinaryQuadraticModel({v: 0 for v in graph}, {(1, 2): -1, (1, 0): -1},
+                                           0.0, dimod.SPIN)
+        self.assertEqual(widget.fingerprint,
+                         pm.PenaltyModel.from_specification(spec, other, 2., -2).fingerprint)
+
+        weaker = dimod.BinaryQuadraticModel({v: 0 for v in graph}, {(0, 1): -.5, (1, 2): -.5},
+                                            0.0, dimod.SPIN)
+        self.assertNotEqual(widget.fingerprint,
+                            pm.PenaltyModel.from_specification(spec, weaker, 2., -2).fingerprint)
+        self.assertNotEqual(widget.fingerprint, spec.fingerprint)
+
+        # penalty models are hashable, consistently with their specification
+        self.assertEqual(hash(widget), hash(spec))
+        self.assertEqual(len({widget, pm.PenaltyModel.from_specification(spec, model, 2., -2)}), 1)
+
+        widget.relabel_variables({0: 'a'}, inplace=True)
+        self.assertEqual(widget.fingerprint, widget.relabel_variables({}, inplace=False).fingerprint)
+
+    def test_serialization(self):
+        graph = nx.path_graph(3)
+        spec = pm.Specification(graph, (0, 2), {(0, 0), (1, 1)}, dimod.BINARY)
+        model = dimod.BinaryQuadraticModel({0: .5, 1: 0, 2: -.5}, {(0, 1): -1, (1, 2): -1},
+                                           .25, dimod.SPIN)
+        widget = pm.PenaltyModel.from_specification(spec, model, 2., -1.75, optimal=False)
+
+        for new in [pm.PenaltyModel.from_bytes(widget.to_bytes()),
+                    pickle.loads(pickle.dumps(widget))]:
+            self.assertIs(type(new), pm.PenaltyModel)
+            self.assertEqual(new, widget)
+            self.assertEqual(new.model, widget.model)
+            self.assertIs(new.model.vartype, dimod.BINARY)
+            self.assertEqual(new.classical_gap, 2.)
+            self.assertEqual(new.ground_energy, -1.75)
+            self.assertFalse(new.optimal)
+            self.assertEqual(new.fingerprint, widget.fingerprint)
+
+        with self.assertRaises(ValueError):
+            pm.Specification.from_bytes(widget.to_bytes())
+
+    def test_serialization_sparse_model(self):
+        # the model has no interaction on some of the edges
+        graph = nx.complete_graph(['a', 'b', 'c'])
+        spec = pm.Specification(graph, ('a', 'c'), {(-1, -1), (1, 1)}, dimod.SPIN)
+        model = dimod.BinaryQuadraticModel({v: 0 for v in graph}, {('a', 'b'): -1, ('c', 'b'): -1},
+                                           0.0, dimod.SPIN)
+        widget = pm.PenaltyModel.from_specification(spec, model, 2., -2)
+
+        new = pm.PenaltyModel.from_bytes(widget.to_bytes())
+        self.assertEqual(new, widget)
+        self.assertEqual(len(new.model.quadratic), 2)
+
+    def test_serialization_built_when_read(self):
+        graph = nx.path_graph(3)
+        spec = pm.Specification(graph, (0, 2), {(-1, -1), (1, 1)}, dimod.SPIN)
+        model = dimod.BinaryQuadraticModel({0: .5, 1: 0, 2: -.5}, {(0, 1): -1, (1, 2): -1},
+                                           0.0, dimod.SPIN)
+        widget = pm.PenaltyModel.from_specification(spec, model, 2., -2)
+
+        new = pm.PenaltyModel.from_bytes(widget.to_bytes())
+        self.assertNotIn('model', vars(new))
+        self.assertEqual(new.model, model)
+        self.assertIn('model', vars(new))
+
+        # the model is built with the old labels and then relabelled
+        new = pm.PenaltyModel.from_bytes(widget.to_bytes())
+        new.relabel_variables({0: 2, 2: 0}, inplace=True)
+        self.assertEqual(new, widget.relabel_variables({0: 2, 2: 0}, inplace=False))
+        self.assertEqual(new.model, widget.relabel_variables({0: 2, 2: 0}, inplace=False).model)
+
+        # the biases are still checked against their ranges
+        widget.model = dimod.BinaryQuadraticModel({0: 3, 1: 0, 2: 0}, {(0, 1): -1, (1, 2): -1},
+                                                  0.0, dimod.SPIN)
+        with self.assertRaises(ValueError):
+            pm.PenaltyModel.from_bytes(widget.to_bytes())
+
     def test_relabel(self):
         graph = nx.path_graph(3)
         decision_variables = (0, 2)
@@ -77,6 +197,17 @@ class TestPenaltyModel(unittest.TestCase):
         self.assertEqual(widget, test_widget)
         self.assertEqual(widget.decision_variables, ('a', 2))
 
+    def test_optimal(self):
+        spec = pm.Specification(nx.path_graph(3), (0, 2), {(-1, -1): 0., (+1, +1): 0.}, dimod.SPIN)
+        model = dimod.BinaryQuadraticModel({0: 0, 1: 0, 2: 0}, {(0, 1): -1, (1, 2): -1}, 0.0, dimod.SPIN)
+
+        widget = pm.PenaltyModel.from_specification(spec, model, 2., -2)
+        self.assertTrue(widget.optimal)
+
+        widget = pm.PenaltyModel.from_specification(spec, model, 2., -2, optimal=False)
+        self.assertFalse(widget.optimal)
+        self.assertFalse(widget.relabel_variables({0: 'a'}, inplace=False).optimal)
+
     def test_bad_energy_range(self):
         graph = nx.path_graph(3)
         decision_variables = (0, 2)
@@ -149,3 +280,109 @@ class TestPenaltyModel(unittest.TestCase):
             pm.PenaltyModel(g1, ['a'], {(0, )}, vartype, bqm, 2, 0)
 
         pm.PenaltyModel(g2, ['a'], {(0, )}, vartype, bqm, 2, 0)
+
+
+class TestVerify(unittest.TestCase):
+    def test_path(self):
+        spec = pm.Specification(nx.path_graph(3), (0, 2), {(-1, -1): 0., (+1, +1): 0.}, dimod.SPIN)
+        model = dimod.BinaryQuadraticModel({0: 0, 1: 0, 2: 0}, {(0, 1): -1, (1, 2): -1}, 0.0, dimod.SPIN)
+        widget = pm.PenaltyModel.from_specification(spec, model, 2., -2)
+
+        verification = widget.verify()
+
+        self.assertTrue(verification.valid)
+        self.assertEqual(verification.ground_energies, {(-1, -1): -2., (+1, +1): -2.})
+        self.assertEqual(verification.ground_energy, -2.)
+        self.assertEqual(verification.classical_gap, 2.)
+
+    def test_overstated_gap(self):
+        spec = pm.Specification(nx.path_graph(3), (0, 2), {(-1, -1): 0., (+1, +1): 0.}, dimod.SPIN)
+        model = dimod.BinaryQuadraticModel({0: 0, 1: 0, 2: 0}, {(0, 1): -1, (1, 2): -1}, 0.0, dimod.SPIN)
+        widget = pm.PenaltyModel.from_specification(spec, model, 3., -2)
+
+        verification = widget.verify()
+
+        self.assertFalse(verification.valid)
+        self.assertEqual(verification.classical_gap, 2.)
+
+    def test_wrong_ground_states(self):
+        spec = pm.Specification(nx.path_graph(3), (0, 2), {(-1, +1): 0., (+1, -1): 0.}, dimod.SPIN)
+        model = dimod.BinaryQuadraticModel({0: 0, 1: 0, 2: 0}, {(0, 1): -1, (1, 2): -1}, 0.0, dimod.SPIN)
+        widget = pm.PenaltyModel.from_specification(spec, model, 2., -2)
+
+        verification = widget.verify()
+
+        self.assertFalse(verification.valid)
+        self.assertEqual(verification.classical_gap, -2.)
+
+    def test_relative_energies(self):
+        graph = nx.complete_graph(2)
+        spec = pm.Specification(graph, (0, 1), {(-1, -1): 0., (+1, +1): 1.}, dimod.SPIN)
+        model = dimod.BinaryQuadraticModel({0: .25, 1: .25}, {(0, 1): -1}, 0.0, dimod.SPIN)
+        widget = pm.PenaltyModel.from_specification(spec, model, .5, -1.5)
+
+        verification = widget.verify()
+
+        self.assertTrue(verification.valid)
+        self.assertEqual(verification.ground_energies, {(-1, -1): -1.5, (+1, +1): -.5})
+        self.assertEqual(verification.classical_gap, 1.5)
+
+        # the same energies for the other order are not consistent with the model
+        spec = pm.Specification(graph, (0, 1), {(-1, -1): 1., (+1, +1): 0.}, dimod.SPIN)
+        widget = pm.PenaltyModel.from_specification(spec, model, .5, -1.5)
+        self.assertFalse(widget.verify().valid)
+
+    def test_binary(self):
+        spec = pm.Specification(nx.path_graph(3), (0, 2), {(0, 0): 0., (1, 1): 0.}, dimod.BINARY)
+        model = dimod.BinaryQuadraticModel({0: 1, 1: 2, 2: 1}, {(0, 1): -2, (1, 2): -2}, 0.0, dimod.BINARY)
+        widget = pm.PenaltyModel.from_specification(spec, model, 1., 0)
+
+        verification = widget.verify()
+
+        self.assertTrue(verification.valid)
+        self.assertEqual(verification.ground_energies, {(0, 0): 0., (1, 1): 0.})
+        self.assertEqual(verification.classical_gap, 1.)
+
+    def test_all_feasible(self):
+        configurations = {config: 0. for config in itertools.product((-1, 1), repeat=2)}
+        spec = pm.Specification(nx.complete_graph(2), (0, 1), configurations, dimod.SPIN)
+        model = dimod.BinaryQuadraticModel({0: 0, 1: 0}, {(0, 1): 0}, 0.0, dimod.SPIN)
+        widget = pm.PenaltyModel.from_specification(spec, model, 2., 0)
+
+        verification = widget.verify()
+
+        self.assertTrue(verification.valid)
+        self.assertEqual(verification.classical_gap, float('inf'))
+
+    def test_brute_force(self):
+        rng = random.Random(5)
+        graph = nx.gnp_random_graph(9, .5, seed=5)
+        decision_variables = (6, 0, 3)
+        feasible_configurations = {config: 0. for config in itertools.product((-1, 1), repeat=3)
+                                   if rng.random() < .5}
+        feasible_configurations.setdefault((1, 1, 1), 0.)
+        linear = {v: rng.uniform(-2, 2) for v in graph}
+        quadratic = {edge: rng.uniform(-1, 1) for edge in graph.edges}
+        model = dimod.BinaryQuadraticModel(linear, quadratic, .5, dimod.SPIN)
+        widget = pm.PenaltyModel(graph, decision_variables, feasible_configurations, dimod.SPIN,
+                                 model, 1., 0,
+                                 ising_linear_ranges={v: [-2, 2] for v in graph})
+
+        auxiliary = [v for v in graph if v not in decision_variables]
+        energies = {}
+        for config in itertools.product((-1, 1), repeat=3):
+            energies[config] = min(model.energy(dict(zip(decision_variables + tuple(auxiliary),
+                                                         config + aux_config)))
+                                   for aux_config in itertools.product((-1, 1), repeat=len(auxiliary)))
+        highest_feasible = max(energies[config] for config in feasible_configurations)
+        lowest_infeasible = min(energy for config, energy in energies.items()
+                                if config not in feasible_configurations)
+
+        # a small chunk size splits both the decision and the auxiliary configurations
+        for chunk_size in (2**20, 4, 1):
+            verification = widget.verify(chunk_size=chunk_size)
+
+            for config in feasible_configurations:
+                self.assertAlmostEqual(verification.ground_energies[config], energies[config])
+            self.assertAlmostEqual(verification.ground_energy, min(energies.values()))
+            self.assertAlmostEqual(verification.classical_gap, lowest_infeasible - highest_feasible)
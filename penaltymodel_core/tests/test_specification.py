@@ -12,10 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import unittest
+import copy
 import itertools
+import pickle
+import unittest
 
 import networkx as nx
+import numpy as np
 
 import penaltymodel.core as pm
 
@@ -291,3 +294,206 @@ class TestSpecification(unittest.TestCase):
 
         with self.assertRaises(ValueError):
             spec.relabel_variables(mapping, inplace=True)
+
+
+class TestFingerprint(unittest.TestCase):
+    def test_stable(self):
+        spec = pm.Specification(nx.path_graph(3), (0, 2), {(-1, -1), (1, 1)}, dimod.SPIN)
+
+        # the fingerprint should never change between processes or versions
+        self.assertEqual(spec.fingerprint,
+                         '652ed54ab49059bd5f420b34057105ac6b7d2404ffe39a07256c5b2526ba3c3e')
+
+    def test_canonical(self):
+        graph = nx.Graph()
+        graph.add_edges_from([('b', 'c'), ('a', 'b'), (('d', 1), 'a')])
+        spec0 = pm.Specification(graph, ('a', ('d', 1)), {(0, 0): 1, (1, 1): .5}, dimod.BINARY,
+                                 ising_linear_ranges={'a': (-1, 1)})
+
+        graph = nx.Graph()
+        graph.add_edges_from([('a', ('d', 1)), ('c', 'b'), ('b', 'a')])
+        configurations = pm.FeasibleConfigurations([3, 0], [.5, 1.], 2, dimod.BINARY)
+        spec1 = pm.Specification(graph, ('a', ('d', 1)), configurations, dimod.BINARY,
+                                 ising_linear_ranges={'a': [-1., 1.]},
+                                 ising_quadratic_ranges={'b': {'a': [-1, 1]}})
+
+        self.assertEqual(spec0, spec1)
+        self.assertEqual(hash(spec0), hash(spec1))
+        self.assertEqual(spec0.fingerprint, spec1.fingerprint)
+        self.assertEqual({spec0: 'a'}[spec1], 'a')
+
+    def test_differences(self):
+        graph = nx.path_graph(3)
+        spec = pm.Specification(graph, (0, 2), {(-1, -1), (1, 1)}, dimod.SPIN)
+
+        others = [pm.Specification(graph, (2, 0), {(-1, -1), (1, 1)}, dimod.SPIN),
+                  pm.Specification(graph, (0, 2), {(-1, -1): 0, (1, 1): 1}, dimod.SPIN),
+                  pm.Specification(graph, (0, 2), {(-1, -1), (1, -1)}, dimod.SPIN),
+                  pm.Specification(nx.complete_graph(3), (0, 2), {(-1, -1), (1, 1)}, dimod.SPIN),
+                  pm.Specification(graph, (0, 2), {(0, 0), (1, 1)}, dimod.BINARY),
+                  pm.Specification(graph, (0, 2), {(-1, -1), (1, 1)}, dimod.SPIN,
+                                   ising_linear_ranges={1: [-1, 1]}),
+                  pm.Specification(graph, (0, 2), {(-1, -1), (1, 1)}, dimod.SPIN,
+                                   ising_quadratic_ranges={0: {1: [-1, 0]}}),
+                  pm.Specification(graph, (0, 2), {(-1, -1), (1, 1)}, dimod.SPIN,
+                                   min_classical_gap=1)]
+
+        fingerprints = {other.fingerprint for other in others}
+        self.assertEqual(len(fingerprints), len(others))
+        self.assertNotIn(spec.fingerprint, fingerprints)
+
+        # the ranges and gap are not compared by __eq__, so they do not change the hash
+        for other in others[-3:]:
+            self.assertEqual(spec, other)
+            self.assertEqual(hash(spec), hash(other))
+
+    def test_empty_configurations(self):
+        spin = pm.Specification(nx.path_graph(2), (0, 1), {}, dimod.SPIN)
+        binary = pm.Specification(nx.path_graph(2), (0, 1), {}, dimod.BINARY)
+
+        self.assertEqual(spin, binary)
+        self.assertEqual(hash(spin), hash(binary))
+        self.assertNotEqual(spin.fingerprint, binary.fingerprint)
+
+    def test_hash_ignores_vartype(self):
+        spin = pm.Specification(nx.path_graph(2), (0, 1), {(1, 1): 0.}, dimod.SPIN)
+        binary = pm.Specification(nx.path_graph(2), (0, 1), {(1, 1): 0.}, dimod.BINARY)
+
+        self.assertEqual(spin, binary)
+        self.assertEqual(hash(spin), hash(binary))
+
+    def test_hash_equal_labels(self):
+        ints = pm.Specification(nx.path_graph([0, 1, 2]), (0, 2), {(-1, -1), (1, 1)}, dimod.SPIN)
+        floats = pm.Specification(nx.path_graph([0., 1., 2.]), (0., 2.), {(-1, -1), (1, 1)},
+                                  dimod.SPIN)
+
+        self.assertEqual(ints, floats)
+        self.assertEqual(hash(ints), hash(floats))
+        self.assertEqual({ints: 'a'}[floats], 'a')
+
+    def test_relabel(self):
+        spec = pm.Specification(nx.path_graph(3), (0, 2), {(-1, -1), (1, 1)}, dimod.SPIN)
+        fingerprint = spec.fingerprint
+
+        copy = spec.relabel_variables({0: 'a'}, inplace=False)
+        self.assertNotEqual(copy.fingerprint, fingerprint)
+        self.assertEqual(spec.fingerprint, fingerprint)
+
+        spec.relabel_variables({0: 'a'}, inplace=True)
+        self.assertEqual(spec.fingerprint, copy.fingerprint)
+        self.assertEqual(hash(spec), hash(copy))
+
+        # through an intermediate labelling
+        spec.relabel_variables({'a': 1, 1: 'a'}, inplace=True)
+        self.assertEqual(spec.fingerprint,
+                         spec.relabel_variables({}, inplace=False).fingerprint)
+
+
+class TestSerialization(unittest.TestCase):
+    def assertRoundTrip(self, spec):
+        for new in [pm.Specification.from_bytes(spec.to_bytes()),
+                    pickle.loads(pickle.dumps(spec)),
+                    copy.deepcopy(spec)]:
+            self.assertIs(type(new), pm.Specification)
+            self.assertEqual(new, spec)
+            self.assertEqual(list(new.graph), list(spec.graph))
+            self.assertEqual(new.ising_linear_ranges, spec.ising_linear_ranges)
+            self.assertEqual(new.ising_quadratic_ranges, spec.ising_quadratic_ranges)
+            self.assertEqual(new.min_classical_gap, spec.min_classical_gap)
+            self.assertIs(new.vartype, spec.vartype)
+            self.assertEqual(new.fingerprint, spec.fingerprint)
+
+    def test_empty(self):
+        self.assertRoundTrip(pm.Specification(nx.Graph(), [], {}, dimod.SPIN))
+
+    def test_int_labels(self):
+        graph = nx.complete_graph(5)
+        graph.add_node(-2**40)
+        spec = pm.Specification(graph, (4, 0, 1), {(-1, -1, -1): 0., (1, 1, 1): .5}, dimod.SPIN,
+                                ising_linear_ranges={0: (-1, 1.5)},
+                                ising_quadratic_ranges={3: {1: [-.5, 0]}}, min_classical_gap=1)
+        self.assertRoundTrip(spec)
+
+    def test_json_labels(self):
+        graph = nx.Graph([('a', 'b'), ('b', ('c', (1, 2.5))), (True, 'a')])
+        spec = pm.Specification(graph, ('a', ('c', (1, 2.5))), {(0, 0), (1, 1)}, dimod.BINARY)
+        self.assertRoundTrip(spec)
+
+    def test_large_int_labels(self):
+        graph = nx.Graph([(-1, 'a'), ('a', 2**70)])
+        spec = pm.Specification(graph, ('a',), {(1,): 0}, dimod.BINARY)
+        self.assertRoundTrip(spec)
+
+    def test_unsupported_labels(self):
+        graph = nx.Graph([(frozenset([1]), 'a')])
+        spec = pm.Specification(graph, ('a',), {(1,): 0}, dimod.BINARY)
+        with self.assertRaises(ValueError):
+            spec.to_bytes()
+
+    def test_built_when_read(self):
+        spec = pm.Specification(nx.path_graph(3), (0, 2), {(-1, -1), (1, 1)}, dimod.SPIN)
+        new = pm.Specification.from_bytes(spec.to_bytes())
+
+        self.assertNotIn('graph', vars(new))
+        self.assertEqual(list(new.graph.edges), list(spec.graph.edges))
+        self.assertIn('graph', vars(new))
+
+        # the attributes can be set before they are read
+        new.ising_linear_ranges = {v: [-1, 1] for v in new.graph}
+        self.assertEqual(new.ising_linear_ranges[0], [-1, 1])
+        self.assertEqual(new.ising_quadratic_ranges, spec.ising_quadratic_ranges)
+
+    def test_pickle(self):
+        spec = pm.Specification(nx.path_graph(3), (0, 2), {(-1, -1): 0, (1, 1): 0}, dimod.SPIN)
+
+        # through to_bytes, which reads the configurations back as arrays
+        new = pickle.loads(pickle.dumps(spec))
+        self.assertEqual(new, spec)
+        self.assertIsInstance(new.feasible_configurations, pm.FeasibleConfigurations)
+
+        # unless it would lose an attribute of the graph or of the specification, or a label
+        spec.graph.add_edge(0, 1, weight=2)
+        self.assertEqual(pickle.loads(pickle.dumps(spec)).graph[0][1], {'weight': 2})
+
+        spec = pm.Specification(nx.path_graph(3), (0, 2), {(-1, -1): 0, (1, 1): 0}, dimod.SPIN)
+        spec.note = 'note'
+        self.assertEqual(copy.deepcopy(spec).note, 'note')
+
+        spec = pm.Specification(nx.Graph([(frozenset([1]), 'a')]), ('a',), {(1,): 0}, dimod.BINARY)
+        self.assertEqual(pickle.loads(pickle.dumps(spec)), spec)
+
+    def test_malformed_data(self):
+        spec = pm.Specification(nx.Graph([('a', 'b')]), ('a',), {(-1,), (1,)}, dimod.SPIN,
+                                ising_linear_ranges={'a': [-1, 1]})
+        data = spec.to_bytes()
+        labels = data.index(b'["a","b"]')
+        ranges = data.index(np.array([-1., 1.]).tobytes())
+
+        # the edge and decision variable are the single bytes after the labels
+        edge = labels + len(b'["a","b"]')
+        for bad in [data[:labels] + b'["a","a"]' + data[edge:],
+                    data[:labels] + b'["a",{ }]' + data[edge:],
+                    data[:labels] + b'{"a":"b"}' + data[edge:],
+                    data[:edge] + b'\x02' + data[edge + 1:],
+                    data[:edge + 2] + b'\x05' + data[edge + 3:],
+                    data[:ranges] + np.array([1., -1.]).tobytes() + data[ranges + 16:],
+                    data[:-1] + b'\x07']:
+            with self.assertRaises(ValueError):
+                pm.Specification.from_bytes(bad)
+
+    def test_bad_data(self):
+        spec = pm.Specification(nx.path_graph(3), (0, 2), {(-1, -1), (1, 1)}, dimod.SPIN)
+        data = spec.to_bytes()
+
+        with self.assertRaises(ValueError):
+            pm.Specification.from_bytes(data[:-1])
+        with self.assertRaises(ValueError):
+            pm.Specification.from_bytes(data + b'\x00')
+        with self.assertRaises(ValueError):
+            pm.Specification.from_bytes(b'PMSQ' + data[4:])
+        with self.assertRaises(ValueError):
+            pm.Specification.from_bytes(data[:4] + b'\x00' + data[5:])  # version
+        with self.assertRaises(ValueError):
+            pm.Specification.from_bytes(data[:6] + b'\x02' + data[7:])  # vartype
+        with self.assertRaises(ValueError):
+            pm.PenaltyModel.from_bytes(data)
@@ -0,0 +1,92 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Time building the constraints of the states not in the table.
+
+For a ferromagnet on a cycle with 8 to 20 decision variables, compare the
+previous enumeration, which tested every state from itertools.product against
+the list of table states and built the edge columns one at a time, with the
+bitmask enumeration used by generate_bqm. Generating the penalty model is timed
+as well, with every constraint up to 16 variables and with row generation
+throughout.
+
+Run with::
+
+    python benchmarks/enumeration.py
+
+"""
+from __future__ import print_function
+
+import itertools
+import time
+
+import networkx as nx
+import numpy as np
+
+from penaltymodel.lp.generation import (generate_bqm, _get_lp_matrix, _get_noted_mask,
+                                        _get_spin_states)
+
+
+def list_enumeration(noted_states, nodes, edges):
+    """The enumeration generate_bqm used before, with the edge columns built one at a time."""
+    unnoted_states = [state for state in itertools.product([-1, 1], repeat=len(nodes))
+                      if state not in noted_states]
+
+    spin_states = np.asarray(unnoted_states)
+    matrix = np.empty((len(spin_states), len(nodes) + len(edges) + 2))
+    matrix[:, :len(nodes)] = spin_states
+    node_indices = dict(zip(nodes, range(len(nodes))))
+    for j, (u, v) in enumerate(edges):
+        matrix[:, j + len(nodes)] = matrix[:, node_indices[u]] * matrix[:, node_indices[v]]
+    matrix[:, -2] = 1
+    matrix[:, -1] = -1
+    return -1 * matrix
+
+
+def bitmask_enumeration(noted_states, nodes, edges):
+    """The enumeration generate_bqm uses."""
+    unnoted_indices = np.flatnonzero(~_get_noted_mask(noted_states, len(nodes)))
+    return -1 * _get_lp_matrix(_get_spin_states(unnoted_indices, len(nodes)),
+                               nodes, edges, 1, -1)
+
+
+def timed(f, *args, **kwargs):
+    t = time.time()
+    f(*args, **kwargs)
+    return time.time() - t
+
+
+def main():
+    print('{:>6}{:>10}{:>10}{:>10}{:>10}'.format('nodes', 'list', 'bitmask', 'full', 'rowgen'))
+    for num_variables in range(8, 21, 2):
+        nodes = list(range(num_variables))
+        graph = nx.cycle_graph(nodes)
+        edges = list(graph.edges)
+        noted_states = [(-1,) * num_variables, (+1,) * num_variables]
+
+        listed = timed(list_enumeration, noted_states, nodes, edges)
+        bitmask = timed(bitmask_enumeration, noted_states, nodes, edges)
+
+        if num_variables <= 16:
+            full = '{:>10.3f}'.format(timed(generate_bqm, graph, noted_states, nodes))
+        else:
+            full = '{:>10}'.format('-')
+
+        rowgen = timed(generate_bqm, graph, noted_states, nodes, row_generation=True)
+
+        print('{:>6}{:>10.3f}{:>10.3f}{}{:>10.3f}'.format(num_variables, listed, bitmask, full,
+                                                        rowgen))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Time solving a batch of tables on the same graph.
+
+For complete graphs with 8 to 14 decision variables, 20 tables of three states
+each are solved with generate_bqm, one call each, and with a PreparedGraph, with
+and without warm starts. The tables either have random states, or the same
+states with random energies. The warm starts need highspy.
+
+Run with::
+
+    python benchmarks/prepared.py
+
+"""
+from __future__ import print_function
+
+import time
+
+import networkx as nx
+import numpy as np
+
+from penaltymodel.lp.generation import generate_bqm, _get_spin_states
+from penaltymodel.lp.prepared import PreparedGraph
+
+NUM_TABLES = 20
+
+
+def random_states(num_variables, random_state):
+    indices = random_state.choice(2**num_variables, 3, replace=False)
+    return [tuple(state) for state in _get_spin_states(indices, num_variables).tolist()]
+
+
+def random_tables(num_variables, random_state):
+    return [set(random_states(num_variables, random_state)) for _ in range(NUM_TABLES)]
+
+
+def random_energies(num_variables, random_state):
+    states = random_states(num_variables, random_state)
+    return [dict(zip(states, random_state.uniform(0, 1, len(states))))
+            for _ in range(NUM_TABLES)]
+
+
+def time_generate_bqm(graph, tables, decision):
+    t = time.time()
+    for table in tables:
+        try:
+            generate_bqm(graph, table, decision)
+        except ValueError:
+            pass
+    return time.time() - t
+
+
+def time_prepared(graph, tables, decision, warm_start):
+    t = time.time()
+    PreparedGraph(graph, decision, warm_start=warm_start).solve_batch(tables)
+    return time.time() - t
+
+
+def main():
+    random_state = np.random.RandomState(0)
+
+    print('{:<10}{:>6}{:>14}{:>10}{:>10}'.format(
+        'tables', 'nodes', 'generate_bqm', 'prepared', 'warm'))
+    for name, make_tables in [('states', random_tables), ('energies', random_energies)]:
+        for num_variables in range(8, 15, 2):
+            graph = nx.complete_graph(num_variables)
+            decision = list(graph)
+            tables = make_tables(num_variables, random_state)
+
+            print('{:<10}{:>6}{:>14.3f}{:>10.3f}{:>10.3f}'.format(
+                name, num_variables,
+                time_generate_bqm(graph, tables, decision),
+                time_prepared(graph, tables, decision, False),
+                time_prepared(graph, tables, decision, True)))
+
+
+if __name__ == '__main__':
+    main()
@@ -3,3 +3,6 @@ import penaltymodel.lp.generation
 
 from penaltymodel.lp.interface import *
 import penaltymodel.lp.interface
+
+from penaltymodel.lp.prepared import *
+import penaltymodel.lp.prepared
@@ -13,11 +13,20 @@
 # limitations under the License.
 
 import dimod
+from functools import partial
 from itertools import product
+import multiprocessing
 import numpy as np
-from scipy.linalg import LinAlgWarning
-from scipy.optimize import linprog, OptimizeWarning
-import warnings
+from scipy.linalg import qr
+from scipy.optimize import linprog, OptimizeResult
+from scipy.sparse import csr_matrix
+
+import penaltymodel.core as pm
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
 
 #TODO: put these values in a common penaltymodel folder
 MIN_LINEAR_BIAS = -2
@@ -73,12 +82,11 @@ def _get_lp_matrix(spin_states, nodes, edges, offset_weight, gap_weight):
         spin_states = np.expand_dims(spin_states, 1)
     matrix[:, :m_linear] = spin_states
 
-    # Populate quadratic terms
+    # Populate quadratic terms, all edges at once
     node_indices = dict(zip(nodes, range(m_linear)))
-    for j, (u, v) in enumerate(edges):
-        u_ind = node_indices[u]
-        v_ind = node_indices[v]
-        matrix[:, j + m_linear] = np.multiply(matrix[:, u_ind], matrix[:, v_ind])
+    u_ind = np.array([node_indices[u] for u, _ in edges], dtype=int)
+    v_ind = np.array([node_indices[v] for _, v in edges], dtype=int)
+    matrix[:, m_linear:m_linear + m_quadratic] = spin_states[:, u_ind] * spin_states[:, v_ind]
 
     # Populate offset and gap columns, respectively
     matrix[:, -2] = offset_weight
@@ -86,15 +94,378 @@ def _get_lp_matrix(spin_states, nodes, edges, offset_weight, gap_weight):
     return matrix
 
 
+def _get_bounds(nodes, edges, linear_energy_ranges, quadratic_energy_ranges, min_classical_gap):
+    """The bounds of the linear program's variables: the biases, the offset and the gap."""
+    linear_range = (MIN_LINEAR_BIAS, MAX_LINEAR_BIAS)
+    quadratic_range = (MIN_QUADRATIC_BIAS, MAX_QUADRATIC_BIAS)
+
+    bounds = [linear_energy_ranges.get(node, linear_range) for node in nodes]
+    bounds += [get_item(quadratic_energy_ranges, edge, quadratic_range) for edge in edges]
+
+    # Note: Since ising has {-1, 1}, the largest possible gap is [-largest_bias, largest_bias],
+    #   hence that 2 * sum(largest_biases)
+    max_gap = 2 * sum(max(abs(lbound), abs(ubound)) for lbound, ubound in bounds)
+    bounds.append((None, None))     # Bound for offset
+    bounds.append((min_classical_gap, max_gap))     # Bound for gap.
+    return bounds
+
+
+def _get_bqm(nodes, edges, x, bounds):
+    """The binary quadratic model of the solution x of the linear program, and its gap."""
+    # HiGHS only meets the bounds within its feasibility tolerance, clip the biases so that
+    # they are in their ranges exactly
+    lower = np.array([-np.inf if low is None else low for low, _ in bounds[:-2]], dtype=float)
+    upper = np.array([np.inf if high is None else high for _, high in bounds[:-2]], dtype=float)
+    x = np.concatenate((np.clip(x[:-2], lower, upper), x[-2:]))
+
+    # Split result
+    m_linear = len(nodes)
+    h = x[:m_linear]
+    j = x[m_linear:-2]
+    offset = x[-2]
+    gap = x[-1]
+
+    if gap <= 0:
+        raise ValueError('Penaltymodel-lp is unable to find a solution.')
+
+    # Create BQM
+    bqm = dimod.BinaryQuadraticModel.empty(dimod.SPIN)
+    bqm.add_variables_from((v, bias) for v, bias in zip(nodes, h))
+    bqm.add_interactions_from((u, v, bias) for (u, v), bias in zip(edges, j))
+    bqm.add_offset(offset)
+
+    return bqm, gap
+
+
+def _linprog(cost_weights, noted_matrix, noted_bound, unnoted_matrix, unnoted_bound, bounds):
+    """Solve the linear program with HiGHS, with the states in the table as equality
+    constraints and the other states as upper bound constraints."""
+    # Returns a Scipy OptimizeResult
+    if noted_matrix is not None:
+        noted_matrix = csr_matrix(noted_matrix)
+    if unnoted_matrix is not None:
+        unnoted_matrix = csr_matrix(unnoted_matrix)
+
+    return linprog(cost_weights, A_eq=noted_matrix, b_eq=noted_bound,
+                   A_ub=unnoted_matrix, b_ub=unnoted_bound, bounds=bounds, method='highs')
+
+
+def _remove_redundant_rows(matrix, bound):
+    """Remove the equality constraints that are linear combinations of the others.
+
+    The rows kept are chosen by a QR decomposition with column pivoting of the transpose of
+    matrix. The removed rows only follow from the kept ones if their bounds are the same
+    combination of the kept bounds, otherwise there is no solution.
+
+    Returns:
+        tuple: The kept rows of matrix and of bound, as a 1-D array.
+
+    Raises:
+        ValueError: If the equality constraints are inconsistent.
+    """
+    bound = np.ravel(bound).astype(float)
+
+    _, r, pivots = qr(matrix.T, mode='economic', pivoting=True)
+    diagonal = np.abs(np.diag(r))
+    tolerance = diagonal.max() * max(matrix.shape) * np.finfo(float).eps
+    rank = int((diagonal > tolerance).sum())
+    if rank == len(matrix):
+        return matrix, bound
+
+    if np.linalg.matrix_rank(np.column_stack((matrix, bound))) > rank:
+        raise ValueError('Penaltymodel-lp is unable to find a solution.')
+
+    keep = np.sort(pivots[:rank])
+    return matrix[keep], bound[keep]
+
+
+def _get_spin_states(indices, n_variables):
+    """The spin states with the given indices in product([-1, 1], repeat=n_variables), as the
+    rows of a numpy array."""
+    shifts = np.arange(n_variables - 1, -1, -1)
+    bits = (np.asarray(indices, dtype=np.int64)[:, np.newaxis] >> shifts) & 1
+    return 2 * bits - 1
+
+
+def _get_state_indices(states, n_variables):
+    """The index of each spin state in product([-1, 1], repeat=n_variables)."""
+    states = np.asarray(states).reshape(-1, n_variables)
+    shifts = np.arange(n_variables - 1, -1, -1)
+    return ((states > 0).astype(np.int64) << shifts).sum(axis=1)
+
+
+def _get_noted_mask(noted_indices, n_variables):
+    """A boolean array over the indices of the spin states, True for the states in the table.
+    """
+    mask = np.zeros(2**n_variables, dtype=bool)
+    mask[noted_indices] = True
+    return mask
+
+
+def _get_table(table, n_variables):
+    """The indices of the spin states in the table, sorted and without repeats, with their
+    energies and the highest energy. The bitmasks of a penaltymodel.FeasibleConfigurations
+    are the indices, so it is used directly."""
+    if isinstance(table, pm.FeasibleConfigurations):
+        table = pm.as_feasible_configurations(table, n_variables, dimod.SPIN)
+        indices, energies = table.masks.astype(np.int64), np.array(table.energies)
+    else:
+        states = list(table)
+        if isinstance(table, Mapping):
+            energies = np.asarray([table[state] for state in states], dtype=float)
+        else:
+            energies = np.zeros(len(states))
+        indices, first = np.unique(_get_state_indices(states, n_variables), return_index=True)
+        energies = energies[first]
+
+    highest_energy = energies.max() if len(energies) else 0
+    return indices, energies, highest_energy
+
+
+def _solve_with_row_generation(cost_weights, noted_matrix, noted_bound, bounds, noted_indices,
+                               nodes, edges, highest_energy, tolerance=1e-6, max_rows=256,
+                               chunk_size=2**16):
+    """Solve the linear program with only some of the constraints of the states not in the
+    table.
+
+    We start with the states one spin flip away from a state in the table, which are the ones
+    most likely to bound the gap. After each solve, the energies of all the states are
+    evaluated chunk_size at a time and the at most max_rows states whose constraints are
+    violated the most are added, until none are violated.
+    """
+    m_linear = len(nodes)
+
+    noted_mask = _get_noted_mask(noted_indices, m_linear)
+    noted = np.flatnonzero(noted_mask)
+
+    flips = 1 << np.arange(m_linear)
+    unnoted = set(np.unique(noted[:, np.newaxis] ^ flips).tolist()) - set(noted.tolist())
+
+    while True:
+        if unnoted:
+            unnoted_matrix = -1 * _get_lp_matrix(_get_spin_states(sorted(unnoted), m_linear),
+                                                 nodes, edges, 1, -1)
+            unnoted_bound = np.full((len(unnoted), 1), -1 * highest_energy)
+        else:
+            unnoted_matrix = unnoted_bound = None
+
+        result = _linprog(cost_weights, noted_matrix, noted_bound,
+                          unnoted_matrix, unnoted_bound, bounds)
+        if not result.success:
+            return result
+
+        # find the states that violate E(state) - gap >= highest_energy
+        slack = np.empty(0)
+        violated = np.empty(0, dtype=np.int64)
+        for start in range(0, 2**m_linear, chunk_size):
+            indices = np.arange(start, min(start + chunk_size, 2**m_linear))
+            energies = _get_lp_matrix(_get_spin_states(indices, m_linear),
+                                      nodes, edges, 1, 0).dot(result.x)
+            chunk_slack = energies - result.x[-1] - highest_energy
+
+            mask = (chunk_slack < -tolerance) & ~noted_mask[indices]
+
+            slack = np.concatenate((slack, chunk_slack[mask]))
+            violated = np.concatenate((violated, indices[mask]))
+            if len(violated) > max_rows:
+                most = np.argpartition(slack, max_rows)[:max_rows]
+                slack, violated = slack[most], violated[most]
+
+        # stop if the only violations are ones the solver's tolerance allows
+        new = set(violated.tolist()) - unnoted
+        if not new:
+            return result
+        unnoted.update(new)
+
+
+def _solve_with_auxiliary(cost_weights, bounds, noted_indices, noted_bound, highest_energy,
+                          nodes, edges, n_auxiliary, max_solves=256, num_workers=1, seed=None):
+    """Solve the linear program with auxiliary variables for the best assignment found of
+    the auxiliary variables in the ground state of each state in the table.
+
+    With the assignment fixed, the constraints are linear:
+        E(x, a(x)) = energy(x)  for x in the table
+        E(x, a) >= energy(x)  for x in the table and every a
+        E(x, a) - gap >= highest_energy  for x not in the table and every a
+    and the gap of the best assignment is the largest gap. If there are at most max_solves
+    assignments they are all tried. Otherwise they are searched in two phases.
+
+    The gap is often the same for all of the assignments that differ from a given one in a
+    single state, since the auxiliary variables' ground states are a threshold function of
+    the decision variables for any model, which an arbitrary assignment is not. So with half
+    of the linear programs, we start from the ground states under a model with each bias at a
+    random end of its range, and move to the ground states under the solution of each linear
+    program until they repeat. Then we climb from the best assignment so far, moving to the
+    best assignment that differs in one auxiliary variable of one state, and restart from
+    another random model's ground states at each local optimum until max_solves linear
+    programs have been solved. The gap is not bounded below while searching, so that the
+    assignments where it is too small can still be compared.
+
+    Returns:
+        :obj:`scipy.optimize.OptimizeResult`: The result of the best assignment, or one that
+        is not successful if none gives a gap of at least the minimum. Its `exhaustive` is
+        True if every assignment was tried, so that the gap is the largest possible.
+    """
+    m_linear = len(nodes)
+    m_decision = m_linear - n_auxiliary
+    n_aux_states = 2**n_auxiliary
+
+    # E(state) - gap * (x not in table) >= energy(x), flipped to an upper bound
+    target = np.full(2**m_decision, float(highest_energy))
+    target[noted_indices] = noted_bound
+    unnoted = np.ones(2**m_decision, dtype=bool)
+    unnoted[noted_indices] = False
+
+    # the upper bound constraints are the negated energy rows with this gap column
+    decision_index = np.arange(2**m_linear) >> n_auxiliary
+    energy_matrix = _get_lp_matrix(_get_spin_states(np.arange(2**m_linear), m_linear),
+                                   nodes, edges, 1, 0)
+    gap_column = unnoted[decision_index].astype(float)
+
+    search_bounds = list(bounds)
+    min_classical_gap, max_gap = search_bounds[-1]
+    search_bounds[-1] = (None, max_gap)
+
+    problem = (cost_weights, energy_matrix, gap_column, -target[decision_index],
+               search_bounds, noted_indices << n_auxiliary, noted_bound)
+
+    def score(x):
+        return -np.inf if x is None else x[-1]
+
+    solved = {}
+
+    def solve(assignments):
+        # solve the linear programs of the assignments not seen yet, within max_solves
+        assignments = [a for a in assignments if a not in solved]
+        assignments = list(dict.fromkeys(assignments))[:max_solves - len(solved)]
+        solved.update(zip(assignments, solve_map(_solve_aux_assignment, assignments)))
+
+    if num_workers == 1:
+        def solve_map(f, args):
+            return map(partial(f, problem=problem), args)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(num_workers, initializer=_set_aux_problem,
+                                    initargs=(problem,))
+        solve_map = pool.map
+
+    exhaustive = n_aux_states**len(noted_indices) <= max_solves
+    try:
+        if exhaustive:
+            solve(product(range(n_aux_states), repeat=len(noted_indices)))
+        else:
+            random_state = np.random.RandomState(seed)
+
+            # follow the ground states under each solution from random seeds, with at most
+            # half of the solves, the seeds can repeat so the restarts are bounded too
+            for _ in range(max_solves):
+                if len(solved) >= max_solves // 2:
+                    break
+                current = _get_random_assignment(random_state, energy_matrix, bounds,
+                                                 noted_indices, n_auxiliary)
+                while current not in solved and len(solved) < max_solves // 2:
+                    solve([current])
+                    x = solved[current]
+                    if x is None:
+                        break
+                    current = _get_ground_assignment(energy_matrix, x, noted_indices,
+                                                     n_auxiliary)
+
+            # then climb from the best of them, and from more seeds
+            current = max(solved, key=lambda n: score(solved[n]), default=None)
+            for _ in range(max_solves):
+                if current is None:
+                    current = _get_random_assignment(random_state, energy_matrix, bounds,
+                                                     noted_indices, n_auxiliary)
+                solve([current])
+                while len(solved) < max_solves:
+                    neighbours = [current[:i] + (a ^ (1 << k),) + current[i + 1:]
+                                  for i, a in enumerate(current) for k in range(n_auxiliary)]
+                    solve(neighbours)
+                    best = max((n for n in neighbours if n in solved),
+                               key=lambda n: score(solved[n]))
+                    if score(solved[best]) <= score(solved[current]):
+                        break
+                    current = best
+                if len(solved) >= max_solves:
+                    break
+                current = None
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    x = max(solved.values(), key=score)
+    success = x is not None and x[-1] >= min_classical_gap
+    return OptimizeResult(x=x, success=success, exhaustive=exhaustive)
+
+
+def _get_ground_assignment(energy_matrix, x, noted_indices, n_auxiliary):
+    """The index of the ground state of the auxiliary variables for each state in the table,
+    under the model x."""
+    energies = energy_matrix.dot(x).reshape(-1, 2**n_auxiliary)
+    return tuple(energies[noted_indices].argmin(axis=1).tolist())
+
+
+def _get_random_assignment(random_state, energy_matrix, bounds, noted_indices, n_auxiliary):
+    """The ground state assignment under a model with each bias at a random end of its
+    range."""
+    x = np.zeros(len(bounds))
+    for i, (low, high) in enumerate(bounds[:-2]):
+        x[i] = high if random_state.randint(2) else low
+    return _get_ground_assignment(energy_matrix, x, noted_indices, n_auxiliary)
+
+
+# The problem solved by _solve_aux_assignment in the processes of a pool
+_aux_problem = None
+
+
+def _set_aux_problem(problem):
+    global _aux_problem
+    _aux_problem = problem
+
+
+def _solve_aux_assignment(assignment, problem=None):
+    """Solve the linear program of _solve_with_auxiliary for the given index of the auxiliary
+    variables' states in the ground state of each state in the table.
+
+    Returns:
+        :obj:`numpy.ndarray`/None: The solution, or None if there is none.
+    """
+    if problem is None:
+        problem = _aux_problem
+    cost_weights, energy_matrix, gap_column, bound, bounds, noted_rows, noted_bound = problem
+
+    rows = noted_rows | np.asarray(assignment, dtype=np.int64)
+    unnoted = np.ones(len(energy_matrix), dtype=bool)
+    unnoted[rows] = False
+
+    try:
+        noted_matrix, noted_bound = _remove_redundant_rows(energy_matrix[rows], noted_bound)
+    except ValueError:
+        return None
+
+    unnoted_matrix = -1 * energy_matrix[unnoted]
+    unnoted_matrix[:, -1] = gap_column[unnoted]
+
+    result = _linprog(cost_weights, noted_matrix, noted_bound,
+                      unnoted_matrix, bound[unnoted], bounds)
+    return result.x if result.success else None
+
+
 #TODO: check table is not empty (perhaps this check should be in bqm.stitch or as a common
 # penaltymodel check)
 def generate_bqm(graph, table, decision_variables,
-                 linear_energy_ranges=None, quadratic_energy_ranges=None, min_classical_gap=2):
+                 linear_energy_ranges=None, quadratic_energy_ranges=None, min_classical_gap=2,
+                 row_generation=False, max_solves=256, num_workers=1, seed=None,
+                 max_variables=10, info=None):
     """
     Args:
         graph: A networkx.Graph
         table: An iterable of valid spin configurations. Each configuration is a tuple of
-            variable assignments ordered by `decision`.
+            variable assignments ordered by `decision`. Or a dict mapping them to their
+            energies, or a spin-valued penaltymodel.FeasibleConfigurations, whose arrays are
+            used directly.
         decision_variables: An ordered iterable of the variables in the binary quadratic model.
         linear_energy_ranges: Dictionary of the form {v: (min, max), ...} where min and
             max are the range of values allowed to v. The default range is [-2, 2].
@@ -102,11 +473,30 @@ def generate_bqm(graph, table, decision_variables,
             the range of values allowed to (u, v). The default range is [-1, 1].
         min_classical_gap: A float. The minimum energy gap between the highest feasible state and
             the lowest infeasible state.
+        row_generation: A bool. If True, rather than writing a constraint for every state not in
+            the table, start with the states next to the table's and repeatedly add the states
+            whose constraints are violated by the solution, until there are none. The states
+            are then only enumerated to evaluate their energies, in bounded memory. Only used
+            without auxiliary variables.
+        max_solves: An int. With auxiliary variables, the most linear programs solved, each for
+            one assignment of the auxiliary variables in the ground states of the feasible
+            configurations. If there are no more assignments than this they are all tried,
+            otherwise they are searched, see _solve_with_auxiliary.
+        num_workers: An int. With auxiliary variables, the number of processes that solve the
+            linear programs. If 1, they are solved in this process.
+        seed: An int. With auxiliary variables, the seed of the random models that the search
+            starts from.
+        max_variables: An int. With auxiliary variables, the most variables allowed. Each of
+            the linear programs has a constraint for every state of all the variables, so
+            larger graphs are refused before anything is built.
+        info: A dict. If provided, it is populated with 'optimal', False if the gap may not
+            be the largest possible because the assignments of the auxiliary variables were
+            searched rather than all tried.
+
+    The variables of the graph that are not in `decision_variables` are auxiliary variables.
+    With them, the model found is the best for the assignments tried, so its gap may not be
+    the largest possible.
     """
-    # Check for auxiliary variables in the graph
-    if len(graph) != len(decision_variables):
-        raise ValueError('Penaltymodel-lp does not handle problems with auxiliary variables')
-
     if not linear_energy_ranges:
         linear_energy_ranges = {}
 
@@ -114,87 +504,68 @@ def generate_bqm(graph, table, decision_variables,
         quadratic_energy_ranges = {}
 
     # Simplify graph naming
-    # Note: nodes' and edges' order determine the column order of the LP
-    nodes = decision_variables
+    # Note: nodes' and edges' order determine the column order of the LP, with the auxiliary
+    #   variables after the decision variables
+    auxiliary = [v for v in graph if v not in decision_variables]
+    nodes = list(decision_variables) + auxiliary
     edges = graph.edges
 
     # Set variable names for lengths
     m_linear = len(nodes)                   # Number of linear biases
     m_quadratic = len(edges)                # Number of quadratic biases
-    n_noted = len(table)                    # Number of spin combinations specified in the table
-    n_unnoted = 2**m_linear - n_noted       # Number of spin combinations that were not specified
-
-    # Linear programming matrix for spin states specified by 'table'
-    noted_states = table.keys() if isinstance(table, dict) else table
-    noted_states = list(noted_states)
-    noted_matrix = _get_lp_matrix(np.asarray(noted_states), nodes, edges, 1, 0)
-
-    # Linear programming matrix for spins states that were not specified by 'table'
-    spin_states = product([-1, 1], repeat=m_linear) if m_linear > 1 else [-1, 1]
-    unnoted_states = [state for state in spin_states if state not in noted_states]
-    unnoted_matrix = _get_lp_matrix(np.asarray(unnoted_states), nodes, edges, 1, -1)
-    if unnoted_matrix is not None:
-        unnoted_matrix *= -1   # Taking negative in order to flip the inequality
 
-    # Constraints
-    if isinstance(table, dict):
-        noted_bound = np.asarray([table[state] for state in noted_states])
-        unnoted_bound = np.full((n_unnoted, 1), -1 * max(table.values()))  # -1 for flipped inequality
-    else:
-        noted_bound = np.zeros((n_noted, 1))
-        unnoted_bound = np.zeros((n_unnoted, 1))
+    if auxiliary and m_linear > max_variables:
+        raise ValueError("Penaltymodel-lp with auxiliary variables is limited to {} variables, "
+                         "the graph has {}".format(max_variables, m_linear))
 
-    # Bounds
-    linear_range = (MIN_LINEAR_BIAS, MAX_LINEAR_BIAS)
-    quadratic_range = (MIN_QUADRATIC_BIAS, MAX_QUADRATIC_BIAS)
+    # Spin states specified by 'table', by their index in product([-1, 1], repeat=m_decision),
+    # and the constraints on their energies
+    noted_indices, noted_bound, highest_energy = _get_table(table, len(decision_variables))
 
-    bounds = [linear_energy_ranges.get(node, linear_range) for node in nodes]
-    bounds += [get_item(quadratic_energy_ranges, edge, quadratic_range) for edge in edges]
-
-    # Note: Since ising has {-1, 1}, the largest possible gap is [-largest_bias, largest_bias],
-    #   hence that 2 * sum(largest_biases)
-    max_gap = 2 * sum(max(abs(lbound), abs(ubound)) for lbound, ubound in bounds)
-    bounds.append((None, None))     # Bound for offset
-    bounds.append((min_classical_gap, max_gap))     # Bound for gap.
+    # Bounds
+    bounds = _get_bounds(nodes, edges, linear_energy_ranges, quadratic_energy_ranges,
+                         min_classical_gap)
 
     # Cost function
     cost_weights = np.zeros((1, m_linear + m_quadratic + 2))
     cost_weights[0, -1] = -1     # Only interested in maximizing the gap
 
-    # Returns a Scipy OptimizeResult
-    # Note: if linear program encounters an ill conditioned matrix or non-full-row-rank matrix,
-    #   rather than let it continue, just fail and allow the next penaltymodel to make an attempt.
-    #   This is just a quick fix as I worry that the warnings could indicate an unreliable
-    #   solution. Note that non-full-row-rank matrix is probably okay, but I feel more comfortable
-    #   failing early and getting a reliable solution from another penaltymodel than from
-    #   simply suppressing the non-full-row-rank matrix warning.
-    # TODO: address warnings by preconditioning the matrix and factorizing the matrix
-    with warnings.catch_warnings():
-        warnings.filterwarnings("error")
-        try:
-            result = linprog(cost_weights.flatten(), A_eq=noted_matrix, b_eq=noted_bound,
-                             A_ub=unnoted_matrix, b_ub=unnoted_bound, bounds=bounds)
-        except (OptimizeWarning, LinAlgWarning) as e:
-            raise ValueError('Penaltymodel-lp has a bad matrix')
+    if auxiliary:
+        result = _solve_with_auxiliary(cost_weights.flatten(), bounds, noted_indices,
+                                       noted_bound, highest_energy, nodes, edges,
+                                       len(auxiliary), max_solves=max_solves,
+                                       num_workers=num_workers, seed=seed)
+    else:
+        # Linear programming matrix for spin states specified by 'table'. The states can give
+        # dependent equality constraints, which HiGHS is given without the redundant ones
+        noted_matrix = _get_lp_matrix(_get_spin_states(noted_indices, m_linear), nodes, edges, 1, 0)
+        if noted_matrix is not None:
+            noted_matrix, noted_bound = _remove_redundant_rows(noted_matrix, noted_bound)
+
+        if row_generation:
+            result = _solve_with_row_generation(cost_weights.flatten(), noted_matrix,
+                                                noted_bound, bounds, noted_indices, nodes, edges,
+                                                highest_energy)
+        else:
+            # Linear programming matrix for spins states that were not specified by 'table',
+            # with the states enumerated by their index in product([-1, 1], repeat=m_linear)
+            unnoted_indices = np.flatnonzero(~_get_noted_mask(noted_indices, m_linear))
+            unnoted_matrix = _get_lp_matrix(_get_spin_states(unnoted_indices, m_linear),
+                                            nodes, edges, 1, -1)
+            if unnoted_matrix is not None:
+                unnoted_matrix *= -1   # Taking negative in order to flip the inequality
+
+            # -1 for flipped inequality
+            unnoted_bound = np.full((len(unnoted_indices), 1), -1 * highest_energy)
+
+            result = _linprog(cost_weights.flatten(), noted_matrix, noted_bound,
+                              unnoted_matrix, unnoted_bound, bounds)
 
     # Unable to find a solution
     if not result.success:
         raise ValueError('Penaltymodel-lp is unable to find a solution.')
 
-    # Split result
-    x = result.x
-    h = x[:m_linear]
-    j = x[m_linear:-2]
-    offset = x[-2]
-    gap = x[-1]
-
-    if gap <= 0:
-        raise ValueError('Penaltymodel-lp is unable to find a solution.')
-
-    # Create BQM
-    bqm = dimod.BinaryQuadraticModel.empty(dimod.SPIN)
-    bqm.add_variables_from((v, bias) for v, bias in zip(nodes, h))
-    bqm.add_interactions_from((u, v, bias) for (u, v), bias in zip(edges, j))
-    bqm.add_offset(offset)
+    if info is not None:
+        info['optimal'] = not auxiliary or result.exhaustive
 
-    return bqm, gap
+    return _get_bqm(nodes, edges, result.x, bounds)
@@ -14,8 +14,6 @@
 
 import dimod
 
-from six import iteritems
-
 import penaltymodel.core as pm
 
 from penaltymodel.lp.generation import generate_bqm
@@ -41,23 +39,31 @@ def get_penalty_model(specification):
         priority (int): -100
 
     """
-    # check that the feasible_configurations are spin
-    feasible_configurations = specification.feasible_configurations
-    if specification.vartype is dimod.BINARY:
-        feasible_configurations = {tuple(2 * v - 1 for v in config): en
-                                   for config, en in iteritems(feasible_configurations)}
+    # the feasible configurations as spin-valued arrays, the masks are the same for both vartypes
+    feasible_configurations = pm.as_feasible_configurations(specification.feasible_configurations,
+                                                            len(specification.decision_variables),
+                                                            specification.vartype)
+    feasible_configurations = feasible_configurations.change_vartype(dimod.SPIN)
 
     # convert ising_quadratic_ranges to the form we expect
     ising_quadratic_ranges = specification.ising_quadratic_ranges
     quadratic_ranges = {(u, v): ising_quadratic_ranges[u][v] for u, v in specification.graph.edges}
 
+    info = {}
     try:
         bqm, gap = generate_bqm(specification.graph, feasible_configurations,
                                 specification.decision_variables,
                                 linear_energy_ranges=specification.ising_linear_ranges,
                                 quadratic_energy_ranges=quadratic_ranges,
-                                min_classical_gap=specification.min_classical_gap)
+                                min_classical_gap=specification.min_classical_gap,
+                                info=info)
     except ValueError:
         raise pm.exceptions.FactoryException("Specification is for too large of a model")
 
-    return pm.PenaltyModel.from_specification(specification, bqm, gap, 0.0)
+    # with auxiliary variables the gap is only the best of the assignments tried
+    try:
+        return pm.PenaltyModel.from_specification(specification, bqm, gap, 0.0,
+                                                  optimal=info['optimal'])
+    except ValueError as err:
+        raise pm.exceptions.FactoryException(
+            "Penaltymodel-lp found a model that does not meet the specification: {}".format(err))
@@ -0,0 +1,197 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import numpy as np
+
+from penaltymodel.lp.generation import (_get_bounds, _get_bqm, _get_lp_matrix,
+                                        _get_noted_mask, _get_spin_states, _get_table,
+                                        _linprog, _remove_redundant_rows)
+
+try:
+    import highspy
+except ImportError:
+    highspy = None
+
+__all__ = ['PreparedGraph']
+
+
+class PreparedGraph(object):
+    """A linear program for the tables of one graph and set of decision variables.
+
+    The energy of every spin state is precomputed as a row of the constraint matrix, and each
+    table only selects which rows are equality constraints. See :func:`.generate_bqm` for the
+    linear program.
+
+    Args:
+        graph: A networkx.Graph, with no variables other than the decision variables.
+        decision_variables: An ordered iterable of the variables in the binary quadratic model.
+        linear_energy_ranges: Dictionary of the form {v: (min, max), ...} where min and
+            max are the range of values allowed to v. The default range is [-2, 2].
+        quadratic_energy_ranges: Dict of the form {(u, v): (min, max), ...} where min and max are
+            the range of values allowed to (u, v). The default range is [-1, 1].
+        min_classical_gap: A float. The minimum energy gap between the highest feasible state and
+            the lowest infeasible state.
+        warm_start: A bool. If True, the linear program is kept in a HiGHS instance, through
+            highspy, and each table is solved starting from the basis of the previous one.
+            That is much faster when consecutive tables are similar, for instance the same
+            states with different energies, but can be slower when they are unrelated. If
+            False, each table is solved from scratch with scipy.
+
+    Examples:
+        >>> import networkx as nx
+        >>> import penaltymodel.lp as lp
+        >>> prepared = lp.PreparedGraph(nx.complete_graph(3), [0, 1, 2])
+        >>> bqm, gap = prepared.solve({(-1, -1, -1), (-1, 1, -1), (1, -1, -1), (1, 1, 1)})
+        >>> gap > 0
+        True
+
+    """
+    def __init__(self, graph, decision_variables, linear_energy_ranges=None,
+                 quadratic_energy_ranges=None, min_classical_gap=2, warm_start=False):
+        if len(graph) != len(decision_variables):
+            raise ValueError('PreparedGraph does not handle problems with auxiliary variables')
+
+        if warm_start and highspy is None:
+            raise ValueError('warm starts require highspy')
+
+        self.nodes = nodes = list(decision_variables)
+        self.edges = edges = list(graph.edges)
+        self.bounds = _get_bounds(nodes, edges, linear_energy_ranges or {},
+                                  quadratic_energy_ranges or {}, min_classical_gap)
+
+        # the energy of each state, by its index in product([-1, 1], repeat=len(nodes)), with
+        # a column for the gap left at 0
+        self.energy_matrix = _get_lp_matrix(_get_spin_states(np.arange(2**len(nodes)),
+                                                             len(nodes)),
+                                            nodes, edges, 1, 0)
+
+        self.cost_weights = np.zeros(self.energy_matrix.shape[1])
+        self.cost_weights[-1] = -1     # Only interested in maximizing the gap
+
+        self._highs = self._build_highs() if warm_start else None
+
+    def _build_highs(self):
+        highs = highspy.Highs()
+        highs.setOptionValue('output_flag', False)
+
+        inf = highspy.kHighsInf
+        lower = np.array([-inf if low is None else low for low, _ in self.bounds], dtype=float)
+        upper = np.array([inf if high is None else high for _, high in self.bounds], dtype=float)
+        num_columns = len(self.bounds)
+        highs.addVars(num_columns, lower, upper)
+        highs.changeColsCost(num_columns, np.arange(num_columns, dtype=np.int32),
+                             self.cost_weights)
+
+        # every state starts out of the table: E(state) - gap >= 0
+        matrix = self.energy_matrix.copy()
+        matrix[:, -1] = -1
+        num_rows = len(matrix)
+        highs.addRows(num_rows, np.zeros(num_rows), np.full(num_rows, inf),
+                      matrix.size,
+                      np.arange(0, matrix.size, num_columns, dtype=np.int32),
+                      np.tile(np.arange(num_columns, dtype=np.int32), num_rows),
+                      matrix.ravel())
+
+        self._noted = np.zeros(num_rows, dtype=bool)
+        self._lower = np.zeros(num_rows)
+        self._upper = np.full(num_rows, inf)
+        return highs
+
+    def solve(self, table):
+        """Find the binary quadratic model with the largest gap for a table.
+
+        Args:
+            table: An iterable of valid spin configurations, ordered by `decision_variables`,
+                or a dict mapping them to their energies, or a spin-valued
+                penaltymodel.FeasibleConfigurations.
+
+        Returns:
+            tuple: The binary quadratic model and its gap.
+
+        Raises:
+            ValueError: If there is no model for the table.
+
+        """
+        noted_indices, noted_bound, highest_energy = _get_table(table, len(self.nodes))
+        noted_mask = _get_noted_mask(noted_indices, len(self.nodes))
+
+        if self._highs is not None:
+            x = self._solve_highs(noted_indices, noted_bound, noted_mask, highest_energy)
+        else:
+            x = self._solve_scipy(noted_indices, noted_bound, noted_mask, highest_energy)
+
+        if x is None:
+            raise ValueError('Penaltymodel-lp is unable to find a solution.')
+
+        return _get_bqm(self.nodes, self.edges, x, self.bounds)
+
+    def solve_batch(self, tables):
+        """Find the binary quadratic models with the largest gap for many tables, one after
+        the other, each warm started from the previous if `warm_start`.
+
+        Args:
+            tables: An iterable of tables, see :meth:`solve`.
+
+        Returns:
+            list: The binary quadratic model and its gap for each table, or None for the
+            tables that have no model.
+
+        """
+        results = []
+        for table in tables:
+            try:
+                results.append(self.solve(table))
+            except ValueError:
+                results.append(None)
+        return results
+
+    def _solve_scipy(self, noted_indices, noted_bound, noted_mask, highest_energy):
+        noted_matrix = self.energy_matrix[noted_indices]
+        if len(noted_matrix):
+            noted_matrix, noted_bound = _remove_redundant_rows(noted_matrix, noted_bound)
+        else:
+            noted_matrix = noted_bound = None
+
+        # -(E(state) - gap) <= -highest_energy for the states not in the table
+        unnoted_matrix = -1 * self.energy_matrix[~noted_mask]
+        unnoted_matrix[:, -1] = 1
+        unnoted_bound = np.full(len(unnoted_matrix), -1. * highest_energy)
+        if not len(unnoted_matrix):
+            unnoted_matrix = unnoted_bound = None
+
+        result = _linprog(self.cost_weights, noted_matrix, noted_bound,
+                          unnoted_matrix, unnoted_bound, self.bounds)
+        return result.x if result.success else None
+
+    def _solve_highs(self, noted_indices, noted_bound, noted_mask, highest_energy):
+        highs = self._highs
+        gap_column = len(self.bounds) - 1
+
+        # E(state) = energy for the states in the table, E(state) - gap >= highest_energy for
+        # the rest. Only the rows that differ from the previous table are changed, so that
+        # HiGHS keeps its basis
+        lower = np.full(len(noted_mask), float(highest_energy))
+        upper = np.full(len(noted_mask), highspy.kHighsInf)
+        lower[noted_indices] = upper[noted_indices] = noted_bound
+
+        for row in np.flatnonzero(noted_mask != self._noted).tolist():
+            highs.changeCoeff(row, gap_column, 0. if noted_mask[row] else -1.)
+        for row in np.flatnonzero((lower != self._lower) | (upper != self._upper)).tolist():
+            highs.changeRowBounds(row, lower[row], upper[row])
+        self._noted, self._lower, self._upper = noted_mask, lower, upper
+
+        highs.run()
+        if highs.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+            return None
+        return np.array(highs.getSolution().col_value)
@@ -8,8 +8,8 @@ exec(open("./penaltymodel/lp/package_info.py").read())
 FACTORY_ENTRYPOINT = 'penaltymodel_factory'
 
 install_requires = ['dimod>=0.6.0,<0.10.0',
-                    'penaltymodel>=0.16.0,<0.17.0',
-                    'scipy>=0.15.0,<2.0.0',
+                    'penaltymodel>=0.17.0,<0.18.0',
+                    'scipy>=1.6.0,<2.0.0',
                     'numpy>=1.15.3,<2.0.0',
                     ]
 
@@ -23,12 +23,10 @@ classifiers = [
     'Operating System :: Microsoft :: Windows',
     'Operating System :: POSIX :: Linux',
     'Programming Language :: Python :: 3',
-    'Programming Language :: Python :: 3.5',
-    'Programming Language :: Python :: 3.6',
     'Programming Language :: Python :: 3.7',
     ]
 
-python_requires = '>=3.5,!=3.0.*,!=3.1.*,!=3.2.*,!=3.3.*,!=3.4.*'
+python_requires = '>=3.7'
 
 setup(
     name="penaltymodel-lp",
@@ -43,6 +41,7 @@ setup(
     classifiers=classifiers,
     python_requires=python_requires,
     install_requires=install_requires,
+    extras_require={'highs': ['highspy>=1.5.3']},
     entry_points={FACTORY_ENTRYPOINT: ['lp = penaltymodel.lp:get_penalty_model']},
     zip_safe=False
 )
@@ -14,12 +14,12 @@
 
 from itertools import product
 import unittest
-from unittest.mock import patch
-from scipy.optimize import OptimizeWarning
-from scipy.linalg import LinAlgWarning
 
+import dimod
 import networkx as nx
+import numpy as np
 
+import penaltymodel.core as pm
 import penaltymodel.lp as lp
 
 
@@ -185,6 +185,164 @@ class TestPenaltyModelLinearProgramming(unittest.TestCase):
         energy = bqm.energy({'a': -1, 'b': -1})
         self.assertAlmostEqual(3, energy)
 
+    def test_row_generation(self):
+        nodes = ['a', 'b', 'c']
+        and_gate_set = {(-1, -1, -1), (-1, 1, -1), (1, -1, -1), (1, 1, 1)}
+        bqm, gap = lp.generate_bqm(nx.complete_graph(nodes), and_gate_set, nodes,
+                                   row_generation=True)
+
+        self.assertGreater(gap, 0)
+        self.verify_gate_bqm(bqm, nodes, min)
+
+    def test_row_generation_ferromagnet(self):
+        # the gap should match the one found with every constraint
+        nodes = list(range(10))
+        graph = nx.path_graph(nodes)
+        values = {(-1,) * len(nodes): 0, (1,) * len(nodes): 0}
+
+        bqm, gap = lp.generate_bqm(graph, values, nodes)
+        rg_bqm, rg_gap = lp.generate_bqm(graph, values, nodes, row_generation=True)
+
+        self.assertAlmostEqual(gap, rg_gap)
+        for state in product([-1, 1], repeat=len(nodes)):
+            spin_state = dict(zip(nodes, state))
+            energy = rg_bqm.energy(spin_state)
+            if state in values:
+                self.assertAlmostEqual(energy, 0)
+            else:
+                self.assertGreaterEqual(round(energy, 7), rg_gap)
+
+    def test_row_generation_impossible_bqm(self):
+        nodes = ['a', 'b', 'c']
+        xor_gate_values = {(-1, -1, -1), (-1, 1, 1), (1, -1, 1), (1, 1, -1)}
+
+        with self.assertRaises(ValueError):
+            lp.generate_bqm(nx.complete_graph(nodes), xor_gate_values, nodes,
+                            row_generation=True)
+
+    def test_single_variable(self):
+        bqm, gap = lp.generate_bqm(nx.complete_graph(['a']), {(1,)}, ['a'])
+
+        self.assertGreater(gap, 0)
+        self.assertAlmostEqual(bqm.energy({'a': 1}), 0)
+        self.assertGreaterEqual(round(bqm.energy({'a': -1}), 7), gap)
+
+    def test_state_enumeration(self):
+        # the states are enumerated by index in the order of product([-1, 1], repeat=n)
+        states = list(product([-1, 1], repeat=5))
+        indices = lp.generation._get_state_indices(states, 5)
+
+        self.assertEqual(indices.tolist(), list(range(32)))
+        self.assertEqual(lp.generation._get_spin_states(indices, 5).tolist(),
+                         [list(state) for state in states])
+
+    def verify_auxiliary_bqm(self, bqm, gap, decision_variables, table):
+        """Check the lowest energy of each decision state, over the auxiliary variables."""
+        auxiliary = [v for v in bqm.variables if v not in decision_variables]
+
+        for state in product([-1, 1], repeat=len(decision_variables)):
+            energy = min(bqm.energy(dict(zip(decision_variables + auxiliary, state + aux)))
+                         for aux in product([-1, 1], repeat=len(auxiliary)))
+            if state in table:
+                self.assertAlmostEqual(energy, 0)
+            else:
+                self.assertGreaterEqual(round(energy, 7), round(gap, 7))
+
+    def test_auxiliary(self):
+        # every assignment of the auxiliary variable is tried
+        and_gate_set = {(-1, -1, -1), (-1, 1, -1), (1, -1, -1), (1, 1, 1)}
+        graph = nx.complete_graph(4)
+        info = {}
+        bqm, gap = lp.generate_bqm(graph, and_gate_set, [0, 1, 2], info=info)
+
+        self.assertGreaterEqual(gap, 2)
+        self.verify_auxiliary_bqm(bqm, gap, [0, 1, 2], and_gate_set)
+        self.assertTrue(info['optimal'])
+
+    def test_auxiliary_local_search(self):
+        # 8**4 assignments, so they are searched
+        and_gate_set = {(-1, -1, -1), (-1, 1, -1), (1, -1, -1), (1, 1, 1)}
+        graph = nx.complete_bipartite_graph(3, 3)
+        info = {}
+        bqm, gap = lp.generate_bqm(graph, and_gate_set, [0, 1, 3], seed=5, info=info)
+
+        self.assertAlmostEqual(gap, 4)
+        self.verify_auxiliary_bqm(bqm, gap, [0, 1, 3], and_gate_set)
+
+        # the gap is only the best of the assignments tried
+        self.assertFalse(info['optimal'])
+
+    def test_auxiliary_mostly_feasible(self):
+        # 15 of the 16 states are feasible, so an assignment of the auxiliary variable that
+        # differs from a constant one in a single state still has no gap
+        table = set(product([-1, 1], repeat=4)) - {(-1, -1, 1, 1)}
+        graph = nx.complete_graph(5)
+
+        bqm, gap = lp.generate_bqm(graph, table, [0, 1, 2, 3], seed=0)
+
+        self.assertAlmostEqual(gap, 2)
+        self.verify_auxiliary_bqm(bqm, gap, [0, 1, 2, 3], table)
+
+    def test_auxiliary_interface(self):
+        and_gate_set = {(-1, -1, -1), (-1, 1, -1), (1, -1, -1), (1, 1, 1)}
+
+        spec = pm.Specification(nx.complete_graph(4), [0, 1, 2], and_gate_set, dimod.SPIN)
+        self.assertTrue(lp.get_penalty_model(spec).optimal)
+
+        spec = pm.Specification(nx.complete_bipartite_graph(3, 3), [0, 1, 3], and_gate_set,
+                                dimod.SPIN)
+        widget = lp.get_penalty_model(spec)
+        self.assertFalse(widget.optimal)
+        self.assertTrue(widget.verify().valid)
+
+    def test_bias_tolerance(self):
+        # HiGHS can return biases just outside of their ranges
+        nodes = [0, 1]
+        edges = [(0, 1)]
+        bounds = [(-2, 2), (-2, 2), (-1, 1), (None, None), (2, 8)]
+        x = np.array([-2 - 1e-12, 0, -1 - 1e-15, .5, 2])
+
+        bqm, gap = lp.generation._get_bqm(nodes, edges, x, bounds)
+        self.assertEqual(bqm.linear[0], -2)
+        self.assertEqual(bqm.quadratic[(0, 1)], -1)
+        self.assertEqual(bqm.offset, .5)
+        self.assertEqual(gap, 2)
+
+    def test_auxiliary_workers(self):
+        and_gate_set = {(-1, -1, -1), (-1, 1, -1), (1, -1, -1), (1, 1, 1)}
+        graph = nx.complete_bipartite_graph(3, 3)
+
+        bqm, gap = lp.generate_bqm(graph, and_gate_set, [0, 1, 3], seed=5)
+        pool_bqm, pool_gap = lp.generate_bqm(graph, and_gate_set, [0, 1, 3], seed=5,
+                                             num_workers=2)
+
+        self.assertAlmostEqual(gap, pool_gap)
+        self.verify_auxiliary_bqm(pool_bqm, pool_gap, [0, 1, 3], and_gate_set)
+
+    def test_auxiliary_impossible(self):
+        # there is no xor gate on K4 within the default ranges
+        xor_gate_values = {(-1, -1, -1), (-1, 1, 1), (1, -1, 1), (1, 1, -1)}
+
+        with self.assertRaises(ValueError):
+            lp.generate_bqm(nx.complete_graph(4), xor_gate_values, [0, 1, 2])
+
+    def test_auxiliary_too_large(self):
+        and_gate_set = {(-1, -1, -1), (-1, 1, -1), (1, -1, -1), (1, 1, 1)}
+
+        with self.assertRaises(ValueError):
+            lp.generate_bqm(nx.complete_bipartite_graph(9, 9), and_gate_set, [0, 1, 9])
+
+        spec = pm.Specification(nx.complete_bipartite_graph(9, 9), [0, 1, 9], and_gate_set,
+                                dimod.SPIN)
+        with self.assertRaises(pm.exceptions.FactoryException):
+            lp.get_penalty_model(spec)
+
+        # without auxiliary variables there is no limit
+        nodes = list(range(11))
+        table = {(1,) * 11, (-1,) * 11}
+        bqm, gap = lp.generate_bqm(nx.path_graph(nodes), table, nodes)
+        self.assertAlmostEqual(gap, 2)
+
     def test_impossible_bqm(self):
         # Set up xor-gate
         # Note: penaltymodel-lp would need an auxiliary variable in order to handle this;
@@ -196,41 +354,82 @@ class TestPenaltyModelLinearProgramming(unittest.TestCase):
         with self.assertRaises(ValueError):
             lp.generate_bqm(nx.complete_graph(nodes), xor_gate_values, nodes)
 
-    @patch('scipy.optimize.linprog')
-    def test_linprog_optimizewarning(self, dummy_linprog):
-        """The linear program sometimes throws OptimizeWarning for matrices that
-        are not full row rank. In such a case, penaltymodel-lp should give up
-        and let a more sophisticated penaltymodel deal with the problem"""
+    def test_redundant_table(self):
+        # the eight states of three variables give eight equality constraints on seven
+        # biases, so one of them is redundant
+        nodes = ['a', 'b', 'c']
+        values = {state: sum(state) for state in product([-1, 1], repeat=3)}
 
-        # Note: I'm using mock because it's difficult to think of a small ising
-        #   system that is not full row rank. (i.e. need to consider linear states,
-        #   quadratic states, offset and gap coefficients when building
-        #   the non-full-row-rank matrix).
-        dummy_linprog.return_value = OptimizeWarning
+        bqm, gap = lp.generate_bqm(nx.complete_graph(nodes), values, nodes)
 
-        # Placeholder problem
-        nodes = ['r', 'a', 'n', 'd', 'o', 'm']
-        values = {(1, 1, 1, 1, 1, 1), (1, 1, 0, 0, 0, 0)}
+        for state, energy in values.items():
+            self.assertAlmostEqual(bqm.energy(dict(zip(nodes, state))), energy)
+
+    def test_inconsistent_table(self):
+        # the energies are the product of the spins, which a quadratic model cannot give
+        nodes = ['a', 'b', 'c']
+        values = {(a, b, c): a * b * c for a, b, c in product([-1, 1], repeat=3)}
 
         with self.assertRaises(ValueError):
             lp.generate_bqm(nx.complete_graph(nodes), values, nodes)
 
-    @patch('scipy.optimize.linprog')
-    def test_linprog_linalgwarning(self, dummy_linprog):
-        """The linear program sometimes throws LinAlgWarning for matrices that
-        are ill-conditioned. In such a case, penaltymodel-lp should give up
-        and let a more sophisticated penaltymodel deal with the problem"""
+    def test_repeated_states(self):
+        # repeated states give dependent equality constraints
+        nodes = ['a', 'b']
+        bqm, gap = lp.generate_bqm(nx.complete_graph(nodes), [(-1, -1), (1, 1), (1, 1)], nodes)
 
-        # Note: I'm using mock because it's difficult to think of a small ising
-        #   system that is ill-conditioned.
-        dummy_linprog.return_value = LinAlgWarning
+        self.assertAlmostEqual(gap, 2)
+        self.assertAlmostEqual(bqm.energy({'a': 1, 'b': 1}), 0)
+        self.assertAlmostEqual(bqm.energy({'a': -1, 'b': -1}), 0)
+
+
+class TestPreparedGraph(unittest.TestCase):
+    def check_tables(self, warm_start):
+        nodes = ['a', 'b', 'c']
+        graph = nx.complete_graph(nodes)
+        tables = [{(-1, -1, -1), (-1, 1, -1), (1, -1, -1), (1, 1, 1)},   # and
+                  {(-1, 1, 1), (1, -1, 1), (1, 1, 1), (-1, -1, -1)},     # or
+                  {(-1, -1, -1), (-1, 1, 1), (1, -1, 1), (1, 1, -1)},    # xor, impossible
+                  {(-1, -1, -1): 0, (1, 1, 1): .5}]
+
+        prepared = lp.PreparedGraph(graph, nodes, warm_start=warm_start)
+        results = prepared.solve_batch(tables)
+
+        for table, result in zip(tables, results):
+            try:
+                bqm, gap = lp.generate_bqm(graph, table, nodes)
+            except ValueError:
+                self.assertIsNone(result)
+                continue
+
+            self.assertAlmostEqual(result[1], gap)
+            for state in product([-1, 1], repeat=3):
+                energy = result[0].energy(dict(zip(nodes, state)))
+                if state in table:
+                    target = table[state] if isinstance(table, dict) else 0
+                    self.assertAlmostEqual(energy, target)
+                else:
+                    self.assertGreaterEqual(round(energy, 7), round(gap, 7))
+
+        # solving a table again gives the same gap
+        self.assertAlmostEqual(prepared.solve(tables[0])[1], results[0][1])
+
+    def test_scipy(self):
+        self.check_tables(False)
+
+    @unittest.skipUnless(lp.prepared.highspy, "highspy is not installed")
+    def test_warm_start(self):
+        self.check_tables(True)
+
+    def test_impossible(self):
+        prepared = lp.PreparedGraph(nx.complete_graph(3), [0, 1, 2])
 
-        # Placeholder problem
-        nodes = ['r', 'a', 'n', 'd', 'o', 'm']
-        values = {(1, 1, 1, 1, 1, 1), (1, 1, 0, 0, 0, 0)}
+        with self.assertRaises(ValueError):
+            prepared.solve({(-1, -1, -1), (-1, 1, 1), (1, -1, 1), (1, 1, -1)})
 
+    def test_auxiliary(self):
         with self.assertRaises(ValueError):
-            lp.generate_bqm(nx.complete_graph(nodes), values, nodes)
+            lp.PreparedGraph(nx.complete_graph(4), [0, 1, 2])
 
 
 if __name__ == "__main__":
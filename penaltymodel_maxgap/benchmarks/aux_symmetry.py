@@ -0,0 +1,101 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+# ================================================================================================
+"""Measure the effect of the auxiliary variable symmetry breaking on the gap
+search.
+
+Each problem is solved three ways: without any aux symmetry breaking, with
+only the gauge fixing, and with the gauge fixing and the ordering of twins.
+Runs that hit the time limit are marked with a '*'.
+
+Run with::
+
+    python benchmarks/aux_symmetry.py
+
+"""
+from __future__ import print_function
+
+import itertools
+import time
+
+import networkx as nx
+
+from penaltymodel.core import ImpossiblePenaltyModel
+from penaltymodel.maxgap import z3backend
+from penaltymodel.maxgap.generation import _set_energies, _maximize_gap, _gap_upperbound
+
+
+def gate(function):
+    return {(x, y, function(x, y)): 0 for x, y in itertools.product((-1, 1), repeat=2)}
+
+
+AND = gate(lambda x, y: 1 if x == y == 1 else -1)
+OR = gate(lambda x, y: 1 if 1 in (x, y) else -1)
+HALF_ADDER = {(x, y, -x * y, 1 if x == y == 1 else -1): 0
+              for x, y in itertools.product((-1, 1), repeat=2)}
+
+
+def problems():
+    """Yield (name, graph, decision_variables, feasible_configurations)."""
+    yield 'ha/K44', nx.complete_bipartite_graph(4, 4), (0, 1, 4, 5), HALF_ADDER
+    yield 'and/K44', nx.complete_bipartite_graph(4, 4), (0, 1, 4), AND
+    yield 'or/K44', nx.complete_bipartite_graph(4, 4), (0, 4, 1), OR
+    yield 'and/K45', nx.complete_bipartite_graph(4, 5), (0, 1, 4), AND
+
+
+TIME_LIMIT = 120
+
+
+def run(graph, decision_variables, feasible_configurations, mode):
+    linear_ranges = {v: (-2., 2.) for v in graph}
+    quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+
+    t = time.time()
+    table = z3backend.Table(graph, decision_variables, linear_ranges, quadratic_ranges,
+                            break_aux_symmetry=(mode == 'twins'))
+    if mode == 'gauge':
+        table.gauge_variables = set(graph) - set(decision_variables)
+    _set_energies(table, feasible_configurations, decision_variables)
+
+    with z3backend.Solver() as solver:
+        for assertion in table.assertions:
+            solver.add_assertion(assertion)
+        info = {}
+        try:
+            model = _maximize_gap(solver, table, 1,
+                                  _gap_upperbound(graph, linear_ranges, quadratic_ranges),
+                                  deadline=t + TIME_LIMIT, info=info)
+            gap = float(model.get_py_value(table.gap))
+        except ImpossiblePenaltyModel:
+            gap = float('nan')
+
+    return time.time() - t, info.get('optimal', True), gap, len(table.twins)
+
+
+def main():
+    modes = ('none', 'gauge', 'twins')
+    print('{:<10}{:>5}{:>7}'.format('problem', 'aux', 'twins') +
+          ''.join('{:>10}'.format(mode) for mode in modes) + '{:>8}'.format('gap'))
+    for name, graph, decision_variables, feasible_configurations in problems():
+        times = []
+        for mode in modes:
+            t, optimal, gap, twins = run(graph, decision_variables, feasible_configurations, mode)
+            times.append('{:.3f}{}'.format(t, '' if optimal else '*'))
+        print('{:<10}{:>5}{:>7}'.format(name, len(graph) - len(decision_variables), twins) +
+              ''.join('{:>10}'.format(t) for t in times) + '{:>8.2f}'.format(gap))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+# ================================================================================================
+"""Compare the time spent encoding and solving with the pysmt and z3 backends.
+
+Run with::
+
+    python benchmarks/backends.py
+
+"""
+from __future__ import print_function
+
+import time
+
+import networkx as nx
+
+from pysmt.environment import reset_env
+from pysmt.shortcuts import Solver
+
+from penaltymodel.core import ImpossiblePenaltyModel
+from penaltymodel.maxgap import smt, z3backend
+from penaltymodel.maxgap.generation import _set_energies, _maximize_gap
+
+
+def problems():
+    """Yield (name, graph, decision_variables, feasible_configurations)."""
+
+    # AND gate on a 4-cycle with one aux
+    graph = nx.cycle_graph(4)
+    yield 'and/C4', graph, (0, 1, 2), {(-1, -1, -1): 0, (-1, 1, -1): 0,
+                                       (1, -1, -1): 0, (1, 1, 1): 0}
+
+    # AND gate on K_{3,3} with three aux
+    graph = nx.complete_bipartite_graph(3, 3)
+    yield 'and/K33', graph, (0, 2, 3), {(-1, -1, -1): 0, (-1, 1, -1): 0,
+                                        (1, -1, -1): 0, (1, 1, 1): 0}
+
+    # equality of 4 variables on K_{4,4}
+    graph = nx.complete_bipartite_graph(4, 4)
+    decision = (0, 1, 4, 5)
+    yield 'eq4/K44', graph, decision, {(-1,) * 4: 0, (1,) * 4: 0}
+
+
+def run(backend, graph, decision_variables, feasible_configurations):
+    linear_ranges = {v: (-2., 2.) for v in graph}
+    quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+
+    gmax = 2 * (2. * len(graph) + 1. * graph.number_of_edges())
+
+    t = time.time()
+    if backend == 'z3':
+        table = z3backend.Table(graph, decision_variables, linear_ranges, quadratic_ranges)
+    else:
+        reset_env()
+        table = smt.Table(graph, decision_variables, linear_ranges, quadratic_ranges)
+    _set_energies(table, feasible_configurations, decision_variables)
+    encode = time.time() - t
+
+    t = time.time()
+    solver = z3backend.Solver() if backend == 'z3' else Solver('z3')
+    with solver:
+        for assertion in table.assertions:
+            solver.add_assertion(assertion)
+        try:
+            model = _maximize_gap(solver, table, 1, gmax)
+            gap = float(model.get_py_value(table.gap))
+        except ImpossiblePenaltyModel:
+            gap = float('nan')
+    solve = time.time() - t
+
+    return encode, solve, gap
+
+
+def main():
+    print('{:<14}{:<8}{:>10}{:>10}{:>8}'.format('problem', 'backend', 'encode', 'solve', 'gap'))
+    for name, graph, decision_variables, feasible_configurations in problems():
+        for backend in ('pysmt', 'z3'):
+            encode, solve, gap = run(backend, graph, decision_variables, feasible_configurations)
+            print('{:<14}{:<8}{:>10.3f}{:>10.3f}{:>8.2f}'.format(name, backend, encode, solve, gap))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,90 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+# ================================================================================================
+"""Compare sweeping the feasible energies of a constraint with :func:`.generate`
+against a :class:`.PreparedProblem`.
+
+Run with::
+
+    python benchmarks/sweep.py
+
+"""
+from __future__ import print_function
+
+import time
+
+import networkx as nx
+
+from pysmt.environment import reset_env
+
+from penaltymodel.core import ImpossiblePenaltyModel
+from penaltymodel.maxgap import generate, PreparedProblem
+
+
+def variants(num_variants):
+    """AND gates with the energy of one feasible configuration raised."""
+    for idx in range(num_variants):
+        energy = idx / float(num_variants)
+        yield {(-1, -1, -1): 0, (-1, 1, -1): energy, (1, -1, -1): 0, (1, 1, 1): 0}
+
+
+def sweep_generate(graph, decision_variables, linear_ranges, quadratic_ranges, num_variants):
+    gaps = []
+    for configurations in variants(num_variants):
+        reset_env()
+        try:
+            __, gap = generate(graph, configurations, decision_variables,
+                               linear_ranges, quadratic_ranges, .5)
+        except ImpossiblePenaltyModel:
+            gap = float('nan')
+        gaps.append(gap)
+    return gaps
+
+
+def sweep_prepared(graph, decision_variables, linear_ranges, quadratic_ranges, num_variants):
+    reset_env()
+    gaps = []
+    with PreparedProblem(graph, decision_variables, linear_ranges, quadratic_ranges) as problem:
+        for configurations in variants(num_variants):
+            try:
+                __, gap = problem.generate(configurations, .5)
+            except ImpossiblePenaltyModel:
+                gap = float('nan')
+            gaps.append(gap)
+    return gaps
+
+
+def main(num_variants=10):
+    print('{:<10}{:>10}{:>10}{:>12}'.format('graph', 'generate', 'prepared', 'max diff'))
+    for name, graph, decision_variables in [('K4', nx.complete_graph(4), (0, 1, 2)),
+                                            ('K33', nx.complete_bipartite_graph(3, 3), (0, 2, 3))]:
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+        args = (graph, decision_variables, linear_ranges, quadratic_ranges, num_variants)
+
+        t = time.time()
+        cold = sweep_generate(*args)
+        cold_time = time.time() - t
+
+        t = time.time()
+        prepared = sweep_prepared(*args)
+        prepared_time = time.time() - t
+
+        diff = max(abs(a - b) for a, b in zip(cold, prepared))
+        print('{:<10}{:>10.3f}{:>10.3f}{:>12.4f}'.format(name, cold_time, prepared_time, diff))
+
+
+if __name__ == '__main__':
+    main()
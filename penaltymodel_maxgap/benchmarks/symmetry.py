@@ -0,0 +1,105 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+# ================================================================================================
+"""Report how much decision-variable symmetry breaking shrinks the smt
+problem for gates that need no auxiliary variables.
+
+Run with::
+
+    python benchmarks/symmetry.py
+
+"""
+from __future__ import print_function
+
+import itertools
+import time
+
+import networkx as nx
+
+from pysmt.environment import reset_env
+
+from penaltymodel.core import ImpossiblePenaltyModel
+from penaltymodel.maxgap.generation import generate, _break_symmetry, _set_energies
+from penaltymodel.maxgap.smt import Table
+from penaltymodel.maxgap.symmetry import decision_automorphisms
+
+
+def problems():
+    """Yield (name, num_variables, feasible_configurations)."""
+    yield 'and', 3, {(x, y, -1 if -1 in (x, y) else 1): 0
+                     for x, y in itertools.product((-1, 1), repeat=2)}
+    yield 'or', 3, {(x, y, 1 if 1 in (x, y) else -1): 0
+                    for x, y in itertools.product((-1, 1), repeat=2)}
+    yield 'eq4', 4, {(-1,) * 4: 0, (1,) * 4: 0}
+    yield 'one-hot4', 4, {tuple(1 if i == j else -1 for i in range(4)): 0 for j in range(4)}
+    yield 'one-hot6', 6, {tuple(1 if i == j else -1 for i in range(6)): 0 for j in range(6)}
+
+
+def encode(graph, decision_variables, feasible_configurations, linear_ranges, quadratic_ranges,
+           symmetry_breaking):
+    reset_env()
+    table = Table(graph, decision_variables, linear_ranges, quadratic_ranges)
+
+    automorphisms = []
+    if symmetry_breaking:
+        automorphisms = decision_automorphisms(graph, decision_variables, feasible_configurations,
+                                               linear_ranges, quadratic_ranges)
+
+    if automorphisms:
+        configurations = _break_symmetry(table, graph, decision_variables, automorphisms)
+    else:
+        configurations = list(itertools.product((-1, 1), repeat=len(decision_variables)))
+
+    _set_energies(table, feasible_configurations, decision_variables, configurations)
+    return len(configurations), len(table.assertions)
+
+
+def solve(graph, decision_variables, feasible_configurations, linear_ranges, quadratic_ranges,
+          symmetry_breaking):
+    reset_env()
+    t = time.time()
+    try:
+        __, gap = generate(graph, feasible_configurations, decision_variables,
+                           linear_ranges, quadratic_ranges, 1,
+                           symmetry_breaking=symmetry_breaking)
+    except ImpossiblePenaltyModel:
+        gap = float('nan')
+    return time.time() - t, gap
+
+
+def main():
+    print('{:<10}{:>8}{:>8}{:>10}{:>10}{:>8}{:>10}{:>10}{:>8}'.format(
+        'problem', 'configs', 'orbits', 'asserts', 'reduced', 'factor', 'time', 'reduced', 'gap'))
+    for name, n, feasible_configurations in problems():
+        graph = nx.complete_graph(n)
+        decision_variables = tuple(range(n))
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+
+        args = (graph, decision_variables, feasible_configurations,
+                linear_ranges, quadratic_ranges)
+
+        configs, asserts = encode(*args, symmetry_breaking=False)
+        orbits, reduced = encode(*args, symmetry_breaking=True)
+
+        cold, __ = solve(*args, symmetry_breaking=False)
+        warm, gap = solve(*args, symmetry_breaking=True)
+
+        print('{:<10}{:>8}{:>8}{:>10}{:>10}{:>8.2f}{:>10.3f}{:>10.3f}{:>8.2f}'.format(
+            name, configs, orbits, asserts, reduced, configs / float(orbits), cold, warm, gap))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+# ================================================================================================
+"""Compare restricting Theta to fixed spins by copying the symbolic BQM against
+:class:`.CompactTheta`, on its own and as part of building a :class:`.Table`.
+
+Run with::
+
+    python benchmarks/theta.py
+
+"""
+from __future__ import print_function
+
+import itertools
+import random
+import time
+
+import dwave_networkx as dnx
+import networkx as nx
+
+from pysmt.environment import reset_env
+
+from penaltymodel.maxgap.generation import _set_energies
+from penaltymodel.maxgap.smt import Table
+from penaltymodel.maxgap.theta import Theta, CompactTheta
+
+AND = {(x, y, 1 if x == y == 1 else -1): 0 for x, y in itertools.product((-1, 1), repeat=2)}
+DECISION = (0, 1, 4)
+
+
+class CopyTheta(object):
+    """Restricts Theta the way Table used to."""
+    def __init__(self, theta):
+        self.theta = theta
+
+    def fix_variables(self, spins):
+        subtheta = self.theta.copy()
+        subtheta.fix_variables(spins)
+        return subtheta
+
+
+def graphs():
+    yield 'K55', nx.complete_bipartite_graph(5, 5)
+    yield 'chimera12', dnx.chimera_graph(1, 2)
+    yield 'chimera13', dnx.chimera_graph(1, 3)
+
+
+def time_restrictions(restrictor, repeats=20):
+    configs = [dict(zip(DECISION, config))
+               for config in itertools.product((-1, 1), repeat=len(DECISION))]
+    t = time.time()
+    for __ in range(repeats):
+        for spins in configs:
+            restrictor.fix_variables(spins)
+    return (time.time() - t) / repeats
+
+
+def time_table(graph, linear_ranges, quadratic_ranges, restrictor):
+    reset_env()
+    random.seed(0)  # the elimination order is randomized
+
+    t = time.time()
+    table = Table(graph, DECISION, linear_ranges, quadratic_ranges)
+    if restrictor is CopyTheta:
+        table._compact = CopyTheta(table.theta)
+    _set_energies(table, AND, DECISION)
+    return time.time() - t
+
+
+def main():
+    print('{:<11}{:>6}{:>12}{:>12}{:>12}{:>12}'.format(
+        'graph', 'nodes', 'copy fix', 'compact fix', 'copy table', 'compact'))
+    for name, graph in graphs():
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+
+        reset_env()
+        theta = Theta.from_graph(graph, linear_ranges, quadratic_ranges)
+        copy_fix = time_restrictions(CopyTheta(theta))
+        compact_fix = time_restrictions(CompactTheta(theta))
+
+        copy_table = time_table(graph, linear_ranges, quadratic_ranges, CopyTheta)
+        compact_table = time_table(graph, linear_ranges, quadratic_ranges, CompactTheta)
+
+        print('{:<11}{:>6}{:>12.4f}{:>12.4f}{:>12.3f}{:>12.3f}'.format(
+            name, len(graph), copy_fix, compact_fix, copy_table, compact_table))
+
+
+if __name__ == '__main__':
+    main()
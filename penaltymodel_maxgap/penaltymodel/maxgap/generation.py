@@ -14,22 +14,39 @@
 #
 # ================================================================================================
 import itertools
+import time
+import warnings
+
+from fractions import Fraction
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
 
 import dimod
+import numpy as np
 
 from pysmt.shortcuts import Solver
 
 from penaltymodel.core import ImpossiblePenaltyModel
+from penaltymodel.maxgap.portfolio import SolverPortfolio
 from penaltymodel.maxgap.smt import Table
+from penaltymodel.maxgap.symmetry import decision_automorphisms, orbits
 
-__all__ = 'generate',
+__all__ = 'generate', 'PreparedProblem'
 
 MAX_GAP_DELTA = 0.01
 
+WARM_START_ATOL = 1e-9
+"""float: The tolerance used when checking the energies of a warm start."""
+
 
 def generate(graph, feasible_configurations, decision_variables,
              linear_energy_ranges, quadratic_energy_ranges, min_classical_gap,
-             smt_solver_name=None):
+             smt_solver_name=None, portfolio=False, backend='pysmt',
+             timeout=None, max_solves=None, info=None, warm_start=None,
+             symmetry_breaking=True):
     """Generates the Ising model that induces the given feasible configurations. The code is based
     on the papers [#do]_ and [#mc]_.
 
@@ -50,6 +67,47 @@ def generate(graph, feasible_configurations, decision_variables,
             lowest infeasible state.
         smt_solver_name (str/None): The name of the smt solver. Must
             be a solver available to pysmt. If None, uses the pysmt default.
+        portfolio (bool/iterable[str], optional, default=False): If True, the
+            installed pysmt solvers are raced against each other in separate
+            processes, see :class:`.SolverPortfolio`. If an iterable of solver
+            names, those solvers are raced. Overrides `smt_solver_name`.
+        backend (str, optional, default='pysmt'): How the smt problem is
+            built. 'pysmt' builds it with pysmt formulas. 'z3' builds it
+            directly with z3's python api, see :mod:`.z3backend`, which is
+            faster for large problems. If z3 is not installed, a warning is
+            raised and 'pysmt' is used instead.
+        timeout (float, optional): Time budget in seconds. Once it is spent,
+            the search for a larger gap stops and the best model found so
+            far is returned. It is checked between solves, so a single solve
+            can overrun it. The first solve, which determines whether a model
+            exists at all, always runs to completion.
+        max_solves (int, optional): The maximum number of smt solves, with
+            the same semantics as `timeout`.
+        info (dict, optional): If a dict is provided, it is populated with
+            information about the search. 'optimal' is False if the budget
+            ran out before the gap was shown to be maximal and 'num_solves'
+            is the number of smt solves, of which 'num_sat' were satisfiable
+            and 'num_unsat' were not. 'warm_start' is True if the warm start
+            was used. 'num_assertions' is the number of assertions in the
+            table and 'num_fresh_symbols' the number of message variables in
+            them. 'timing' maps each phase to the time spent in it in
+            seconds: building Theta ('theta') and the elimination trees
+            ('elimination'), finding symmetries ('symmetry'), building the
+            energy assertions ('assertions') and solving ('solve').
+        warm_start (:obj:`dimod.BinaryQuadraticModel`, optional): A penalty
+            model for the same problem, for instance from a cheaper factory
+            or a cache. Its gap is checked with a single solve in which the
+            biases are fixed, and if it holds the search for a larger gap
+            starts from there. Otherwise the search starts from
+            `min_classical_gap` as usual.
+        symmetry_breaking (bool, optional, default=True): If True, only
+            search for models in a canonical form that does not change the
+            largest gap. If every variable in the graph is a decision
+            variable, the permutations of the decision variables that
+            preserve the problem are found, and only one energy constraint
+            is needed for each set of equivalent configurations. Otherwise
+            the aux variables are gauge fixed and ordered where the energy
+            ranges allow it. See :mod:`penaltymodel.maxgap.symmetry`.
 
     Returns:
         tuple: A 4-tuple containing:
@@ -66,6 +124,8 @@ def generate(graph, feasible_configurations, decision_variables,
     Raises:
         ImpossiblePenaltyModel: If the penalty model cannot be built. Normally due
             to a non-zero infeasible gap.
+        ValueError: If `backend` is unknown, or if `backend` is 'z3' and
+            `portfolio` is given.
 
     .. [#do] Bian et al., "Discrete optimization using quantum annealing on sparse Ising models",
         https://www.frontiersin.org/articles/10.3389/fphy.2014.00056/full
@@ -75,14 +135,514 @@ def generate(graph, feasible_configurations, decision_variables,
         https://arxiv.org/pdf/1603.03111.pdf
 
     """
+    if timeout is not None:
+        deadline = time.time() + timeout
+    else:
+        deadline = None
+
+    if info is None:
+        info = {}
+
+    if backend not in ('pysmt', 'z3'):
+        raise ValueError("unknown backend {!r}, expected 'pysmt' or 'z3'".format(backend))
+
+    if backend == 'z3':
+        if portfolio:
+            raise ValueError("the solver portfolio requires the 'pysmt' backend")
+        try:
+            from penaltymodel.maxgap import z3backend
+        except ImportError:
+            warnings.warn("z3 is not installed, falling back to the 'pysmt' backend")
+            backend = 'pysmt'
+
     if len(graph) == 0:
+        info.update(optimal=True, num_solves=0, num_sat=0, num_unsat=0, warm_start=False,
+                    num_assertions=0, num_fresh_symbols=0, timing={})
         return dimod.BinaryQuadraticModel.empty(dimod.SPIN), float('inf')
 
     # we need to build a Table. The table encodes all of the information used by the smt solver
-    table = Table(graph, decision_variables, linear_energy_ranges, quadratic_energy_ranges)
+    if backend == 'z3':
+        table = z3backend.Table(graph, decision_variables,
+                                linear_energy_ranges, quadratic_energy_ranges,
+                                break_aux_symmetry=symmetry_breaking)
+    else:
+        table = Table(graph, decision_variables, linear_energy_ranges, quadratic_energy_ranges,
+                      break_aux_symmetry=symmetry_breaking)
+    timing = dict(table.timing)
+
+    t = time.time()
+    if symmetry_breaking:
+        automorphisms = decision_automorphisms(graph, decision_variables, feasible_configurations,
+                                               linear_energy_ranges, quadratic_energy_ranges)
+    else:
+        automorphisms = []
+
+    if automorphisms:
+        configurations = _break_symmetry(table, graph, decision_variables, automorphisms)
+    else:
+        configurations = None
+    timing['symmetry'] += time.time() - t
+
+    t = time.time()
+    _set_energies(table, feasible_configurations, decision_variables, configurations)
+    timing['assertions'] = time.time() - t
 
-    # iterate over every possible configuration of the decision variables.
+    # now we just need to get a solver
+    t = time.time()
+    if backend == 'z3':
+        solver = z3backend.Solver()
+    elif portfolio:
+        solver = SolverPortfolio(None if portfolio is True else portfolio)
+    else:
+        solver = Solver(smt_solver_name)
+
+    with solver:
+
+        # add all of the assertions from the table to the solver
+        for assertion in table.assertions:
+            solver.add_assertion(assertion)
+
+        gmax = _gap_upperbound(graph, linear_energy_ranges, quadratic_energy_ranges)
+
+        if warm_start is not None:
+            seed, min_classical_gap, seed_solves = _check_warm_start(solver, table, warm_start,
+                                                                     graph, decision_variables,
+                                                                     feasible_configurations,
+                                                                     min_classical_gap)
+        else:
+            seed, seed_solves = None, 0
+
+        # the check of the warm start counts against the budget
+        if max_solves is not None:
+            max_solves -= seed_solves
+
+        model = _maximize_gap(solver, table, min_classical_gap, gmax,
+                              deadline=deadline, max_solves=max_solves, info=info,
+                              model=seed)
+
+        info['warm_start'] = seed is not None
+        info['num_solves'] += seed_solves
+        if seed_solves:
+            info['num_sat' if seed is not None else 'num_unsat'] += 1
+
+    timing['solve'] = time.time() - t
+
+    info.update(num_assertions=len(table.assertions),
+                num_fresh_symbols=table.num_fresh_symbols,
+                timing=timing)
+
+    # finally we need to convert our values back into python floats.
+
+    classical_gap = _classical_gap(float(model.get_py_value(table.gap)),
+                                   graph, decision_variables, feasible_configurations)
+
+    return table.theta.to_bqm(model), classical_gap
+
+
+class PreparedProblem(object):
+    """A maxgap problem that is encoded once and then solved for many sets of
+    feasible configurations.
+
+    The graph, decision variables and energy ranges are fixed. The energy
+    formulas for every configuration of the decision variables are built and
+    given to a single smt solver up front. Each call to :meth:`.generate`
+    then only adds the assertions that set the feasible energies and bound
+    the infeasible ones, and removes them again afterwards.
+
+    Args:
+        graph (nx.Graph): The target graph on which the Ising model is to be built.
+        decision_variables (list/tuple): Which variables in the graph are
+            assigned as decision variables.
+        linear_energy_ranges (dict): A dict of the form {v: (min, max), ...}
+            where min and max are the range of values allowed to v.
+        quadratic_energy_ranges (dict): A dict of the form
+            {(u, v): (min, max), ...} where min and max are the range
+            of values allowed to (u, v).
+        smt_solver_name (str/None): The name of the smt solver. Must
+            be a solver available to pysmt. If None, uses the pysmt default.
+        backend (str, optional, default='pysmt'): Build the smt problem with
+            'pysmt' or directly with 'z3'. See :func:`.generate`.
+
+    Examples:
+        This example sweeps the energy of one feasible configuration of an
+        AND gate.
+
+        >>> import networkx as nx
+        >>> import penaltymodel.maxgap as maxgap
+        >>> graph = nx.complete_graph(4)
+        >>> linear_energy_ranges = {v: (-2., 2.) for v in graph}
+        >>> quadratic_energy_ranges = {edge: (-1., 1.) for edge in graph.edges}
+        >>> with maxgap.PreparedProblem(graph, (0, 1, 2), linear_energy_ranges,
+        ...                             quadratic_energy_ranges) as problem:
+        ...     for energy in (0., .5, 1.):
+        ...         configurations = {(-1, -1, -1): 0., (-1, +1, -1): energy,
+        ...                           (+1, -1, -1): 0., (+1, +1, +1): 0.}
+        ...         bqm, gap = problem.generate(configurations, 1.)
+
+    """
+    def __init__(self, graph, decision_variables, linear_energy_ranges, quadratic_energy_ranges,
+                 smt_solver_name=None, backend='pysmt'):
+
+        if backend not in ('pysmt', 'z3'):
+            raise ValueError("unknown backend {!r}, expected 'pysmt' or 'z3'".format(backend))
+
+        if backend == 'z3':
+            try:
+                from penaltymodel.maxgap import z3backend
+            except ImportError:
+                warnings.warn("z3 is not installed, falling back to the 'pysmt' backend")
+                backend = 'pysmt'
+
+        self.graph = graph
+        self.decision_variables = decision_variables = tuple(decision_variables)
+
+        self._gmax = _gap_upperbound(graph, linear_energy_ranges, quadratic_energy_ranges)
+
+        if len(graph) == 0:
+            self.table = self._solver = None
+            self._energies = []
+            return
+
+        if backend == 'z3':
+            self.table = table = z3backend.Table(graph, decision_variables,
+                                                 linear_energy_ranges, quadratic_energy_ranges)
+        else:
+            self.table = table = Table(graph, decision_variables,
+                                       linear_energy_ranges, quadratic_energy_ranges)
+
+        # we don't know yet which configurations will be feasible so we need both
+        # formulas for all of them. Each formula comes with assertions on its
+        # message variables which would only slow the solver down when the
+        # formula is not used, so we keep those aside for each variant
+        self._energies = energies = []
+        for config in itertools.product((-1, 1), repeat=len(decision_variables)):
+            spins = dict(zip(decision_variables, config))
+            energy, auxvars, assertions = _capture(table, table.aux_energy, spins)
+            upperbound, __, upperbound_assertions = _capture(table, table.energy_upperbound, spins)
+            energies.append((config, energy, auxvars, assertions,
+                             upperbound, upperbound_assertions))
+
+        if backend == 'z3':
+            self._solver = solver = z3backend.Solver()
+        else:
+            self._solver = solver = Solver(smt_solver_name)
+
+        for assertion in table.assertions:
+            solver.add_assertion(assertion)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Release the smt solver."""
+        if self._solver is not None:
+            self._solver.__exit__(None, None, None)
+            self._solver = None
+
+    def generate(self, feasible_configurations, min_classical_gap,
+                 timeout=None, max_solves=None, info=None):
+        """Generate the Ising model that induces the given feasible configurations.
+
+        Args:
+            feasible_configurations (dict): The set of feasible configurations
+                of the decision variables. The key is a feasible configuration
+                as a tuple of spins, the values are the associated energy.
+            min_classical_gap (float): The minimum energy gap between the
+                highest feasible state and the lowest infeasible state.
+            timeout (float, optional): See :func:`.generate`.
+            max_solves (int, optional): See :func:`.generate`.
+            info (dict, optional): If a dict is provided, 'optimal',
+                'num_solves', 'num_sat' and 'num_unsat' are set as in
+                :func:`.generate`. 'num_assertions' is the number of
+                assertions added for this call and 'timing' holds the time
+                spent adding them ('assertions') and solving ('solve').
+
+        Returns:
+            tuple: The :obj:`dimod.BinaryQuadraticModel` and the classical
+            energy gap between ground and the first excited state.
+
+        Raises:
+            ImpossiblePenaltyModel: If the penalty model cannot be built.
+
+        """
+        if timeout is not None:
+            deadline = time.time() + timeout
+        else:
+            deadline = None
+
+        if info is None:
+            info = {}
+
+        if len(self.graph) == 0:
+            info.update(optimal=True, num_solves=0, num_sat=0, num_unsat=0,
+                        num_assertions=0, timing={})
+            return dimod.BinaryQuadraticModel.empty(dimod.SPIN), float('inf')
+
+        if self._solver is None:
+            raise ValueError("the problem has been closed")
+
+        table = self.table
+        solver = self._solver
+
+        if feasible_configurations:
+            highest_feasible_energy = max(feasible_configurations.values())
+        else:
+            highest_feasible_energy = 0
+
+        timing = {}
+        t = time.time()
+        solver.push()
+        try:
+            num_feasible = 0
+            added = []
+            for (config, energy, auxvars, assertions,
+                    upperbound, upperbound_assertions) in self._energies:
+                if config in feasible_configurations:
+                    added.extend(assertions)
+                    added.append(table.energy_assertion(energy, feasible_configurations[config]))
+
+                    if num_feasible < 2:
+                        # see Table.energy
+                        added.extend(table.aux_symmetry_assertions(auxvars, num_feasible))
+                    num_feasible += 1
+                else:
+                    added.extend(upperbound_assertions)
+                    added.append(table.energy_upperbound_assertion(
+                        upperbound, highest_feasible_energy))
+
+            for assertion in added:
+                solver.add_assertion(assertion)
+            timing['assertions'] = time.time() - t
+
+            t = time.time()
+            model = _maximize_gap(solver, table, min_classical_gap, self._gmax,
+                                  deadline=deadline, max_solves=max_solves, info=info)
+        finally:
+            solver.pop()
+        timing['solve'] = time.time() - t
+
+        info.update(num_assertions=len(added), timing=timing)
+
+        classical_gap = _classical_gap(float(model.get_py_value(table.gap)),
+                                       self.graph, self.decision_variables,
+                                       feasible_configurations)
+
+        return table.theta.to_bqm(model), classical_gap
+
+
+def _capture(table, method, spins):
+    """Call a method of the table that builds an energy formula, returning the
+    formula, its aux variables (if any) and the assertions it made rather than
+    adding them to the table."""
+    assertions = table.assertions
+    table.assertions = type(assertions)()
+    try:
+        result = method(spins)
+        captured = table.assertions
+    finally:
+        table.assertions = assertions
+
+    if isinstance(result, tuple):
+        energy, auxvars = result
+    else:
+        energy, auxvars = result, {}
+    return energy, auxvars, captured
+
+
+def _gap_upperbound(graph, linear_energy_ranges, quadratic_energy_ranges):
+    """The maximum possible gap for a particular set of variables."""
+    # To find it, we take the sum of the largest coefficients possible and double it. We double
+    # it because in Ising, the largest gap possible from the largest coefficient is the
+    # negative of said coefficient. Example: consider a graph with one node A, with a
+    # energy range of [-2, 1]. The largest energy gap between spins +1 and -1 is 4;
+    # namely, the largest absolute coefficient -2 with the ising spins results to
+    # gap = (-2)(-1) - (-2)(1) = 4.
+    gmax = sum(max(abs(r) for r in linear_energy_ranges[v]) for v in graph)
+    gmax += sum(max(abs(r) for r in quadratic_energy_ranges[(u, v)])
+                for (u, v) in graph.edges)
+    return 2 * gmax
+
+
+def _classical_gap(gap, graph, decision_variables, feasible_configurations):
+    """The classical gap of a model whose gap variable has value `gap`."""
+    # if the problem is fully specified (or empty) it has infinite gap
+    if (len(decision_variables) == len(graph) and
+            decision_variables and  # at least one variable
+            len(feasible_configurations) == 2**len(decision_variables)):
+        return float('inf')
+    return gap
+
+
+def _limit(x):
+    """Round x the same way as :func:`.limitReal`."""
+    return float(Fraction(x).limit_denominator(1000000))
+
+
+def _seed(seed, graph, decision_variables, feasible_configurations,
+          gauge_variables=(), twins=()):
+    """Determine the biases and gap of a warm start.
+
+    The `gauge_variables` are gauge transformed so that they are +1 in the
+    ground state of the first feasible configuration, and the `twins` are
+    permuted so that the spin-up ones come first in the ground state of the
+    second, matching the symmetry breaking in :class:`.Table`.
+
+    Returns:
+        tuple/None: The linear biases, quadratic biases and gap, or None if
+        `seed` is not a penalty model for the feasible configurations.
+
+    """
+    if any(v not in graph for v in seed.linear):
+        return None
+    if any(not graph.has_edge(u, v) for u, v in seed.quadratic):
+        return None
+
+    # round the biases the same way the smt problem does, so that the energies
+    # we calculate here match the ones seen by the solver
+    bqm = dimod.BinaryQuadraticModel({v: 0.0 for v in graph}, {}, 0.0, dimod.SPIN)
+    bqm.add_variables_from((v, _limit(bias)) for v, bias in seed.spin.linear.items())
+    bqm.add_interactions_from((u, v, _limit(bias)) for (u, v), bias in seed.spin.quadratic.items())
+    bqm.add_offset(seed.spin.offset)
+
+    aux_variables = [v for v in graph if v not in decision_variables]
+    labels = list(decision_variables) + aux_variables
+
+    aux_configs = np.array(list(itertools.product((-1, 1), repeat=len(aux_variables))),
+                           dtype=np.int8).reshape(2**len(aux_variables), len(aux_variables))
+
+    # the ground energy and ground aux state of each decision configuration
+    ground = {}
     for config in itertools.product((-1, 1), repeat=len(decision_variables)):
+        samples = np.hstack((np.tile(np.array(config, dtype=np.int8), (len(aux_configs), 1)),
+                             aux_configs))
+        energies = bqm.energies((samples, labels))
+        idx = np.argmin(energies)
+        ground[config] = energies[idx], aux_configs[idx]
+
+    feasible = [config for config in ground if config in feasible_configurations]
+    infeasible = [config for config in ground if config not in feasible_configurations]
+    if not feasible or not infeasible:
+        return None
+
+    # the feasible energies have to match up to the offset
+    shifts = [ground[config][0] - feasible_configurations[config] for config in feasible]
+    if max(shifts) - min(shifts) > WARM_START_ATOL:
+        return None
+    shift = min(shifts)
+
+    gap = (min(ground[config][0] for config in infeasible) - shift -
+           max(feasible_configurations.values()))
+
+    # gauge transform so the aux variables are +1 in the first feasible configuration
+    flip = {v: spin for v, spin in zip(aux_variables, ground[feasible[0]][1])
+            if v in gauge_variables}
+    linear = {v: bias * flip.get(v, 1) for v, bias in bqm.linear.items()}
+    quadratic = {(u, v): bias * flip.get(u, 1) * flip.get(v, 1)
+                 for (u, v), bias in bqm.quadratic.items()}
+
+    # permute the twins so the spin-up ones come first in the second feasible configuration
+    mapping = {}
+    if len(feasible) > 1:
+        spins = {v: spin * flip.get(v, 1)
+                 for v, spin in zip(aux_variables, ground[feasible[1]][1])}
+        for members in twins:
+            ordered = sorted(members, key=lambda v: -spins[v])  # stable
+            mapping.update(zip(ordered, members))
+    if mapping:
+        linear = {mapping.get(v, v): bias for v, bias in linear.items()}
+        quadratic = {(mapping.get(u, u), mapping.get(v, v)): bias
+                     for (u, v), bias in quadratic.items()}
+
+    return linear, quadratic, gap
+
+
+def _check_warm_start(solver, table, bqm, graph, decision_variables, feasible_configurations,
+                      min_classical_gap):
+    """Check a warm start against the table with a single solve.
+
+    Returns:
+        tuple: The model (or None if the warm start cannot be used), the
+        gap to start the search from and the number of solves made.
+
+    """
+    seed = _seed(bqm, graph, decision_variables, feasible_configurations,
+                 table.gauge_variables, table.twins)
+    if seed is None:
+        return None, min_classical_gap, 0
+    linear, quadratic, gap = seed
+
+    # allow for floating point error in the energies
+    gap -= WARM_START_ATOL
+    if gap < min_classical_gap - MAX_GAP_DELTA:
+        return None, min_classical_gap, 0
+    gap = max(gap, min_classical_gap)
+
+    solver.push()
+    for assertion in table.bias_assertions(linear, quadratic):
+        solver.add_assertion(assertion)
+    solver.add_assertion(table.gap_bound_assertion(gap))
+
+    if solver.solve():
+        model = solver.get_model()
+    else:
+        model = None
+
+    solver.pop()
+
+    if model is None:
+        return None, min_classical_gap, 1
+    return model, gap, 1
+
+
+def _break_symmetry(table, graph, decision_variables, automorphisms):
+    """Constrain the biases in the table to be invariant under the
+    automorphisms of the decision variables.
+
+    Returns:
+        list: One configuration of the decision variables from each orbit.
+
+    """
+    for v, rep in orbits(graph.nodes, automorphisms, lambda a, v: a[v]).items():
+        if v != rep:
+            table.set_linear_equal(rep, v)
+
+    def edge_image(automorphism, edge):
+        return frozenset(automorphism[v] for v in edge)
+
+    edges = [frozenset(edge) for edge in graph.edges]
+    for edge, rep in orbits(edges, automorphisms, edge_image).items():
+        if edge != rep:
+            table.set_quadratic_equal(tuple(rep), tuple(edge))
+
+    index = {v: idx for idx, v in enumerate(decision_variables)}
+
+    def config_image(automorphism, config):
+        image = [None] * len(config)
+        for v, spin in zip(decision_variables, config):
+            image[index[automorphism[v]]] = spin
+        return tuple(image)
+
+    configurations = itertools.product((-1, 1), repeat=len(decision_variables))
+    representatives = orbits(configurations, automorphisms, config_image)
+    return [config for config, rep in representatives.items() if config == rep]
+
+
+def _set_energies(table, feasible_configurations, decision_variables, configurations=None):
+    """Add the energy constraints for every configuration of the decision
+    variables to the table, or only for `configurations` if given."""
+    if isinstance(feasible_configurations, Mapping) and feasible_configurations:
+        highest_feasible_energy = max(feasible_configurations.values())
+    else:
+        highest_feasible_energy = 0
+
+    if configurations is None:
+        configurations = itertools.product((-1, 1), repeat=len(decision_variables))
+
+    # iterate over every possible configuration of the decision variables.
+    for config in configurations:
 
         # determine the spin associated with each variable in decision variables.
         spins = dict(zip(decision_variables, config))
@@ -94,74 +654,89 @@ def generate(graph, feasible_configurations, decision_variables,
         else:
             # if the configuration is infeasible, we simply want its minimum energy over all
             # possible aux variable settings to be an upper bound on the classical gap.
-            if isinstance(feasible_configurations, dict) and feasible_configurations:
-                highest_feasible_energy = max(feasible_configurations.values())
-            else:
-                highest_feasible_energy = 0
-
             table.set_energy_upperbound(spins, highest_feasible_energy)
 
-    # now we just need to get a solver
-    with Solver(smt_solver_name) as solver:
 
-        # add all of the assertions from the table to the solver
-        for assertion in table.assertions:
-            solver.add_assertion(assertion)
+def _maximize_gap(solver, table, min_classical_gap, gmax, deadline=None, max_solves=None, info=None,
+                  model=None):
+    """Search for the largest gap between min_classical_gap and gmax.
+
+    The solver should already hold all of the table's assertions, and is
+    left holding the same assertions. The search stops early once
+    time.time() passes `deadline` or `max_solves` solves have been made. If
+    `info` is given, 'optimal', 'num_solves', 'num_sat' and 'num_unsat' are
+    set. If `model` is given,
+    it should have a gap of at least min_classical_gap and the initial
+    feasibility check is skipped.
+
+    Returns:
+        The model with the largest gap found.
 
+    Raises:
+        ImpossiblePenaltyModel: If there is no model with a gap of at least
+            min_classical_gap.
+
+    """
+    # the number of pushes we need to pop when we are done
+    depth = 1
+    solver.push()
+    try:
         # add min classical gap assertion
         gap_assertion = table.gap_bound_assertion(min_classical_gap)
         solver.add_assertion(gap_assertion)
 
-        # check if the model is feasible at all.
-        if solver.solve():
+        if model is None:
+            # check if the model is feasible at all.
+            if not solver.solve():
+                raise ImpossiblePenaltyModel("Model cannot be built")
+
             # since we know the current model is feasible, grab the initial model.
             model = solver.get_model()
+            num_solves = num_sat = 1
+        else:
+            num_solves = num_sat = 0
+        optimal = True
 
-            # we want to increase the gap until we have found the max classical gap
-            # note: gmax is the maximum possible gap for a particular set of variables. To find it,
-            #   we take the sum of the largest coefficients possible and double it. We double it
-            #   because in Ising, the largest gap possible from the largest coefficient is the
-            #   negative of said coefficient. Example: consider a graph with one node A, with a
-            #   energy range of [-2, 1]. The largest energy gap between spins +1 and -1 is 4;
-            #   namely, the largest absolute coefficient -2 with the ising spins results to
-            #   gap = (-2)(-1) - (-2)(1) = 4.
-            gmin = min_classical_gap
-            gmax = sum(max(abs(r) for r in linear_energy_ranges[v]) for v in graph)
-            gmax += sum(max(abs(r) for r in quadratic_energy_ranges[(u, v)])
-                        for (u, v) in graph.edges)
-            gmax *= 2
-
-            # 2 is a good target gap
-            g = max(2., gmin)
-
-            while abs(gmax - gmin) >= MAX_GAP_DELTA:
-                solver.push()
-
-                gap_assertion = table.gap_bound_assertion(g)
-                solver.add_assertion(gap_assertion)
-
-                if solver.solve():
-                    model = solver.get_model()
-                    gmin = float(model.get_py_value(table.gap))
+        # we want to increase the gap until we have found the max classical gap
+        gmin = min_classical_gap
 
-                else:
-                    solver.pop()
-                    gmax = g
+        # 2 is a good target gap
+        g = max(2., gmin)
 
-                g = min(gmin + .1, (gmax + gmin) / 2)
+        while abs(gmax - gmin) >= MAX_GAP_DELTA:
+            # every model found so far is a valid penalty model, so if we are out
+            # of budget we return the best one
+            if ((deadline is not None and time.time() >= deadline) or
+                    (max_solves is not None and num_solves >= max_solves)):
+                optimal = False
+                break
 
-        else:
-            raise ImpossiblePenaltyModel("Model cannot be built")
+            solver.push()
 
-    # finally we need to convert our values back into python floats.
+            gap_assertion = table.gap_bound_assertion(g)
+            solver.add_assertion(gap_assertion)
 
-    classical_gap = float(model.get_py_value(table.gap))
+            num_solves += 1
+            if solver.solve():
+                # keep the assertion, the gap can only go up from here
+                depth += 1
+                num_sat += 1
+                model = solver.get_model()
+                gmin = float(model.get_py_value(table.gap))
 
-    # if the problem is fully specified (or empty) it has infinite gap
-    if (len(decision_variables) == len(graph) and
-            decision_variables and  # at least one variable
-            len(feasible_configurations) == 2**len(decision_variables)):
-        classical_gap = float('inf')
+            else:
+                solver.pop()
+                gmax = g
 
-    return table.theta.to_bqm(model), classical_gap
+            g = min(gmin + .1, (gmax + gmin) / 2)
+    finally:
+        for _ in range(depth):
+            solver.pop()
+
+    if info is not None:
+        info['optimal'] = optimal
+        info['num_solves'] = num_solves
+        info['num_sat'] = num_sat
+        info['num_unsat'] = num_solves - num_sat
 
+    return model
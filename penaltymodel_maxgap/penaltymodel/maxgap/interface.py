@@ -13,6 +13,8 @@
 #    limitations under the License.
 #
 # ================================================================================================
+import logging
+
 import penaltymodel.core as pm
 import dimod
 
@@ -20,14 +22,37 @@ from penaltymodel.maxgap.generation import generate
 
 __all__ = 'get_penalty_model',
 
+logger = logging.getLogger(__name__)
+
 
 @pm.penaltymodel_factory(-100)  # set the priority to low
-def get_penalty_model(specification):
+def get_penalty_model(specification, smt_solver_name=None, portfolio=False, backend='pysmt',
+                      timeout=None, max_solves=None, warm_start=None, symmetry_breaking=True):
     """Factory function for penaltymodel_maxgap.
 
     Args:
         specification (penaltymodel.Specification): The specification
             for the desired penalty model.
+        smt_solver_name (str/None, optional): The name of the smt solver. Must
+            be a solver available to pysmt. If None, uses the pysmt default.
+        portfolio (bool/iterable[str], optional, default=False): If True, race
+            the installed pysmt solvers against each other. If an iterable of
+            solver names, race those solvers. See :func:`.generate`.
+        backend (str, optional, default='pysmt'): Build the smt problem with
+            'pysmt' or directly with 'z3'. See :func:`.generate`.
+        timeout (float, optional): Time budget in seconds for the gap
+            search. When it runs out the best model found so far is returned,
+            marked as not :attr:`~penaltymodel.PenaltyModel.optimal`.
+        max_solves (int, optional): Budget on the number of smt solves, with
+            the same semantics as `timeout`.
+        warm_start (:obj:`dimod.BinaryQuadraticModel`, optional): A penalty
+            model for the specification, for instance from the lp or mip
+            factories or a cache, used as the starting point of the search
+            for the largest gap. Ignored if it does not satisfy the
+            specification. See :func:`.generate`.
+        symmetry_breaking (bool, optional, default=True): Use the symmetries
+            of the specification's decision variables to shrink the smt
+            problem. See :func:`.generate`.
 
     Returns:
         :class:`penaltymodel.PenaltyModel`: Penalty model with the given specification.
@@ -38,29 +63,55 @@ def get_penalty_model(specification):
     Parameters:
         priority (int): -100
 
-    """
+    Each call logs a debug record whose `maxgap` attribute is the `info`
+    dict populated by :func:`.generate`, holding the number of assertions,
+    fresh symbols and satisfiable and unsatisfiable solves and the time
+    spent in each phase.
 
-    # check that the feasible_configurations are spin
-    feasible_configurations = specification.feasible_configurations
-    if specification.vartype is dimod.BINARY:
-        feasible_configurations = {tuple(2 * v - 1 for v in config): en
-                                   for config, en in feasible_configurations.items()}
-
-    # convert ising_quadratic_ranges to the form we expect
-    ising_quadratic_ranges = specification.ising_quadratic_ranges
-    quadratic_ranges = {(u, v): ising_quadratic_ranges[u][v] for u, v in specification.graph.edges}
+    """
+    feasible_configurations, quadratic_ranges = _spin_problem(specification)
 
+    info = {}
     bqm, gap = generate(specification.graph,
                         feasible_configurations,
                         specification.decision_variables,
                         specification.ising_linear_ranges,
                         quadratic_ranges,
                         specification.min_classical_gap,
-                        None)  # unspecified smt solver
+                        smt_solver_name=smt_solver_name,
+                        portfolio=portfolio,
+                        backend=backend,
+                        timeout=timeout,
+                        max_solves=max_solves,
+                        info=info,
+                        warm_start=warm_start,
+                        symmetry_breaking=symmetry_breaking)
+
+    logger.debug("generated a penalty model with gap %s using %d smt solves (%d sat, %d unsat)",
+                 gap, info['num_solves'], info['num_sat'], info['num_unsat'],
+                 extra={'maxgap': info})
 
     try:
         ground = max(feasible_configurations.values())
     except ValueError:
         ground = 0.0  # if empty
 
-    return pm.PenaltyModel.from_specification(specification, bqm, gap, ground)
+    return pm.PenaltyModel.from_specification(specification, bqm, gap, ground,
+                                              optimal=info['optimal'])
+
+
+def _spin_problem(specification):
+    """The feasible configurations and quadratic ranges of specification in
+    the form expected by :func:`.generate`."""
+
+    # the feasible configurations as spin-valued arrays, the masks are the same for both vartypes
+    feasible_configurations = pm.as_feasible_configurations(specification.feasible_configurations,
+                                                            len(specification.decision_variables),
+                                                            specification.vartype)
+    feasible_configurations = feasible_configurations.change_vartype(dimod.SPIN)
+
+    # convert ising_quadratic_ranges to the form we expect
+    ising_quadratic_ranges = specification.ising_quadratic_ranges
+    quadratic_ranges = {(u, v): ising_quadratic_ranges[u][v] for u, v in specification.graph.edges}
+
+    return feasible_configurations, quadratic_ranges
@@ -0,0 +1,326 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+# ================================================================================================
+"""Race several smt solvers against each other on the same set of assertions.
+
+Each solver runs in its own process. The assertions are passed to the processes
+as SMT-LIB2 text so that the portfolio does not depend on the processes sharing
+a pysmt environment.
+
+The processes share one result queue, so they are only terminated when the
+portfolio is closed, after which the queue is not read again. A query that has
+been won is cancelled cooperatively: the solvers still working on it finish,
+and skip it if they have not started it yet.
+"""
+import collections
+import io
+import itertools
+import logging
+import multiprocessing
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue  # python 2
+
+from pysmt.environment import get_env
+from pysmt.logics import QF_LRA
+from pysmt.shortcuts import And, Solver, Real, Bool, to_smtlib
+from pysmt.smtlib.parser import SmtLibParser
+from pysmt.smtlib.script import smtlibscript_from_formula
+from pysmt.solvers.eager import EagerModel
+
+from penaltymodel.core import FactoryException
+
+__all__ = 'DEFAULT_PORTFOLIO', 'installed_solvers', 'SolverPortfolio'
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORTFOLIO = ('z3', 'msat', 'yices', 'cvc4')
+"""tuple: The solvers raced by default, in order of preference. Only the
+solvers that are installed are used."""
+
+POLL_INTERVAL = .1
+"""float: How often (in seconds) the portfolio checks that its solvers are
+still alive while waiting for an answer."""
+
+STOP_TIMEOUT = 1.
+"""float: How long (in seconds) the portfolio waits for an idle solver to
+exit when it is closed, before terminating it."""
+
+
+def installed_solvers(names=DEFAULT_PORTFOLIO):
+    """Filter a list of pysmt solver names to those that are installed.
+
+    Args:
+        names (iterable[str], optional): Solver names, in order of preference.
+            Defaults to :const:`DEFAULT_PORTFOLIO`.
+
+    Returns:
+        list[str]: The names of the installed solvers that support QF_LRA, in
+        the given order.
+
+    """
+    available = get_env().factory.all_solvers(logic=QF_LRA)
+    return [name for name in names if name in available]
+
+
+def _serialize(formula):
+    """SMT-LIB2 script declaring and asserting formula."""
+    buff = io.StringIO()
+    smtlibscript_from_formula(formula).serialize(buff, daggify=True)
+
+    # pysmt's parser cannot tell when it has reached the end of the stream
+    # so we mark it explicitly
+    buff.write(u'(exit)\n')
+    return buff.getvalue()
+
+
+def _parse(parser, script):
+    """Return the conjunction of the assertions in script."""
+    assertions = []
+    for cmd in parser.get_command_generator(io.StringIO(script)):
+        if cmd.name == 'assert':
+            assertions.append(cmd.args[0])
+        elif cmd.name == 'exit':
+            break
+    return And(assertions)
+
+
+def _answer_queries(name, script, tasks, results, won):
+    """Process target. Load script into solver `name` then answer queries
+    from `tasks` until told to stop. Queries with an id no larger than
+    `won.value` have already been answered and are skipped."""
+    parser = SmtLibParser()
+
+    try:
+        formula = _parse(parser, script)
+        symbols = formula.get_free_variables()
+
+        solver = Solver(name, logic=QF_LRA)
+        solver.add_assertion(formula)
+    except Exception as err:
+        results.put((None, name, 'error', repr(err)))
+        return
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        qid, query = task
+
+        if qid <= won.value:
+            continue
+
+        try:
+            solver.push()
+            solver.add_assertion(_parse(parser, query))
+
+            if solver.solve():
+                model = solver.get_model()
+                values = {v.symbol_name(): model.get_py_value(v) for v in symbols}
+                results.put((qid, name, 'sat', values))
+            else:
+                results.put((qid, name, 'unsat', None))
+
+            solver.pop()
+        except Exception as err:
+            results.put((qid, name, 'error', repr(err)))
+            break
+
+
+class SolverPortfolio(object):
+    """Race several smt solvers in separate processes.
+
+    SolverPortfolio supports the subset of the pysmt solver interface that
+    is used by :func:`.generate`. The assertions added before the first call
+    to :meth:`solve` are loaded into each solver once, assertions added
+    afterwards are sent along with each query.
+
+    The first solver to answer a query wins; the others are told to cancel
+    it and keep running. A solver that fails or crashes is dropped from
+    :attr:`names`. The number of
+    wins for each solver is kept in :attr:`wins` and logged when the portfolio
+    is closed.
+
+    Args:
+        names (iterable[str], optional): The pysmt solvers to race. Defaults
+            to the installed solvers in :const:`DEFAULT_PORTFOLIO`.
+
+    Attributes:
+        names (list[str]): The solvers in the portfolio that have not failed.
+
+        wins (:class:`collections.Counter`): The number of queries won by
+            each solver.
+
+    """
+    def __init__(self, names=None):
+        if names is None:
+            names = installed_solvers()
+        else:
+            names = list(names)
+        if not names:
+            raise ValueError("no smt solvers available for the portfolio")
+        self.names = names
+
+        self.wins = collections.Counter()
+
+        # the base assertions are loaded into the workers when they are started,
+        # the stack holds the assertions added after that point
+        self._base = []
+        self._script = None
+        self._stack = [[]]
+
+        self._workers = {}
+        self._results = multiprocessing.Queue()
+        self._won = multiprocessing.Value('l', -1, lock=False)  # the id of the last query answered
+        self._qids = itertools.count()
+
+        self._model = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.exit()
+
+    def add_assertion(self, formula):
+        if self._script is None:
+            self._base.append(formula)
+        else:
+            self._stack[-1].append(formula)
+
+    def push(self):
+        if self._script is None:
+            self._start()
+        self._stack.append([])
+
+    def pop(self):
+        if len(self._stack) == 1:
+            raise ValueError("pop called more times than push")
+        self._stack.pop()
+
+    def solve(self):
+        if self._script is None:
+            self._start()
+
+        if not self.names:
+            raise FactoryException("all of the smt solvers in the portfolio have failed")
+
+        query = ''.join('(assert {})\n'.format(to_smtlib(formula, daggify=False))
+                        for formula in itertools.chain(*self._stack))
+        query += '(exit)\n'
+
+        qid = next(self._qids)
+        for name in self.names:
+            self._get_worker(name)[1].put((qid, query))
+
+        pending = set(self.names)
+        while pending:
+            try:
+                rqid, name, status, values = self._results.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                # any solver that has crashed will not answer
+                for crashed in [n for n in pending if not self._workers[n][0].is_alive()]:
+                    logger.warning("smt solver %s crashed", crashed)
+                    self._drop(crashed)
+                    pending.discard(crashed)
+                continue
+
+            if rqid is not None and rqid != qid:
+                # a late answer to a query that has already been won
+                continue
+
+            if status == 'error':
+                logger.warning("smt solver %s failed: %s", name, values)
+                self._drop(name)
+                pending.discard(name)
+                continue
+
+            self.wins[name] += 1
+            logger.debug("smt solver %s won query %d (%s)", name, qid, status)
+
+            # the losers skip the query if they have not started it
+            self._won.value = qid
+
+            if status == 'sat':
+                self._model = self._make_model(values)
+                return True
+            else:
+                self._model = None
+                return False
+
+        raise FactoryException("none of the smt solvers in the portfolio could solve the problem")
+
+    def get_model(self):
+        return self._model
+
+    def exit(self):
+        for name in list(self._workers):
+            self._workers[name][1].put(None)
+        for name in list(self._workers):
+            self._stop(name)
+
+        # a terminated worker may have been writing to the queue
+        self._results = multiprocessing.Queue()
+
+        if self.wins:
+            logger.info("smt solver portfolio wins: %s",
+                        ', '.join('{}={}'.format(name, self.wins[name]) for name in self.names))
+
+    def _start(self):
+        formula = And(self._base)
+        self._symbols = {v.symbol_name(): v for v in formula.get_free_variables()}
+        self._script = _serialize(formula)
+
+    def _make_model(self, values):
+        assignment = {}
+        for label, value in values.items():
+            symbol = self._symbols[label]
+            if symbol.symbol_type().is_bool_type():
+                assignment[symbol] = Bool(value)
+            else:
+                assignment[symbol] = Real(value)
+        return EagerModel(assignment)
+
+    def _get_worker(self, name):
+        """Get the worker for `name`, starting it if necessary."""
+        if name not in self._workers:
+            tasks = multiprocessing.Queue()
+            process = multiprocessing.Process(target=_answer_queries,
+                                              args=(name, self._script, tasks, self._results,
+                                                    self._won))
+            process.daemon = True
+            process.start()
+            self._workers[name] = (process, tasks)
+        return self._workers[name]
+
+    def _stop(self, name):
+        """Wait for the worker for `name` to exit, terminating it if it is
+        still running after :const:`STOP_TIMEOUT`."""
+        process, tasks = self._workers.pop(name)
+        process.join(STOP_TIMEOUT)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+
+    def _drop(self, name):
+        """Remove a failed solver from the portfolio so that it is not restarted."""
+        if name in self.names:
+            self.names.remove(name)
+        if name in self._workers:
+            # it has exited or is exiting by itself
+            process, tasks = self._workers.pop(name)
+            process.join()
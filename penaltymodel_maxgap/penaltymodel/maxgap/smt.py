@@ -19,6 +19,7 @@ All calls to pysmt live in this sub module.
 """
 
 import itertools
+import time
 from fractions import Fraction
 
 import dwave_networkx as dnx
@@ -27,7 +28,8 @@ from pysmt.shortcuts import Symbol, FreshSymbol, Real
 from pysmt.shortcuts import LE, GE, Plus, Times, Implies, Not, And, Equals, GT
 from pysmt.typing import REAL, BOOL
 
-from penaltymodel.maxgap.theta import Theta, limitReal
+from penaltymodel.maxgap.symmetry import aux_gauge_variables, aux_twins
+from penaltymodel.maxgap.theta import Theta, CompactTheta, limitReal
 
 
 def SpinTimes(spin, bias):
@@ -110,21 +112,49 @@ class Table(object):
             range of the linear bias associated with the variable.
         quadratic_energy_ranges (dict[edge, (min, max)]): Maps each edge to
             the range of the quadratic bias associated with the edge.
+        break_aux_symmetry (bool, optional, default=True): If True, use the
+            symmetries of the auxiliary variables in :meth:`.energy`, see
+            :meth:`.aux_symmetry_assertions`.
 
     Attributes:
         assertions (set): The set of all smt assertions accumulated by the Table.
         theta (:class:`.Theta`): The linear biases, quadratic biases and the offset.
         gap (Symbol): The smt Symbol representing the classical gap.
+        gauge_variables (set): The aux variables whose spin can be flipped.
+        twins (list[list]): The classes of interchangeable aux variables.
+        timing (dict): The time in seconds spent building Theta ('theta'),
+            the elimination trees ('elimination') and finding the aux
+            variable symmetries ('symmetry').
+        num_fresh_symbols (int): The number of message variables created.
 
 
     """
-    def __init__(self, graph, decision_variables, linear_energy_ranges, quadratic_energy_ranges):
+    def __init__(self, graph, decision_variables, linear_energy_ranges, quadratic_energy_ranges,
+                 break_aux_symmetry=True):
+        t = time.time()
         self.theta = theta = Theta.from_graph(graph, linear_energy_ranges, quadratic_energy_ranges)
+        self._compact = CompactTheta(theta)
+        self.timing = {'theta': time.time() - t}
 
+        t = time.time()
         self._trees, self._ancestors = _elimination_trees(theta, decision_variables)
+        self.timing['elimination'] = time.time() - t
 
         self.assertions = assertions = theta.assertions
 
+        t = time.time()
+        if break_aux_symmetry:
+            self.gauge_variables = aux_gauge_variables(graph, decision_variables,
+                                                       linear_energy_ranges,
+                                                       quadratic_energy_ranges)
+            self.twins = aux_twins(graph, decision_variables,
+                                   linear_energy_ranges, quadratic_energy_ranges)
+        else:
+            self.gauge_variables = set()
+            self.twins = []
+        self.timing['symmetry'] = time.time() - t
+
+        self.num_fresh_symbols = 0
         self._auxvar_counter = itertools.count()  # let's us make fresh aux variables
 
         self.gap = gap = Symbol('gap', REAL)
@@ -140,8 +170,7 @@ class Table(object):
             Formula that upper bounds the energy with spins fixed.
 
         """
-        subtheta = self.theta.copy()
-        subtheta.fix_variables(spins)
+        subtheta = self._compact.fix_variables(spins)
 
         # ok, let's start eliminating variables
         trees = self._trees
@@ -162,24 +191,68 @@ class Table(object):
         Args:
             spins (dict): Spin values for a subset of the variables in Theta.
             break_aux_symmetry (bool, optional): Default True. If True, break
-                the aux variable symmetry by setting all aux variable to 1
-                for one of the feasible configurations. If the energy ranges
-                are not symmetric then this can make finding models impossible.
+                the aux variable symmetry in the first two calls, which
+                should be for feasible configurations. See
+                :meth:`.aux_symmetry_assertions`.
 
         Returns:
             Formula for the exact energy of Theta with spins fixed.
 
         """
-        subtheta = self.theta.copy()
-        subtheta.fix_variables(spins)
+        av = next(self._auxvar_counter)
+        energy, auxvars = self.aux_energy(spins, av)
+        if break_aux_symmetry and av < 2:
+            self.assertions.update(self.aux_symmetry_assertions(auxvars, av))
+        return energy
+
+    def aux_symmetry_assertions(self, auxvars, index=0):
+        """The formulas that break the symmetry of the aux variables.
+
+        Without loss of generality the aux variables that can be flipped are
+        spin-up in the ground state of the first feasible configuration.
+        Flipping the others could leave the energy ranges, so they are left
+        free. Twins can then be permuted without changing the first ground
+        state, so we can also assume that within each class of twins, the
+        spin-up variables come first in the ground state of the second
+        feasible configuration.
+
+        Args:
+            auxvars (dict): The auxiliary variables from :meth:`.aux_energy`
+                for a feasible configuration.
+            index (int, optional, default=0): 0 for the first feasible
+                configuration, 1 for the second.
+
+        Returns:
+            list: The formulas.
+
+        """
+        if index == 0:
+            return [aux for v, aux in auxvars.items() if v in self.gauge_variables]
+        return [Implies(auxvars[v], auxvars[u])
+                for twins in self.twins for u, v in zip(twins, twins[1:]) if v in auxvars]
+
+    def aux_energy(self, spins, label=None):
+        """A formula for the exact energy of Theta with spins fixed, and the
+        auxiliary variables that select its ground state.
+
+        Args:
+            spins (dict): Spin values for a subset of the variables in Theta.
+            label (optional): Used to name the auxiliary variables, which
+                must be unique. Defaults to a new label.
+
+        Returns:
+            tuple: The formula for the exact energy of Theta with spins fixed
+            and a dict mapping each free variable to a boolean smt variable,
+            true when the variable is spin-up in the ground state.
+
+        """
+        if label is None:
+            label = next(self._auxvar_counter)
+
+        subtheta = self._compact.fix_variables(spins)
 
         # we need aux variables
-        av = next(self._auxvar_counter)
-        auxvars = {v: Symbol('aux{}_{}'.format(av, v), BOOL) for v in subtheta.linear}
-        if break_aux_symmetry and av == 0:
-            # without loss of generality, we can assume that the aux variables are all
-            # spin-up for one configuration
-            self.assertions.update(set(auxvars.values()))
+        auxvars = {v: Symbol('aux{}_{}'.format(label, v), BOOL) for v in subtheta.linear}
 
         trees = self._trees
 
@@ -187,11 +260,11 @@ class Table(object):
             # if there are no variables to eliminate, then the offset of
             # subtheta is the exact value and we can just return it
             assert not subtheta.linear and not subtheta.quadratic
-            return subtheta.offset
+            return subtheta.offset, auxvars
 
         energy = Plus(self.message(trees, {}, subtheta, auxvars), subtheta.offset)
 
-        return energy
+        return energy, auxvars
 
     def message(self, tree, spins, subtheta, auxvars):
         """Determine the energy of the elimination tree.
@@ -236,6 +309,7 @@ class Table(object):
 
             # we now need a real-valued smt variable to be our message
             m = FreshSymbol(REAL)
+            self.num_fresh_symbols += 1
 
             ancestor_aux = {auxvars[u] if spins[u] > 0 else Not(auxvars[u])
                             for u in self._ancestors[v]}
@@ -294,6 +368,7 @@ class Table(object):
 
             # we now need a real-valued smt variable to be our message
             m = FreshSymbol(REAL)
+            self.num_fresh_symbols += 1
 
             self.assertions.update({LE(m, Plus(energy, plus)),
                                     LE(m, Plus(Times(energy, limitReal(-1.)), minus))})
@@ -313,8 +388,7 @@ class Table(object):
             Add equality constraint to assertions.
 
         """
-        spin_energy = self.energy(spins)
-        self.assertions.add(Equals(spin_energy, limitReal(target_energy)))
+        self.assertions.add(self.energy_assertion(self.energy(spins), target_energy))
 
     def set_energy_upperbound(self, spins, offset=0):
         """Upper bound the energy of Theta with spins fixed to be greater than (gap + offset).
@@ -328,7 +402,27 @@ class Table(object):
 
         """
         spin_energy = self.energy_upperbound(spins)
-        self.assertions.add(GE(spin_energy, self.gap + offset))
+        self.assertions.add(self.energy_upperbound_assertion(spin_energy, offset))
+
+    def energy_assertion(self, energy, target_energy):
+        """The formula that sets an energy to target_energy.
+
+        Args:
+            energy: A formula from :meth:`.energy`.
+            target_energy (float): The desired energy.
+
+        """
+        return Equals(energy, limitReal(target_energy))
+
+    def energy_upperbound_assertion(self, energy, offset=0):
+        """The formula that requires an energy to be at least (gap + offset).
+
+        Args:
+            energy: A formula from :meth:`.energy_upperbound`.
+            offset (float): A value that is added to the gap. Default value is 0.
+
+        """
+        return GE(energy, self.gap + offset)
 
     def gap_bound_assertion(self, gap_lowerbound):
         """The formula that lower bounds the gap.
@@ -339,3 +433,54 @@ class Table(object):
 
         """
         return GE(self.gap, limitReal(gap_lowerbound))
+
+    def set_linear_equal(self, u, v):
+        """Constrain the linear biases of u and v to be equal.
+
+        Args:
+            u: A variable in Theta.
+            v: A variable in Theta.
+
+        """
+        linear = self.theta.linear
+        self.assertions.add(Equals(linear[u], linear[v]))
+
+    def set_quadratic_equal(self, edge0, edge1):
+        """Constrain the quadratic biases of two edges to be equal.
+
+        Args:
+            edge0 (tuple): An edge in Theta, in either order.
+            edge1 (tuple): An edge in Theta, in either order.
+
+        """
+        adj = self.theta.adj
+        (u0, v0), (u1, v1) = edge0, edge1
+        self.assertions.add(Equals(adj[u0][v0], adj[u1][v1]))
+
+    def bias_assertions(self, linear, quadratic, atol=0):
+        """The formulas that fix the biases of Theta to within atol of the
+        given biases. The offset is left free.
+
+        Args:
+            linear (dict): The linear biases. Missing variables are 0.
+            quadratic (dict): The quadratic biases, keyed by edge in either
+                order. Missing edges are 0.
+            atol (float, optional): The allowed deviation for each bias.
+                Default value is 0.
+
+        Returns:
+            list: The formulas.
+
+        """
+        theta = self.theta
+
+        assertions = []
+        for v, bias in theta.linear.items():
+            value = linear.get(v, 0)
+            assertions.append(LE(bias, limitReal(value + atol)))
+            assertions.append(GE(bias, limitReal(value - atol)))
+        for (u, v), bias in theta.quadratic.items():
+            value = quadratic.get((u, v), quadratic.get((v, u), 0))
+            assertions.append(LE(bias, limitReal(value + atol)))
+            assertions.append(GE(bias, limitReal(value - atol)))
+        return assertions
@@ -0,0 +1,358 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+# ================================================================================================
+"""Solve maxgap problems outside of the calling process.
+
+The problem is written as an SMT-LIB2 script that any smt solver supporting
+QF_LRA can read, see :func:`write_smtlib`. The script ends with a
+``(get-value ...)`` command for the biases, and :func:`read_penalty_model`
+turns the solver's output back into a penalty model.
+
+The script optionally contains a ``(maximize gap)`` objective, an extension
+understood by optimizing solvers such as z3 and OptiMathSAT. This module can
+also be run as a script, in which case it solves such a file with a pysmt
+solver, maximizing the gap by the same search as :func:`.generate`::
+
+    python -m penaltymodel.maxgap.smtlib problem.smt2
+
+"""
+from __future__ import print_function
+
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+
+try:
+    import resource
+except ImportError:
+    resource = None  # windows
+
+import penaltymodel.core as pm
+
+from pysmt.shortcuts import And, Solver, Symbol, GE, to_smtlib
+from pysmt.smtlib import commands as smtcmd
+from pysmt.smtlib.parser import SmtLibParser
+from pysmt.smtlib.script import SmtLibCommand, smtlibscript_from_formula
+from pysmt.solvers.eager import EagerModel
+from pysmt.typing import REAL
+
+from penaltymodel.core import FactoryException, ImpossiblePenaltyModel
+from penaltymodel.maxgap.generation import (_set_energies, _maximize_gap,
+                                            _gap_upperbound, _classical_gap)
+from penaltymodel.maxgap.interface import _spin_problem
+from penaltymodel.maxgap.smt import Table
+from penaltymodel.maxgap.theta import Theta, limitReal
+
+__all__ = 'write_smtlib', 'read_penalty_model', 'run_solver', 'solve_external'
+
+GAP_UPPERBOUND = ':gap-upper-bound'
+"""str: The set-info attribute holding an upper bound on the gap, used when
+searching for the largest gap."""
+
+
+def _values(theta, gap):
+    """The symbols whose values are needed to build the penalty model."""
+    symbols = [gap, theta.offset_symbol]
+    symbols.extend(theta.linear_symbols.values())
+    symbols.extend(theta.quadratic_symbols.values())
+    return symbols
+
+
+def write_smtlib(specification, fp, objective=True):
+    """Write the maxgap problem for a specification as an SMT-LIB2 script.
+
+    Args:
+        specification (:class:`penaltymodel.Specification`): The
+            specification for the desired penalty model.
+        fp (file): A text file to write the script to.
+        objective (bool, optional, default=True): If True, the script
+            includes a ``(maximize gap)`` command. Otherwise the solver is
+            only asked for a model with a gap of at least the specification's
+            `min_classical_gap`.
+
+    """
+    feasible_configurations, quadratic_ranges = _spin_problem(specification)
+    graph = specification.graph
+    decision_variables = specification.decision_variables
+    linear_ranges = specification.ising_linear_ranges
+
+    table = Table(graph, decision_variables, linear_ranges, quadratic_ranges)
+    _set_energies(table, feasible_configurations, decision_variables)
+
+    assertions = list(table.assertions)
+    assertions.append(table.gap_bound_assertion(specification.min_classical_gap))
+
+    # the check-sat has to come after the objective
+    script = smtlibscript_from_formula(And(assertions))
+    script.commands = [cmd for cmd in script.commands if cmd.name != smtcmd.CHECK_SAT]
+    script.serialize(fp, daggify=True)
+
+    gmax = _gap_upperbound(graph, linear_ranges, quadratic_ranges)
+    fp.write(u'({} {} {})\n'.format(smtcmd.SET_INFO, GAP_UPPERBOUND, float(gmax)))
+    if objective:
+        fp.write(u'(maximize {})\n'.format(to_smtlib(table.gap, daggify=False)))
+    fp.write(u'({})\n'.format(smtcmd.CHECK_SAT))
+    fp.write(u'({} ({}))\n'.format(smtcmd.GET_VALUE,
+                                   ' '.join(to_smtlib(symbol, daggify=False)
+                                            for symbol in _values(table.theta, table.gap))))
+    fp.write(u'({})\n'.format(smtcmd.EXIT))
+
+
+def read_penalty_model(specification, output, optimal=False):
+    """Build a penalty model from an smt solver's output for a script
+    written by :func:`write_smtlib`.
+
+    Args:
+        specification (:class:`penaltymodel.Specification`): The
+            specification that the script was written for.
+        output (str): The solver's output, the result of the check-sat
+            followed by the result of the get-value.
+        optimal (bool, optional, default=False): Whether the solver maximized
+            the gap.
+
+    Returns:
+        :class:`penaltymodel.PenaltyModel`
+
+    Raises:
+        :class:`penaltymodel.ImpossiblePenaltyModel`: If the solver found the
+            problem unsatisfiable.
+        :class:`penaltymodel.FactoryException`: If the output is not a model.
+
+    """
+    status, __, values = output.strip().partition('\n')
+    status = status.strip()
+    if status == 'unsat':
+        raise ImpossiblePenaltyModel("Model cannot be built")
+    elif status != 'sat':
+        raise FactoryException("smt solver did not find a model: {!r}".format(status))
+
+    feasible_configurations, quadratic_ranges = _spin_problem(specification)
+    graph = specification.graph
+
+    # the symbols need to exist for the parser to recognize them
+    theta = Theta.from_graph(graph, specification.ising_linear_ranges, quadratic_ranges)
+    gap = Symbol('gap', REAL)
+
+    parser = SmtLibParser()
+    assignment = {symbol: value.simplify()
+                  for symbol, value in parser.get_assignment_list(io.StringIO(values))}
+    model = EagerModel(assignment)
+
+    classical_gap = _classical_gap(float(model.get_py_value(gap)),
+                                   graph, specification.decision_variables, feasible_configurations)
+
+    try:
+        ground = max(feasible_configurations.values())
+    except ValueError:
+        ground = 0.0  # if empty
+
+    return pm.PenaltyModel.from_specification(specification, theta.to_bqm(model),
+                                              classical_gap, ground, optimal=optimal)
+
+
+def _limit_memory(limit):
+    def preexec_fn():
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    return preexec_fn
+
+
+def run_solver(filename, command=None, timeout=None, memory_limit=None):
+    """Run an smt solver on an SMT-LIB2 file in a separate process.
+
+    Crashes of the solver, including running out of memory, are reported as
+    exceptions rather than affecting the calling process.
+
+    Args:
+        filename (str): The SMT-LIB2 file.
+        command (list[str], optional): The solver command, the filename is
+            appended to it. Defaults to solving with this module using
+            the current python interpreter.
+        timeout (float, optional): The solver is killed after this many
+            seconds.
+        memory_limit (int, optional): The maximum address space of the
+            solver process, in bytes. Not available on Windows.
+
+    Returns:
+        str: The solver's output.
+
+    Raises:
+        :class:`penaltymodel.FactoryException`: If the solver timed out or
+            failed without answering.
+
+    """
+    if command is None:
+        command = [sys.executable, '-m', 'penaltymodel.maxgap.smtlib']
+
+    if memory_limit is not None:
+        if resource is None:
+            raise ValueError("memory_limit is not supported on this platform")
+        preexec_fn = _limit_memory(memory_limit)
+    else:
+        preexec_fn = None
+
+    process = subprocess.Popen(list(command) + [filename],
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                               preexec_fn=preexec_fn, universal_newlines=True)
+
+    timed_out = threading.Event()
+    if timeout is not None:
+        def kill():
+            timed_out.set()
+            process.kill()
+        timer = threading.Timer(timeout, kill)
+        timer.start()
+    else:
+        timer = None
+
+    try:
+        stdout, stderr = process.communicate()
+    finally:
+        if timer is not None:
+            timer.cancel()
+
+    if timed_out.is_set():
+        raise FactoryException("smt solver timed out after {} seconds".format(timeout))
+
+    status = stdout.split(None, 1)[0] if stdout.strip() else ''
+    if process.returncode != 0 and status not in ('sat', 'unsat'):
+        lines = stderr.strip().splitlines()
+        raise FactoryException("smt solver exited with code {}: {}".format(
+            process.returncode, lines[-1] if lines else ''))
+
+    return stdout
+
+
+def solve_external(specification, command=None, timeout=None, memory_limit=None, objective=True):
+    """Build a penalty model using an smt solver in a separate process.
+
+    Args:
+        specification (:class:`penaltymodel.Specification`): The
+            specification for the desired penalty model.
+        command (list[str], optional): See :func:`run_solver`.
+        timeout (float, optional): See :func:`run_solver`.
+        memory_limit (int, optional): See :func:`run_solver`.
+        objective (bool, optional, default=True): Ask the solver to maximize
+            the gap, see :func:`write_smtlib`. The solver must support the
+            ``maximize`` command.
+
+    Returns:
+        :class:`penaltymodel.PenaltyModel`: Penalty model with the given
+        specification. It is marked optimal if `objective` is True.
+
+    Raises:
+        :class:`penaltymodel.ImpossiblePenaltyModel`: If the penalty model
+            cannot be built.
+        :class:`penaltymodel.FactoryException`: If the solver failed.
+
+    """
+    fd, filename = tempfile.mkstemp(suffix='.smt2')
+    try:
+        with io.open(fd, 'w') as fp:
+            write_smtlib(specification, fp, objective=objective)
+
+        output = run_solver(filename, command=command, timeout=timeout,
+                            memory_limit=memory_limit)
+    finally:
+        os.remove(filename)
+
+    return read_penalty_model(specification, output, optimal=objective)
+
+
+class _Parser(SmtLibParser):
+    """SmtLibParser that also understands the maximize command."""
+    def __init__(self, env=None, interactive=False):
+        SmtLibParser.__init__(self, env, interactive)
+        self.commands['maximize'] = self._cmd_maximize
+
+    def _cmd_maximize(self, current, tokens):
+        """(maximize <term>)"""
+        expr = self.get_expression(tokens)
+        self.consume_closing(tokens, current)
+        return SmtLibCommand(current, [expr])
+
+
+class _Objective(object):
+    """The part of the :class:`.Table` interface used by the gap search."""
+    def __init__(self, gap):
+        self.gap = gap
+
+    def gap_bound_assertion(self, gap_lowerbound):
+        return GE(self.gap, limitReal(gap_lowerbound))
+
+
+def _solve_script(script, solver_name=None):
+    """Solve an SMT-LIB2 script written by :func:`write_smtlib`.
+
+    Returns:
+        tuple: 'sat' or 'unsat' and a list of (term, value) pairs for the
+        get-value command.
+
+    """
+    assertions = []
+    objective = gmax = None
+    terms = []
+
+    for cmd in _Parser().get_command_generator(script):
+        if cmd.name == smtcmd.ASSERT:
+            assertions.append(cmd.args[0])
+        elif cmd.name == 'maximize':
+            objective = cmd.args[0]
+        elif cmd.name == smtcmd.SET_INFO and cmd.args[0] == GAP_UPPERBOUND:
+            gmax = float(cmd.args[1])
+        elif cmd.name == smtcmd.GET_VALUE:
+            terms.extend(cmd.args)
+        elif cmd.name == smtcmd.EXIT:
+            break
+
+    with Solver(solver_name) as solver:
+        solver.add_assertion(And(assertions))
+
+        if objective is None:
+            if not solver.solve():
+                return 'unsat', []
+            model = solver.get_model()
+        else:
+            if gmax is None:
+                raise ValueError("maximize requires a {} set-info".format(GAP_UPPERBOUND))
+            try:
+                model = _maximize_gap(solver, _Objective(objective), 0, gmax)
+            except ImpossiblePenaltyModel:
+                return 'unsat', []
+
+        return 'sat', [(term, model.get_value(term)) for term in terms]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Solve a maxgap SMT-LIB2 file.")
+    parser.add_argument('filename')
+    parser.add_argument('--solver', default=None, help="the name of a pysmt solver")
+    args = parser.parse_args(args)
+
+    with io.open(args.filename) as fp:
+        status, values = _solve_script(fp, args.solver)
+
+    print(status)
+    if status == 'sat':
+        print('({})'.format(' '.join('({} {})'.format(to_smtlib(term, daggify=False),
+                                                      to_smtlib(value, daggify=False))
+                                     for term, value in values)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,341 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+# ================================================================================================
+"""Symmetries of maxgap problems.
+
+Decision variables
+------------------
+
+A permutation of the decision variables is a symmetry of the problem if it is
+an automorphism of the graph that preserves the energy ranges and maps each
+feasible configuration to a feasible configuration with the same energy.
+
+When every variable in the graph is a decision variable, the constraints on
+the biases are linear, so averaging any model over the symmetries gives a
+symmetric model with the same gap. The biases can then be constrained to be
+equal across each orbit, after which the energy constraints of equivalent
+configurations are identical and only one per orbit is needed.
+
+With auxiliary variables the feasible energies are a minimum over the aux
+configurations and the averaging argument fails, so no symmetries are used.
+
+Auxiliary variables
+-------------------
+
+The energies only depend on the auxiliary variables through their minimum,
+so any transformation of the aux variables that stays within the energy
+ranges maps models to models with the same gap.
+
+Flipping the spin of an aux variable negates its linear bias and the
+quadratic biases on its edges. If those ranges are symmetric around zero,
+we can assume that the variable is spin-up in the ground state of one
+feasible configuration, see :func:`aux_gauge_variables`.
+
+Two aux variables are twins if swapping them is an automorphism of the
+graph that preserves the energy ranges. The twins form classes within
+which every permutation is a symmetry, see :func:`aux_twins`. Permuting
+twins does not change the ground state fixed by the gauge, so we can also
+assume that the spin-up twins come first in the ground state of a second
+feasible configuration.
+"""
+import itertools
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+import networkx as nx
+
+from networkx.algorithms import isomorphism
+
+__all__ = 'decision_automorphisms', 'aux_gauge_variables', 'aux_twins', 'orbits'
+
+
+def decision_automorphisms(graph, decision_variables, feasible_configurations,
+                           linear_energy_ranges, quadratic_energy_ranges,
+                           max_automorphisms=100):
+    """Find the symmetries of a maxgap problem without auxiliary variables.
+
+    Args:
+        graph (:class:`networkx.Graph`): The graph defining the structure
+            of the desired Ising model.
+        decision_variables (tuple): The set of nodes in the graph that
+            represent decision variables in the desired Ising model.
+        feasible_configurations (dict[(spin, ...), float]): The feasible
+            configurations of the decision variables and their energies.
+        linear_energy_ranges (dict[node, (min, max)]): Maps each node to the
+            range of the linear bias associated with the variable.
+        quadratic_energy_ranges (dict[edge, (min, max)]): Maps each edge to
+            the range of the quadratic bias associated with the edge.
+        max_automorphisms (int, optional, default=100): The maximum number
+            of graph automorphisms to consider, on top of the transpositions
+            of two variables which are always checked. The symmetries found
+            are then a subset of all of the symmetries, which is still
+            correct but might break less symmetry.
+
+    Returns:
+        list[dict]: A generating set for the symmetries found, as maps from
+        each decision variable to its image. Empty if there are auxiliary
+        variables or the only symmetry is the identity.
+
+    """
+    if len(graph) != len(decision_variables) or any(v not in graph for v in decision_variables):
+        return []
+
+    labelled = _labelled(graph, linear_energy_ranges, quadratic_energy_ranges)
+
+    def match(a, b):
+        return a['bias_range'] == b['bias_range']
+
+    # the transpositions are cheap to check and cover the common case of
+    # interchangeable variables, the graph matcher finds the rest
+    def transpositions():
+        for u, v in itertools.combinations(decision_variables, 2):
+            mapping = {w: w for w in decision_variables}
+            mapping[u], mapping[v] = v, u
+            if _is_automorphism(labelled, mapping):
+                yield mapping
+
+    matcher = isomorphism.GraphMatcher(labelled, labelled, node_match=match, edge_match=match)
+    mappings = itertools.chain(transpositions(),
+                               itertools.islice(matcher.isomorphisms_iter(), max_automorphisms))
+
+    if not isinstance(feasible_configurations, Mapping):
+        feasible_configurations = dict.fromkeys(feasible_configurations, 0.0)
+
+    index = {v: idx for idx, v in enumerate(decision_variables)}
+
+    generators = []
+    group = _PermutationGroup(len(decision_variables))
+    for mapping in mappings:
+
+        # position idx of a configuration moves to position perm[idx]
+        perm = tuple(index[mapping[v]] for v in decision_variables)
+        if perm in group:
+            # already generated, this includes the identity
+            continue
+
+        for config, energy in feasible_configurations.items():
+            image = [None] * len(config)
+            for idx, spin in zip(perm, config):
+                image[idx] = spin
+            image = tuple(image)
+            if image not in feasible_configurations or feasible_configurations[image] != energy:
+                break
+        else:
+            generators.append(perm)
+            group.add(perm)
+
+    return [{v: decision_variables[idx] for v, idx in zip(decision_variables, perm)}
+            for perm in generators]
+
+
+def aux_gauge_variables(graph, decision_variables, linear_energy_ranges,
+                        quadratic_energy_ranges):
+    """Find the auxiliary variables whose spin can be flipped.
+
+    Args:
+        graph (:class:`networkx.Graph`): The graph defining the structure
+            of the desired Ising model.
+        decision_variables (tuple): The set of nodes in the graph that
+            represent decision variables in the desired Ising model.
+        linear_energy_ranges (dict[node, (min, max)]): Maps each node to the
+            range of the linear bias associated with the variable.
+        quadratic_energy_ranges (dict[edge, (min, max)]): Maps each edge to
+            the range of the quadratic bias associated with the edge.
+
+    Returns:
+        set: The auxiliary variables whose linear range, and the quadratic
+        range of each of their edges, are symmetric around zero.
+
+    """
+    labelled = _labelled(graph, linear_energy_ranges, quadratic_energy_ranges)
+
+    def symmetric(bias_range):
+        min_, max_ = bias_range
+        return min_ == -max_
+
+    decision_variables = set(decision_variables)
+    return {v for v in labelled if v not in decision_variables and
+            symmetric(labelled.nodes[v]['bias_range']) and
+            all(symmetric(bias_range) for __, __, bias_range in
+                labelled.edges(v, data='bias_range'))}
+
+
+def aux_twins(graph, decision_variables, linear_energy_ranges, quadratic_energy_ranges):
+    """Find the classes of interchangeable auxiliary variables.
+
+    Args:
+        graph (:class:`networkx.Graph`): The graph defining the structure
+            of the desired Ising model.
+        decision_variables (tuple): The set of nodes in the graph that
+            represent decision variables in the desired Ising model.
+        linear_energy_ranges (dict[node, (min, max)]): Maps each node to the
+            range of the linear bias associated with the variable.
+        quadratic_energy_ranges (dict[edge, (min, max)]): Maps each edge to
+            the range of the quadratic bias associated with the edge.
+
+    Returns:
+        list[list]: The classes with at least two variables, each in the
+        order of `graph`. Swapping any two variables in a class is a
+        symmetry of the problem.
+
+    """
+    labelled = _labelled(graph, linear_energy_ranges, quadratic_energy_ranges)
+
+    decision_variables = set(decision_variables)
+    aux_variables = [v for v in labelled if v not in decision_variables]
+
+    transpositions = []
+    for u, v in itertools.combinations(aux_variables, 2):
+        if labelled.degree(u) != labelled.degree(v):
+            continue
+        mapping = {w: w for w in labelled}
+        mapping[u], mapping[v] = v, u
+        if _is_automorphism(labelled, mapping):
+            transpositions.append(mapping)
+
+    classes = {}
+    for v, rep in orbits(aux_variables, transpositions, lambda a, v: a[v]).items():
+        classes.setdefault(rep, []).append(v)
+
+    return [members for members in classes.values() if len(members) > 1]
+
+
+def _labelled(graph, linear_energy_ranges, quadratic_energy_ranges):
+    """A copy of graph with the energy ranges as 'bias_range' attributes."""
+    labelled = nx.Graph()
+    for v in graph:
+        labelled.add_node(v, bias_range=tuple(linear_energy_ranges[v]))
+    for u, v in graph.edges:
+        if (u, v) in quadratic_energy_ranges:
+            bias_range = quadratic_energy_ranges[(u, v)]
+        else:
+            bias_range = quadratic_energy_ranges[(v, u)]
+        labelled.add_edge(u, v, bias_range=tuple(bias_range))
+    return labelled
+
+
+def _is_automorphism(graph, mapping):
+    """Whether mapping preserves the nodes, edges and their bias ranges."""
+    nodes = graph.nodes
+    for v in graph:
+        if nodes[v]['bias_range'] != nodes[mapping[v]]['bias_range']:
+            return False
+    for u, v, bias_range in graph.edges(data='bias_range'):
+        image = graph.get_edge_data(mapping[u], mapping[v])
+        if image is None or image['bias_range'] != bias_range:
+            return False
+    return True
+
+
+class _PermutationGroup(object):
+    """A group of permutations of range(n), given as tuples, stored as a
+    chain of stabilizers.
+
+    Level k holds the elements that fix 0, ..., k - 1 and a transversal
+    mapping each image of k to one of them, so membership is a sift through
+    at most n levels and the group itself is never listed. Generators are
+    added with Knuth's variant of the Schreier-Sims algorithm, see
+    D. E. Knuth, Efficient representation of perm groups, Combinatorica 11
+    (1991).
+    """
+    def __init__(self, n):
+        identity = tuple(range(n))
+        self._generators = [[] for _ in range(n)]
+        self._transversals = [{k: identity} for k in range(n)]
+
+    def __contains__(self, perm):
+        return self._sifts(0, perm)
+
+    def add(self, perm):
+        """Add perm to the generators of the group."""
+        self._extend(0, perm)
+
+    def _sifts(self, level, perm):
+        for k in range(level, len(self._transversals)):
+            coset = self._transversals[k].get(perm[k])
+            if coset is None:
+                return False
+            perm = _compose(_inverse(coset), perm)
+        return True
+
+    def _extend(self, level, perm):
+        if self._sifts(level, perm):
+            return
+        self._generators[level].append(perm)
+        for coset in list(self._transversals[level].values()):
+            self._close(level, _compose(perm, coset))
+
+    def _close(self, level, perm):
+        transversal = self._transversals[level]
+        image = perm[level]
+        if image in transversal:
+            # a Schreier generator of the stabilizer of level
+            self._extend(level + 1, _compose(_inverse(transversal[image]), perm))
+        else:
+            transversal[image] = perm
+            for generator in self._generators[level]:
+                self._close(level, _compose(generator, perm))
+
+
+def _compose(a, b):
+    """The permutation that applies b and then a."""
+    return tuple(a[idx] for idx in b)
+
+
+def _inverse(perm):
+    inverse = [None] * len(perm)
+    for idx, image in enumerate(perm):
+        inverse[image] = idx
+    return tuple(inverse)
+
+
+def orbits(elements, automorphisms, act):
+    """Partition elements into the orbits of the group generated by the
+    automorphisms.
+
+    Args:
+        elements (iterable): The elements to partition.
+        automorphisms (iterable[dict]): Maps from each variable to its image.
+        act (function): act(automorphism, element) is the image of element.
+
+    Returns:
+        dict: Maps each element to the first element of its orbit, in the
+        order of `elements`.
+
+    """
+    elements = list(elements)
+    parent = {e: e for e in elements}
+    order = {e: idx for idx, e in enumerate(elements)}
+
+    def find(e):
+        while parent[e] != e:
+            parent[e] = parent[parent[e]]
+            e = parent[e]
+        return e
+
+    for automorphism in automorphisms:
+        for e in elements:
+            a, b = find(e), find(act(automorphism, e))
+            if a != b:
+                # keep the earliest element as the root
+                if order[a] < order[b]:
+                    parent[b] = a
+                else:
+                    parent[a] = b
+
+    return {e: find(e) for e in elements}
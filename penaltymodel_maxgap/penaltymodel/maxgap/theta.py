@@ -19,7 +19,7 @@ import dimod
 
 from pysmt.environment import get_env
 from pysmt.shortcuts import Real, Symbol
-from pysmt.shortcuts import LE, GE
+from pysmt.shortcuts import LE, GE, Plus, Times
 from pysmt.typing import REAL
 
 
@@ -43,7 +43,10 @@ class Theta(dimod.BinaryQuadraticModel):
     def __init__(self, linear, quadratic, offset, vartype):
         """Theta is a BQM where the biases are pysmt Symbols.
 
-        Theta is normally constructed using :meth:`.Theta.from_graph`.
+        Theta is normally constructed using :meth:`.Theta.from_graph`, which
+        also records the bias symbols in `linear_symbols`,
+        `quadratic_symbols` and `offset_symbol`. The biases of the BQM itself
+        may be stored by dimod as expressions of those symbols.
 
         """
         dimod.BinaryQuadraticModel.__init__(self, linear, quadratic, offset, vartype)
@@ -51,6 +54,10 @@ class Theta(dimod.BinaryQuadraticModel):
         # add additional assertions tab
         self.assertions = set()
 
+        self.linear_symbols = {}
+        self.quadratic_symbols = {}
+        self.offset_symbol = None
+
     @classmethod
     def from_graph(cls, graph, linear_energy_ranges, quadratic_energy_ranges):
         """Create Theta from a graph and energy ranges.
@@ -74,12 +81,13 @@ class Theta(dimod.BinaryQuadraticModel):
 
         theta = cls.empty(dimod.SPIN)
 
-        theta.add_offset(Symbol('offset', REAL))
+        theta.offset_symbol = Symbol('offset', REAL)
+        theta.add_offset(theta.offset_symbol)
 
         def Linear(v):
             """Create a Symbol for the linear bias including the energy range
             constraints."""
-            bias = Symbol('h_{}'.format(v), REAL)
+            bias = theta.linear_symbols[v] = Symbol('h_{}'.format(v), REAL)
 
             min_, max_ = linear_energy_ranges[v]
 
@@ -91,7 +99,7 @@ class Theta(dimod.BinaryQuadraticModel):
         def Quadratic(u, v):
             """Create a Symbol for the quadratic bias including the energy range
             constraints."""
-            bias = Symbol('J_{},{}'.format(u, v), REAL)
+            bias = theta.quadratic_symbols[(u, v)] = Symbol('J_{},{}'.format(u, v), REAL)
 
             if (v, u) in quadratic_energy_ranges:
                 min_, max_ = quadratic_energy_ranges[(v, u)]
@@ -124,9 +132,151 @@ class Theta(dimod.BinaryQuadraticModel):
 
         """
         linear = ((v, float(model.get_py_value(bias)))
-                  for v, bias in self.linear.items())
+                  for v, bias in self.linear_symbols.items())
         quadratic = ((u, v, float(model.get_py_value(bias)))
-                     for (u, v), bias in self.quadratic.items())
-        offset = float(model.get_py_value(self.offset))
+                     for (u, v), bias in self.quadratic_symbols.items())
+        offset = float(model.get_py_value(self.offset_symbol))
 
         return dimod.BinaryQuadraticModel(linear, quadratic, offset, dimod.SPIN)
+
+
+class CompactTheta(object):
+    """An index-based, read-only copy of :class:`.Theta`.
+
+    The biases are stored in lists indexed by variable and by edge, with the
+    adjacency in compressed sparse row (CSR) form, so restrictions of Theta
+    to fixed spins can be built without copying a
+    :class:`dimod.BinaryQuadraticModel` of symbolic biases.
+
+    Args:
+        theta (:class:`.Theta`): The Theta to copy.
+
+    Attributes:
+        variables (list): The variables, in index order.
+        index (dict): Maps each variable to its index.
+        linear (list): The linear bias of each variable.
+        edges (list[tuple]): The edges as pairs of variable indices.
+        quadratic (list): The quadratic bias of each edge.
+        offset: The offset.
+        indptr (list[int]): The neighbours of the variable with index i are
+            indices[indptr[i]:indptr[i+1]], connected by the edges with the
+            indices edge_ids[indptr[i]:indptr[i+1]].
+        indices (list[int]): See `indptr`.
+        edge_ids (list[int]): See `indptr`.
+
+    """
+    def __init__(self, theta):
+        self.variables = variables = list(theta.linear)
+        self.index = index = {v: idx for idx, v in enumerate(variables)}
+        self.linear = [theta.linear[v] for v in variables]
+        self.offset = theta.offset
+
+        self.edges = edges = []
+        self.quadratic = []
+        neighbours = [[] for __ in variables]
+        for (u, v), bias in theta.quadratic.items():
+            ui, vi = index[u], index[v]
+            neighbours[ui].append((vi, len(edges)))
+            neighbours[vi].append((ui, len(edges)))
+            edges.append((ui, vi))
+            self.quadratic.append(bias)
+
+        self.indptr = indptr = [0]
+        self.indices = indices = []
+        self.edge_ids = edge_ids = []
+        for row in neighbours:
+            for vi, ei in sorted(row):
+                indices.append(vi)
+                edge_ids.append(ei)
+            indptr.append(len(indices))
+
+        # the structure of a restriction only depends on which variables are fixed
+        self._structures = {}
+
+    def fix_variables(self, spins):
+        """Restrict Theta to the given spins.
+
+        Args:
+            spins (dict): Spin values for a subset of the variables in Theta.
+
+        Returns:
+            :class:`.Restriction`: The linear and quadratic biases of the free
+            variables and the offset, which includes the energy of the fixed
+            variables.
+
+        """
+        index = self.index
+        fixed = [0] * len(self.variables)
+        for v, spin in spins.items():
+            fixed[index[v]] = spin
+
+        key = tuple(fixed[i] != 0 for i in range(len(fixed)))
+        try:
+            adj, quadratic = self._structures[key]
+        except KeyError:
+            adj, quadratic = self._structures[key] = self._free_structure(fixed)
+
+        variables = self.variables
+        indptr, indices, edge_ids = self.indptr, self.indices, self.edge_ids
+        qbias = self.quadratic
+
+        linear = {}
+        offset = [self.offset]
+        for i, h in enumerate(self.linear):
+            if fixed[i]:
+                offset.append(_spin_times(fixed[i], h))
+            else:
+                terms = [h]
+                for k in range(indptr[i], indptr[i + 1]):
+                    j = indices[k]
+                    if fixed[j]:
+                        terms.append(_spin_times(fixed[j], qbias[edge_ids[k]]))
+                linear[variables[i]] = Plus(terms) if len(terms) > 1 else h
+
+        for ei, (i, j) in enumerate(self.edges):
+            if fixed[i] and fixed[j]:
+                offset.append(_spin_times(fixed[i] * fixed[j], qbias[ei]))
+
+        return Restriction(linear, adj, quadratic, Plus(offset))
+
+    def _free_structure(self, fixed):
+        """The adjacency and quadratic biases among the free variables."""
+        variables = self.variables
+        qbias = self.quadratic
+
+        adj = {variables[i]: {} for i, spin in enumerate(fixed) if not spin}
+        quadratic = {}
+        for ei, (i, j) in enumerate(self.edges):
+            if not fixed[i] and not fixed[j]:
+                u, v = variables[i], variables[j]
+                adj[u][v] = adj[v][u] = quadratic[(u, v)] = qbias[ei]
+        return adj, quadratic
+
+
+class Restriction(object):
+    """The restriction of a :class:`.CompactTheta` to fixed spins, see
+    :meth:`.CompactTheta.fix_variables`.
+
+    Attributes:
+        linear (dict): The linear bias of each free variable, including the
+            interactions with the fixed variables.
+        adj (dict): The quadratic biases between free variables as a
+            dict-of-dicts.
+        quadratic (dict): The quadratic bias of each edge between free
+            variables.
+        offset: The offset plus the energy of the fixed variables.
+
+    """
+    __slots__ = 'linear', 'adj', 'quadratic', 'offset'
+
+    def __init__(self, linear, adj, quadratic, offset):
+        self.linear = linear
+        self.adj = adj
+        self.quadratic = quadratic
+        self.offset = offset
+
+
+def _spin_times(spin, bias):
+    if spin == 1:
+        return bias
+    return Times(Real((-1, 1)), bias)
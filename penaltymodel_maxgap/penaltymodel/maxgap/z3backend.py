@@ -0,0 +1,531 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+# ================================================================================================
+"""Build the smt problem directly with z3's python api.
+
+This mirrors :mod:`penaltymodel.maxgap.smt` and :mod:`penaltymodel.maxgap.theta`
+but skips pysmt's formula construction, which is a large share of the runtime
+for problems with many configurations. Requires the z3 python bindings.
+"""
+import itertools
+import time
+from fractions import Fraction
+
+import dimod
+import z3
+
+from penaltymodel.core import FactoryException
+from penaltymodel.maxgap.smt import _elimination_trees
+from penaltymodel.maxgap.symmetry import aux_gauge_variables, aux_twins
+
+__all__ = 'Theta', 'Table', 'Solver'
+
+
+class Numerals(object):
+    """Cache of z3 rational constants.
+
+    Numbers are limited to denominators of at most `max_denominator`, the
+    same as :func:`.limitReal`.
+
+    """
+    def __init__(self, max_denominator=1000000):
+        self.max_denominator = max_denominator
+        self._cache = {}
+
+    def __call__(self, x):
+        try:
+            return self._cache[x]
+        except KeyError:
+            pass
+        f = Fraction(x).limit_denominator(self.max_denominator)
+        num = self._cache[x] = z3.Q(f.numerator, f.denominator)
+        return num
+
+
+class Theta(object):
+    """The linear biases, quadratic biases and offset as z3 Real constants.
+
+    Theta is normally constructed using :meth:`.Theta.from_graph`.
+
+    Attributes:
+        linear (dict): The linear bias for each variable.
+        adj (dict): The quadratic biases as a dict-of-dicts.
+        quadratic (dict): The quadratic bias for each edge.
+        offset: The offset.
+        assertions (list): The energy range constraints.
+
+    """
+    def __init__(self):
+        self.linear = {}
+        self.adj = {}
+        self.quadratic = {}
+        self.offset = z3.Real('offset')
+        self.assertions = []
+
+    @classmethod
+    def from_graph(cls, graph, linear_energy_ranges, quadratic_energy_ranges, numerals=None):
+        """Create Theta from a graph and energy ranges.
+
+        Args:
+            graph (:obj:`networkx.Graph`):
+                Provides the structure for Theta.
+            linear_energy_ranges (dict):
+                A dict of the form {v: (min, max), ...} where min and max are the
+                range of values allowed to v.
+            quadratic_energy_ranges (dict):
+                A dict of the form {(u, v): (min, max), ...} where min and max
+                are the range of values allowed to (u, v).
+            numerals (:class:`.Numerals`, optional):
+                Cache for the range constants.
+
+        Returns:
+            :obj:`.Theta`
+
+        """
+        if numerals is None:
+            numerals = Numerals()
+
+        theta = cls()
+
+        for v in graph.nodes:
+            bias = theta.linear[v] = z3.Real('h_{}'.format(v))
+            theta.adj[v] = {}
+
+            min_, max_ = linear_energy_ranges[v]
+            theta.assertions.append(bias <= numerals(max_))
+            theta.assertions.append(bias >= numerals(min_))
+
+        for u, v in graph.edges:
+            bias = theta.quadratic[(u, v)] = theta.adj[u][v] = theta.adj[v][u] = \
+                z3.Real('J_{},{}'.format(u, v))
+
+            if (v, u) in quadratic_energy_ranges:
+                min_, max_ = quadratic_energy_ranges[(v, u)]
+            else:
+                min_, max_ = quadratic_energy_ranges[(u, v)]
+            theta.assertions.append(bias <= numerals(max_))
+            theta.assertions.append(bias >= numerals(min_))
+
+        return theta
+
+    def to_bqm(self, model):
+        """Given a model, return a bqm.
+
+        Args:
+            model (:class:`.Model`): A model from :class:`.Solver`.
+
+        Returns:
+            :obj:`dimod.BinaryQuadraticModel`
+
+        """
+        linear = ((v, float(model.get_py_value(bias)))
+                  for v, bias in self.linear.items())
+        quadratic = ((u, v, float(model.get_py_value(bias)))
+                     for (u, v), bias in self.quadratic.items())
+        offset = float(model.get_py_value(self.offset))
+
+        return dimod.BinaryQuadraticModel(linear, quadratic, offset, dimod.SPIN)
+
+
+def _spin_times(spin, bias):
+    return bias if spin > 0 else -bias
+
+
+def _sum(terms):
+    """Sum of real terms.
+
+    Equivalent to z3.Sum but calls the C api directly. z3.Sum coerces each
+    of its arguments which is most of the cost of building the table.
+    """
+    if len(terms) == 1:
+        return terms[0]
+    ctx = terms[0].ctx
+    args = (z3.Ast * len(terms))(*(term.ast for term in terms))
+    return z3.ArithRef(z3.Z3_mk_add(ctx.ref(), len(terms), args), ctx)
+
+
+def _and(terms):
+    """Conjunction of boolean terms, see :func:`_sum`."""
+    if len(terms) == 1:
+        return terms[0]
+    ctx = terms[0].ctx
+    args = (z3.Ast * len(terms))(*(term.ast for term in terms))
+    return z3.BoolRef(z3.Z3_mk_and(ctx.ref(), len(terms), args), ctx)
+
+
+def _le(lhs, rhs):
+    """lhs <= rhs for real terms, see :func:`_sum`."""
+    return z3.BoolRef(z3.Z3_mk_le(lhs.ctx.ref(), lhs.ast, rhs.ast), lhs.ctx)
+
+
+def _ge(lhs, rhs):
+    """lhs >= rhs for real terms, see :func:`_sum`."""
+    return z3.BoolRef(z3.Z3_mk_ge(lhs.ctx.ref(), lhs.ast, rhs.ast), lhs.ctx)
+
+
+class Table(object):
+    """Table of energy relations, see :class:`penaltymodel.maxgap.smt.Table`.
+
+    Args:
+        graph (:class:`networkx.Graph`): The graph defining the structure
+            of the desired Ising model.
+        decision_variables (tuple): The set of nodes in the graph that
+            represent decision variables in the desired Ising model.
+        linear_energy_ranges (dict[node, (min, max)]): Maps each node to the
+            range of the linear bias associated with the variable.
+        quadratic_energy_ranges (dict[edge, (min, max)]): Maps each edge to
+            the range of the quadratic bias associated with the edge.
+
+        break_aux_symmetry (bool, optional, default=True): If True, use the
+            symmetries of the auxiliary variables.
+
+    Attributes:
+        assertions (list): All z3 assertions accumulated by the Table.
+        theta (:class:`.Theta`): The linear biases, quadratic biases and the offset.
+        gap: The z3 constant representing the classical gap.
+        gauge_variables (set): The aux variables whose spin can be flipped.
+        twins (list[list]): The classes of interchangeable aux variables.
+        timing (dict): The time in seconds spent building Theta ('theta'),
+            the elimination trees ('elimination') and finding the aux
+            variable symmetries ('symmetry').
+        num_fresh_symbols (int): The number of message variables created.
+
+    """
+    def __init__(self, graph, decision_variables, linear_energy_ranges, quadratic_energy_ranges,
+                 break_aux_symmetry=True):
+        self.numerals = numerals = Numerals()
+
+        t = time.time()
+        self.theta = theta = Theta.from_graph(graph, linear_energy_ranges, quadratic_energy_ranges,
+                                              numerals)
+        self.timing = {'theta': time.time() - t}
+
+        t = time.time()
+        self._trees, self._ancestors = _elimination_trees(theta, decision_variables)
+        self.timing['elimination'] = time.time() - t
+
+        self.assertions = assertions = theta.assertions
+
+        t = time.time()
+        if break_aux_symmetry:
+            self.gauge_variables = aux_gauge_variables(graph, decision_variables,
+                                                       linear_energy_ranges,
+                                                       quadratic_energy_ranges)
+            self.twins = aux_twins(graph, decision_variables,
+                                   linear_energy_ranges, quadratic_energy_ranges)
+        else:
+            self.gauge_variables = set()
+            self.twins = []
+        self.timing['symmetry'] = time.time() - t
+
+        self.num_fresh_symbols = 0
+        self._auxvar_counter = itertools.count()
+
+        self.gap = gap = z3.Real('gap')
+        assertions.append(gap > 0)
+
+    def _fix(self, spins):
+        """The linear biases of the free variables and the offset with spins fixed."""
+        theta = self.theta
+
+        linear = {}
+        offset = [theta.offset]
+        for v, bias in theta.linear.items():
+            if v in spins:
+                offset.append(_spin_times(spins[v], bias))
+            else:
+                linear[v] = [bias]
+        for (u, v), bias in theta.quadratic.items():
+            if u in spins:
+                if v in spins:
+                    offset.append(_spin_times(spins[u] * spins[v], bias))
+                else:
+                    linear[v].append(_spin_times(spins[u], bias))
+            elif v in spins:
+                linear[u].append(_spin_times(spins[v], bias))
+
+        return linear, _sum(offset)
+
+    def energy_upperbound(self, spins):
+        """A formula for an upper bound on the energy of Theta with spins fixed.
+
+        Args:
+            spins (dict): Spin values for a subset of the variables in Theta.
+
+        Returns:
+            Formula that upper bounds the energy with spins fixed.
+
+        """
+        linear, offset = self._fix(spins)
+
+        if not self._trees:
+            assert not linear
+            return offset
+
+        return self.message_upperbound(self._trees, {}, linear) + offset
+
+    def energy(self, spins, break_aux_symmetry=True):
+        """A formula for the exact energy of Theta with spins fixed.
+
+        Args:
+            spins (dict): Spin values for a subset of the variables in Theta.
+            break_aux_symmetry (bool, optional): Default True. If True, break
+                the aux variable symmetry in the first two calls, which
+                should be for feasible configurations. See
+                :meth:`.aux_symmetry_assertions`.
+
+        Returns:
+            Formula for the exact energy of Theta with spins fixed.
+
+        """
+        av = next(self._auxvar_counter)
+        energy, auxvars = self.aux_energy(spins, av)
+        if break_aux_symmetry and av < 2:
+            self.assertions.extend(self.aux_symmetry_assertions(auxvars, av))
+        return energy
+
+    def aux_symmetry_assertions(self, auxvars, index=0):
+        """The formulas that break the symmetry of the aux variables. See
+        :meth:`penaltymodel.maxgap.smt.Table.aux_symmetry_assertions`.
+
+        """
+        if index == 0:
+            return [aux for v, aux in auxvars.items() if v in self.gauge_variables]
+        return [z3.Implies(auxvars[v], auxvars[u])
+                for twins in self.twins for u, v in zip(twins, twins[1:]) if v in auxvars]
+
+    def aux_energy(self, spins, label=None):
+        """A formula for the exact energy of Theta with spins fixed, and the
+        auxiliary variables. See :meth:`penaltymodel.maxgap.smt.Table.aux_energy`.
+
+        """
+        if label is None:
+            label = next(self._auxvar_counter)
+
+        linear, offset = self._fix(spins)
+
+        auxvars = {v: z3.Bool('aux{}_{}'.format(label, v)) for v in linear}
+
+        if not self._trees:
+            assert not linear
+            return offset, auxvars
+
+        return self.message(self._trees, {}, linear, auxvars) + offset, auxvars
+
+    def message(self, tree, spins, linear, auxvars):
+        """Determine the energy of the elimination tree.
+
+        Args:
+            tree (dict): The current elimination tree
+            spins (dict): The current fixed spins of the ancestors.
+            linear (dict): The linear terms of the free variables.
+            auxvars (dict): The auxiliary variables for the given spins.
+
+        Returns:
+            The formula for the energy of the tree.
+
+        """
+        adj = self.theta.adj
+
+        energy_sources = []
+        for v, children in tree.items():
+            aux = auxvars[v]
+
+            # the energy contributions when v is positive
+            contributions = list(linear[v])
+            contributions.extend(_spin_times(spins[u], bias)
+                                 for u, bias in adj[v].items() if u in spins)
+
+            plus_energy = _sum(contributions)
+            minus_energy = -plus_energy
+
+            if children:
+                spins[v] = 1
+                plus_energy = _sum([plus_energy, self.message(children, spins, linear, auxvars)])
+                spins[v] = -1
+                minus_energy = _sum([minus_energy,
+                                     self.message(children, spins, linear, auxvars)])
+                del spins[v]
+
+            m = z3.FreshReal('m')
+            self.num_fresh_symbols += 1
+
+            ancestor_aux = [auxvars[u] if spins[u] > 0 else z3.Not(auxvars[u])
+                            for u in self._ancestors[v]]
+            plus_aux = _and([aux] + ancestor_aux)
+            minus_aux = _and([z3.Not(aux)] + ancestor_aux)
+
+            self.assertions.extend((_le(m, plus_energy),
+                                    _le(m, minus_energy),
+                                    z3.Implies(plus_aux, _ge(m, plus_energy)),
+                                    z3.Implies(minus_aux, _ge(m, minus_energy))))
+
+            energy_sources.append(m)
+
+        return _sum(energy_sources)
+
+    def message_upperbound(self, tree, spins, linear):
+        """Determine an upper bound on the energy of the elimination tree.
+
+        Args:
+            tree (dict): The current elimination tree
+            spins (dict): The current fixed spins of the ancestors.
+            linear (dict): The linear terms of the free variables.
+
+        Returns:
+            The formula for the energy of the tree.
+
+        """
+        adj = self.theta.adj
+
+        energy_sources = []
+        for v, subtree in tree.items():
+
+            contributions = list(linear[v])
+            contributions.extend(_spin_times(spins[u], bias)
+                                 for u, bias in adj[v].items() if u in spins)
+
+            energy = _sum(contributions)
+
+            m = z3.FreshReal('m')
+            self.num_fresh_symbols += 1
+
+            if subtree:
+                spins[v] = 1
+                plus = self.message_upperbound(subtree, spins, linear)
+                spins[v] = -1
+                minus = self.message_upperbound(subtree, spins, linear)
+                del spins[v]
+
+                self.assertions.extend((_le(m, _sum([energy, plus])),
+                                        _le(m, _sum([minus, -energy]))))
+            else:
+                self.assertions.extend((_le(m, energy), _le(m, -energy)))
+
+            energy_sources.append(m)
+
+        return _sum(energy_sources)
+
+    def set_energy(self, spins, target_energy):
+        """Set the energy of Theta with spins fixed to target_energy.
+
+        Args:
+            spins (dict): Spin values for a subset of the variables in Theta.
+            target_energy (float): The desired energy for Theta with spins fixed.
+
+        """
+        self.assertions.append(self.energy_assertion(self.energy(spins), target_energy))
+
+    def set_energy_upperbound(self, spins, offset=0):
+        """Upper bound the energy of Theta with spins fixed to be greater than (gap + offset).
+
+        Args:
+            spins (dict): Spin values for a subset of the variables in Theta.
+            offset (float): A value that is added to the upper bound. Default value is 0.
+
+        """
+        spin_energy = self.energy_upperbound(spins)
+        self.assertions.append(self.energy_upperbound_assertion(spin_energy, offset))
+
+    def energy_assertion(self, energy, target_energy):
+        """The formula that sets an energy to target_energy."""
+        return energy == self.numerals(target_energy)
+
+    def energy_upperbound_assertion(self, energy, offset=0):
+        """The formula that requires an energy to be at least (gap + offset)."""
+        return energy >= self.gap + self.numerals(offset)
+
+    def gap_bound_assertion(self, gap_lowerbound):
+        """The formula that lower bounds the gap.
+
+        Args:
+            gap_lowerbound (float): Return the formula that sets a lower
+                bound on the gap.
+
+        """
+        return self.gap >= self.numerals(gap_lowerbound)
+
+    def set_linear_equal(self, u, v):
+        """Constrain the linear biases of u and v to be equal."""
+        linear = self.theta.linear
+        self.assertions.append(linear[u] == linear[v])
+
+    def set_quadratic_equal(self, edge0, edge1):
+        """Constrain the quadratic biases of two edges to be equal."""
+        adj = self.theta.adj
+        (u0, v0), (u1, v1) = edge0, edge1
+        self.assertions.append(adj[u0][v0] == adj[u1][v1])
+
+    def bias_assertions(self, linear, quadratic, atol=0):
+        """The formulas that fix the biases of Theta to within atol of the
+        given biases. See :meth:`penaltymodel.maxgap.smt.Table.bias_assertions`.
+
+        """
+        numerals = self.numerals
+        theta = self.theta
+
+        assertions = []
+        for v, bias in theta.linear.items():
+            value = linear.get(v, 0)
+            assertions.append(_le(bias, numerals(value + atol)))
+            assertions.append(_ge(bias, numerals(value - atol)))
+        for (u, v), bias in theta.quadratic.items():
+            value = quadratic.get((u, v), quadratic.get((v, u), 0))
+            assertions.append(_le(bias, numerals(value + atol)))
+            assertions.append(_ge(bias, numerals(value - atol)))
+        return assertions
+
+
+class Model(object):
+    """Wraps a z3 model with the part of the pysmt model interface used by
+    maxgap."""
+    def __init__(self, model):
+        self._model = model
+
+    def get_py_value(self, expr):
+        value = self._model.eval(expr, model_completion=True)
+        return Fraction(value.numerator_as_long(), value.denominator_as_long())
+
+
+class Solver(object):
+    """Incremental z3 solver with the part of the pysmt solver interface used
+    by maxgap."""
+    def __init__(self):
+        self._solver = z3.SolverFor('QF_LRA')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def add_assertion(self, formula):
+        self._solver.add(formula)
+
+    def push(self):
+        self._solver.push()
+
+    def pop(self):
+        self._solver.pop()
+
+    def solve(self):
+        result = self._solver.check()
+        if result == z3.unknown:
+            raise FactoryException("z3 could not determine satisfiability: {}".format(
+                self._solver.reason_unknown()))
+        return result == z3.sat
+
+    def get_model(self):
+        return Model(self._solver.model())
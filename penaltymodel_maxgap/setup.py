@@ -48,7 +48,7 @@ setup_requires = ['pysmt==0.7.0']
 
 install_requires = ['dimod>=0.8.0,<0.9.0',
                     'dwave_networkx>=0.6.0',
-                    'penaltymodel>=0.16.0,<0.17.0',
+                    'penaltymodel>=0.17.0,<0.18.0',
                     'pysmt==0.7.0',
                     ]
 
@@ -33,17 +33,19 @@ class TestGeneration(unittest.TestCase):
 
     def generate_and_check(self, graph, configurations, decision_variables,
                            linear_energy_ranges, quadratic_energy_ranges,
-                           min_classical_gap, known_classical_gap=0):
+                           min_classical_gap, known_classical_gap=0, **kwargs):
         """Checks that MaxGap's BQM and gap obeys the constraints set by configurations,
         linear and quadratic energy ranges, and min classical gap.
 
         Args:
             known_classical_gap: a known gap for this graph and configuration
+            kwargs: passed to maxgap.generate
         """
         bqm, gap = maxgap.generate(graph, configurations, decision_variables,
                                    linear_energy_ranges,
                                    quadratic_energy_ranges,
-                                   min_classical_gap)
+                                   min_classical_gap,
+                                   **kwargs)
 
         # Check gap
         # Note: Due to the way MaxGap searches for the maximum gap, if
@@ -244,6 +246,288 @@ class TestGeneration(unittest.TestCase):
                                 quadratic_energy_ranges,
                                 min_classical_gap)
 
+    def test_portfolio(self):
+        graph = nx.complete_graph(3)
+
+        configurations = {(-1, -1): 0, (1, 1): 0}
+
+        linear_energy_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_energy_ranges = {(u, v): (-1., 1.) for u, v in graph.edges}
+        decision_variables = [0, 1]
+        min_classical_gap = 2
+
+        self.generate_and_check(graph, configurations, decision_variables,
+                                linear_energy_ranges,
+                                quadratic_energy_ranges,
+                                min_classical_gap,
+                                portfolio=True)
+
+    def test_z3_backend(self):
+        graph = nx.complete_graph(3)
+
+        configurations = {(-1, -1): 0, (1, 1): 0}
+
+        linear_energy_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_energy_ranges = {(u, v): (-1., 1.) for u, v in graph.edges}
+        decision_variables = [0, 1]
+        min_classical_gap = 2
+
+        self.generate_and_check(graph, configurations, decision_variables,
+                                linear_energy_ranges,
+                                quadratic_energy_ranges,
+                                min_classical_gap,
+                                backend='z3')
+
+    def test_z3_backend_K33(self):
+        graph = nx.complete_bipartite_graph(3, 3)
+
+        decision_variables = (0, 2, 3)
+        configurations = {(-1, -1, -1): 0,
+                          (-1, +1, -1): 0,
+                          (+1, -1, -1): 0,
+                          (+1, +1, +1): 0}
+        linear_energy_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_energy_ranges = {(u, v): (-1., 1.) for u, v in graph.edges}
+        min_classical_gap = 2
+
+        self.generate_and_check(graph, configurations, decision_variables,
+                                linear_energy_ranges,
+                                quadratic_energy_ranges,
+                                min_classical_gap,
+                                backend='z3')
+
+    def test_timeout(self):
+        graph = nx.complete_graph(3)
+
+        configurations = {(-1, -1): 0, (1, 1): 0}
+
+        linear_energy_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_energy_ranges = {(u, v): (-1., 1.) for u, v in graph.edges}
+        decision_variables = [0, 1]
+        min_classical_gap = 2
+
+        info = {}
+        self.generate_and_check(graph, configurations, decision_variables,
+                                linear_energy_ranges,
+                                quadratic_energy_ranges,
+                                min_classical_gap,
+                                timeout=0, info=info)
+        self.assertFalse(info['optimal'])
+        self.assertEqual(info['num_solves'], 1)
+        self.assertFalse(info['warm_start'])
+
+        info = {}
+        self.generate_and_check(graph, configurations, decision_variables,
+                                linear_energy_ranges,
+                                quadratic_energy_ranges,
+                                min_classical_gap,
+                                max_solves=3, info=info)
+        self.assertFalse(info['optimal'])
+        self.assertEqual(info['num_solves'], 3)
+        self.assertFalse(info['warm_start'])
+
+        info = {}
+        self.generate_and_check(graph, configurations, decision_variables,
+                                linear_energy_ranges,
+                                quadratic_energy_ranges,
+                                min_classical_gap,
+                                info=info)
+        self.assertTrue(info['optimal'])
+        self.assertGreater(info['num_solves'], 3)
+
+    def test_info(self):
+        graph = nx.complete_bipartite_graph(2, 2)
+
+        configurations = {(-1, -1): 0, (1, 1): 0}
+
+        linear_energy_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_energy_ranges = {(u, v): (-1., 1.) for u, v in graph.edges}
+        decision_variables = (0, 2)
+        min_classical_gap = 1
+
+        for backend in ('pysmt', 'z3'):
+            with self.subTest(backend=backend):
+                info = {}
+                self.generate_and_check(graph, configurations, decision_variables,
+                                        linear_energy_ranges,
+                                        quadratic_energy_ranges,
+                                        min_classical_gap,
+                                        backend=backend, info=info)
+
+                self.assertEqual(info['num_sat'] + info['num_unsat'], info['num_solves'])
+                self.assertGreaterEqual(info['num_sat'], 1)
+                self.assertGreater(info['num_assertions'], 0)
+                self.assertGreater(info['num_fresh_symbols'], 0)
+                self.assertEqual(set(info['timing']),
+                                 {'theta', 'elimination', 'symmetry', 'assertions', 'solve'})
+                self.assertTrue(all(t >= 0 for t in info['timing'].values()))
+
+    def test_warm_start(self):
+        graph = nx.complete_bipartite_graph(3, 3)
+
+        decision_variables = (0, 2, 3)
+        configurations = {(-1, -1, -1): 0,
+                          (-1, +1, -1): 0,
+                          (+1, -1, -1): 0,
+                          (+1, +1, +1): 0}
+        linear_energy_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_energy_ranges = {(u, v): (-1., 1.) for u, v in graph.edges}
+        min_classical_gap = 2
+
+        cold = {}
+        bqm, gap = maxgap.generate(graph, configurations, decision_variables,
+                                   linear_energy_ranges,
+                                   quadratic_energy_ranges,
+                                   min_classical_gap,
+                                   info=cold)
+        self.assertFalse(cold['warm_start'])
+
+        # flip the aux variables, so the seed needs to be gauge transformed
+        seed = bqm.copy()
+        for v in (1, 4, 5):
+            seed.flip_variable(v)
+
+        for backend in ('pysmt', 'z3'):
+            warm = {}
+            self.generate_and_check(graph, configurations, decision_variables,
+                                    linear_energy_ranges,
+                                    quadratic_energy_ranges,
+                                    min_classical_gap,
+                                    known_classical_gap=gap,
+                                    backend=backend,
+                                    warm_start=seed, info=warm)
+            self.assertTrue(warm['warm_start'])
+            self.assertLess(warm['num_solves'], cold['num_solves'])
+
+            # the check of the seed is one of the solves
+            warm = {}
+            maxgap.generate(graph, configurations, decision_variables,
+                            linear_energy_ranges, quadratic_energy_ranges, min_classical_gap,
+                            backend=backend, warm_start=seed, max_solves=2, info=warm)
+            self.assertTrue(warm['warm_start'])
+            self.assertEqual(warm['num_solves'], 2)
+
+        # a seed that is not a penalty model is ignored
+        warm = {}
+        self.generate_and_check(graph, configurations, decision_variables,
+                                linear_energy_ranges,
+                                quadratic_energy_ranges,
+                                min_classical_gap,
+                                known_classical_gap=gap,
+                                warm_start=dimod.BinaryQuadraticModel.from_ising({0: 1}, {}),
+                                info=warm)
+        self.assertFalse(warm['warm_start'])
+        self.assertEqual(warm['num_solves'], cold['num_solves'])
+
+    def test_symmetry_breaking(self):
+        graph = nx.complete_graph(3)
+
+        decision_variables = (0, 1, 2)
+        configurations = {(-1, -1, -1): 0,
+                          (-1, +1, -1): 0,
+                          (+1, -1, -1): 0,
+                          (+1, +1, +1): 0}
+        linear_energy_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_energy_ranges = {(u, v): (-1., 1.) for u, v in graph.edges}
+        min_classical_gap = 1
+
+        __, gap = maxgap.generate(graph, configurations, decision_variables,
+                                  linear_energy_ranges,
+                                  quadratic_energy_ranges,
+                                  min_classical_gap,
+                                  symmetry_breaking=False)
+
+        for backend in ('pysmt', 'z3'):
+            self.generate_and_check(graph, configurations, decision_variables,
+                                    linear_energy_ranges,
+                                    quadratic_energy_ranges,
+                                    min_classical_gap,
+                                    known_classical_gap=gap,
+                                    backend=backend)
+
+            # the inputs are interchangeable
+            bqm, __ = maxgap.generate(graph, configurations, decision_variables,
+                                      linear_energy_ranges,
+                                      quadratic_energy_ranges,
+                                      min_classical_gap,
+                                      backend=backend)
+            self.assertEqual(bqm.linear[0], bqm.linear[1])
+            self.assertEqual(bqm.adj[0][2], bqm.adj[1][2])
+
+    def test_asymmetric_aux_range(self):
+        graph = nx.Graph([(0, 1)])
+
+        # the aux variable 1 cannot be flipped so its spin must not be fixed
+        linear_energy_ranges = {0: (-2., 2.), 1: (.5, 2.)}
+        quadratic_energy_ranges = {(0, 1): (-1., 1.)}
+
+        for backend in ('pysmt', 'z3'):
+            self.generate_and_check(graph, {(-1,): 0}, (0,),
+                                    linear_energy_ranges,
+                                    quadratic_energy_ranges,
+                                    .1,
+                                    known_classical_gap=6,
+                                    backend=backend)
+
+    def test_prepared_problem(self):
+        graph = nx.complete_graph(4)
+
+        decision_variables = (0, 1, 2)
+        linear_energy_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_energy_ranges = {(u, v): (-1., 1.) for u, v in graph.edges}
+        min_classical_gap = .5
+
+        def configurations(energy):
+            return {(-1, -1, -1): 0,
+                    (-1, +1, -1): energy,
+                    (+1, -1, -1): 0,
+                    (+1, +1, +1): 0}
+
+        for backend in ('pysmt', 'z3'):
+            with maxgap.PreparedProblem(graph, decision_variables,
+                                        linear_energy_ranges, quadratic_energy_ranges,
+                                        backend=backend) as problem:
+
+                for energy in (0, .5, 1):
+                    info = {}
+                    bqm, gap = problem.generate(configurations(energy), min_classical_gap,
+                                                info=info)
+                    self.assertTrue(info['optimal'])
+
+                    __, expected = maxgap.generate(graph, configurations(energy),
+                                                   decision_variables,
+                                                   linear_energy_ranges,
+                                                   quadratic_energy_ranges,
+                                                   min_classical_gap)
+                    self.assertAlmostEqual(gap, expected, delta=MAX_GAP_DELTA)
+
+                    sampleset = dimod.ExactSolver().sample(bqm)
+                    ground = {}
+                    for sample, en in sampleset.data(['sample', 'energy']):
+                        config = tuple(sample[v] for v in decision_variables)
+                        ground.setdefault(config, en)
+                    for config, en in configurations(energy).items():
+                        self.assertAlmostEqual(ground[config], en)
+                    for config in ground:
+                        if config not in configurations(energy):
+                            self.assertGreaterEqual(ground[config] - max(0, energy),
+                                                    gap - 1e-6)
+
+                # an impossible variant does not affect the ones after it
+                with self.assertRaises(pm.ImpossiblePenaltyModel):
+                    problem.generate(configurations(0), 100)
+                __, gap = problem.generate(configurations(0), min_classical_gap)
+                self.assertGreaterEqual(gap, min_classical_gap)
+
+    def test_unknown_backend(self):
+        graph = nx.complete_graph(1)
+        with self.assertRaises(ValueError):
+            maxgap.generate(graph, {(1,): 0}, [0], {0: (-2., 2.)}, {}, 2, backend='cplex')
+
+        with self.assertRaises(ValueError):
+            maxgap.generate(graph, {(1,): 0}, [0], {0: (-2., 2.)}, {}, 2,
+                            backend='z3', portfolio=True)
+
     def test_min_gap_equals_max_gap(self):
         # Make sure that a model is always grabbed, even when min_gap == max_gap
         min_gap = 4     # This value is also the max classical gap
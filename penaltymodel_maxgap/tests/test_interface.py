@@ -40,6 +40,30 @@ class TestInterface(unittest.TestCase):
         for (u, v) in graph.edges:
             self.assertIn(u, widget.model.adj[v])
 
+    def test_max_solves(self):
+        graph = nx.complete_graph(3)
+        spec = pm.Specification(graph, [0, 1], {(-1, -1): 0, (+1, +1): 0}, dimod.SPIN)
+
+        widget = maxgap.get_penalty_model(spec)
+        self.assertTrue(widget.optimal)
+
+        # only the feasibility solve is made
+        suboptimal = maxgap.get_penalty_model(spec, max_solves=1)
+        self.assertFalse(suboptimal.optimal)
+        self.assertGreaterEqual(suboptimal.classical_gap, spec.min_classical_gap)
+        self.assertLessEqual(suboptimal.classical_gap, widget.classical_gap)
+
+    def test_info_logged(self):
+        graph = nx.complete_graph(3)
+        spec = pm.Specification(graph, [0, 1], {(-1, -1): 0, (+1, +1): 0}, dimod.SPIN)
+
+        with self.assertLogs('penaltymodel.maxgap.interface', level='DEBUG') as cm:
+            maxgap.get_penalty_model(spec)
+
+        info, = (record.maxgap for record in cm.records)
+        self.assertTrue(info['optimal'])
+        self.assertIn('solve', info['timing'])
+
     def test_binary_specification(self):
         graph = nx.Graph()
         for i in range(4):
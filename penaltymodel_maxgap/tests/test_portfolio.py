@@ -0,0 +1,108 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+# ================================================================================================
+import unittest
+
+from pysmt.environment import reset_env
+from pysmt.shortcuts import Symbol, GE, LE, Real
+from pysmt.typing import REAL
+
+from penaltymodel.core import FactoryException
+from penaltymodel.maxgap.portfolio import SolverPortfolio, installed_solvers
+
+
+class TestSolverPortfolio(unittest.TestCase):
+    def setUp(self):
+        self.env = reset_env()
+
+    def test_installed_solvers(self):
+        self.assertEqual(installed_solvers(['not-a-solver']), [])
+
+    def test_no_solvers(self):
+        with self.assertRaises(ValueError):
+            SolverPortfolio([])
+
+    def test_push_pop(self):
+        x = Symbol('x', REAL)
+
+        with SolverPortfolio() as solver:
+            solver.add_assertion(LE(x, Real(3)))
+            solver.add_assertion(GE(x, Real(1)))
+
+            self.assertTrue(solver.solve())
+            value = solver.get_model().get_py_value(x)
+            self.assertGreaterEqual(value, 1)
+            self.assertLessEqual(value, 3)
+
+            solver.push()
+            solver.add_assertion(GE(x, Real(5)))
+            self.assertFalse(solver.solve())
+            solver.pop()
+
+            solver.push()
+            solver.add_assertion(GE(x, Real(3)))
+            self.assertTrue(solver.solve())
+            self.assertEqual(solver.get_model().get_py_value(x), 3)
+            solver.pop()
+
+            self.assertEqual(sum(solver.wins.values()), 3)
+
+    def test_failing_solver(self):
+        x = Symbol('x', REAL)
+
+        with SolverPortfolio(installed_solvers() + ['not-a-solver']) as solver:
+            solver.add_assertion(GE(x, Real(1)))
+
+            self.assertTrue(solver.solve())
+            self.assertNotIn('not-a-solver', solver.names)
+
+            solver.push()
+            solver.add_assertion(GE(x, Real(5)))
+            self.assertTrue(solver.solve())
+            self.assertGreaterEqual(solver.get_model().get_py_value(x), 5)
+            solver.pop()
+
+    def test_all_solvers_failing(self):
+        x = Symbol('x', REAL)
+
+        with SolverPortfolio(['not-a-solver']) as solver:
+            solver.add_assertion(GE(x, Real(1)))
+
+            with self.assertRaises(FactoryException):
+                solver.solve()
+            with self.assertRaises(FactoryException):
+                solver.solve()
+
+    def test_workers_kept(self):
+        x = Symbol('x', REAL)
+
+        with SolverPortfolio() as solver:
+            solver.add_assertion(GE(x, Real(1)))
+
+            self.assertTrue(solver.solve())
+            processes = {name: worker[0] for name, worker in solver._workers.items()}
+
+            solver.push()
+            solver.add_assertion(LE(x, Real(0)))
+            self.assertFalse(solver.solve())
+            solver.pop()
+
+            self.assertTrue(solver.solve())
+            self.assertEqual({name: worker[0] for name, worker in solver._workers.items()},
+                             processes)
+
+        self.assertEqual(solver._workers, {})
+        for process in processes.values():
+            self.assertFalse(process.is_alive())
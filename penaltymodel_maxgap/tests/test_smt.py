@@ -108,6 +108,27 @@ class TestTable(pysmt.test.TestCase):
         J = {(u, v): 1 for u, v in graph.edges}
         self.check_table_energies_exact(graph, decision_variables, h, J)
 
+    def test_aux_symmetry(self):
+        graph = nx.complete_bipartite_graph(4, 4)
+        decision_variables = (0, 4)
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+        linear_ranges[7] = (-1., 2.)
+
+        table = Table(graph, decision_variables, linear_ranges, quadratic_ranges)
+        self.assertEqual(table.gauge_variables, {1, 2, 3, 5, 6})
+        self.assertEqual(table.twins, [[1, 2, 3], [5, 6]])
+
+        __, auxvars = table.aux_energy({0: -1, 4: -1})
+        self.assertEqual(set(table.aux_symmetry_assertions(auxvars)),
+                         {auxvars[v] for v in (1, 2, 3, 5, 6)})
+        self.assertEqual(len(table.aux_symmetry_assertions(auxvars, 1)), 3)
+
+        table = Table(graph, decision_variables, linear_ranges, quadratic_ranges,
+                      break_aux_symmetry=False)
+        self.assertEqual(table.aux_symmetry_assertions(auxvars), [])
+        self.assertEqual(table.aux_symmetry_assertions(auxvars, 1), [])
+
     def check_table_energies_exact(self, graph, decision_variables, h, J):
         """For a given ising problem, check that the table gives the correct
         energies when linear and quadratic energies are specified exactly.
@@ -0,0 +1,109 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+# ================================================================================================
+import io
+import sys
+import unittest
+
+import dimod
+import networkx as nx
+
+from pysmt.environment import reset_env
+
+import penaltymodel.core as pm
+import penaltymodel.maxgap as maxgap
+
+from penaltymodel.maxgap.generation import MAX_GAP_DELTA
+from penaltymodel.maxgap.smtlib import write_smtlib, read_penalty_model, solve_external
+
+
+class TestSmtlib(unittest.TestCase):
+    def setUp(self):
+        self.env = reset_env()
+
+        graph = nx.complete_graph(3)
+        self.spec = pm.Specification(graph, [0, 1], {(-1, -1): 0, (+1, +1): 0}, dimod.SPIN)
+
+    def test_write(self):
+        fp = io.StringIO()
+        write_smtlib(self.spec, fp)
+        script = fp.getvalue()
+
+        self.assertIn('(maximize gap)', script)
+        self.assertIn('(check-sat)', script)
+        self.assertIn('(get-value (gap offset h_0', script)
+        self.assertTrue(script.endswith('(exit)\n'))
+
+        fp = io.StringIO()
+        write_smtlib(self.spec, fp, objective=False)
+        self.assertNotIn('maximize', fp.getvalue())
+
+    def test_read(self):
+        output = 'sat\n((gap 2.0) (offset 1.0) (h_0 0.0) (h_1 0.0) (h_2 (/ (- 1) 4)) ' \
+                 '(|J_0,1| (- 1.0)) (|J_0,2| 0.0) (|J_1,2| 0.0))\n'
+        widget = read_penalty_model(self.spec, output)
+
+        self.assertEqual(widget.classical_gap, 2)
+        self.assertFalse(widget.optimal)
+        self.assertEqual(widget.model.linear[2], -.25)
+        self.assertEqual(widget.model.adj[0][1], -1)
+        self.assertEqual(widget.model.offset, 1)
+
+        with self.assertRaises(pm.ImpossiblePenaltyModel):
+            read_penalty_model(self.spec, 'unsat\n')
+
+        with self.assertRaises(pm.FactoryException):
+            read_penalty_model(self.spec, 'unknown\n')
+
+    def test_solve_external(self):
+        widget = solve_external(self.spec)
+        expected = maxgap.get_penalty_model(self.spec)
+
+        self.assertTrue(widget.optimal)
+        self.assertGreaterEqual(widget.classical_gap, expected.classical_gap - MAX_GAP_DELTA)
+
+        # check the energies
+        sampleset = dimod.ExactSolver().sample(widget.model)
+        for sample, energy in sampleset.data(['sample', 'energy']):
+            if (sample[0], sample[1]) in self.spec.feasible_configurations:
+                self.assertGreaterEqual(energy, widget.ground_energy - 1e-6)
+            else:
+                self.assertGreaterEqual(energy, widget.ground_energy + widget.classical_gap - 1e-6)
+
+    def test_solve_external_no_objective(self):
+        widget = solve_external(self.spec, objective=False)
+        self.assertFalse(widget.optimal)
+        self.assertGreaterEqual(widget.classical_gap, self.spec.min_classical_gap)
+
+    def test_impossible(self):
+        graph = nx.path_graph(3)
+        configurations = {(-1, -1, -1): 0,
+                          (-1, +1, -1): 0,
+                          (+1, -1, -1): 0,
+                          (+1, +1, +1): 0}
+        spec = pm.Specification(graph, (0, 1, 2), configurations, dimod.SPIN)
+
+        with self.assertRaises(pm.ImpossiblePenaltyModel):
+            solve_external(spec)
+
+    def test_crash(self):
+        command = [sys.executable, '-c', 'import sys; sys.exit("segfault")']
+        with self.assertRaises(pm.FactoryException):
+            solve_external(self.spec, command=command)
+
+    def test_timeout(self):
+        command = [sys.executable, '-c', 'import time; time.sleep(30)']
+        with self.assertRaises(pm.FactoryException):
+            solve_external(self.spec, command=command, timeout=.1)
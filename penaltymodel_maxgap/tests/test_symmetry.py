@@ -0,0 +1,213 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+# ================================================================================================
+import itertools
+import unittest
+
+import networkx as nx
+
+from penaltymodel.maxgap.symmetry import (decision_automorphisms, aux_gauge_variables,
+                                          aux_twins, orbits)
+from penaltymodel.maxgap.symmetry import _PermutationGroup
+
+AND = {(-1, -1, -1): 0, (-1, 1, -1): 0, (1, -1, -1): 0, (1, 1, 1): 0}
+
+
+class TestDecisionAutomorphisms(unittest.TestCase):
+    def test_and(self):
+        graph = nx.complete_graph(3)
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+
+        automorphisms = decision_automorphisms(graph, (0, 1, 2), AND,
+                                               linear_ranges, quadratic_ranges)
+
+        # only the inputs can be swapped
+        self.assertEqual(automorphisms, [{0: 1, 1: 0, 2: 2}])
+
+    def test_and_relabelled(self):
+        graph = nx.complete_graph('abc')
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+
+        # the output is the first decision variable
+        configurations = {(out, x, y): 0 for (x, y, out) in AND}
+
+        automorphisms = decision_automorphisms(graph, 'cab', configurations,
+                                               linear_ranges, quadratic_ranges)
+        self.assertEqual(automorphisms, [{'a': 'b', 'b': 'a', 'c': 'c'}])
+
+    def test_energy_ranges(self):
+        graph = nx.complete_graph(3)
+        linear_ranges = {0: (-2., 2.), 1: (-1., 1.), 2: (-2., 2.)}
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+
+        self.assertEqual(decision_automorphisms(graph, (0, 1, 2), AND,
+                                                linear_ranges, quadratic_ranges), [])
+
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_ranges = {(0, 1): (-1., 1.), (0, 2): (-1., 1.), (2, 1): (-.5, .5)}
+
+        self.assertEqual(decision_automorphisms(graph, (0, 1, 2), AND,
+                                                linear_ranges, quadratic_ranges), [])
+
+    def test_feasible_energies(self):
+        graph = nx.complete_graph(3)
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+
+        configurations = dict(AND)
+        configurations[(-1, 1, -1)] = .5
+
+        self.assertEqual(decision_automorphisms(graph, (0, 1, 2), configurations,
+                                                linear_ranges, quadratic_ranges), [])
+
+    def test_aux(self):
+        graph = nx.complete_graph(4)
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+
+        self.assertEqual(decision_automorphisms(graph, (0, 1, 2), AND,
+                                                linear_ranges, quadratic_ranges), [])
+
+    def test_generators(self):
+        graph = nx.complete_graph(4)
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+        configurations = {(-1,) * 4: 0, (1,) * 4: 0}
+
+        # a generating set for all 24 permutations
+        automorphisms = decision_automorphisms(graph, (0, 1, 2, 3), configurations,
+                                               linear_ranges, quadratic_ranges)
+        self.assertLess(len(automorphisms), 24)
+        self.assertEqual(set(orbits(range(4), automorphisms, lambda a, v: a[v]).values()), {0})
+
+        # the transpositions are enough
+        automorphisms = decision_automorphisms(graph, (0, 1, 2, 3), configurations,
+                                               linear_ranges, quadratic_ranges,
+                                               max_automorphisms=0)
+        self.assertEqual(set(orbits(range(4), automorphisms, lambda a, v: a[v]).values()), {0})
+
+    def test_cycle(self):
+        graph = nx.cycle_graph(5)
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+        configurations = {(-1,) * 5: 0, (1,) * 5: 0}
+
+        # no transpositions, but the rotations and reflections are found
+        automorphisms = decision_automorphisms(graph, range(5), configurations,
+                                               linear_ranges, quadratic_ranges)
+        self.assertEqual(set(orbits(range(5), automorphisms, lambda a, v: a[v]).values()), {0})
+
+
+    def test_one_hot(self):
+        # every permutation is a symmetry, far too many to list
+        graph = nx.complete_graph(16)
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+        configurations = {tuple(1 if u == v else -1 for u in graph): 0 for v in graph}
+
+        automorphisms = decision_automorphisms(graph, tuple(graph), configurations,
+                                               linear_ranges, quadratic_ranges)
+        self.assertLess(len(automorphisms), len(graph))
+        self.assertEqual(set(orbits(graph, automorphisms, lambda a, v: a[v]).values()), {0})
+
+
+class TestPermutationGroup(unittest.TestCase):
+    def test_membership(self):
+        rotation = (1, 2, 3, 4, 0)
+        reflection = (4, 3, 2, 1, 0)
+
+        group = _PermutationGroup(5)
+        self.assertIn(tuple(range(5)), group)
+        self.assertNotIn(rotation, group)
+
+        group.add(rotation)
+        self.assertEqual(sum(perm in group for perm in itertools.permutations(range(5))), 5)
+        self.assertIn((2, 3, 4, 0, 1), group)
+        self.assertNotIn(reflection, group)
+
+        group.add(reflection)
+        self.assertEqual(sum(perm in group for perm in itertools.permutations(range(5))), 10)
+
+        group.add((1, 0, 2, 3, 4))
+        self.assertTrue(all(perm in group for perm in itertools.permutations(range(5))))
+
+
+class TestAuxGaugeVariables(unittest.TestCase):
+    def test_symmetric(self):
+        graph = nx.complete_bipartite_graph(3, 3)
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+
+        self.assertEqual(aux_gauge_variables(graph, (0, 2, 3), linear_ranges, quadratic_ranges),
+                         {1, 4, 5})
+
+    def test_asymmetric(self):
+        graph = nx.complete_bipartite_graph(3, 3)
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        linear_ranges[1] = (-1., 2.)
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+        quadratic_ranges[(0, 4)] = (-1., .5)
+
+        # 1 has an asymmetric range and 4 has an edge with one
+        self.assertEqual(aux_gauge_variables(graph, (0, 2, 3), linear_ranges, quadratic_ranges),
+                         {5})
+
+
+class TestAuxTwins(unittest.TestCase):
+    def test_bipartite(self):
+        graph = nx.complete_bipartite_graph(4, 4)
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+
+        self.assertEqual(aux_twins(graph, (0, 4), linear_ranges, quadratic_ranges),
+                         [[1, 2, 3], [5, 6, 7]])
+
+        # a different range splits up the class
+        linear_ranges[6] = (-1., 1.)
+        self.assertEqual(aux_twins(graph, (0, 4), linear_ranges, quadratic_ranges),
+                         [[1, 2, 3], [5, 7]])
+
+    def test_adjacent(self):
+        graph = nx.complete_graph(4)
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+
+        self.assertEqual(aux_twins(graph, (0, 1), linear_ranges, quadratic_ranges), [[2, 3]])
+
+    def test_path(self):
+        graph = nx.path_graph(4)
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+
+        self.assertEqual(aux_twins(graph, (0, 3), linear_ranges, quadratic_ranges), [])
+
+
+class TestOrbits(unittest.TestCase):
+    def test_cycle(self):
+        rotation = {0: 1, 1: 2, 2: 3, 3: 0}
+
+        self.assertEqual(orbits(range(4), [rotation], lambda a, v: a[v]),
+                         {0: 0, 1: 0, 2: 0, 3: 0})
+
+    def test_swap(self):
+        swap = {0: 1, 1: 0, 2: 2}
+
+        self.assertEqual(orbits(range(3), [swap], lambda a, v: a[v]),
+                         {0: 0, 1: 0, 2: 2})
+
+    def test_identity(self):
+        self.assertEqual(orbits('abc', [], None), {'a': 'a', 'b': 'b', 'c': 'c'})
@@ -20,7 +20,7 @@ import pysmt.test
 
 from pysmt.shortcuts import GT, LT, And, Equals, GE, LE, Not
 
-from penaltymodel.maxgap.theta import Theta, limitReal
+from penaltymodel.maxgap.theta import Theta, CompactTheta, limitReal
 
 
 class TestTheta(pysmt.test.TestCase):
@@ -69,6 +69,20 @@ class TestTheta(pysmt.test.TestCase):
 
         self.assertConsistentGraphTheta(graph, theta)
 
+    def test_symbols(self):
+        linear_ranges = defaultdict(lambda: (-2., 2.))
+        quadratic_ranges = defaultdict(lambda: (-1., 1.))
+
+        graph = nx.path_graph(3)
+        theta = Theta.from_graph(graph, linear_ranges, quadratic_ranges)
+
+        # the symbols themselves, however dimod stores the biases
+        self.assertEqual([bias.symbol_name() for bias in theta.linear_symbols.values()],
+                         ['h_0', 'h_1', 'h_2'])
+        self.assertEqual(sorted(bias.symbol_name() for bias in theta.quadratic_symbols.values()),
+                         ['J_0,1', 'J_1,2'])
+        self.assertEqual(theta.offset_symbol.symbol_name(), 'offset')
+
     def test_energy_ranges_K5(self):
         """Check that the energy ranges were set the way we expect"""
         linear_ranges = defaultdict(lambda: (-2., 2.))
@@ -100,3 +114,44 @@ class TestTheta(pysmt.test.TestCase):
         for v, bias in theta.linear.items():
             self.assertSat(Equals(bias, cp_theta.linear[v]))
             self.assertUnsat(Not(Equals(bias, cp_theta.linear[v])))
+
+
+class TestCompactTheta(pysmt.test.TestCase):
+    def test_fix_variables(self):
+        linear_ranges = defaultdict(lambda: (-2., 2.))
+        quadratic_ranges = defaultdict(lambda: (-1., 1.))
+
+        graph = nx.complete_graph(5)
+        graph.remove_edge(3, 4)
+        theta = Theta.from_graph(graph, linear_ranges, quadratic_ranges)
+        compact = CompactTheta(theta)
+
+        self.assertEqual(compact.indptr[-1], 2 * graph.number_of_edges())
+
+        # give every bias a value
+        values = {theta.offset: limitReal(.25)}
+        values.update((bias, limitReal(.1 * idx)) for idx, bias in enumerate(theta.linear.values()))
+        values.update((bias, limitReal(-.05 * idx))
+                      for idx, bias in enumerate(theta.quadratic.values()))
+
+        def value(formula):
+            return formula.substitute(values).simplify().constant_value()
+
+        spins = {0: -1, 2: 1, 3: -1}
+
+        expected = theta.copy()
+        expected.fix_variables(spins)
+
+        restriction = compact.fix_variables(spins)
+
+        self.assertEqual(set(restriction.linear), {1, 4})
+        for v, bias in restriction.linear.items():
+            self.assertEqual(value(bias), value(expected.linear[v]))
+        self.assertEqual(set(restriction.quadratic), {(1, 4)})
+        self.assertEqual(restriction.adj, {1: {4: theta.adj[1][4]}, 4: {1: theta.adj[1][4]}})
+        self.assertEqual(value(restriction.offset), value(expected.offset))
+
+        # nothing fixed
+        restriction = compact.fix_variables({})
+        self.assertEqual(restriction.linear, theta.linear)
+        self.assertEqual(len(restriction.quadratic), len(theta.quadratic))
@@ -0,0 +1,96 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+#    Licensed under the Apache License, Version 2.0 (the "License");
+#    you may not use this file except in compliance with the License.
+#    You may obtain a copy of the License at
+#
+#        http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS,
+#    WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#    See the License for the specific language governing permissions and
+#    limitations under the License.
+#
+# ================================================================================================
+import itertools
+import unittest
+
+import dimod
+import networkx as nx
+
+try:
+    import z3
+except ImportError:
+    _z3 = False
+else:
+    _z3 = True
+    from penaltymodel.maxgap.z3backend import Table, Solver
+
+
+@unittest.skipUnless(_z3, "z3 is not installed")
+class TestTable(unittest.TestCase):
+    def check_energies(self, graph, decision_variables, h, J):
+        """Fix theta to (h, J) and check the table energies against brute force."""
+        bqm = dimod.BinaryQuadraticModel.from_ising(h, J)
+        aux_variables = [v for v in graph if v not in decision_variables]
+
+        linear_ranges = {v: (-2, 2) for v in graph}
+        quadratic_ranges = {edge: (-1, 1) for edge in graph.edges}
+
+        for config in itertools.product((-1, 1), repeat=len(decision_variables)):
+            spins = dict(zip(decision_variables, config))
+
+            table = Table(graph, decision_variables, linear_ranges, quadratic_ranges)
+            theta = table.theta
+
+            exact = table.energy(spins, break_aux_symmetry=False)
+            upper = table.energy_upperbound(spins)
+
+            with Solver() as solver:
+                for assertion in table.assertions:
+                    solver.add_assertion(assertion)
+                for v, bias in h.items():
+                    solver.add_assertion(theta.linear[v] == table.numerals(bias))
+                for (u, v), bias in J.items():
+                    if (u, v) not in theta.quadratic:
+                        u, v = v, u
+                    solver.add_assertion(theta.quadratic[(u, v)] == table.numerals(bias))
+                solver.add_assertion(theta.offset == 0)
+
+                self.assertTrue(solver.solve())
+                model = solver.get_model()
+
+            target = min(bqm.energy(dict(itertools.chain(spins.items(), zip(aux_variables, aux))))
+                         for aux in itertools.product((-1, 1), repeat=len(aux_variables)))
+
+            self.assertAlmostEqual(float(model.get_py_value(exact)), target)
+            self.assertLessEqual(float(model.get_py_value(upper)), target + 1e-9)
+
+    def test_no_aux(self):
+        graph = nx.complete_graph(2)
+        self.check_energies(graph, [0, 1], {0: -.56, 1: .43}, {(0, 1): -1})
+
+    def test_one_aux(self):
+        graph = nx.complete_graph(3)
+        self.check_energies(graph, [0, 1], {0: .5, 1: -1, 2: .25}, {(0, 1): .5, (0, 2): -1, (1, 2): 1})
+
+    def test_chain_aux(self):
+        graph = nx.path_graph(4)
+        self.check_energies(graph, [0], {0: 1, 1: -.5, 2: .5, 3: -1},
+                            {(0, 1): -1, (1, 2): .75, (2, 3): 1})
+
+    def test_to_bqm(self):
+        graph = nx.complete_graph(2)
+        table = Table(graph, [0, 1], {0: (-2, 2), 1: (-2, 2)}, {(0, 1): (-1, 1)})
+
+        with Solver() as solver:
+            for assertion in table.assertions:
+                solver.add_assertion(assertion)
+            solver.add_assertion(table.theta.linear[0] == table.numerals(.5))
+            self.assertTrue(solver.solve())
+            bqm = table.theta.to_bqm(solver.get_model())
+
+        self.assertEqual(bqm.vartype, dimod.SPIN)
+        self.assertEqual(bqm.linear[0], .5)
+        self.assertIn((0, 1), bqm.quadratic)
@@ -0,0 +1,93 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Time building the mixed-integer program and loading it into the solver, for
+complete graphs with max_variables=10, 12 and 14.
+
+Two problems are built on each graph: a ferromagnet where every variable is a
+decision variable, and an AND gate with the remaining variables auxiliary.
+Solving is not timed, it is dominated by the MIP solver.
+
+Run with::
+
+    python benchmarks/assembly.py
+
+"""
+from __future__ import print_function
+
+import itertools
+import time
+
+from collections import defaultdict
+
+import networkx as nx
+
+from ortools.linear_solver import pywraplp
+
+from penaltymodel.mip.generation import _Model
+
+AND = {(x, y, 1 if x == y == 1 else -1): 0. for x, y in itertools.product((-1, 1), repeat=2)}
+
+
+def problems(num_variables):
+    yield 'ferromagnet', {(-1,) * num_variables: 0., (+1,) * num_variables: 0.}, \
+        list(range(num_variables))
+    yield 'AND', AND, [0, 1, 2]
+
+
+def build_model(graph, table, decision, min_classical_gap, linear_energy_ranges,
+                quadratic_energy_ranges):
+    """Build the mixed-integer program that generate_bqm solves without row generation, with
+    all of its constraints, as an MPModelProto."""
+    model = _Model(graph, table, decision, min_classical_gap,
+                   linear_energy_ranges, quadratic_energy_ranges)
+    model.add_energy_constraints()
+    for config in model.table:
+        model.add_ground_constraints(config)
+    model.break_symmetry()
+    return model.model
+
+
+def time_assembly(graph, table, decision, repeats=3):
+    linear_energy_ranges = defaultdict(lambda: (-2, 2))
+    quadratic_energy_ranges = defaultdict(lambda: (-1, 1))
+
+    build = load = float('inf')
+    for __ in range(repeats):
+        t = time.time()
+        model = build_model(graph, table, decision, 2,
+                            linear_energy_ranges, quadratic_energy_ranges)
+        build = min(build, time.time() - t)
+
+        t = time.time()
+        solver = pywraplp.Solver('SolveIntegerProblem',
+                                 pywraplp.Solver.CBC_MIXED_INTEGER_PROGRAMMING)
+        solver.LoadModelFromProto(model)
+        load = min(load, time.time() - t)
+
+    return len(model.constraint), build, load
+
+
+def main():
+    print('{:<13}{:>6}{:>9}{:>10}{:>10}{:>10}'.format(
+        'problem', 'nodes', 'rows', 'build', 'load', 'total'))
+    for num_variables in (10, 12, 14):
+        graph = nx.complete_graph(num_variables)
+        for name, table, decision in problems(num_variables):
+            rows, build, load = time_assembly(graph, table, decision)
+            print('{:<13}{:>6}{:>9}{:>10.3f}{:>10.3f}{:>10.3f}'.format(
+                name, num_variables, rows, build, load, build + load))
+
+
+if __name__ == '__main__':
+    main()
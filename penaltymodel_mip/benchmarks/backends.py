@@ -0,0 +1,85 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Time generating the penalty models of the test specifications with each
+backend, single threaded. CBC is built without threads by OR-tools, scipy does
+not expose HiGHS's and SCIP's concurrent solvers are slower on these problems.
+
+Backends that are not installed are skipped. The time is the best of three.
+
+Run with::
+
+    python benchmarks/backends.py
+
+"""
+from __future__ import print_function
+
+import itertools
+import time
+
+import networkx as nx
+
+from penaltymodel.mip import generate_bqm, get_backend
+
+AND = {(-1, -1, -1): 0, (-1, +1, -1): 0, (+1, -1, -1): 0, (+1, +1, +1): 0}
+
+
+def specifications():
+    yield 'AND K4', nx.complete_graph(4), AND, (0, 1, 2)
+
+    yield 'AND K5', nx.complete_graph(5), AND, (0, 1, 2)
+
+    yield 'AND K6', nx.complete_graph(6), AND, (0, 1, 2)
+
+    yield ('NAE3SAT C4', nx.cycle_graph(4),
+           {config for config in itertools.product((-1, 1), repeat=3) if len(set(config)) > 1},
+           (0, 1, 2))
+
+    graph = nx.complete_graph(6)
+    graph.add_edge(8, 9)
+    yield 'disjoint', graph, {(-1, -1, -1): 0, (+1, +1, -1): 0}, (0, 1, 8)
+
+    yield 'ferro K8', nx.complete_graph(8), {(-1,) * 8: 0, (+1,) * 8: 0}, list(range(8))
+
+
+def time_backend(graph, table, decision, backend, repeats=3):
+    best = float('inf')
+    for __ in range(repeats):
+        t = time.time()
+        __, gap = generate_bqm(graph, table, decision, backend=backend)
+        best = min(best, time.time() - t)
+    return gap, best
+
+
+def main():
+    configurations = [('cbc', 1), ('scip', 1), ('highs', 1)]
+
+    backends = []
+    for name, num_threads in configurations:
+        try:
+            backends.append(('{}/{}'.format(name, num_threads),
+                             get_backend(name, num_threads=num_threads)))
+        except ValueError as err:
+            print('skipping {}: {}'.format(name, err))
+
+    print(('{:<13}' + '{:>10}' * len(backends)).format('problem', *(n for n, _ in backends)))
+    for problem, graph, table, decision in specifications():
+        times = []
+        for __, backend in backends:
+            __, t = time_backend(graph, table, decision, backend)
+            times.append(t)
+        print(('{:<13}' + '{:>10.3f}' * len(backends)).format(problem, *times))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Compare the branch-and-bound nodes and solve time of the ground constraints
+with a constant big-M of 200 and with the big-M computed for each row from the
+bias ranges.
+
+Only problems with auxiliary variables are run, the others have no big-M. The
+time is the best of three, the nodes are from the same run.
+
+Run with::
+
+    python benchmarks/big_m.py
+
+"""
+from __future__ import print_function
+
+import itertools
+import time
+
+from collections import defaultdict
+
+import networkx as nx
+import numpy as np
+
+from penaltymodel.mip import get_backend
+from penaltymodel.mip.generation import _Model
+
+AND = {(-1, -1, -1): 0, (-1, +1, -1): 0, (+1, -1, -1): 0, (+1, +1, +1): 0}
+XOR = {(-1, -1, -1): 0, (-1, +1, +1): 0, (+1, -1, +1): 0, (+1, +1, -1): 0}
+
+
+class _ConstantModel(_Model):
+    def ground_penalties(self, spins):
+        return np.full((len(spins), len(self.auxiliary)), 200.)
+
+
+def problems():
+    yield 'AND K5', nx.complete_graph(5), AND, [0, 1, 2]
+    yield 'AND K6', nx.complete_graph(6), AND, [0, 1, 2]
+    yield 'XOR K5', nx.complete_graph(5), XOR, [0, 1, 2]
+    yield 'XOR K6', nx.complete_graph(6), XOR, [0, 1, 2]
+
+    yield ('NAE3SAT K5', nx.complete_graph(5),
+           {config: 0 for config in itertools.product((-1, 1), repeat=3)
+            if len(set(config)) > 1},
+           [0, 1, 2])
+
+    graph = nx.complete_graph(6)
+    graph.add_edge(8, 9)
+    yield 'disjoint', graph, {(-1, -1, -1): 0, (+1, +1, -1): 0}, [0, 1, 8]
+
+
+def time_solve(cls, graph, table, decision, backend, repeats=3):
+    best = float('inf')
+    for __ in range(repeats):
+        t = time.time()
+        model = cls(graph, table, decision, 2, defaultdict(lambda: (-2, 2)),
+                    defaultdict(lambda: (-1, 1)), backend)
+        model.add_energy_constraints()
+        for config in table:
+            model.add_ground_constraints(config)
+        model.break_symmetry()
+        values = model.solve()
+        elapsed = time.time() - t
+
+        if elapsed < best:
+            best, nodes = elapsed, backend.num_nodes
+    return values[model.gap], nodes, best
+
+
+def main():
+    backends = []
+    for name in ('cbc', 'highs'):
+        try:
+            backends.append((name, get_backend(name)))
+        except ValueError as err:
+            print('skipping {}: {}'.format(name, err))
+
+    print('{:<12}{:<7}{:>6}{:>9}{:>9}{:>9}{:>9}'.format(
+        'problem', 'solver', 'gap', 'nodes', 'nodes', 'time', 'time'))
+    print('{:<12}{:<7}{:>6}{:>9}{:>9}{:>9}{:>9}'.format(
+        '', '', '', 'M=200', 'per-row', 'M=200', 'per-row'))
+    for problem, graph, table, decision in problems():
+        for name, backend in backends:
+            gap, constant_nodes, constant_time = time_solve(_ConstantModel, graph, table,
+                                                            decision, backend)
+            __, nodes, t = time_solve(_Model, graph, table, decision, backend)
+            print('{:<12}{:<7}{:>6.2f}{:>9}{:>9}{:>9.3f}{:>9.3f}'.format(
+                problem, name, gap, constant_nodes, nodes, constant_time, t))
+
+
+if __name__ == '__main__':
+    main()
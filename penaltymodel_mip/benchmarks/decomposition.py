@@ -0,0 +1,109 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Time generating penalty models past the size limits, within a time budget.
+
+Problems past max_decision or max_variables are solved with the compact
+formulation, where the auxiliary variables are minimized over by variable
+elimination. Each problem is generated with the limits set just below its size,
+and, where it takes less than a few minutes, with the full model and no budget.
+
+The problems are ferromagnets on complete graphs with 12 to 20 decision
+variables, and equality and AND gates with auxiliary paths, stars and complete
+bipartite graphs. A gap marked with * is that of the last solution when the
+budget ran out, valid but maybe not the largest.
+
+Run with::
+
+    python benchmarks/decomposition.py
+
+"""
+from __future__ import print_function
+
+import itertools
+import time
+
+from collections import defaultdict
+
+import networkx as nx
+
+import penaltymodel.core as pm
+
+from penaltymodel.mip.generation import generate_bqm
+
+AND = {(x, y, 1 if x == y == 1 else -1): 0. for x, y in itertools.product((-1, 1), repeat=2)}
+EQUALITY = {(-1, -1): 0., (+1, +1): 0.}
+
+TIME_BUDGET = 60
+
+
+def problems():
+    for num_variables in (12, 14, 16, 18, 20):
+        yield ('ferromagnet', nx.complete_graph(num_variables),
+               {(-1,) * num_variables: 0., (+1,) * num_variables: 0.},
+               list(range(num_variables)), num_variables <= 14)
+
+    graph = nx.complete_graph(2)
+    nx.add_path(graph, [1] + list(range(2, 11)))
+    yield 'EQ + path', graph, EQUALITY, [0, 1], False
+
+    graph = nx.complete_graph(3)
+    graph.add_edges_from((2, v) for v in range(3, 11))
+    yield 'AND + star', graph, AND, [0, 1, 2], False
+
+    graph = nx.complete_graph(4)
+    nx.add_path(graph, [3] + list(range(4, 11)))
+    yield 'AND + path', graph, AND, [0, 1, 2], False
+
+    yield 'AND K4,4', nx.complete_bipartite_graph(4, 4), AND, [0, 1, 4], True
+    yield 'AND K5,5', nx.complete_bipartite_graph(5, 5), AND, [0, 1, 5], False
+
+
+def time_generation(graph, table, decision, compact):
+    linear_energy_ranges = defaultdict(lambda: (-2, 2))
+    quadratic_energy_ranges = defaultdict(lambda: (-1, 1))
+
+    if compact:
+        limits = dict(max_decision=len(decision) - 1, max_variables=len(graph) - 1,
+                      time_budget=TIME_BUDGET)
+    else:
+        limits = dict(max_decision=len(graph), max_variables=len(graph))
+
+    t = time.time()
+    try:
+        __, gap = generate_bqm(graph, table, decision, linear_energy_ranges,
+                               quadratic_energy_ranges, **limits)
+    except pm.FactoryException:
+        return '-', time.time() - t
+
+    duration = time.time() - t
+    if compact and duration > TIME_BUDGET:
+        return '{:.3f}*'.format(gap), duration
+    return '{:.3f}'.format(gap), duration
+
+
+def main():
+    print('{:<13}{:>6}{:>9}{:>10}{:>9}{:>10}'.format(
+        'problem', 'nodes', 'gap', 'full', 'gap', 'compact'))
+    for name, graph, table, decision, full in problems():
+        if full:
+            full = '{:>9}{:>10.3f}'.format(*time_generation(graph, table, decision, False))
+        else:
+            full = '{:>9}{:>10}'.format('-', '-')
+
+        compact = '{:>9}{:>10.3f}'.format(*time_generation(graph, table, decision, True))
+        print('{:<13}{:>6}{}{}'.format(name, len(graph), full, compact))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Time generating penalty models with and without row generation.
+
+A ferromagnet where every variable is a decision variable is generated on
+complete graphs with 10 to 18 nodes, and an AND gate with the remaining
+variables auxiliary on complete graphs with 5 and 6 nodes. The full model is
+skipped for ferromagnets with more than 14 nodes, where it takes minutes.
+
+Run with::
+
+    python benchmarks/row_generation.py
+
+"""
+from __future__ import print_function
+
+import itertools
+import time
+
+from collections import defaultdict
+
+import networkx as nx
+
+from penaltymodel.mip.generation import generate_bqm
+
+AND = {(x, y, 1 if x == y == 1 else -1): 0. for x, y in itertools.product((-1, 1), repeat=2)}
+
+
+def problems():
+    for num_variables in (10, 12, 14, 16, 18):
+        yield ('ferromagnet', nx.complete_graph(num_variables),
+               {(-1,) * num_variables: 0., (+1,) * num_variables: 0.},
+               list(range(num_variables)), num_variables <= 14)
+    for num_variables in (5, 6):
+        yield 'AND', nx.complete_graph(num_variables), AND, [0, 1, 2], True
+
+
+def time_generation(graph, table, decision, row_generation):
+    linear_energy_ranges = defaultdict(lambda: (-2, 2))
+    quadratic_energy_ranges = defaultdict(lambda: (-1, 1))
+
+    t = time.time()
+    __, gap = generate_bqm(graph, table, decision, linear_energy_ranges,
+                           quadratic_energy_ranges, max_decision=len(graph),
+                           max_variables=len(graph), row_generation=row_generation)
+    return gap, time.time() - t
+
+
+def main():
+    print('{:<13}{:>6}{:>8}{:>10}{:>8}{:>10}'.format(
+        'problem', 'nodes', 'gap', 'full', 'gap', 'rowgen'))
+    for name, graph, table, decision, full in problems():
+        if full:
+            gap, full_time = time_generation(graph, table, decision, False)
+            full = '{:>8.3f}{:>10.3f}'.format(gap, full_time)
+        else:
+            full = '{:>8}{:>10}'.format('-', '-')
+
+        gap, rowgen_time = time_generation(graph, table, decision, True)
+        print('{:<13}{:>6}{}{:>8.3f}{:>10.3f}'.format(
+            name, len(graph), full, gap, rowgen_time))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Compare the symmetry breaking of the auxiliary variables with fixing them to
+a random configuration for the first feasible configuration, as was done
+before.
+
+The random fixing is run with five seeds, and the smallest and largest node
+counts and times are shown.
+
+Run with::
+
+    python benchmarks/symmetry.py
+
+"""
+from __future__ import print_function
+
+import random
+import time
+
+from collections import defaultdict
+
+import networkx as nx
+import numpy as np
+
+from penaltymodel.mip import get_backend
+from penaltymodel.mip.generation import _Model
+
+AND = {(-1, -1, -1): 0, (-1, +1, -1): 0, (+1, -1, -1): 0, (+1, +1, +1): 0}
+XOR = {(-1, -1, -1): 0, (-1, +1, +1): 0, (+1, -1, +1): 0, (+1, +1, -1): 0}
+
+
+class _RandomModel(_Model):
+    def break_symmetry(self):
+        values = [random.randint(0, 1) for v in self.auxiliary]
+        self._add_constraints(self.a_star[next(iter(self.table))],
+                              np.identity(len(self.auxiliary)),
+                              values, values)
+
+
+def problems():
+    for num_variables in (5, 6, 7):
+        yield 'AND K{}'.format(num_variables), nx.complete_graph(num_variables), AND
+    for num_variables in (5, 6):
+        yield 'XOR K{}'.format(num_variables), nx.complete_graph(num_variables), XOR
+    yield 'AND K3,3', nx.complete_bipartite_graph(3, 3), AND
+
+
+def solve(cls, graph, table, backend):
+    t = time.time()
+    model = cls(graph, table, [0, 1, 2], 2, defaultdict(lambda: (-2, 2)),
+                defaultdict(lambda: (-1, 1)), backend)
+    model.add_energy_constraints()
+    for config in table:
+        model.add_ground_constraints(config)
+    model.break_symmetry()
+    values = model.solve()
+    return values[model.gap], backend.num_nodes, time.time() - t
+
+
+def main():
+    backend = get_backend('cbc')
+
+    print('{:<10}{:>6}{:>13}{:>9}{:>15}{:>9}'.format(
+        'problem', 'gap', 'random nodes', 'nodes', 'random time', 'time'))
+    for problem, graph, table in problems():
+        runs = []
+        for seed in range(5):
+            random.seed(seed)
+            runs.append(solve(_RandomModel, graph, table, backend))
+        gap, nodes, t = solve(_Model, graph, table, backend)
+
+        random_nodes = [n for __, n, __ in runs]
+        random_times = [rt for __, __, rt in runs]
+        print('{:<10}{:>6.2f}{:>13}{:>9}{:>15}{:>9.3f}'.format(
+            problem, gap,
+            '{}-{}'.format(min(random_nodes), max(random_nodes)), nodes,
+            '{:.3f}-{:.3f}'.format(min(random_times), max(random_times)), t))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,3 +1,6 @@
+from penaltymodel.mip.backends import *
+import penaltymodel.mip.backends
+
 from penaltymodel.mip.generation import *
 import penaltymodel.mip.generation
 
@@ -0,0 +1,277 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""The solvers used for the mixed-integer programs built by :func:`.generate_bqm`.
+
+CBC and SCIP are called through OR-tools, HiGHS through :func:`scipy.optimize.milp`
+(scipy 1.10 or later).
+
+"""
+import numpy as np
+
+from ortools.linear_solver import linear_solver_pb2, pywraplp
+
+import penaltymodel.core as pm
+
+__all__ = ['Backend', 'CBC', 'SCIP', 'HiGHS', 'get_backend']
+
+
+class Backend(object):
+    """A mixed-integer program solver.
+
+    Args:
+        num_threads (int, optional, default=1):
+            The number of threads the solver may use.
+
+        time_limit (float, optional):
+            The time limit of each solve, in seconds. If it is reached, the best solution found
+            so far is used, so the gap may not be the largest possible.
+
+        gap_tolerance (float, optional):
+            The relative MIP gap at which the solver stops. As for `time_limit`, the gap of the
+            returned model is then only within that tolerance of the largest possible.
+
+        seed (int, optional):
+            The random seed of the solver, for solvers that use one.
+
+    Attributes:
+        num_nodes (int/None): The number of branch-and-bound nodes explored by the last solve,
+            or None before the first.
+
+        optimal (bool/None): Whether the solution of the last solve was proven optimal, False
+            if it was stopped by a time limit or `gap_tolerance`, or None before the first.
+
+    """
+    def __init__(self, num_threads=1, time_limit=None, gap_tolerance=None, seed=None):
+        self.num_threads = num_threads
+        self.time_limit = time_limit
+        self.gap_tolerance = gap_tolerance
+        self.seed = seed
+        self.num_nodes = None
+        self.optimal = None
+
+    def solve(self, model, time_limit=None):
+        """Solve a program.
+
+        Args:
+            model: The program, with a `model` attribute holding it as an MPModelProto and a
+                `constraint_matrix` method giving its constraints as arrays.
+
+            time_limit (float, optional): A time limit for this solve, in seconds. The smaller
+                of it and the backend's `time_limit` is used.
+
+        Returns:
+            list: The values of the variables.
+
+        Raises:
+            ImpossiblePenaltyModel: If the program has no solution.
+
+            FactoryException: If no solution was found within the time limit.
+
+        """
+        raise NotImplementedError
+
+    def _time_limit(self, time_limit):
+        if self.time_limit is None:
+            return time_limit
+        if time_limit is None:
+            return self.time_limit
+        return min(self.time_limit, time_limit)
+
+
+class _ORTools(Backend):
+    """A solver called through OR-tools' linear solver wrapper."""
+    solver_type = None
+    threaded = True
+
+    def solver_parameters(self):
+        """Parameters in the solver's own format, or '' for none."""
+        return ''
+
+    def solve(self, model, time_limit=None):
+        time_limit = self._time_limit(time_limit)
+
+        solver = pywraplp.Solver('SolveIntegerProblem', getattr(pywraplp.Solver, self.solver_type))
+
+        error = solver.LoadModelFromProto(model.model)
+        if error:
+            raise RuntimeError(error)
+
+        if self.num_threads != 1 and self.threaded:
+            solver.SetNumThreads(self.num_threads)
+        if self.solver_parameters():
+            solver.SetSolverSpecificParametersAsString(self.solver_parameters())
+        if time_limit is not None:
+            solver.SetTimeLimit(max(int(1000 * time_limit), 1))
+
+        parameters = pywraplp.MPSolverParameters()
+        if self.gap_tolerance is not None:
+            parameters.SetDoubleParam(parameters.RELATIVE_MIP_GAP, self.gap_tolerance)
+
+        result_status = solver.Solve(parameters)
+        self.num_nodes = solver.nodes()
+        self.optimal = result_status == solver.OPTIMAL and not self.gap_tolerance
+
+        if result_status in [solver.INFEASIBLE, solver.UNBOUNDED]:
+            raise pm.ImpossiblePenaltyModel("No solution was found")
+        if result_status not in [solver.OPTIMAL, solver.FEASIBLE]:
+            raise pm.FactoryException("No solution was found within the time limit")
+
+        # read everything back into floats
+        response = linear_solver_pb2.MPSolutionResponse()
+        solver.FillSolutionResponseProto(response)
+        return list(response.variable_value)
+
+
+class CBC(_ORTools):
+    """COIN-OR branch and cut, through OR-tools. See :class:`Backend`.
+
+    OR-tools builds CBC without thread support, so `num_threads` is ignored. CBC is
+    deterministic and OR-tools does not pass it a seed, so `seed` is ignored as well.
+
+    """
+    solver_type = 'CBC_MIXED_INTEGER_PROGRAMMING'
+    threaded = False
+
+
+class SCIP(_ORTools):
+    """SCIP, through OR-tools. See :class:`Backend`.
+
+    More than one thread runs SCIP's concurrent solvers, which were slower than a single
+    thread on the test problems and can deadlock with OR-tools 9.6.
+
+    """
+    solver_type = 'SCIP_MIXED_INTEGER_PROGRAMMING'
+
+    def solver_parameters(self):
+        if self.seed is None:
+            return ''
+        return 'randomization/randomseedshift = {:d}\n'.format(self.seed)
+
+
+class HiGHS(Backend):
+    """HiGHS, through :func:`scipy.optimize.milp`. See :class:`Backend`.
+
+    scipy does not expose HiGHS's thread count or seed, so `num_threads` and `seed` are
+    ignored. HiGHS is deterministic.
+
+    """
+    def __init__(self, *args, **kwargs):
+        import scipy
+
+        # milp was added in scipy 1.9 and its mip_rel_gap option in 1.10
+        if tuple(int(part) for part in scipy.__version__.split('.')[:2]) < (1, 10):
+            raise ImportError("the HiGHS backend requires scipy 1.10 or later")
+        super(HiGHS, self).__init__(*args, **kwargs)
+
+    def solve(self, model, time_limit=None):
+        time_limit = self._time_limit(time_limit)
+
+        from scipy.optimize import Bounds, LinearConstraint, milp
+        from scipy.sparse import csr_matrix
+
+        variables = model.model.variable
+        cost = np.array([variable.objective_coefficient for variable in variables])
+        if model.model.maximize:
+            cost = -cost
+
+        integrality = np.array([variable.is_integer for variable in variables], dtype=int)
+        bounds = Bounds([variable.lower_bound for variable in variables],
+                        [variable.upper_bound for variable in variables])
+
+        matrix, lower_bounds, upper_bounds = model.constraint_matrix()
+        if len(matrix):
+            constraints = LinearConstraint(csr_matrix(matrix), lower_bounds, upper_bounds)
+        else:
+            constraints = None
+
+        options = {}
+        if time_limit is not None:
+            options['time_limit'] = time_limit
+        if self.gap_tolerance is not None:
+            options['mip_rel_gap'] = self.gap_tolerance
+
+        result = milp(cost, integrality=integrality, bounds=bounds, constraints=constraints,
+                      options=options)
+        self.num_nodes = getattr(result, 'mip_node_count', None)
+        self.optimal = result.status == 0 and not self.gap_tolerance
+
+        if result.x is None:
+            if result.status == 1:  # iteration or time limit
+                raise pm.FactoryException("No solution was found within the time limit")
+            raise pm.ImpossiblePenaltyModel("No solution was found")
+
+        return self._polish(result.x, cost, integrality, bounds, matrix, lower_bounds,
+                            upper_bounds).tolist()
+
+    @staticmethod
+    def _polish(x, cost, integrality, bounds, matrix, lower_bounds, upper_bounds):
+        """Solve the linear program with the integer variables fixed to their values in x.
+
+        milp does not expose HiGHS's feasibility tolerances, and its solutions can be 1e-6
+        away from the constraints, which is then the error in the gap. The linear program is
+        solved with tighter tolerances. If it fails, x is returned.
+
+        """
+        from scipy.optimize import linprog
+
+        lower = np.where(integrality, np.round(x), bounds.lb)
+        upper = np.where(integrality, np.round(x), bounds.ub)
+
+        # lower_bounds <= matrix.x <= upper_bounds as upper bounds only
+        finite_upper = np.isfinite(upper_bounds)
+        finite_lower = np.isfinite(lower_bounds)
+        if len(matrix):
+            A_ub = np.vstack((matrix[finite_upper], -matrix[finite_lower]))
+            b_ub = np.concatenate((upper_bounds[finite_upper], -lower_bounds[finite_lower]))
+        else:
+            A_ub = b_ub = None
+
+        result = linprog(cost, A_ub=A_ub, b_ub=b_ub, bounds=list(zip(lower, upper)),
+                         method='highs', options={'primal_feasibility_tolerance': 1e-10,
+                                                  'dual_feasibility_tolerance': 1e-10})
+        return result.x if result.success else x
+
+
+BACKENDS = {'cbc': CBC, 'scip': SCIP, 'highs': HiGHS}
+
+
+def get_backend(name, num_threads=1, time_limit=None, gap_tolerance=None, seed=None):
+    """Get a solver by name.
+
+    Args:
+        name (str): One of 'cbc', 'scip' or 'highs'.
+
+        num_threads/time_limit/gap_tolerance/seed: See :class:`Backend`.
+
+    Returns:
+        :class:`Backend`
+
+    Raises:
+        ValueError: If `name` is unknown, or its solver is not installed.
+
+    """
+    try:
+        cls = BACKENDS[name]
+    except KeyError:
+        raise ValueError("unknown backend {!r}, expected one of {}".format(
+            name, ', '.join(map(repr, sorted(BACKENDS)))))
+
+    if issubclass(cls, _ORTools) and not hasattr(pywraplp.Solver, cls.solver_type):
+        raise ValueError("OR-tools was not built with {}".format(cls.__name__))
+
+    try:
+        return cls(num_threads=num_threads, time_limit=time_limit, gap_tolerance=gap_tolerance,
+                   seed=seed)
+    except ImportError:
+        raise ValueError("the {!r} backend requires scipy 1.10 or later".format(name))
@@ -0,0 +1,147 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Exact minimization over the auxiliary variables by variable elimination.
+
+With the decision variables fixed, the energy is an Ising model over the
+auxiliary variables. Eliminating them one at a time, each time minimizing over
+the variable the sum of the terms that contain it, is dynamic programming over
+the tree decomposition that the elimination order induces. Each step builds a
+table over the variable and its neighbours at that point, so the cost is
+exponential only in the width of the order, rather than in the number of
+auxiliary variables.
+
+All of the functions work on many decision configurations at once, the tables
+having a leading axis over them.
+
+"""
+import numpy as np
+
+__all__ = ['elimination_order', 'aux_ground_states']
+
+
+def elimination_order(graph, auxiliary):
+    """A greedy minimum-degree elimination order of the auxiliary variables.
+
+    Args:
+        graph (:obj:`~networkx.Graph`): The structure of the binary quadratic model.
+        auxiliary (list): The auxiliary variables.
+
+    Returns:
+        tuple: The order, as a list, and its width, the largest number of auxiliary variables
+        in a table built while eliminating in that order.
+
+    """
+    aux = set(auxiliary)
+    adj = {v: set(u for u in graph[v] if u in aux) for v in auxiliary}
+
+    order = []
+    width = 0
+    while adj:
+        # ties go to the earliest variable so the order is deterministic
+        v = min(adj, key=lambda u: (len(adj[u]), auxiliary.index(u)))
+        neighbours = adj.pop(v)
+        for u in neighbours:
+            adj[u].update(neighbours - {u})
+            adj[u].discard(v)
+        order.append(v)
+        width = max(width, len(neighbours) + 1)
+
+    return order, width
+
+
+def aux_ground_states(linear, quadratic, decision, auxiliary, decision_spins, order=None):
+    """Minimize the energy over the auxiliary variables for each decision configuration.
+
+    Args:
+        linear (dict): The linear biases, keyed by variable.
+        quadratic (dict): The quadratic biases, keyed by edge.
+        decision (list): The decision variables.
+        auxiliary (list): The auxiliary variables.
+        decision_spins (:obj:`numpy.ndarray`): The decision configurations, one row each,
+            ordered by decision.
+        order (list, optional): The elimination order of the auxiliary variables, see
+            :func:`elimination_order`. Defaults to the order of `auxiliary`.
+
+    Returns:
+        tuple: The lowest energy of each decision configuration, without any offset, and the
+        spins of the auxiliary variables that reach it, one row each, ordered by auxiliary.
+
+    """
+    spins = np.asarray(decision_spins, dtype=float)
+    num_configs = len(spins)
+    column = {v: idx for idx, v in enumerate(decision)}
+    aux = set(auxiliary)
+
+    if order is None:
+        order = auxiliary
+
+    # the energy of the decision variables alone, and the field each one puts on its
+    # auxiliary neighbours
+    constant = np.zeros(num_configs)
+    fields = {v: np.full(num_configs, float(linear.get(v, 0.))) for v in auxiliary}
+    for v in decision:
+        constant += linear.get(v, 0.) * spins[:, column[v]]
+
+    # factors are (scope, table) with a table axis over the configurations, and then one of
+    # length 2 (spin down, spin up) for each variable in scope
+    factors = []
+    for (u, v), bias in quadratic.items():
+        if u in aux and v in aux:
+            factors.append(((u, v), bias * np.array([[[1., -1.], [-1., 1.]]])))
+        elif u in aux:
+            fields[u] = fields[u] + bias * spins[:, column[v]]
+        elif v in aux:
+            fields[v] = fields[v] + bias * spins[:, column[u]]
+        else:
+            constant += bias * spins[:, column[u]] * spins[:, column[v]]
+
+    for v in auxiliary:
+        factors.append(((v,), np.stack((-fields[v], fields[v]), axis=1)))
+
+    # eliminate, remembering the minimizing spin of each variable given the rest of its table
+    argmins = []
+    for v in order:
+        touching = [factor for factor in factors if v in factor[0]]
+        factors = [factor for factor in factors if v not in factor[0]]
+
+        scope = [v] + sorted(set(u for s, _ in touching for u in s) - {v},
+                             key=auxiliary.index)
+        table = np.zeros((num_configs,) + (2,) * len(scope))
+        for s, t in touching:
+            table = table + _expand(s, t, scope)
+
+        argmins.append((v, scope[1:], np.argmin(table, axis=1)))
+        factors.append((tuple(scope[1:]), np.min(table, axis=1)))
+
+    energies = constant.copy()
+    for _, table in factors:
+        energies += np.broadcast_to(table, (num_configs,))
+
+    # assign in the reverse order, each variable depends on ones eliminated after it
+    index = {v: idx for idx, v in enumerate(auxiliary)}
+    bits = np.zeros((num_configs, len(auxiliary)), dtype=np.int64)
+    rows = np.arange(num_configs)
+    for v, rest, argmin in reversed(argmins):
+        argmin = np.broadcast_to(argmin, (num_configs,) + argmin.shape[1:])
+        bits[:, index[v]] = argmin[(rows,) + tuple(bits[:, index[u]] for u in rest)]
+
+    return energies, 2 * bits - 1
+
+
+def _expand(scope, table, target):
+    """Arrange the axes of a factor's table to broadcast against a table over target."""
+    axes = sorted(range(len(scope)), key=lambda idx: target.index(scope[idx]))
+    table = np.transpose(table, [0] + [idx + 1 for idx in axes])
+    shape = [table.shape[0]] + [2 if v in scope else 1 for v in target]
+    return table.reshape(shape)
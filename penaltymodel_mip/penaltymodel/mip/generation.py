@@ -12,23 +12,29 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import itertools
-import random
+import struct
+import time
 
-from collections import Mapping, defaultdict
+from collections import defaultdict
 
 import dimod
 import networkx as nx
+import numpy as np
 
-from ortools.linear_solver import pywraplp
+from ortools.linear_solver import linear_solver_pb2
 
 import penaltymodel.core as pm
 
+from penaltymodel.mip.backends import Backend, get_backend
+from penaltymodel.mip.elimination import aux_ground_states, elimination_order
+from penaltymodel.mip.symmetry import aux_gauge_variables, aux_twins
+
 
 def generate_bqm(graph, table, decision,
                  linear_energy_ranges=None, quadratic_energy_ranges=None, min_classical_gap=2,
                  precision=7, max_decision=8, max_variables=10,
-                 return_auxiliary=False):
+                 return_auxiliary=False, row_generation=False, backend='cbc', num_threads=1,
+                 time_limit=None, gap_tolerance=None, seed=None, time_budget=None, info=None):
     """Get a binary quadratic model with specific ground states.
 
     Args:
@@ -37,7 +43,9 @@ def generate_bqm(graph, table, decision,
 
         table (iterable):
             Iterable of valid configurations (of spin-values). Each configuration is a tuple of
-            variable assignments ordered by `decision`.
+            variable assignments ordered by `decision`. If a dict, the values are the target
+            energies of the configurations. A spin-valued
+            :class:`penaltymodel.FeasibleConfigurations` is used without conversion.
 
         decision (list/tuple):
             The variables in the binary quadratic model which have specified configurations.
@@ -58,17 +66,57 @@ def generate_bqm(graph, table, decision,
             Values returned by the optimization solver are rounded to `precision` digits of
             precision.
 
-        max_decision (int, optional, default=4):
-            Maximum number of decision variables allowed. The algorithm is valid for arbitrary
-            sizes of problem but can be extremely slow.
+        max_decision (int, optional, default=8):
+            Without a `time_budget`, the maximum number of decision variables allowed. With
+            one, as the factory gives by default, larger problems are allowed and this only
+            decides how they are solved, see `time_budget`.
 
-        max_variables (int, optional, default=4):
-            Maximum number of variables allowed. The algorithm is valid for arbitrary
-            sizes of problem but can be extremely slow.
+        max_variables (int, optional, default=10):
+            Without a `time_budget`, the maximum number of variables allowed. With one, larger
+            problems are allowed and this only decides how they are solved, see `time_budget`.
 
         return_auxiliary (bool, optional, False):
             If True, the auxiliary configurations are returned for each configuration in table.
 
+        row_generation (bool, optional, False):
+            If True, the constraints are not all written up front. The program is solved with a
+            few of them, the ones violated by the solution are added and the program is solved
+            again, until none are violated. Memory then stays small for larger graphs, so
+            `max_variables` can be raised.
+
+        backend (str/:class:`.Backend`, optional, default='cbc'):
+            The mixed-integer program solver, 'cbc', 'scip' or 'highs', see
+            :mod:`penaltymodel.mip.backends`. A :class:`.Backend` can also be given, in which
+            case `num_threads`, `time_limit`, `gap_tolerance` and `seed` are ignored.
+
+        num_threads (int, optional, default=1):
+            The number of threads the solver may use.
+
+        time_limit (float, optional):
+            The time limit of each solve, in seconds. If it is reached, the best model found so
+            far is returned, which may not have the largest gap.
+
+        gap_tolerance (float, optional):
+            The relative MIP gap at which the solver stops, so the gap of the returned model is
+            only within that tolerance of the largest.
+
+        seed (int, optional):
+            The random seed of the solver. The program itself is built deterministically.
+
+        time_budget (float, optional):
+            Time budget in seconds. If given, `max_decision` and `max_variables` only decide
+            how problems are solved: problems within them as set by `row_generation`, larger
+            ones with row generation and a ground state constraint that does not grow
+            exponentially with the number of auxiliary variables. Every solve is limited to
+            what is left of the budget. When it runs out, the last solution is used if it is
+            a valid model, whose gap may not be the largest, otherwise generation fails with
+            a FactoryException.
+
+        info (dict, optional):
+            If provided, it is populated with 'optimal', False if the gap may not be the
+            largest possible because the time budget, `time_limit` or `gap_tolerance` stopped
+            the solver first.
+
     Returns:
         If return_auxiliary is False:
 
@@ -88,6 +136,8 @@ def generate_bqm(graph, table, decision,
         ImpossiblePenaltyModel: If the penalty model cannot be built. Normally due
             to a non-zero infeasible gap.
 
+        FactoryException: If the time budget or time limit ran out before a model was found.
+
     """
 
     # Developer note: This function is input checking and output formatting. The logic is
@@ -96,42 +146,55 @@ def generate_bqm(graph, table, decision,
     if not isinstance(graph, nx.Graph):
         raise TypeError("expected input graph to be a NetworkX Graph.")
 
-    if not set().union(*table).issubset({-1, 1}):
-        raise ValueError("expected table to be spin-valued")
-
     if not isinstance(decision, list):
         decision = list(decision)  # handle iterables
     if not all(v in graph for v in decision):
         raise ValueError("given graph does not match the variable labels in decision variables")
 
-    num_var = len(decision)
-    if any(len(config) != num_var for config in table):
-        raise ValueError("number of decision variables does not match all of the entires in the table")
+    # raises a ValueError if the table is not spin-valued or does not match the decision variables
+    table = pm.as_feasible_configurations(table, len(decision), dimod.SPIN)
+
+    # problems past the limits can only be solved within a time budget
+    large = len(decision) > max_decision or len(graph) > max_variables
+    if time_budget is not None:
+        deadline = time.time() + time_budget
+    else:
+        deadline = None
+
+        if len(decision) > max_decision:
+            raise ValueError(("The table is too large. Note that larger models can be built by "
+                              "setting max_decision to a higher number, but generation could be "
+                              "extremely slow."))
 
-    if len(decision) > max_decision:
-        raise ValueError(("The table is too large. Note that larger models can be built by setting "
-                          "max_decision to a higher number, but generation could be extremely slow."))
+        if len(graph) > max_variables:
+            raise ValueError(("The graph is too large. Note that larger models can be built by "
+                              "setting max_variables to a higher number, but generation could be "
+                              "extremely slow."))
 
-    if len(graph) > max_variables:
-        raise ValueError(("The graph is too large. Note that larger models can be built by setting "
-                          "max_variables to a higher number, but generation could be extremely slow."))
+    if not isinstance(backend, Backend):
+        backend = get_backend(backend, num_threads=num_threads, time_limit=time_limit,
+                              gap_tolerance=gap_tolerance, seed=seed)
 
     if linear_energy_ranges is None:
         linear_energy_ranges = defaultdict(lambda: (-2, 2))
     if quadratic_energy_ranges is None:
         quadratic_energy_ranges = defaultdict(lambda: (-1, 1))
 
-    if not isinstance(table, Mapping):
-        table = {config: 0. for config in table}
-
-    h, J, offset, gap, aux = _generate_ising(graph, table, decision, min_classical_gap,
-                                             linear_energy_ranges, quadratic_energy_ranges)
+    h, J, offset, gap, aux, optimal = _generate_ising(graph, table, decision, min_classical_gap,
+                                                      linear_energy_ranges,
+                                                      quadratic_energy_ranges,
+                                                      row_generation=row_generation or large,
+                                                      backend=backend, deadline=deadline,
+                                                      compact=large)
 
     bqm = dimod.BinaryQuadraticModel.empty(dimod.SPIN)
     bqm.add_variables_from((v, round(bias, precision)) for v, bias in h.items())
     bqm.add_interactions_from((u, v, round(bias, precision)) for (u, v), bias in J.items())
     bqm.add_offset(round(offset, precision))
 
+    if info is not None:
+        info['optimal'] = optimal
+
     if return_auxiliary:
         return bqm, round(gap, precision), aux
     else:
@@ -139,7 +202,8 @@ def generate_bqm(graph, table, decision,
 
 
 def _generate_ising(graph, table, decision, min_classical_gap, linear_energy_ranges,
-                    quadratic_energy_ranges):
+                    quadratic_energy_ranges, row_generation=False, backend=None, deadline=None,
+                    compact=False):
 
     if not table:
         # if there are no feasible configurations then the gap is 0 and the model is empty
@@ -147,143 +211,868 @@ def _generate_ising(graph, table, decision, min_classical_gap, linear_energy_ran
         J = {edge: 0.0 for edge in graph.edges}
         offset = 0.0
         gap = 0.0
-        return h, J, offset, gap, {}
+        return h, J, offset, gap, {}, True
+
+    model = _Model(graph, table, decision, min_classical_gap,
+                   linear_energy_ranges, quadratic_energy_ranges, backend)
+
+    if row_generation:
+        values, optimal = _solve_with_row_generation(model, deadline=deadline,
+                                                     compact=compact)
+    else:
+        model.add_energy_constraints()
+        for config in table:
+            model.add_ground_constraints(config)
+        model.break_symmetry()
+
+        values = model.solve(_remaining(deadline))
+        optimal = model.backend.optimal
+
+    auxiliary = model.auxiliary
+    nodes = model.nodes
+    edges = model.edges
+
+    # solvers only meet the bounds within their feasibility tolerance, clip the biases so that
+    # they are in their ranges exactly, and use the gap of the clipped model
+    values = list(values)
+    variables = model.model.variable
+    for idx in range(model.offset):
+        values[idx] = min(max(values[idx], variables[idx].lower_bound), variables[idx].upper_bound)
+
+    _inf_gap = not auxiliary and len(table) == 2**len(decision)
+
+    h = dict(zip(nodes, values))
+    J = dict(zip(edges, values[len(nodes):model.offset]))
+    if _inf_gap:
+        gap = float('inf')
+    else:
+        gap = model.classical_gap(values)
+        if gap is None:
+            gap = values[model.gap]
+    offset = values[model.offset]
+
+    if not gap:
+        raise pm.ImpossiblePenaltyModel("No positive gap can be found for the given model")
+
+    if auxiliary:
+        aux_configs = {config: {v: values[var]*2 - 1
+                                for v, var in zip(auxiliary, model.a_star[config])}
+                       for config in table}
+    else:
+        aux_configs = {config: dict() for config in table}
+
+    return h, J, offset, gap, aux_configs, optimal
+
 
-    auxiliary = [v for v in graph if v not in decision]
-    variables = decision + auxiliary
+def _solve_with_row_generation(model, tolerance=1e-6, deadline=None, compact=False):
+    """Solve the model, adding only the energy constraints violated by the current solution.
 
-    solver = pywraplp.Solver('SolveIntegerProblem', pywraplp.Solver.CBC_MIXED_INTEGER_PROGRAMMING)
+    We start with all of the ground constraints of the feasible configurations. For the
+    energy constraints, we guess the configuration of the auxiliary variables in the ground
+    state of each feasible configuration, and take it and its neighbours at Hamming distance
+    one, which are the infeasible configurations most likely to bound the gap. After every
+    solve, the energies of all of the configurations are evaluated for the solution and the
+    most violated energy constraints are added, see violated_energy_constraints. When none
+    are violated the solution is optimal for the full model.
 
-    h = {v: solver.NumVar(linear_energy_ranges[v][0], linear_energy_ranges[v][1], 'h_%s' % v)
-         for v in graph.nodes}
+    If compact is True, none of the constraints grow exponentially with the number of
+    auxiliary variables: the ground constraints are add_product_ground_constraints, and the
+    energy constraints are added for all of the auxiliary configurations of a decision
+    configuration at once, see add_elimination_constraints, starting with the feasible
+    configurations and their neighbours.
 
-    J = {}
-    for u, v in graph.edges:
-        if (u, v) in quadratic_energy_ranges:
-            low, high = quadratic_energy_ranges[(u, v)]
+    If the deadline passes first, the last solution is still a valid model if its biases
+    give the feasible configurations their target energies, with a smaller gap than the
+    solution's, see _Model.classical_gap.
+
+    Returns:
+        tuple: The values of the model's variables, as a list, and whether they were proven
+        optimal, False if the deadline passed or the backend stopped early.
+
+    Raises:
+        FactoryException: If the deadline passes before a valid model is found.
+
+    """
+    num_aux_configs = 2**len(model.auxiliary)
+
+    for config in model.table:
+        if compact:
+            model.add_product_ground_constraints(config)
         else:
-            low, high = quadratic_energy_ranges[(v, u)]
-        J[(u, v)] = solver.NumVar(low, high, 'J_%s,%s' % (u, v))
+            model.add_ground_constraints(config)
+        _remaining(deadline)
 
-    offset = solver.NumVar(-solver.infinity(), solver.infinity(), 'offset')
+    # the configuration that the symmetry breaking makes likely
+    aux = model.break_symmetry() or 0
 
-    gap = solver.NumVar(min_classical_gap, solver.infinity(), 'classical_gap')
+    if compact:
+        flips = 1 << np.arange(len(model.decision) + 1) >> 1  # 0 and then each single bit
+        rows = np.unique((model.feasible[:, np.newaxis] ^ flips).ravel()).tolist()
+        add_constraints = model.add_elimination_constraints
+        violated_constraints = model.violated_elimination_constraints
+    else:
+        flips = 1 << np.arange(len(model.variables) + 1) >> 1
+        rows = ((model.feasible * num_aux_configs + aux)[:, np.newaxis] ^ flips).ravel()
+        rows = np.unique(rows).tolist()
+        add_constraints = model.add_energy_constraints
+        violated_constraints = model.violated_energy_constraints
+    add_constraints(rows)
+
+    # the rows we have added, so that we stop if the solver's tolerance lets them be violated
+    added = set(rows)
+
+    values = None
+    while True:
+        try:
+            time_limit = _remaining(deadline)
+        except pm.FactoryException:
+            gap = None if values is None else model.classical_gap(values, tolerance)
+            if gap is None:
+                raise
+            values[model.gap] = gap
+            return values, False
+
+        values = model.solve(time_limit)
+
+        rows = [row for row in violated_constraints(values, tolerance) if row not in added]
+        if not rows:
+            return values, model.backend.optimal
+
+        add_constraints(rows)
+        added.update(rows)
+
+
+def _remaining(deadline):
+    """The time left until deadline, or None if there is none."""
+    if deadline is None:
+        return None
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        raise pm.FactoryException("The time budget ran out before a model was found")
+    return remaining
+
+
+class _Model(object):
+    """The mixed-integer program solved by _generate_ising.
+
+    The columns are the linear biases, the quadratic biases, the offset, the gap and then
+    the a*(x) variables of each feasible configuration. The constraints are added
+    separately, either all of them or only some, see _solve_with_row_generation.
+
+    The configurations of the variables, decision variables first, are identified by their
+    index in itertools.product((-1, 1), repeat=len(variables)), so the decision configuration
+    of configuration i has index i >> len(auxiliary).
+
+    Attributes:
+        model (MPModelProto): The program.
+        constraints (list): The blocks of constraints added to model, as the arguments of
+            _add_constraints, see constraint_matrix.
+        a_star (dict): The columns of the a*(x) variables of each feasible configuration.
+        gauge_variables (set): The auxiliary variables whose spin can be flipped.
+        twins (list[list]): The classes of interchangeable auxiliary variables.
+        elimination_order (list): The order in which the auxiliary variables are minimized
+            over, and elimination_width its width, see :mod:`penaltymodel.mip.elimination`.
+        feasible (:obj:`numpy.ndarray`): The index of each configuration in table.
 
-    # Let x, a be the decision, auxiliary variables respectively
-    # Let E(x, a) be the energy of x and a
-    # Let F be the feasible configurations of x
-    # Let g be the classical gap
-    # Let a*(x) be argmin_a E(x, a) - the config of aux variables that minimizes the energy with x fixed
+    """
+    def __init__(self, graph, table, decision, min_classical_gap, linear_energy_ranges,
+                 quadratic_energy_ranges, backend=None):
+        self.backend = backend if backend is not None else get_backend('cbc')
 
-    # We want:
-    #   E(x, a) >= target_energy  forall x in F, forall a
-    #   E(x, a) - g >= highest_target_energy  forall x not in F, forall a
-    highest_target_energy = max(table.values()) if isinstance(table, dict) else 0
+        self.table = table = pm.as_feasible_configurations(table, len(decision), dimod.SPIN)
+        self.decision = decision
+        self.auxiliary = auxiliary = [v for v in graph if v not in decision]
 
-    for config in itertools.product((-1, 1), repeat=len(variables)):
-        spins = dict(zip(variables, config))
+        self.gauge_variables = aux_gauge_variables(graph, decision, linear_energy_ranges,
+                                                   quadratic_energy_ranges)
+        self.twins = aux_twins(graph, decision, linear_energy_ranges, quadratic_energy_ranges)
 
-        decision_config = tuple(spins[v] for v in decision)
+        self.elimination_order, self.elimination_width = elimination_order(graph, auxiliary)
+        self.variables = decision + auxiliary
 
-        target_energy = table.get(decision_config, highest_target_energy)
+        self.nodes = nodes = list(graph.nodes)
+        self.edges = edges = list(graph.edges)
 
-        # the E(x, a) term
-        coefficients = {bias: spins[v] for v, bias in h.items()}
-        coefficients.update({bias: spins[u] * spins[v] for (u, v), bias in J.items()})
-        coefficients[offset] = 1
+        self.model = model = linear_solver_pb2.MPModelProto()
+        self.constraints = []
 
-        if decision_config not in table:
-            # we want energy greater than gap for decision configs not in feasible
-            coefficients[gap] = -1
+        # the bias ranges, keyed by node and by edge
+        self.lower_bounds = lower_bounds = {}
+        self.upper_bounds = upper_bounds = {}
 
-        const = solver.Constraint(target_energy, solver.infinity())
-        for var, coef in coefficients.items():
-            const.SetCoefficient(var, coef)
+        for v in nodes:
+            low, high = linear_energy_ranges[v]
+            model.variable.add(lower_bound=low, upper_bound=high, name='h_%s' % v)
+            lower_bounds[v], upper_bounds[v] = low, high
 
-    if not auxiliary:
-        # We have no auxiliary variables. We want:
-        #   E(x) <= target_energy forall x in F
-        for decision_config, target_energy in table.items():
-            spins = dict(zip(decision, decision_config))
+        for u, v in edges:
+            if (u, v) in quadratic_energy_ranges:
+                low, high = quadratic_energy_ranges[(u, v)]
+            else:
+                low, high = quadratic_energy_ranges[(v, u)]
+            model.variable.add(lower_bound=low, upper_bound=high, name='J_%s,%s' % (u, v))
+            lower_bounds[(u, v)], upper_bounds[(u, v)] = low, high
 
-            # the E(x, a) term
-            coefficients = {bias: spins[v] for v, bias in h.items()}
-            coefficients.update({bias: spins[u] * spins[v] for (u, v), bias in J.items()})
-            coefficients[offset] = 1
+        # the gap is at most the range of the energy. The bound is implied when all of the
+        # constraints are present, but keeps the program bounded when only some are
+        max_gap = 2 * sum(max(abs(variable.lower_bound), abs(variable.upper_bound))
+                          for variable in model.variable)
 
-            const = solver.Constraint(-solver.infinity(), target_energy)
-            for var, coef in coefficients.items():
-                const.SetCoefficient(var, coef)
+        self.offset = len(nodes) + len(edges)
+        model.variable.add(lower_bound=-np.inf, upper_bound=np.inf, name='offset')
 
-    else:
-        # We have auxiliary variables. So that each feasible config has at least one ground we want:
-        #   E(x, a) - 100*|| a - a*(x) || <= target_energy  forall x in F, forall a
+        self.gap = self.offset + 1
+        model.variable.add(lower_bound=min_classical_gap, upper_bound=max_gap,
+                           name='classical_gap')
 
         # we need a*(x) forall x in F
-        a_star = {config: {v: solver.IntVar(0, 1, 'a*(%s)_%s' % (config, v)) for v in auxiliary} for config in table}
+        self.a_star = a_star = {}
+        if auxiliary:
+            for config in table:
+                a_star[config] = np.arange(len(model.variable),
+                                           len(model.variable) + len(auxiliary))
+                for v in auxiliary:
+                    model.variable.add(lower_bound=0, upper_bound=1, is_integer=True,
+                                       name='a*(%s)_%s' % (config, v))
+
+        if auxiliary or len(table) != 2**len(decision):
+            model.variable[self.gap].objective_coefficient = 1
+            model.maximize = True
+
+        # Let x, a be the decision, auxiliary variables respectively
+        # Let E(x, a) be the energy of x and a
+        # Let F be the feasible configurations of x
+        # Let g be the classical gap
+        # Let a*(x) be argmin_a E(x, a) - the config of aux variables that minimizes the energy with x fixed
+
+        # We want:
+        #   E(x, a) >= target_energy  forall x in F, forall a
+        #   E(x, a) - g >= highest_target_energy  forall x not in F, forall a
+        highest_target_energy = table.energies.max() if len(table) else 0
+
+        self.feasible = feasible = table.masks.astype(np.int64)
+        self.target_energies = np.full(2**len(decision), highest_target_energy, dtype=float)
+        self.target_energies[feasible] = table.energies
+        self.infeasible = np.ones(2**len(decision), dtype=bool)
+        self.infeasible[feasible] = False
+
+    def add_energy_constraints(self, indices=None):
+        """Add E(x, a) >= target_energy or E(x, a) - g >= highest_target_energy for the
+        configurations with the given indices, or for all of them."""
+        spins = _spin_configurations(len(self.variables), indices)
+        if indices is None:
+            indices = np.arange(len(spins))
+        decision_index = np.asarray(indices, dtype=np.int64) >> len(self.auxiliary)
+
+        energy = _energy_coefficients(spins, self.variables, self.nodes, self.edges)
+
+        # we want energy greater than gap for decision configs not in feasible
+        gap_coefficients = -self.infeasible[decision_index].astype(float)
+
+        self._add_constraints(np.arange(self.gap + 1),
+                              np.hstack((energy, gap_coefficients[:, np.newaxis])),
+                              self.target_energies[decision_index],
+                              np.inf)
+
+    def add_ground_constraints(self, config):
+        """Add the constraints that make a*(x) a ground state of the feasible configuration x."""
+        auxiliary = self.auxiliary
+
+        if not auxiliary:
+            # We have no auxiliary variables. We want:
+            #   E(x) <= target_energy forall x in F
+            spins = np.array([config], dtype=np.int8)
+            self._add_constraints(np.arange(self.gap),
+                                  _energy_coefficients(spins, self.variables,
+                                                       self.nodes, self.edges),
+                                  -np.inf,
+                                  self.table[config])
+            return
 
-        for decision_config, target_energy in table.items():
+        # We have auxiliary variables. So that each feasible config has at least one ground we want:
+        #   E(x, a) - sum_v M_v(x, a) * |a_v - a*(x)_v| <= target_energy  forall x in F, forall a
+        # where M_v(x, a) bounds how much flipping v changes E(x, a), see ground_penalties
+        aux_spins = _spin_configurations(len(auxiliary))
+        spins = np.hstack((np.tile(np.array(config, dtype=np.int8), (len(aux_spins), 1)),
+                           aux_spins))
+        big_m = self.ground_penalties(spins)
+
+        # We don't have absolute value, so we order the subtraction according to a:
+        #   a*(x)_v - a_v if a_v == -1
+        #   a_v - a*(x)_v if a_v == +1
+        penalty = big_m * aux_spins
+        penalty_bound = (big_m * (aux_spins > 0)).sum(axis=1)
+
+        self._add_constraints(np.hstack((np.arange(self.gap), self.a_star[config])),
+                              np.hstack((_energy_coefficients(spins, self.variables,
+                                                              self.nodes, self.edges),
+                                         penalty)),
+                              -np.inf,
+                              self.table[config] + penalty_bound)
+
+    def add_product_ground_constraints(self, config):
+        """Add the constraints that make a*(x) a ground state of the feasible configuration x,
+        with E(x, a*(x)) <= target_energy written out as a linear constraint.
+
+        This takes new continuous variables and a few constraints for each auxiliary variable
+        and each edge touching one, rather than a constraint for each of the 2**len(auxiliary)
+        configurations as in add_ground_constraints. The energy constraints of x then make
+        a*(x) a ground state.
+
+        E(x, a*(x)) has products of biases and of the spins of a*(x). Writing s_v = 2*a_v - 1
+        for the binary a_v of a*(x), and w_uv for a_u xor a_v,
+            h_v * s_v = 2 * h_v * a_v - h_v
+            J_uv * x_u * s_v = x_u * (2 * J_uv * a_v - J_uv)
+            J_uv * s_u * s_v = J_uv - 2 * J_uv * w_uv
+        so with a variable for each product of a bias and a binary variable the energy is
+        linear. For a bias b in [low, high] and a binary y, p = b * y exactly when
+            low * y <= p <= high * y
+            b - high * (1 - y) <= p <= b - low * (1 - y)
+        and w_uv is a_u xor a_v exactly when
+            a_u - a_v <= w_uv <= a_u + a_v
+            a_v - a_u <= w_uv <= 2 - a_u - a_v
+
+        """
+        if not self.auxiliary:
+            self.add_ground_constraints(config)
+            return
+
+        model = self.model
+        spin = dict(zip(self.decision, config))
+        a_star = dict(zip(self.auxiliary, self.a_star[config]))
+        bias_column = dict(zip(self.nodes, range(len(self.nodes))))
+        bias_column.update(zip(self.edges, range(len(self.nodes), self.offset)))
+
+        def product(bias, y):
+            # a new variable p = bias * y
+            low, high = self.lower_bounds[bias], self.upper_bounds[bias]
+            p = len(model.variable)
+            model.variable.add(lower_bound=min(low, 0), upper_bound=max(high, 0),
+                               name='p(%s)_%s' % (config, len(model.variable)))
+            self._add_constraints([p, y, bias_column[bias]],
+                                  [[1, -low, 0], [1, -high, 0],
+                                   [1, -high, -1], [1, -low, -1]],
+                                  [0, -np.inf, -high, -np.inf],
+                                  [np.inf, 0, np.inf, -low])
+            return p
+
+        # the coefficients of E(x, a*(x)), keyed by column
+        energy = {self.offset: 1.}
+
+        def add(column, coefficient):
+            energy[column] = energy.get(column, 0.) + coefficient
+
+        for v in self.nodes:
+            if v in spin:
+                add(bias_column[v], spin[v])
+            else:
+                add(bias_column[v], -1)
+                add(product(v, a_star[v]), 2)
+
+        for u, v in self.edges:
+            if u in spin and v in spin:
+                add(bias_column[(u, v)], spin[u] * spin[v])
+            elif u in spin or v in spin:
+                x, a = (spin[u], a_star[v]) if u in spin else (spin[v], a_star[u])
+                add(bias_column[(u, v)], -x)
+                add(product((u, v), a), 2 * x)
+            else:
+                w = len(model.variable)
+                model.variable.add(lower_bound=0, upper_bound=1,
+                                   name='w(%s)_%s' % (config, len(model.variable)))
+                self._add_constraints([w, a_star[u], a_star[v]],
+                                      [[1, -1, 1], [1, 1, -1], [1, -1, -1], [1, 1, 1]],
+                                      [0, 0, -np.inf, -np.inf],
+                                      [np.inf, np.inf, 0, 2])
+                add(bias_column[(u, v)], 1)
+                add(product((u, v), w), -2)
+
+        columns = sorted(energy)
+        self._add_constraints(columns, [[energy[column] for column in columns]],
+                              -np.inf, self.table[config])
+
+    def ground_penalties(self, spins):
+        """The big-M coefficient of each auxiliary variable in the ground constraints of the
+        given configurations.
+
+        E(x, a*(x)) <= target_energy, so E(x, a) - target_energy is at most the energy
+        difference between a and a*(x). Flipping the auxiliary variables in a set S changes the
+        energy by at most the sum, over v in S, of the largest change the bias ranges allow in
+        the biases touching v: 2*h_v*a_v for the linear bias, and 2*J_uv*a_v*s_u for each
+        neighbour u, or 0 if u is flipped as well. That sum is a valid M for every a*(x), and
+        a much tighter one than a constant.
+
+        Args:
+            spins (:obj:`numpy.ndarray`): The configurations, one row each, ordered by
+                variables.
+
+        Returns:
+            :obj:`numpy.ndarray`: An array with a row for each configuration and a column for
+            each auxiliary variable.
+
+        """
+        column = {v: idx for idx, v in enumerate(self.variables)}
+        spins = np.asarray(spins, dtype=float)
+        aux_columns = {v: idx for idx, v in enumerate(self.auxiliary)}
+
+        def largest(low, high, sign):
+            # the largest bias * sign, for a bias in [low, high]
+            return np.where(sign > 0, high, -low)
+
+        big_m = np.zeros((len(spins), len(self.auxiliary)))
+        for v, idx in aux_columns.items():
+            big_m[:, idx] = 2 * largest(self.lower_bounds[v], self.upper_bounds[v],
+                                        spins[:, column[v]])
+
+        for u, v in self.edges:
+            low, high = self.lower_bounds[(u, v)], self.upper_bounds[(u, v)]
+            sign = spins[:, column[u]] * spins[:, column[v]]
+            change = 2 * np.maximum(largest(low, high, sign), 0)
+            if u in aux_columns:
+                big_m[:, aux_columns[u]] += change
+            if v in aux_columns:
+                big_m[:, aux_columns[v]] += change
+
+        return np.maximum(big_m, 0)
+
+    def break_symmetry(self):
+        """Add the constraints that break the symmetry of the auxiliary variables.
+
+        Without loss of generality the auxiliary variables that can be flipped are spin-up in
+        a*(x) of the first feasible configuration. Within each class of twins, the spin-up
+        variables come first in a*(x) of the first feasible configuration if the twins were
+        not fixed there, or of the second otherwise. See :mod:`penaltymodel.mip.symmetry`.
+
+        Returns:
+            int/None: The index of the configuration of the auxiliary variables with the
+            variables that were fixed spin-up and the rest spin-down, or None if there are no
+            auxiliary variables.
+
+        """
+        if not self.auxiliary:
+            return None
+
+        a_star = [self.a_star[config] for config in self.table]
+
+        gauge = [idx for idx, v in enumerate(self.auxiliary) if v in self.gauge_variables]
+        if gauge:
+            self._add_constraints(a_star[0][gauge],
+                                  np.identity(len(gauge)),
+                                  1, 1)  # equality constraint
+
+        index = {v: idx for idx, v in enumerate(self.auxiliary)}
+        for twins in self.twins:
+            if twins[0] not in self.gauge_variables:
+                columns = a_star[0]
+            elif len(a_star) > 1:
+                columns = a_star[1]
+            else:
+                continue
+
+            # a*(x)_u >= a*(x)_v for consecutive twins u, v
+            self._add_constraints(columns[[index[v] for v in twins]],
+                                  np.eye(len(twins) - 1, len(twins)) -
+                                  np.eye(len(twins) - 1, len(twins), 1),
+                                  0, np.inf)
+
+        return _configuration_index([int(v in self.gauge_variables) for v in self.auxiliary])
+
+    def _add_constraints(self, columns, coefficients, lower_bounds, upper_bounds):
+        coefficients = np.asarray(coefficients, dtype=float)
+        lower_bounds = np.broadcast_to(np.asarray(lower_bounds, dtype=float), len(coefficients))
+        upper_bounds = np.broadcast_to(np.asarray(upper_bounds, dtype=float), len(coefficients))
+
+        _add_constraints(self.model, columns, coefficients, lower_bounds, upper_bounds)
+        self.constraints.append((np.asarray(columns), coefficients, lower_bounds, upper_bounds))
+
+    def constraint_matrix(self):
+        """The constraints added so far, as lower_bounds <= matrix.dot(x) <= upper_bounds.
+
+        Returns:
+            tuple: The dense matrix and the lower and upper bounds.
+
+        """
+        num_columns = len(self.model.variable)
+
+        blocks = []
+        for columns, coefficients, _, _ in self.constraints:
+            block = np.zeros((len(coefficients), num_columns))
+            block[:, columns] = coefficients
+            blocks.append(block)
+
+        if not blocks:
+            return np.zeros((0, num_columns)), np.zeros(0), np.zeros(0)
+
+        return (np.vstack(blocks),
+                np.concatenate([lower for _, _, lower, _ in self.constraints]),
+                np.concatenate([upper for _, _, _, upper in self.constraints]))
+
+    def solve(self, time_limit=None):
+        """Solve the program with the constraints added so far, see :meth:`.Backend.solve`.
+
+        Returns:
+            list: The values of the variables.
+
+        """
+        return self.backend.solve(self, time_limit)
+
+    def energies(self, values, indices):
+        """The energies of the configurations with the given indices for the biases in values."""
+        column = {v: idx for idx, v in enumerate(self.variables)}
+
+        linear = np.zeros(len(self.variables))
+        linear[[column[v] for v in self.nodes]] = values[:len(self.nodes)]
+
+        quadratic = np.zeros((len(self.variables), len(self.variables)))
+        for (u, v), bias in zip(self.edges, values[len(self.nodes):self.offset]):
+            quadratic[column[u], column[v]] += bias
+
+        spins = _spin_configurations(len(self.variables), indices).astype(float)
+        return spins.dot(linear) + (spins.dot(quadratic) * spins).sum(axis=1) + values[self.offset]
+
+    def ground_energies(self, values):
+        """The lowest energy of each decision configuration for the biases in values."""
+        linear = dict(zip(self.nodes, values))
+        quadratic = dict(zip(self.edges, values[len(self.nodes):self.offset]))
+
+        # keep the tables built by the elimination within 2**16 entries
+        chunk_size = max((1 << 16) >> self.elimination_width, 1)
+
+        energies = np.empty(2**len(self.decision))
+        for start in range(0, len(energies), chunk_size):
+            decision_index = np.arange(start, min(start + chunk_size, len(energies)))
+            energies[decision_index], _ = aux_ground_states(
+                linear, quadratic, self.decision, self.auxiliary,
+                _spin_configurations(len(self.decision), decision_index),
+                self.elimination_order)
+
+        return energies + values[self.offset]
+
+    def classical_gap(self, values, tolerance=1e-6):
+        """The classical gap of the model given by the biases in values.
+
+        Returns:
+            float/None: The gap, or None if the feasible configurations do not have their
+            target energies as ground energies, or the gap is below the minimum.
+
+        """
+        energies = self.ground_energies(values) - self.target_energies
+
+        if np.any(np.abs(energies[~self.infeasible]) > tolerance):
+            return None
+
+        if not self.infeasible.any():
+            return values[self.gap]
+
+        gap = energies[self.infeasible].min()
+        if gap < self.model.variable[self.gap].lower_bound - tolerance:
+            return None
+        return gap
+
+    def add_elimination_constraints(self, indices):
+        """Add min_a E(x, a) >= target_energy or min_a E(x, a) - g >= highest_target_energy
+        for the decision configurations with the given indices.
+
+        The minimum is written as the variable elimination of
+        :mod:`penaltymodel.mip.elimination`, with a new variable m(r) for each configuration r
+        of the variables in the table left when eliminating v, constrained by
+            m(r) <= sum of the tables touching v, at (s_v, r), for s_v in (-1, +1)
+        and one constraint that the constant terms and the tables left after eliminating all
+        of the auxiliary variables are at least the target energy. The tables are linear in
+        the biases and the earlier m, and the m can always be raised to the minimum, so the
+        constraints hold exactly when the minimum is at least the target. There are at most
+        2**width constraints for each auxiliary variable, rather than 2**len(auxiliary).
+
+        """
+        model = self.model
+        auxiliary = self.auxiliary
+        num_columns = self.gap + 1
+
+        bias_column = dict(zip(self.nodes, range(len(self.nodes))))
+        bias_column.update(zip(self.edges, range(len(self.nodes), self.offset)))
+
+        for index, config in zip(indices, _spin_configurations(len(self.decision), indices)):
+            spin = dict(zip(self.decision, config))
+
+            # the tables are arrays over the configurations of their scope and then the
+            # columns of the biases, offset and gap, with a list of arrays of the columns of
+            # the m variables they also add
+            constant = np.zeros(num_columns)
+            constant[self.offset] = 1
+            constant[self.gap] = -float(self.infeasible[index])
+
+            fields = {v: np.zeros(num_columns) for v in auxiliary}
+            for v in self.nodes:
+                if v in spin:
+                    constant[bias_column[v]] += spin[v]
+                else:
+                    fields[v][bias_column[v]] += 1
+
+            factors = []
+            for u, v in self.edges:
+                column = bias_column[(u, v)]
+                if u in spin and v in spin:
+                    constant[column] += spin[u] * spin[v]
+                elif u in spin:
+                    fields[v][column] += spin[u]
+                elif v in spin:
+                    fields[u][column] += spin[v]
+                else:
+                    table = np.zeros((2, 2, num_columns))
+                    table[:, :, column] = [[1, -1], [-1, 1]]
+                    factors.append(((u, v), table, []))
+
+            for v in auxiliary:
+                factors.append(((v,), np.outer([-1, 1], fields[v]), []))
+
+            for v in self.elimination_order:
+                touching = [factor for factor in factors if v in factor[0]]
+                factors = [factor for factor in factors if v not in factor[0]]
+
+                rest = sorted(set(u for scope, _, _ in touching for u in scope) - {v},
+                              key=auxiliary.index)
+                scope = [v] + rest
+
+                table = sum(_align(s, t, scope) for s, t, _ in touching)
+                messages = [_align(s, m, scope) for s, _, ms in touching for m in ms]
+
+                first = len(model.variable)
+                for _ in range(2**len(rest)):
+                    model.variable.add(lower_bound=-np.inf, upper_bound=np.inf,
+                                       name='m(%s)_%s' % (index, len(model.variable)))
+                message = np.arange(first, len(model.variable)).reshape((2,) * len(rest))
+
+                # m(r) - the tables at (s_v, r) <= 0
+                num_rows = 2**len(scope)
+                rows = np.arange(num_rows)
+                columns = np.concatenate([np.arange(num_columns),
+                                          np.arange(first, len(model.variable))] +
+                                         [m.ravel() for m in messages])
+                columns = np.unique(columns)
+                position = dict(zip(columns, range(len(columns))))
+
+                coefficients = np.zeros((num_rows, len(columns)))
+                coefficients[:, :num_columns] = -table.reshape(num_rows, num_columns)
+                for m in messages:
+                    np.subtract.at(coefficients,
+                                   (rows, [position[c] for c in m.ravel()]), 1)
+                own = np.broadcast_to(message, (2,) + message.shape).ravel()
+                coefficients[rows, [position[c] for c in own]] += 1
+
+                self._add_constraints(columns, coefficients, -np.inf, 0)
+
+                factors.append((tuple(rest), np.zeros((2,) * len(rest) + (num_columns,)),
+                                [message]))
+
+            # the constant terms and the tables of the m left without any variables
+            coefficients = {column: c for column, c in enumerate(constant) if c}
+            for _, table, ms in factors:
+                for column, c in enumerate(table):
+                    if c:
+                        coefficients[column] = coefficients.get(column, 0) + c
+                for m in ms:
+                    coefficients[int(m)] = coefficients.get(int(m), 0) + 1
+
+            columns = sorted(coefficients)
+            self._add_constraints(columns, [[coefficients[column] for column in columns]],
+                                  self.target_energies[index], np.inf)
+
+    def violated_elimination_constraints(self, values, tolerance=1e-6, max_rows=64):
+        """The indices of the at most max_rows decision configurations whose lowest energy
+        violates its constraint the most for the solution in values, see
+        add_elimination_constraints."""
+        slack = (self.ground_energies(values) - self.target_energies
+                 - values[self.gap] * self.infeasible)
+
+        violated = np.flatnonzero(slack < -tolerance)
+        if len(violated) > max_rows:
+            violated = violated[np.argpartition(slack[violated], max_rows)[:max_rows]]
+        return violated.tolist()
+
+    def violated_energy_constraints(self, values, tolerance=1e-6, max_rows=256,
+                                    chunk_size=1 << 16):
+        """The indices of the at most max_rows configurations whose energy constraints are
+        violated the most by the solution in values.
+
+        The configurations are evaluated chunk_size at a time, so memory does not grow with
+        the number of configurations. With auxiliary variables, only the configuration of
+        the auxiliary variables with the lowest energy can be the most violated for each
+        decision configuration, so those are found by variable elimination instead, see
+        :mod:`penaltymodel.mip.elimination`.
+
+        """
+        if self.auxiliary:
+            return self._violated_aux_energy_constraints(values, tolerance, max_rows,
+                                                         chunk_size)
+
+        num_configs = 2**len(self.variables)
+
+        slack = np.empty(0)
+        rows = np.empty(0, dtype=np.int64)
+        for start in range(0, num_configs, chunk_size):
+            indices = np.arange(start, min(start + chunk_size, num_configs))
+            decision_index = indices >> len(self.auxiliary)
+
+            chunk_slack = (self.energies(values, indices)
+                           - self.target_energies[decision_index]
+                           - values[self.gap] * self.infeasible[decision_index])
+            violated = chunk_slack < -tolerance
+
+            slack = np.concatenate((slack, chunk_slack[violated]))
+            rows = np.concatenate((rows, indices[violated]))
+            if len(rows) > max_rows:
+                most = np.argpartition(slack, max_rows)[:max_rows]
+                slack, rows = slack[most], rows[most]
+
+        return rows.tolist()
+
+    def _violated_aux_energy_constraints(self, values, tolerance, max_rows, chunk_size):
+        linear = dict(zip(self.nodes, values))
+        quadratic = dict(zip(self.edges, values[len(self.nodes):self.offset]))
+
+        # keep the tables built by the elimination within chunk_size entries
+        scale = max(self.elimination_width, len(self.auxiliary).bit_length())
+        chunk_size = max(chunk_size >> scale, 1)
+
+        num_configs = 2**len(self.decision)
+
+        slack = np.empty(0)
+        rows = np.empty(0, dtype=np.int64)
+        for start in range(0, num_configs, chunk_size):
+            decision_index = np.arange(start, min(start + chunk_size, num_configs))
+
+            energies, aux_spins = aux_ground_states(
+                linear, quadratic, self.decision, self.auxiliary,
+                _spin_configurations(len(self.decision), decision_index),
+                self.elimination_order)
+
+            # the ground states and their neighbours, which are likely to be violated as well
+            shifts = np.arange(len(self.auxiliary) - 1, -1, -1)
+            ground = ((decision_index << len(self.auxiliary))
+                      | ((aux_spins > 0) << shifts).sum(axis=1))
+            indices = (ground[:, np.newaxis] ^ np.concatenate(([0], 1 << shifts))).ravel()
+
+            chunk_slack = (self.energies(values, indices)
+                           - self.target_energies[indices >> len(self.auxiliary)]
+                           - values[self.gap] * self.infeasible[indices >> len(self.auxiliary)])
+            violated = chunk_slack < -tolerance
+
+            slack = np.concatenate((slack, chunk_slack[violated]))
+            rows = np.concatenate((rows, indices[violated]))
+            if len(rows) > max_rows:
+                most = np.argpartition(slack, max_rows)[:max_rows]
+                slack, rows = slack[most], rows[most]
+
+        return rows.tolist()
+
+
+def _align(scope, table, target):
+    """Arrange the axes of a table over the variables in scope, with possibly more axes
+    after them, to broadcast against a table over the variables in target."""
+    axes = sorted(range(len(scope)), key=lambda idx: target.index(scope[idx]))
+    table = np.transpose(table, axes + list(range(len(scope), table.ndim)))
+    shape = [2 if v in scope else 1 for v in target] + list(table.shape[len(scope):])
+    return np.broadcast_to(table.reshape(shape), (2,) * len(target) + table.shape[len(scope):])
+
+
+def _spin_configurations(num_variables, indices=None):
+    """The spin configurations of num_variables variables with the given indices in
+    itertools.product((-1, 1), repeat=num_variables) as the rows of an array, or all of them.
+    """
+    if indices is None:
+        indices = np.arange(2**num_variables)
+    shifts = np.arange(num_variables - 1, -1, -1)
+    bits = (np.asarray(indices, dtype=np.int64)[:, np.newaxis] >> shifts) & 1
+    return 2 * bits.astype(np.int8) - 1
 
-            for aux_config in itertools.product((-1, 1), repeat=len(variables) - len(decision)):
-                spins = dict(zip(variables, decision_config+aux_config))
 
-                ub = target_energy
+def _configuration_index(config):
+    """The index of config in itertools.product((-1, 1), repeat=len(config)), where config
+    may also be given as bits."""
+    index = 0
+    for spin in config:
+        index = (index << 1) | (spin > 0)
+    return index
 
-                # the E(x, a) term
-                coefficients = {bias: spins[v] for v, bias in h.items()}
-                coefficients.update({bias: spins[u] * spins[v] for (u, v), bias in J.items()})
-                coefficients[offset] = 1
 
-                # # the -100*|| a - a*(x) || term
-                for v in auxiliary:
-                    # we don't have absolute value, so we check what a is and order the subtraction accordingly
-                    if spins[v] == -1:
-                        # a*(x)_v - a_v
-                        coefficients[a_star[decision_config][v]] = -200
-                    else:
-                        # a_v - a*(x)_v
-                        assert spins[v] == 1  # sanity check
-                        coefficients[a_star[decision_config][v]] = +200
-                        ub += 200
-
-                const = solver.Constraint(-solver.infinity(), ub)
-                for var, coef in coefficients.items():
-                    const.SetCoefficient(var, coef)
-
-        # without loss of generality we can fix the auxiliary variables associated with
-        # one of the feasible configurations. Do so randomly.
-        for var in next(iter(a_star.values())).values():
-            val = random.randint(0, 1)
-            const = solver.Constraint(val, val)  # equality constraint
-            const.SetCoefficient(var, 1)
-
-    if auxiliary or len(table) != 2**len(decision):
-        objective = solver.Objective()
-        objective.SetCoefficient(gap, 1)
-        objective.SetMaximization()
-        _inf_gap = False
-    else:
-        _inf_gap = True
+def _energy_coefficients(spins, variables, nodes, edges):
+    """The coefficients of the linear biases, quadratic biases and offset in the
+    energy of each configuration in spins."""
+    column = {v: idx for idx, v in enumerate(variables)}
 
-    # run solver
-    result_status = solver.Solve()
+    linear = spins[:, [column[v] for v in nodes]]
+    quadratic = (spins[:, [column[u] for u, _ in edges]] *
+                 spins[:, [column[v] for _, v in edges]])
 
-    if result_status not in [solver.OPTIMAL, solver.FEASIBLE]:
-        raise pm.ImpossiblePenaltyModel("No solution was found")
+    return np.hstack((linear, quadratic, np.ones((len(spins), 1), dtype=np.int8))).astype(float)
 
-    # read everything back into floats
-    h = {v: bias.solution_value() for v, bias in h.items()}
-    J = {(u, v): bias.solution_value() for (u, v), bias in J.items()}
-    offset = offset.solution_value()
-    gap = float('inf') if _inf_gap else gap.solution_value()
 
-    if not gap:
-        raise pm.ImpossiblePenaltyModel("No positive gap can be found for the given model")
+def _add_constraints(model, columns, coefficients, lower_bounds, upper_bounds):
+    """Add the constraints lower_bounds <= coefficients.dot(x[columns]) <= upper_bounds to
+    the model, one for each row of coefficients. The bounds are broadcast.
 
-    if auxiliary:
-        aux_configs = {config: {v: val.solution_value()*2 - 1 for v, val in a_star[config].items()}
-                       for config in table}
-    else:
-        aux_configs = {config: dict() for config in table}
+    Filling the repeated fields of the constraints one row at a time converts every
+    coefficient to a python object, so instead the constraints are written in the protobuf
+    wire format with numpy and merged into the model in one go.
 
-    return h, J, offset, gap, aux_configs
+    """
+    lower_bounds = np.broadcast_to(np.asarray(lower_bounds, dtype=float), len(coefficients))
+    upper_bounds = np.broadcast_to(np.asarray(upper_bounds, dtype=float), len(coefficients))
+
+    # the sparse representation of coefficients
+    nonzero = coefficients != 0
+    indices = np.broadcast_to(np.asarray(columns, dtype=np.int64), coefficients.shape)[nonzero]
+    data = coefficients[nonzero]
+    indptr = np.concatenate(([0], np.cumsum(nonzero.sum(axis=1))))
+
+    # the var_index fields are packed int32 varints, of seven bits per byte, so that a
+    # non-negative index takes at most five bytes
+    if len(indices) and (indices.min() < 0 or indices.max() >= 1 << 31):
+        raise ValueError("column indices must be non-negative int32, got one in [{}, {}]"
+                         .format(indices.min(), indices.max()))
+    shifts = 7 * np.arange(5)
+    lengths = 1 + (indices[:, np.newaxis] >= 1 << shifts[1:]).sum(axis=1)
+    position = np.arange(5)
+    varints = (((indices[:, np.newaxis] >> shifts) & 0x7f) |
+               ((position < lengths[:, np.newaxis] - 1) << 7)).astype(np.uint8)
+    index_bytes = varints[position < lengths[:, np.newaxis]].tobytes()
+    index_ptr = np.concatenate(([0], np.cumsum(lengths)))[indptr].tolist()
+
+    # the coefficient fields are packed little-endian doubles
+    data_bytes = data.astype('<f8').tobytes()
+    data_ptr = (8 * indptr).tolist()
+
+    chunks = []
+    for row, (low, high) in enumerate(zip(lower_bounds.tolist(), upper_bounds.tolist())):
+        index_start, index_stop = index_ptr[row], index_ptr[row + 1]
+        data_start, data_stop = data_ptr[row], data_ptr[row + 1]
+
+        constraint = [_LOWER_BOUND, struct.pack('<d', low), _UPPER_BOUND, struct.pack('<d', high)]
+        if data_stop > data_start:
+            constraint.extend((_VAR_INDEX, _varint(index_stop - index_start),
+                               index_bytes[index_start:index_stop],
+                               _COEFFICIENT, _varint(data_stop - data_start),
+                               data_bytes[data_start:data_stop]))
+        constraint = b''.join(constraint)
+
+        chunks.extend((_CONSTRAINT, _varint(len(constraint)), constraint))
+
+    model.MergeFromString(b''.join(chunks))
+
+
+# the protobuf tags of the fields written by _add_constraints
+_CONSTRAINT = b'\x22'  # MPModelProto.constraint, length delimited
+_LOWER_BOUND = b'\x11'  # MPConstraintProto.lower_bound, double
+_UPPER_BOUND = b'\x19'  # MPConstraintProto.upper_bound, double
+_VAR_INDEX = b'\x32'  # MPConstraintProto.var_index, packed
+_COEFFICIENT = b'\x3a'  # MPConstraintProto.coefficient, packed
+
+
+def _varint(value):
+    """Encode a non-negative integer as a protobuf varint."""
+    encoded = bytearray()
+    while value >= 0x80:
+        encoded.append((value & 0x7f) | 0x80)
+        value >>= 7
+    encoded.append(value)
+    return bytes(encoded)
@@ -14,8 +14,6 @@
 
 import dimod
 
-from six import iteritems
-
 import penaltymodel.core as pm
 
 from penaltymodel.mip.generation import generate_bqm
@@ -24,12 +22,17 @@ __all__ = ['get_penalty_model']
 
 
 @pm.penaltymodel_factory(-150)
-def get_penalty_model(specification):
+def get_penalty_model(specification, time_budget=60.):
     """Factory function for penaltymodel-mip.
 
     Args:
         specification (penaltymodel.Specification): The specification
             for the desired penalty model.
+        time_budget (float/None, optional, default=60.): Time budget in
+            seconds. Specifications are not limited in size, larger ones are
+            solved with row generation and fail when the budget runs out.
+            If None, specifications with more than 8 decision or 10 total
+            variables fail immediately. See :func:`.generate_bqm`.
 
     Returns:
         :class:`penaltymodel.PenaltyModel`: Penalty model with the given specification.
@@ -37,28 +40,35 @@ def get_penalty_model(specification):
     Raises:
         :class:`penaltymodel.ImpossiblePenaltyModel`: If the penalty cannot be built.
 
+        :class:`penaltymodel.FactoryException`: If the specification is too
+            large, or the time budget ran out.
+
     Parameters:
         priority (int): -100
 
     """
 
-    # check that the feasible_configurations are spin
-    feasible_configurations = specification.feasible_configurations
-    if specification.vartype is dimod.BINARY:
-        feasible_configurations = {tuple(2 * v - 1 for v in config): en
-                                   for config, en in iteritems(feasible_configurations)}
+    # the feasible configurations as spin-valued arrays, the masks are the same for both vartypes
+    feasible_configurations = pm.as_feasible_configurations(specification.feasible_configurations,
+                                                            len(specification.decision_variables),
+                                                            specification.vartype)
+    feasible_configurations = feasible_configurations.change_vartype(dimod.SPIN)
 
     # convert ising_quadratic_ranges to the form we expect
     ising_quadratic_ranges = specification.ising_quadratic_ranges
     quadratic_ranges = {(u, v): ising_quadratic_ranges[u][v] for u, v in specification.graph.edges}
 
+    info = {}
     try:
         bqm, gap = generate_bqm(specification.graph, feasible_configurations,
                                 specification.decision_variables,
                                 linear_energy_ranges=specification.ising_linear_ranges,
                                 quadratic_energy_ranges=quadratic_ranges,
-                                min_classical_gap=specification.min_classical_gap)
-    except ValueError:
-        raise pm.exceptions.FactoryException("Specification is for too large of a model")
-
-    return pm.PenaltyModel.from_specification(specification, bqm, gap, 0.0)
+                                min_classical_gap=specification.min_classical_gap,
+                                time_budget=time_budget, info=info)
+    except ValueError as err:
+        raise pm.exceptions.FactoryException(
+            "Specification is for too large of a model: {}".format(err))
+
+    return pm.PenaltyModel.from_specification(specification, bqm, gap, 0.0,
+                                              optimal=info['optimal'])
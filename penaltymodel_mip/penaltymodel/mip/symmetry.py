@@ -0,0 +1,107 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""Symmetries of the auxiliary variables of mip problems.
+
+The energies only depend on the auxiliary variables through their minimum, so
+any transformation of the aux variables that stays within the energy ranges
+maps models to models with the same gap.
+
+Flipping the spin of an aux variable negates its linear bias and the quadratic
+biases on its edges. If those ranges are symmetric around zero, we can assume
+that the variable is spin-up in the ground state of one feasible configuration,
+see :func:`aux_gauge_variables`.
+
+Two aux variables are twins if swapping them is an automorphism of the graph
+that preserves the energy ranges. The twins form classes within which every
+permutation is a symmetry, see :func:`aux_twins`, so we can assume that the
+spin-up twins come first in the ground state of a feasible configuration, as
+long as that does not contradict the gauge.
+
+"""
+__all__ = ['aux_gauge_variables', 'aux_twins']
+
+
+def aux_gauge_variables(graph, decision, linear_energy_ranges, quadratic_energy_ranges):
+    """Find the auxiliary variables whose spin can be flipped.
+
+    Args:
+        graph (:obj:`~networkx.Graph`): The structure of the binary quadratic model.
+        decision (list): The decision variables.
+        linear_energy_ranges (dict): The range of each linear bias, keyed by node.
+        quadratic_energy_ranges (dict): The range of each quadratic bias, keyed by edge in
+            either order.
+
+    Returns:
+        set: The auxiliary variables whose linear range, and the quadratic range of each of
+        their edges, are symmetric around zero.
+
+    """
+    def symmetric(bias_range):
+        low, high = bias_range
+        return low == -high
+
+    decision = set(decision)
+    return {v for v in graph if v not in decision and
+            symmetric(linear_energy_ranges[v]) and
+            all(symmetric(_quadratic_range(quadratic_energy_ranges, v, u)) for u in graph[v])}
+
+
+def aux_twins(graph, decision, linear_energy_ranges, quadratic_energy_ranges):
+    """Find the classes of interchangeable auxiliary variables.
+
+    Args:
+        graph (:obj:`~networkx.Graph`): The structure of the binary quadratic model.
+        decision (list): The decision variables.
+        linear_energy_ranges (dict): The range of each linear bias, keyed by node.
+        quadratic_energy_ranges (dict): The range of each quadratic bias, keyed by edge in
+            either order.
+
+    Returns:
+        list[list]: The classes with at least two variables, each in the order of `graph`.
+        Swapping any two variables in a class is a symmetry of the problem.
+
+    """
+    decision = set(decision)
+    auxiliary = [v for v in graph if v not in decision]
+
+    def swappable(u, v):
+        # swapping u and v is an automorphism preserving the ranges if they have the same
+        # linear range and the same neighbours w, other than each other, with the same
+        # quadratic ranges
+        if tuple(linear_energy_ranges[u]) != tuple(linear_energy_ranges[v]):
+            return False
+        neighbours = set(graph[u]) - {v}
+        if neighbours != set(graph[v]) - {u}:
+            return False
+        return all(tuple(_quadratic_range(quadratic_energy_ranges, u, w)) ==
+                   tuple(_quadratic_range(quadratic_energy_ranges, v, w))
+                   for w in neighbours)
+
+    # swappable is transitive, so the classes can be grown greedily
+    classes = []
+    for v in auxiliary:
+        for members in classes:
+            if swappable(members[0], v):
+                members.append(v)
+                break
+        else:
+            classes.append([v])
+
+    return [members for members in classes if len(members) > 1]
+
+
+def _quadratic_range(quadratic_energy_ranges, u, v):
+    if (u, v) in quadratic_energy_ranges:
+        return quadratic_energy_ranges[(u, v)]
+    return quadratic_energy_ranges[(v, u)]
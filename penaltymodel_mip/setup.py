@@ -13,10 +13,14 @@ else:
 
 install_requires = ['dimod>=0.6.0,<0.9.0',
                     'networkx>=2.0,<3.0',
-                    'ortools>=6.6.4659,<7.0.0',
-                    'penaltymodel>=0.16.0,<0.17.0',
+                    'numpy>=1.15.3,<2.0.0',
+                    'ortools>=8.2.8710,<10.0.0',
+                    'penaltymodel>=0.17.0,<0.18.0',
                     ]
 
+extras_require = {'highs': ['scipy>=1.10.0'],
+                  }
+
 packages = ['penaltymodel',
             'penaltymodel.mip',
             ]
@@ -26,15 +30,12 @@ classifiers = [
     'Operating System :: MacOS :: MacOS X',
     'Operating System :: Microsoft :: Windows',
     'Operating System :: POSIX :: Linux',
-    'Programming Language :: Python :: 2',
-    'Programming Language :: Python :: 2.7',
     'Programming Language :: Python :: 3',
-    'Programming Language :: Python :: 3.5',
     'Programming Language :: Python :: 3.6',
     'Programming Language :: Python :: 3.7',
     ]
 
-python_requires = '>=2.7,!=3.0.*,!=3.1.*,!=3.2.*,!=3.3.*,!=3.4.*'
+python_requires = '>=3.6'
 
 setup(
     name='penaltymodel-mip',
@@ -49,6 +50,7 @@ setup(
     classifiers=classifiers,
     python_requires=python_requires,
     install_requires=install_requires,
+    extras_require=extras_require,
     entry_points={'penaltymodel_factory': ['mip = penaltymodel.mip:get_penalty_model']},
     zip_safe=False
 )
@@ -0,0 +1,96 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+import unittest
+
+import networkx as nx
+import numpy as np
+
+from penaltymodel.mip.elimination import elimination_order, aux_ground_states
+
+
+class TestEliminationOrder(unittest.TestCase):
+    def test_path(self):
+        graph = nx.path_graph(6)
+
+        order, width = elimination_order(graph, [2, 3, 4, 5])
+
+        self.assertEqual(sorted(order), [2, 3, 4, 5])
+        self.assertEqual(width, 2)
+
+    def test_clique(self):
+        graph = nx.complete_graph(6)
+
+        order, width = elimination_order(graph, [2, 3, 4, 5])
+
+        self.assertEqual(order, [2, 3, 4, 5])
+        self.assertEqual(width, 4)
+
+    def test_no_auxiliary(self):
+        self.assertEqual(elimination_order(nx.complete_graph(3), []), ([], 0))
+
+
+class TestAuxGroundStates(unittest.TestCase):
+    def check_brute_force(self, graph, decision, seed):
+        rng = np.random.RandomState(seed)
+        auxiliary = [v for v in graph if v not in decision]
+        linear = {v: rng.uniform(-2, 2) for v in graph}
+        quadratic = {edge: rng.uniform(-1, 1) for edge in graph.edges}
+
+        decision_spins = np.array(list(itertools.product((-1, 1), repeat=len(decision))))
+        order, _ = elimination_order(graph, auxiliary)
+
+        energies, aux_spins = aux_ground_states(linear, quadratic, decision, auxiliary,
+                                                decision_spins, order)
+
+        for config, energy, ground in zip(decision_spins, energies, aux_spins):
+            def energy_of(aux_config):
+                sample = dict(zip(decision, config))
+                sample.update(zip(auxiliary, aux_config))
+                return (sum(linear[v] * sample[v] for v in graph) +
+                        sum(bias * sample[u] * sample[v] for (u, v), bias in quadratic.items()))
+
+            lowest = min(energy_of(aux_config)
+                         for aux_config in itertools.product((-1, 1), repeat=len(auxiliary)))
+
+            self.assertAlmostEqual(energy, lowest)
+            self.assertAlmostEqual(energy_of(ground), lowest)
+
+    def test_complete(self):
+        self.check_brute_force(nx.complete_graph(7), [0, 1, 2], 0)
+
+    def test_bipartite(self):
+        self.check_brute_force(nx.complete_bipartite_graph(3, 4), [0, 1, 3], 1)
+
+    def test_random(self):
+        for seed in range(5):
+            graph = nx.gnp_random_graph(9, .4, seed=seed)
+            self.check_brute_force(graph, [0, 1, 2], seed)
+
+    def test_no_auxiliary(self):
+        self.check_brute_force(nx.complete_graph(3), [0, 1, 2], 2)
+
+    def test_default_order(self):
+        graph = nx.cycle_graph(6)
+        linear = {v: .5 for v in graph}
+        quadratic = {edge: 1. for edge in graph.edges}
+
+        energies, aux_spins = aux_ground_states(linear, quadratic, [0], [1, 2, 3, 4, 5],
+                                                [[1], [-1]])
+
+        # the cycle is antiferromagnetic and even, so alternating spins are best, with the
+        # fields picking the alternation that starts at spin up
+        np.testing.assert_array_almost_equal(energies, [-6., -6.])
+        np.testing.assert_array_equal(aux_spins, [[-1, 1, -1, 1, -1], [1, -1, 1, -1, 1]])
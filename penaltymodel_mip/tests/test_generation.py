@@ -19,6 +19,9 @@ import itertools
 
 import dimod
 import networkx as nx
+import numpy as np
+
+from ortools.linear_solver import linear_solver_pb2
 
 
 import penaltymodel.core as pm
@@ -369,3 +372,358 @@ class TestGeneration(unittest.TestCase):
         bqm, gap = mip.generate_bqm(graph, configurations, nodes)
         self.check_bqm_table(bqm, gap, configurations, nodes)
         self.check_bqm_graph(bqm, graph)
+
+    def test_row_generation_AND_K5(self):
+        graph = nx.complete_graph(5)
+        configurations = {(-1, -1, -1): 0,
+                          (-1, +1, -1): 0,
+                          (+1, -1, -1): 0,
+                          (+1, +1, +1): 0}
+        decision_variables = (0, 1, 2)
+
+        bqm, gap = mip.generate_bqm(graph, configurations, decision_variables,
+                                    row_generation=True)
+
+        self.check_bqm_table(bqm, gap, configurations, decision_variables)
+        self.check_bqm_graph(bqm, graph)
+
+    def test_row_generation_ferromagnet(self):
+        """Row generation finds the same gap as the full model."""
+        graph = nx.complete_graph(8)
+        configurations = {(-1,) * 8: 0, (+1,) * 8: 0}
+        decision_variables = list(graph)
+
+        bqm, gap = mip.generate_bqm(graph, configurations, decision_variables)
+        rg_bqm, rg_gap = mip.generate_bqm(graph, configurations, decision_variables,
+                                          row_generation=True)
+
+        self.assertAlmostEqual(gap, rg_gap)
+        self.check_bqm_table(rg_bqm, rg_gap, configurations, decision_variables)
+
+    def test_row_generation_impossible(self):
+        graph = nx.path_graph(3)
+        configurations = {(-1, -1, -1): 0,
+                          (-1, +1, -1): 0,
+                          (+1, -1, -1): 0,
+                          (+1, +1, +1): 0}
+        decision_variables = (0, 1, 2)
+
+        with self.assertRaises(pm.ImpossiblePenaltyModel):
+            mip.generate_bqm(graph, configurations, decision_variables,
+                             row_generation=True)
+
+    def test_time_budget_ferromagnet(self):
+        """Past max_decision, the problem is solved within the time budget."""
+        graph = nx.complete_graph(12)
+        configurations = {(-1,) * 12: 0, (+1,) * 12: 0}
+        decision_variables = list(graph)
+
+        with self.assertRaises(ValueError):
+            mip.generate_bqm(graph, configurations, decision_variables)
+
+        bqm, gap = mip.generate_bqm(graph, configurations, decision_variables,
+                                    time_budget=60)
+
+        self.assertEqual(gap, 22)
+        self.check_bqm_table(bqm, gap, configurations, decision_variables)
+
+    def test_time_budget_auxiliary(self):
+        """Past max_variables, the auxiliary variables are minimized over exactly."""
+        graph = nx.complete_graph(2)
+        nx.add_path(graph, [1] + list(range(2, 11)))
+        configurations = {(-1, -1): 0, (+1, +1): 0}
+        decision_variables = [0, 1]
+
+        bqm, gap = mip.generate_bqm(graph, configurations, decision_variables,
+                                    time_budget=60)
+
+        # the auxiliary variables only see node 1, so they cannot help
+        self.assertEqual(gap, 2)
+        self.check_bqm_table(bqm, gap, configurations, decision_variables)
+
+    def test_time_budget_same_gap(self):
+        """The formulation used past the limits gives the same gap."""
+        graph = nx.complete_graph(5)
+        configurations = {(-1, -1, -1): 0,
+                          (-1, +1, -1): 0,
+                          (+1, -1, -1): 0,
+                          (+1, +1, +1): 0}
+        decision_variables = (0, 1, 2)
+
+        bqm, gap = mip.generate_bqm(graph, configurations, decision_variables)
+        small_bqm, small_gap = mip.generate_bqm(graph, configurations, decision_variables,
+                                                max_variables=4, time_budget=60)
+
+        self.assertAlmostEqual(gap, small_gap)
+        self.check_bqm_table(small_bqm, small_gap, configurations, decision_variables)
+
+    def test_time_budget_ran_out(self):
+        graph = nx.complete_bipartite_graph(6, 6)
+        configurations = {(-1, -1, -1): 0,
+                          (-1, +1, -1): 0,
+                          (+1, -1, -1): 0,
+                          (+1, +1, +1): 0}
+        decision_variables = (0, 1, 6)
+
+        with self.assertRaises(pm.FactoryException):
+            mip.generate_bqm(graph, configurations, decision_variables, time_budget=1e-3)
+
+    def test_info_optimal(self):
+        graph = nx.complete_graph(5)
+        configurations = {(-1, -1, -1): 0,
+                          (-1, +1, -1): 0,
+                          (+1, -1, -1): 0,
+                          (+1, +1, +1): 0}
+        decision_variables = (0, 1, 2)
+
+        for row_generation in (False, True):
+            info = {}
+            mip.generate_bqm(graph, configurations, decision_variables,
+                             row_generation=row_generation, info=info)
+            self.assertIs(info['optimal'], True)
+
+        # with a gap tolerance the solver may stop before the largest gap
+        info = {}
+        mip.generate_bqm(graph, configurations, decision_variables, gap_tolerance=.5, info=info)
+        self.assertIs(info['optimal'], False)
+
+    def test_info_optimal_time_limit(self):
+        """A solution accepted at a time limit is not optimal."""
+        graph = nx.complete_graph(5)
+        configurations = {(-1, -1, -1): 0,
+                          (-1, +1, -1): 0,
+                          (+1, -1, -1): 0,
+                          (+1, +1, +1): 0}
+        decision_variables = (0, 1, 2)
+
+        class FeasibleCBC(mip.CBC):
+            # as if every solve stopped at its time limit with the same solution
+            def solve(self, model, time_limit=None):
+                values = super(FeasibleCBC, self).solve(model, time_limit)
+                self.optimal = False
+                return values
+
+        for row_generation in (False, True):
+            info = {}
+            bqm, gap = mip.generate_bqm(graph, configurations, decision_variables,
+                                        row_generation=row_generation, backend=FeasibleCBC(),
+                                        info=info)
+            self.check_bqm_table(bqm, gap, configurations, decision_variables)
+            self.assertIs(info['optimal'], False)
+
+    def test_deterministic(self):
+        graph = nx.complete_graph(5)
+        configurations = {(-1, -1, -1): 0,
+                          (-1, +1, -1): 0,
+                          (+1, -1, -1): 0,
+                          (+1, +1, +1): 0}
+        decision_variables = (0, 1, 2)
+
+        bqm, gap, aux = mip.generate_bqm(graph, configurations, decision_variables,
+                                         return_auxiliary=True)
+        for __ in range(3):
+            self.assertEqual(mip.generate_bqm(graph, configurations, decision_variables,
+                                              return_auxiliary=True),
+                             (bqm, gap, aux))
+
+    def test_symmetry_breaking_asymmetric_ranges(self):
+        """Only the auxiliary variables with symmetric ranges are fixed."""
+        graph = nx.complete_graph(5)
+        configurations = {(-1, -1, -1): 0,
+                          (-1, +1, -1): 0,
+                          (+1, -1, -1): 0,
+                          (+1, +1, +1): 0}
+        decision_variables = (0, 1, 2)
+
+        linear_energy_ranges = {v: (-2., 2.) for v in graph}
+        linear_energy_ranges[3] = (-2., -1.)
+        linear_energy_ranges[4] = (-2., -1.)
+        quadratic_energy_ranges = {edge: (-1., 1.) for edge in graph.edges}
+
+        bqm, gap = mip.generate_bqm(graph, configurations, decision_variables,
+                                    linear_energy_ranges=linear_energy_ranges,
+                                    quadratic_energy_ranges=quadratic_energy_ranges)
+        self.check_bqm_table(bqm, gap, configurations, decision_variables)
+
+        # the largest gap, with no symmetry breaking
+        model = mip.generation._Model(graph, configurations, list(decision_variables), 2,
+                                      linear_energy_ranges, quadratic_energy_ranges)
+        model.add_energy_constraints()
+        for config in configurations:
+            model.add_ground_constraints(config)
+        self.assertAlmostEqual(model.solve()[model.gap], gap)
+
+    def test_seed(self):
+        graph = nx.complete_graph(5)
+        configurations = {(-1, -1, -1): 0,
+                          (-1, +1, -1): 0,
+                          (+1, -1, -1): 0,
+                          (+1, +1, +1): 0}
+        decision_variables = (0, 1, 2)
+
+        __, gap = mip.generate_bqm(graph, configurations, decision_variables,
+                                   backend='scip', seed=17)
+        self.assertAlmostEqual(gap, 4)
+
+
+try:
+    mip.get_backend('highs')
+except ValueError:
+    _highs = False
+else:
+    _highs = True
+
+
+class TestBackends(unittest.TestCase):
+    def setUp(self):
+        self.graph = nx.complete_graph(5)
+        self.configurations = {(-1, -1, -1): 0,
+                               (-1, +1, -1): 0,
+                               (+1, -1, -1): 0,
+                               (+1, +1, +1): 0}
+        self.decision_variables = (0, 1, 2)
+
+    def check_backend(self, **kwargs):
+        bqm, gap = mip.generate_bqm(self.graph, self.configurations, self.decision_variables)
+
+        backend_bqm, backend_gap = mip.generate_bqm(self.graph, self.configurations,
+                                                    self.decision_variables, **kwargs)
+
+        self.assertAlmostEqual(gap, backend_gap)
+
+        # the feasible configurations are ground states
+        response = dimod.ExactSolver().sample(backend_bqm)
+        ground = response.first.energy
+        for sample, energy in response.data(['sample', 'energy']):
+            config = tuple(sample[v] for v in self.decision_variables)
+            if energy < ground + backend_gap - .001:
+                self.assertIn(config, self.configurations)
+
+    def test_cbc(self):
+        self.check_backend(backend='cbc', num_threads=2, time_limit=60, gap_tolerance=0)
+
+    def test_scip(self):
+        self.check_backend(backend='scip', time_limit=60)
+
+    @unittest.skipUnless(_highs, "scipy 1.10 or later is not installed")
+    def test_highs(self):
+        self.check_backend(backend='highs', time_limit=60, gap_tolerance=0)
+
+    @unittest.skipUnless(_highs, "scipy 1.10 or later is not installed")
+    def test_highs_row_generation(self):
+        self.check_backend(backend=mip.HiGHS(), row_generation=True)
+
+    @unittest.skipUnless(_highs, "scipy 1.10 or later is not installed")
+    def test_highs_bias_ranges(self):
+        # HiGHS's solution has h[1] = -2.0000005 before it is polished
+        graph = nx.Graph([(0, 1), (0, 2), (0, 3), (1, 3), (2, 3)])
+        configurations = {(1, 1), (-1, -1), (-1, 1)}
+        spec = pm.Specification(graph, [0, 1], configurations, dimod.SPIN,
+                                min_classical_gap=.01)
+
+        bqm, gap = mip.generate_bqm(graph, configurations, [0, 1], min_classical_gap=.01,
+                                    backend='highs')
+
+        self.assertAlmostEqual(gap, 8)
+        widget = pm.PenaltyModel.from_specification(spec, bqm, gap, 0.0)
+        self.assertTrue(widget.verify().valid)
+
+    @unittest.skipUnless(_highs, "scipy 1.10 or later is not installed")
+    def test_highs_impossible(self):
+        graph = nx.path_graph(3)
+        with self.assertRaises(pm.ImpossiblePenaltyModel):
+            mip.generate_bqm(graph, self.configurations, self.decision_variables,
+                             backend='highs')
+
+    def test_unknown(self):
+        with self.assertRaises(ValueError):
+            mip.generate_bqm(self.graph, self.configurations, self.decision_variables,
+                             backend='gurobi')
+
+
+class TestAddConstraints(unittest.TestCase):
+    def test_matches_proto_fields(self):
+        # column indices whose varints take one to five bytes
+        columns = np.array([0, 5, 127, 128, 200, 16383, 16384, 300000, 2**21, 2**28, 2**31 - 1])
+        coefficients = np.array([[1., 0., -2., .5, 0., 3., -1., 200., 0., 1., -1.],
+                                 [0., 0., 0., 0., 0., 0., 0., 0., 0., 0., 0.],
+                                 [-1.5, 1., 0., 0., 7., 0., 0., -200., 2., 0., 4.]])
+        lower_bounds = [0., -float('inf'), 1.]
+        upper_bounds = float('inf')
+
+        model = linear_solver_pb2.MPModelProto()
+        mip.generation._add_constraints(model, columns, coefficients, lower_bounds, upper_bounds)
+
+        expected = linear_solver_pb2.MPModelProto()
+        for row, low in zip(coefficients, lower_bounds):
+            nonzero = row != 0
+            expected.constraint.add(lower_bound=low, upper_bound=upper_bounds,
+                                    var_index=columns[nonzero].tolist(),
+                                    coefficient=row[nonzero].tolist())
+
+        self.assertEqual(model, expected)
+
+        # the same wire format as the protobuf library, and it parses back
+        data = model.SerializeToString()
+        self.assertEqual(data, expected.SerializeToString())
+        self.assertEqual(linear_solver_pb2.MPModelProto.FromString(data), expected)
+
+    def test_merges_into_model(self):
+        model = linear_solver_pb2.MPModelProto()
+        model.variable.add(lower_bound=0, upper_bound=1, is_integer=True)
+        model.constraint.add(lower_bound=-1, upper_bound=1, var_index=[0], coefficient=[2.])
+
+        expected = linear_solver_pb2.MPModelProto()
+        expected.CopyFrom(model)
+        expected.constraint.add(lower_bound=0, upper_bound=0, var_index=[0], coefficient=[-1.])
+
+        mip.generation._add_constraints(model, [0], np.array([[-1.]]), 0, 0)
+        self.assertEqual(model, expected)
+
+    def test_bad_columns(self):
+        model = linear_solver_pb2.MPModelProto()
+        for column in (-1, 2**31):
+            with self.assertRaises(ValueError):
+                mip.generation._add_constraints(model, [column], np.array([[1.]]), 0, 0)
+        self.assertEqual(len(model.constraint), 0)
+
+
+class TestGroundPenalties(unittest.TestCase):
+    def test_bounds_energy_change(self):
+        # asymmetric ranges, some excluding 0
+        graph = nx.complete_graph(5)
+        decision = [0, 1]
+        table = {(-1, +1): 0}
+        linear_energy_ranges = {v: (-2, 1) for v in graph}
+        quadratic_energy_ranges = {(u, v): (-1, 1) for u, v in graph.edges}
+        quadratic_energy_ranges[(2, 3)] = (.5, 1)
+        quadratic_energy_ranges[(0, 4)] = (-1, -.25)
+
+        model = mip.generation._Model(graph, table, decision, 2,
+                                      linear_energy_ranges, quadratic_energy_ranges)
+
+        spins = np.array([(-1, +1) + aux for aux in itertools.product((-1, 1), repeat=3)])
+        big_m = model.ground_penalties(spins)
+
+        rng = np.random.RandomState(5)
+        for __ in range(20):
+            h = {v: rng.uniform(*linear_energy_ranges[v]) for v in graph}
+            J = {edge: rng.uniform(*quadratic_energy_ranges[edge]) for edge in graph.edges}
+            bqm = dimod.BinaryQuadraticModel.from_ising(h, J)
+
+            for a, m in zip(spins, big_m):
+                energy = bqm.energy(dict(zip(model.variables, a)))
+                for a_star in spins:
+                    flipped = a != a_star
+                    self.assertLessEqual(
+                        energy - bqm.energy(dict(zip(model.variables, a_star))),
+                        m[flipped[2:]].sum() + 1e-9)
+
+    def test_tighter_than_constant(self):
+        graph = nx.complete_graph(5)
+        model = mip.generation._Model(graph, {(-1, -1, -1): 0}, [0, 1, 2], 2,
+                                      {v: (-2, 2) for v in graph},
+                                      {edge: (-1, 1) for edge in graph.edges})
+
+        spins = np.array([(-1, -1, -1) + aux for aux in itertools.product((-1, 1), repeat=2)])
+        np.testing.assert_array_equal(model.ground_penalties(spins), 12)
@@ -36,6 +36,7 @@ class TestInterface(unittest.TestCase):
             self.assertIn(v, widget.model.linear)
         for (u, v) in graph.edges:
             self.assertIn(u, widget.model.adj[v])
+        self.assertTrue(widget.optimal)
 
     def test_binary_specification(self):
         graph = nx.Graph()
@@ -119,6 +120,18 @@ class TestInterface(unittest.TestCase):
 
         self.assertEqual(model.model.spin, bqm)
 
+    def test_twelve_variable(self):
+        decision = list(range(12))
+        configs = {(-1,) * 12, (+1,) * 12}
+        spec = pm.Specification(nx.complete_graph(12), decision, configs, dimod.SPIN)
+
+        widget = mip.get_penalty_model(spec)
+
+        self.assertEqual(widget.classical_gap, 22)
+
+        with self.assertRaises(pm.FactoryException):
+            mip.get_penalty_model(spec, time_budget=None)
+
     def check_generated_ising_model(self, feasible_configurations, decision_variables,
                                     linear, quadratic, ground_energy, infeasible_gap):
         """Check that the given Ising model has the correct energy levels"""
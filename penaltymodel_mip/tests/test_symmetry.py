@@ -0,0 +1,73 @@
+# Copyright 2019 D-Wave Systems Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import unittest
+
+import networkx as nx
+
+from penaltymodel.mip.symmetry import aux_gauge_variables, aux_twins
+
+
+class TestAuxGaugeVariables(unittest.TestCase):
+    def test_symmetric(self):
+        graph = nx.complete_bipartite_graph(3, 3)
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+
+        self.assertEqual(aux_gauge_variables(graph, [0, 2, 3], linear_ranges, quadratic_ranges),
+                         {1, 4, 5})
+
+    def test_asymmetric(self):
+        graph = nx.complete_bipartite_graph(3, 3)
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        linear_ranges[1] = (-1., 2.)
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+        quadratic_ranges[(0, 4)] = (-1., .5)
+
+        # 1 has an asymmetric range and 4 has an edge with one
+        self.assertEqual(aux_gauge_variables(graph, [0, 2, 3], linear_ranges, quadratic_ranges),
+                         {5})
+
+
+class TestAuxTwins(unittest.TestCase):
+    def test_bipartite(self):
+        graph = nx.complete_bipartite_graph(4, 4)
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+
+        self.assertEqual(aux_twins(graph, [0, 4], linear_ranges, quadratic_ranges),
+                         [[1, 2, 3], [5, 6, 7]])
+
+        # a different range splits up the class
+        linear_ranges[6] = (-1., 1.)
+        self.assertEqual(aux_twins(graph, [0, 4], linear_ranges, quadratic_ranges),
+                         [[1, 2, 3], [5, 7]])
+
+    def test_adjacent(self):
+        graph = nx.complete_graph(4)
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+
+        self.assertEqual(aux_twins(graph, [0, 1], linear_ranges, quadratic_ranges), [[2, 3]])
+
+        # the edges to a decision variable must match as well
+        quadratic_ranges[(0, 3)] = (-.5, .5)
+        self.assertEqual(aux_twins(graph, [0, 1], linear_ranges, quadratic_ranges), [])
+
+    def test_path(self):
+        graph = nx.path_graph(4)
+        linear_ranges = {v: (-2., 2.) for v in graph}
+        quadratic_ranges = {edge: (-1., 1.) for edge in graph.edges}
+
+        self.assertEqual(aux_twins(graph, [0, 3], linear_ranges, quadratic_ranges), [])